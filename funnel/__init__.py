@@ -69,6 +69,7 @@ assets['schedules.js'][version] = 'js/schedules.js'
 
 from . import (  # isort:skip  # noqa: F401  # pylint: disable=wrong-import-position
     geoip,
+    pwned_passwords,
     proxies,
     loginproviders,
     signals,
@@ -141,6 +142,7 @@ redis_store.init_app(app)
 rq.init_app(app)
 executor.init_app(app)
 geoip.geoip.init_app(app)
+pwned_passwords.pwned_passwords.init_app(app)
 
 # Baseframe is required for apps with UI ('funnel' theme is registered above)
 baseframe.init_app(
@@ -23,6 +23,13 @@ const ReadStatus = {
       ReadStatus.setNotifyIcon(responseData.unread);
     }
   },
+  listenNotificationStatus() {
+    // The server closes the stream periodically and EventSource reconnects on its own
+    const source = new EventSource(window.Hasgeek.Config.notificationCountStream);
+    source.addEventListener('unread', (event) => {
+      ReadStatus.setNotifyIcon(parseInt(event.data, 10));
+    });
+  },
   async sendNotificationReadStatus() {
     const notificationID = Utils.getQueryString('utm_source');
     const Base58regex = /[\d\w]{21,22}/;
@@ -155,6 +162,10 @@ const ReadStatus = {
   init() {
     ReadStatus.sendNotificationReadStatus();
     if ($('.header__nav-links--updates').length) {
+      if (window.EventSource && window.Hasgeek.Config.notificationCountStream) {
+        ReadStatus.listenNotificationStatus();
+        return;
+      }
       ReadStatus.updateNotificationStatus();
       window.setInterval(
         ReadStatus.updateNotificationStatus,
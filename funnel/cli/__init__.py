@@ -1,5 +1,5 @@
 """Command line interface."""
 
-from . import geodata, lint, misc, periodic, refresh
+from . import geodata, lint, misc, periodic, pwned_passwords, refresh
 
-__all__ = ['geodata', 'lint', 'misc', 'periodic', 'refresh']
+__all__ = ['geodata', 'lint', 'misc', 'periodic', 'pwned_passwords', 'refresh']
@@ -8,8 +8,17 @@ periodic = AppGroup(
     'periodic', help="Periodic tasks from cron (with recommended intervals)"
 )
 
-from . import mnrl, notification, stats, sync
+from . import comment, mnrl, notification, shortlink, site_metric, stats, sync
 
 app.cli.add_command(periodic)
 
-__all__ = ['mnrl', 'notification', 'periodic', 'stats', 'sync']
+__all__ = [
+    'comment',
+    'mnrl',
+    'notification',
+    'periodic',
+    'shortlink',
+    'site_metric',
+    'stats',
+    'sync',
+]
@@ -0,0 +1,16 @@
+"""Periodic maintenance of comment counters."""
+
+from __future__ import annotations
+
+import click
+
+from ...models import CommentsetMembership, db
+from . import periodic
+
+
+@periodic.command('comment_unread_counts')
+def comment_unread_counts() -> None:
+    """Correct drift in new comment counts for commentset subscribers (1h)."""
+    corrected = CommentsetMembership.reconcile_new_comment_counts()
+    db.session.commit()
+    click.echo(f"Corrected {corrected} new comment counts")
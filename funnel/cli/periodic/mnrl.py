@@ -38,6 +38,7 @@ here:
 # spell-checker:ignore TRAI ijson HTTPX apikey anext
 
 import asyncio
+from collections.abc import AsyncIterator
 from http import HTTPStatus
 
 import click
@@ -47,9 +48,16 @@ from rich import get_console, print as rprint
 from rich.progress import Progress
 
 from ... import app
-from ...models import AccountPhone, PhoneNumber, db
+from ...models import AccountPhone, PhoneNumber, db, sa_orm
 from . import periodic
 
+#: Number of MNRL numbers to match against the database in each query
+MATCH_BATCH_SIZE = 5000
+#: Number of MNRL files to download in parallel
+DOWNLOAD_CONCURRENCY = 3
+#: Number of downloaded batches that may wait for matching before downloads pause
+MATCH_QUEUE_SIZE = 10
+
 
 class KeyInvalidError(ValueError):
     """MNRL API key is invalid."""
@@ -85,12 +93,6 @@ class AsyncStreamAsFile:
             return b''
 
 
-async def get_existing_phone_numbers(prefix: str) -> set[str]:
-    """Async wrapper for PhoneNumber.get_numbers."""
-    # TODO: This is actually an async-blocking call. We need full stack async here.
-    return PhoneNumber.get_numbers(prefix=prefix, remove=True)
-
-
 async def get_mnrl_json_file_list(apikey: str) -> list[str]:
     """
     Return filenames for the currently published MNRL JSON files.
@@ -117,10 +119,13 @@ async def get_mnrl_json_file_list(apikey: str) -> list[str]:
     return [row['file_name'] for row in result['mnrl_files']['json']]
 
 
-async def get_mnrl_json_file_numbers(
-    client: httpx.AsyncClient, apikey: str, filename: str
-) -> tuple[str, set[str]]:
-    """Return phone numbers from an MNRL JSON file URL."""
+async def iter_mnrl_json_file_numbers(
+    client: httpx.AsyncClient,
+    apikey: str,
+    filename: str,
+    batch_size: int = MATCH_BATCH_SIZE,
+) -> AsyncIterator[list[str]]:
+    """Stream phone numbers from an MNRL JSON file URL in batches."""
     async with client.stream(
         'GET',
         f'https://mnrl.trai.gov.in/api/mnrl/json/{filename}/{apikey}',
@@ -129,80 +134,130 @@ async def get_mnrl_json_file_numbers(
         response.raise_for_status()
         # The JSON structure is {"payload": [{"n": "number"}, ...]}
         # The 'item' in 'payload.item' is ijson's code for array elements
-        return filename, {
-            value
-            async for key, value in ijson.kvitems(
-                AsyncStreamAsFile(response), 'payload.item'
-            )
-            if key == 'n' and value is not None
-        }
-
-
-async def forget_phone_numbers(phone_numbers: set[str], prefix: str) -> None:
-    """Mark phone numbers as forgotten."""
-    for unprefixed in phone_numbers:
-        number = prefix + unprefixed
-        account_phone = AccountPhone.get(number)
-        if account_phone is not None:
-            # TODO: Dispatch a notification to account_phone.account, but since the
-            # notification will not know the phone number (it'll already be forgotten),
-            # we need a new db model to contain custom messages
-            # TODO: Also delay dispatch until the full MNRL scan is complete -- their
-            # backup contact phone number may also have expired. That means this
-            # function will create notifications and return them, leaving dispatch to
-            # the outermost function
-            rprint(f"{account_phone} - owned by {account_phone.account.pickername}")
-            # TODO: MNRL isn't foolproof. Don't delete! Instead, notify the user and
-            # only delete if they don't respond (How? Maybe delete and send them a
-            # re-add token?)
-            # db.session.delete(account_phone)
-        phone_number = PhoneNumber.get(number)
-        if phone_number is not None:
-            rprint(
-                f"{phone_number} - since {phone_number.created_at:%Y-%m-%d}, updated"
-                f" {phone_number.updated_at:%Y-%m-%d}"
-            )
-            # phone_number.mark_forgotten()
+        batch: list[str] = []
+        async for key, value in ijson.kvitems(
+            AsyncStreamAsFile(response), 'payload.item'
+        ):
+            if key == 'n' and value is not None:
+                batch.append(value)
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+        if batch:
+            yield batch
+
+
+async def get_mnrl_json_file_numbers(
+    client: httpx.AsyncClient, apikey: str, filename: str
+) -> tuple[str, set[str]]:
+    """Return all phone numbers from an MNRL JSON file URL."""
+    numbers: set[str] = set()
+    async for batch in iter_mnrl_json_file_numbers(client, apikey, filename):
+        numbers.update(batch)
+    return filename, numbers
+
+
+def forget_phone_numbers(phone_numbers: list[str], prefix: str) -> set[str]:
+    """
+    Mark phone numbers as forgotten if they are known, returning the known numbers.
+
+    Numbers are matched by hash in a single query, along with any account they are
+    attached to. This makes blocking database calls and must be run in a thread.
+    """
+    known_numbers = PhoneNumber.get_many(prefix + number for number in phone_numbers)
+    if not known_numbers:
+        return set()
+    account_phones = (
+        AccountPhone.query.filter(
+            AccountPhone.phone_number_id.in_([pn.id for pn in known_numbers])
+        )
+        .options(sa_orm.joinedload(AccountPhone.account))
+        .all()
+    )
+    for account_phone in account_phones:
+        # TODO: Dispatch a notification to account_phone.account, but since the
+        # notification will not know the phone number (it'll already be forgotten),
+        # we need a new db model to contain custom messages
+        # TODO: Also delay dispatch until the full MNRL scan is complete -- their
+        # backup contact phone number may also have expired. That means this
+        # function will create notifications and return them, leaving dispatch to
+        # the outermost function
+        rprint(f"{account_phone} - owned by {account_phone.account.pickername}")
+        # TODO: MNRL isn't foolproof. Don't delete! Instead, notify the user and
+        # only delete if they don't respond (How? Maybe delete and send them a
+        # re-add token?)
+        # db.session.delete(account_phone)
+    for phone_number in known_numbers:
+        rprint(
+            f"{phone_number} - since {phone_number.created_at:%Y-%m-%d}, updated"
+            f" {phone_number.updated_at:%Y-%m-%d}"
+        )
+        # phone_number.mark_forgotten()
     db.session.commit()
+    skip = len(prefix)
+    return {pn.number[skip:] for pn in known_numbers if pn.number}
+
+
+async def match_mnrl_batches(
+    queue: asyncio.Queue[tuple[str, list[str]] | None], phone_prefix: str
+) -> dict[str, set[str]]:
+    """
+    Match batches of MNRL numbers from the queue until a `None` is received.
+
+    Batches are processed one at a time in a worker thread, so the database session is
+    never used concurrently and the event loop remains free for downloads. Returns
+    revoked numbers per MNRL filename.
+    """
+    revoked: dict[str, set[str]] = {}
+    while (item := await queue.get()) is not None:
+        filename, batch = item
+        try:
+            found = await asyncio.to_thread(forget_phone_numbers, batch, phone_prefix)
+        except Exception as exc:  # noqa: BLE001  # pylint: disable=broad-except
+            db.session.rollback()
+            app.logger.exception("%s in forget_phone_numbers", repr(exc))
+        else:
+            revoked.setdefault(filename, set()).update(found)
+    return revoked
 
 
 async def process_mnrl_files(
-    apikey: str,
-    existing_phone_numbers: set[str],
-    phone_prefix: str,
-    mnrl_filenames: list[str],
+    apikey: str, phone_prefix: str, mnrl_filenames: list[str]
 ) -> tuple[set[str], int, int]:
     """
     Scan all MNRL files and return a tuple of results.
 
+    Files are downloaded in parallel and matched against the database in batches as
+    they stream in, without loading either the files or existing numbers into memory.
+
     :return: Tuple of number to be revoked (set), total expired numbers in the MNRL,
         and count of failures when accessing the MNRL lists
     """
-    revoked_phone_numbers: set[str] = set()
-    mnrl_total_count = 0
+    queue: asyncio.Queue[tuple[str, list[str]] | None] = asyncio.Queue(
+        maxsize=MATCH_QUEUE_SIZE
+    )
+    semaphore = asyncio.Semaphore(DOWNLOAD_CONCURRENCY)
+    file_totals: dict[str, int] = {}
     failures = 0
-    async_tasks: set[asyncio.Task] = set()
+
     with Progress(transient=True) as progress:
         ptask = progress.add_task(
             f"Processing {len(mnrl_filenames)} MNRL files", total=len(mnrl_filenames)
         )
-        async with httpx.AsyncClient(
-            http2=True, limits=httpx.Limits(max_connections=3)
-        ) as client:
-            for future in asyncio.as_completed(
-                [
-                    get_mnrl_json_file_numbers(client, apikey, filename)
-                    for filename in mnrl_filenames
-                ]
-            ):
+
+        async def download(client: httpx.AsyncClient, filename: str) -> None:
+            nonlocal failures
+            async with semaphore:
+                progress.update(ptask, description=f"Processing {filename}...")
+                file_totals[filename] = 0
                 try:
-                    filename, mnrl_set = await future
+                    async for batch in iter_mnrl_json_file_numbers(
+                        client, apikey, filename
+                    ):
+                        file_totals[filename] += len(batch)
+                        await queue.put((filename, batch))
                 except httpx.HTTPError as exc:
-                    progress.advance(ptask)
                     failures += 1
-                    # Extract filename from the URL (ends with /filename/apikey) as we
-                    # can't get any context from asyncio.as_completed's future
-                    filename = exc.request.url.path.split('/')[-2]
                     progress.update(ptask, description=f"Error in {filename}...")
                     if isinstance(exc, httpx.HTTPStatusError):
                         rprint(
@@ -211,56 +266,43 @@ async def process_mnrl_files(
                         )
                     else:
                         rprint(f"[red]{filename}: Failed with {exc!r}")
-                else:
-                    progress.advance(ptask)
-                    mnrl_total_count += len(mnrl_set)
-                    progress.update(ptask, description=f"Processing {filename}...")
-                    found_expired = existing_phone_numbers.intersection(mnrl_set)
-                    if found_expired:
-                        revoked_phone_numbers.update(found_expired)
-                        rprint(
-                            f"[blue]{filename}: {len(found_expired):,} matches in"
-                            f" {len(mnrl_set):,} total"
-                        )
-                        async_tasks.add(
-                            asyncio.create_task(
-                                forget_phone_numbers(found_expired, phone_prefix)
-                            )
-                        )
-                    else:
-                        rprint(
-                            f"[cyan]{filename}: No matches in {len(mnrl_set):,} total"
-                        )
+                progress.advance(ptask)
 
-    # Await all the background tasks
-    for task in async_tasks:
-        try:
-            # TODO: Change this to `notifications = await task` then return them too
-            await task
-        except Exception as exc:  # noqa: BLE001  # pylint: disable=broad-except
-            app.logger.exception("%s in forget_phone_numbers", repr(exc))
-    return revoked_phone_numbers, mnrl_total_count, failures
+        matcher = asyncio.create_task(match_mnrl_batches(queue, phone_prefix))
+        async with httpx.AsyncClient(
+            http2=True, limits=httpx.Limits(max_connections=DOWNLOAD_CONCURRENCY)
+        ) as client:
+            await asyncio.gather(
+                *(download(client, filename) for filename in mnrl_filenames)
+            )
+        await queue.put(None)
+        revoked = await matcher
+
+    revoked_phone_numbers: set[str] = set()
+    for filename, total in file_totals.items():
+        found = revoked.get(filename, set())
+        revoked_phone_numbers.update(found)
+        if found:
+            rprint(f"[blue]{filename}: {len(found):,} matches in {total:,} total")
+        else:
+            rprint(f"[cyan]{filename}: No matches in {total:,} total")
+    return revoked_phone_numbers, sum(file_totals.values()), failures
 
 
 async def process_mnrl(apikey: str) -> None:
     """Process MNRL data using the API key."""
     console = get_console()
     phone_prefix = '+91'
-    task_numbers = asyncio.create_task(get_existing_phone_numbers(phone_prefix))
-    task_files = asyncio.create_task(get_mnrl_json_file_list(apikey))
-    with console.status("Loading phone numbers..."):
-        existing_phone_numbers = await task_numbers
-    rprint(f"Evaluating {len(existing_phone_numbers):,} phone numbers for expiry")
     try:
         with console.status("Getting MNRL download list..."):
-            mnrl_filenames = await task_files
+            mnrl_filenames = await get_mnrl_json_file_list(apikey)
     except httpx.HTTPError as exc:
         err = f"{exc!r} in MNRL API getting download list"
         rprint(f"[red]{err}")
         raise click.ClickException(err) from exc
 
     revoked_phone_numbers, mnrl_total_count, failures = await process_mnrl_files(
-        apikey, existing_phone_numbers, phone_prefix, mnrl_filenames
+        apikey, phone_prefix, mnrl_filenames
     )
     rprint(
         f"Processed {mnrl_total_count:,} expired phone numbers in MNRL with"
@@ -3,12 +3,19 @@
 from __future__ import annotations
 
 from datetime import timedelta
+from itertools import islice
 
-from ... import models
+import click
+
+from ... import models, redis_store
 from ...models import db, sa, sa_orm
 from ...views.notification import dispatch_notification
+from ...views.notification_counter import UNREAD_COUNT_PREFIX, reconcile_unread_counts
 from . import periodic
 
+#: Number of unread counters to reconcile per database query
+RECONCILE_BATCH_SIZE = 500
+
 
 @periodic.command('project_starting_alert')
 def project_starting_alert() -> None:
@@ -51,3 +58,17 @@ def project_starting_alert() -> None:
                 fragment=session,
             )
         )
+
+
+@periodic.command('notification_unread_counts')
+def notification_unread_counts() -> None:
+    """Correct drift in cached unread notification counters (1h)."""
+    account_ids = (
+        int(key.removeprefix(UNREAD_COUNT_PREFIX))
+        for key in redis_store.scan_iter(match=UNREAD_COUNT_PREFIX + '*', count=1000)
+    )
+    corrected = 0
+    while batch := list(islice(account_ids, RECONCILE_BATCH_SIZE)):
+        corrected += reconcile_unread_counts(batch)
+    db.session.commit()
+    click.echo(f"Corrected {corrected} unread notification counters")
@@ -0,0 +1,50 @@
+"""Periodic recording of shortlink click counts."""
+
+from __future__ import annotations
+
+from contextlib import suppress
+from datetime import datetime
+from itertools import islice
+
+import click
+from pytz import utc
+from redis.exceptions import ResponseError
+
+from ... import redis_store
+from ...models import ShortlinkClickCount, db
+from ...views.shortlink import (
+    SHORTLINK_CLICKS_FLUSH_PREFIX,
+    SHORTLINK_CLICKS_HOUR_FORMAT,
+    SHORTLINK_CLICKS_PREFIX,
+)
+from . import periodic
+
+#: Number of shortlinks to record counts for per database statement
+FLUSH_BATCH_SIZE = 1000
+
+
+@periodic.command('shortlink_clicks')
+def shortlink_clicks() -> None:
+    """Record shortlink click counts from Redis in the database (5m)."""
+    # Move live counters aside so that new clicks go into a fresh counter. A flush key
+    # left behind by a failed run is recorded first, and the live counter waits for
+    # the next run
+    for key in list(redis_store.scan_iter(match=SHORTLINK_CLICKS_PREFIX + '*')):
+        hour_str = key.removeprefix(SHORTLINK_CLICKS_PREFIX)
+        # ResponseError is raised if the counter expired after it was listed
+        with suppress(ResponseError):
+            redis_store.renamenx(key, SHORTLINK_CLICKS_FLUSH_PREFIX + hour_str)
+
+    recorded = 0
+    for key in list(redis_store.scan_iter(match=SHORTLINK_CLICKS_FLUSH_PREFIX + '*')):
+        hour = datetime.strptime(
+            key.removeprefix(SHORTLINK_CLICKS_FLUSH_PREFIX),
+            SHORTLINK_CLICKS_HOUR_FORMAT,
+        ).replace(tzinfo=utc)
+        counts = ((int(_id), int(count)) for _id, count in redis_store.hscan_iter(key))
+        while batch := dict(islice(counts, FLUSH_BATCH_SIZE)):
+            ShortlinkClickCount.add_counts(hour, batch)
+            recorded += sum(batch.values())
+        db.session.commit()
+        redis_store.delete(key)
+    click.echo(f"Recorded {recorded} shortlink clicks")
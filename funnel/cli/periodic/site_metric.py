@@ -0,0 +1,20 @@
+"""Periodic refresh of site admin dashboard metrics."""
+
+from __future__ import annotations
+
+import click
+
+from ...models import AuthClientActiveCount, SiteMetric, db
+from . import periodic
+
+
+@periodic.command('site_metrics')
+@click.option(
+    '--full', is_flag=True, help="Recount signups for all months, not just the latest"
+)
+def site_metrics(full: bool) -> None:
+    """Refresh user metrics for the site admin dashboard (15m)."""
+    SiteMetric.refresh(full=full)
+    AuthClientActiveCount.refresh()
+    db.session.commit()
+    click.echo("Refreshed site metrics")
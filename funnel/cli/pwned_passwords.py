@@ -0,0 +1,39 @@
+"""Offline corpus for breached password checks."""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import click
+from flask.cli import AppGroup
+
+from .. import app
+from ..pwned_passwords import BreachCorpus
+
+pwned = AppGroup('pwned_passwords', help="Manage the breached password corpus.")
+
+
+@pwned.command('import')
+@click.argument('source', type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.argument('dest', type=click.Path(dir_okay=False, path_type=Path))
+def import_corpus(source: Path, dest: Path) -> None:
+    """
+    Import a breach corpus from Pwned Passwords SHA-1 hashes.
+
+    SOURCE has ``HASH:COUNT`` lines in order of hash, as produced by the Pwned
+    Passwords downloader. DEST is replaced only when the import succeeds. Configure
+    the app with ``PWNED_PASSWORDS_CORPUS`` set to DEST to use it.
+    """
+    partial = dest.with_name(dest.name + '.partial')
+    try:
+        with source.open(encoding='ascii') as lines, partial.open('wb') as corpus:
+            records = BreachCorpus.write(lines, corpus)
+    except ValueError as exc:
+        partial.unlink(missing_ok=True)
+        raise click.ClickException(str(exc)) from exc
+    os.replace(partial, dest)
+    click.echo(f"Imported {records} hashes into {dest}")
+
+
+app.cli.add_command(pwned)
@@ -6,8 +6,8 @@ from ... import app
 
 refresh = AppGroup('refresh', help="Refresh or purge caches")
 
-from . import markdown
+from . import markdown, rsvp, schedule
 
 app.cli.add_command(refresh)
 
-__all__ = ['markdown', 'refresh']
+__all__ = ['markdown', 'refresh', 'rsvp', 'schedule']
@@ -0,0 +1,16 @@
+"""Refresh stored project RSVP counts."""
+
+from __future__ import annotations
+
+import click
+
+from ...models import ProjectRsvpCount, db
+from . import refresh
+
+
+@refresh.command('rsvp_counts')
+def rsvp_counts() -> None:
+    """Repair stored project RSVP counts from RSVPs."""
+    project_ids = ProjectRsvpCount.refresh()
+    db.session.commit()
+    click.echo(f"Corrected RSVP counts for {len(project_ids)} projects")
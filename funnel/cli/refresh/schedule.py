@@ -0,0 +1,16 @@
+"""Refresh stored project schedule bounds."""
+
+from __future__ import annotations
+
+import click
+
+from ...models import Project, db
+from . import refresh
+
+
+@refresh.command('schedule_bounds')
+def schedule_bounds() -> None:
+    """Backfill or repair stored project schedule bounds from sessions."""
+    project_ids = Project.refresh_schedule_bounds()
+    db.session.commit()
+    click.echo(f"Corrected schedule bounds for {len(project_ids)} projects")
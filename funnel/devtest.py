@@ -299,10 +299,18 @@ def _prepare_subprocess(
             main_app.logger.info(capture)
             return token_urlsafe()
 
+        def mock_sms_many(
+            messages: Any,
+            callback: bool = True,
+            transport: Any = None,  # noqa: ARG001
+        ) -> list[str]:
+            return [mock_sms(phone, message, callback) for phone, message in messages]
+
         # Patch email
         install_mock(transports.email.send.send_email, mock_email)
         # Patch SMS
         install_mock(transports.sms.send.send_sms, mock_sms)
+        install_mock(transports.sms.send.send_sms_many, mock_sms_many)
 
     return worker(*args, **kwargs)
 
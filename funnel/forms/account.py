@@ -3,11 +3,8 @@
 from __future__ import annotations
 
 from collections.abc import Iterable, Sequence
-from hashlib import sha1
-from http import HTTPStatus
 from typing import Any, NoReturn
 
-import requests
 from flask import url_for
 from flask_babel import ngettext
 from markupsafe import Markup
@@ -26,6 +23,7 @@ from ..models import (
     check_password_strength,
     getuser,
 )
+from ..pwned_passwords import pwned_passwords
 from .helpers import (
     EmailAddressAvailable,
     PhoneNumberAvailable,
@@ -118,39 +116,10 @@ class PasswordStrengthValidator:
 
 
 def pwned_password_validator(_form: Any, field: forms.PasswordField) -> None:
-    """Validate password against the pwned password API."""
+    """Validate password against breached password lists."""
     if field.data is None:
         return
-    phash = sha1(field.data.encode(), usedforsecurity=False).hexdigest().upper()
-    prefix, suffix = phash[:5], phash[5:]
-
-    try:
-        rv = requests.get(f'https://api.pwnedpasswords.com/range/{prefix}', timeout=10)
-        if rv.status_code != HTTPStatus.OK:
-            # API call had an error and we can't proceed with validation.
-            return
-        # This API returns minimal plaintext containing ``suffix:count``, one per line.
-        # The following code is defensive, attempting to add mitigations (inner->outer):
-        # 1. If there's no : separator, assume a count of 1
-        # 2. Strip text on either side of the colon
-        # 3. Ensure the suffix is uppercase
-        # 4. If count is not a number, default it to 0 (ie, this is not a match)
-        matches: dict[str, int] = {
-            line_suffix.upper(): int(line_count) if line_count.isdigit() else 0
-            for line_suffix, line_count in (
-                (split1.strip(), split2.strip())
-                for split1, split2 in (
-                    (line + (':1' if ':' not in line else '')).split(':', 1)
-                    for line in rv.text.splitlines()
-                )
-            )
-        }
-    except requests.RequestException:
-        # An exception occurred and we have no data to validate password against
-        return
-
-    # If we have data, check for our hash suffix in the returned range of matches
-    count = matches.get(suffix)
+    count = pwned_passwords.breach_count(field.data)
     if count:  # not 0 and not None
         raise forms.validators.StopValidation(
             ngettext(
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+from collections.abc import Callable
 from typing import TYPE_CHECKING
 
 from baseframe import _, __, forms
@@ -272,8 +273,8 @@ class LogoutForm(forms.Form):
 class OtpForm(forms.Form):
     """Verify an OTP."""
 
-    __expects__ = ('valid_otp',)
-    valid_otp: str
+    __expects__ = ('verify_otp',)
+    verify_otp: Callable[[str], bool]
 
     otp = forms.StringField(
         __("OTP"),
@@ -290,7 +291,7 @@ class OtpForm(forms.Form):
 
     def validate_otp(self, field: forms.Field) -> None:
         """Confirm OTP is as expected."""
-        if field.data != self.valid_otp:
+        if not self.verify_otp(field.data):
             raise forms.validators.StopValidation(MSG_INCORRECT_OTP)
 
 
@@ -304,8 +305,8 @@ class EmailOtpForm(OtpForm):
 class RegisterOtpForm(forms.Form):
     """Verify an OTP and register an account."""
 
-    __expects__ = ('valid_otp',)
-    valid_otp: str
+    __expects__ = ('verify_otp',)
+    verify_otp: Callable[[str], bool]
 
     fullname = forms.StringField(
         __("Your name"),
@@ -333,5 +334,9 @@ class RegisterOtpForm(forms.Form):
 
     def validate_otp(self, field: forms.Field) -> None:
         """Confirm OTP is as expected."""
-        if field.data != self.valid_otp:
+        if self.fullname.errors:
+            # A correct OTP is consumed when verified, so don't verify until the form
+            # is otherwise valid
+            raise forms.validators.StopValidation
+        if not self.verify_otp(field.data):
             raise forms.validators.StopValidation(MSG_INCORRECT_OTP)
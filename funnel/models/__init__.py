@@ -18,6 +18,7 @@ __getattr__, __dir__, __all__ = lazy_loader.attach_stub(__name__, __file__)
 
 __all__ = [
     "ACCOUNT_STATE",
+    "AUTH_CLIENT_ACTIVE_PERIODS",
     "EMAIL_DELIVERY_STATE",
     "LOGIN_SESSION_VALIDITY_PERIOD",
     "MODERATOR_REPORT_TYPE",
@@ -42,6 +43,7 @@ __all__ = [
     "Anchor",
     "AppenderQuery",
     "AuthClient",
+    "AuthClientActiveCount",
     "AuthClientCredential",
     "AuthClientPermissions",
     "AuthClientTeamPermissions",
@@ -101,6 +103,8 @@ __all__ = [
     "MembershipRecordTypeEnum",
     "MembershipRecordTypeError",
     "MembershipRevokedError",
+    "MergePreview",
+    "MigrationCount",
     "Model",
     "ModelBase",
     "ModelIdProtocol",
@@ -134,6 +138,7 @@ __all__ = [
     "ProjectLocation",
     "ProjectMembership",
     "ProjectRedirect",
+    "ProjectRsvpCount",
     "ProjectRsvpStateEnum",
     "ProjectSponsorMembership",
     "ProjectStartingNotification",
@@ -160,7 +165,9 @@ __all__ = [
     "SavedSession",
     "Session",
     "Shortlink",
+    "ShortlinkClickCount",
     "SiteMembership",
+    "SiteMetric",
     "SmsMessage",
     "SmsStatusEnum",
     "SyncTicket",
@@ -212,6 +219,7 @@ __all__ = [
     "membership_mixin",
     "merge_accounts",
     "moderation",
+    "name_to_bigint",
     "notification",
     "notification_categories",
     "notification_type_registry",
@@ -222,6 +230,7 @@ __all__ = [
     "phone_blake2b160_hash",
     "phone_number",
     "postgresql",
+    "preview_merge_accounts",
     "profanity",
     "project",
     "project_child_role_map",
@@ -249,6 +258,7 @@ __all__ = [
     "typing",
     "unknown_account",
     "update",
+    "url_blake2b160_hash",
     "user_signals",
     "utils",
     "valid_account_name",
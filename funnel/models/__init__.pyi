@@ -210,11 +210,17 @@ from .project_membership import (
 from .proposal import PROPOSAL_STATE, Proposal, ProposalSuuidRedirect
 from .proposal_membership import ProposalMembership
 from .reorder_mixin import ReorderMixin
-from .rsvp import RSVP_STATUS, Rsvp, RsvpStateEnum
+from .rsvp import RSVP_STATUS, ProjectRsvpCount, Rsvp, RsvpStateEnum
 from .saved import SavedProject, SavedSession
 from .session import Session
-from .shortlink import Shortlink
+from .shortlink import (
+    Shortlink,
+    ShortlinkClickCount,
+    name_to_bigint,
+    url_blake2b160_hash,
+)
 from .site_membership import SiteMembership
+from .site_metric import AUTH_CLIENT_ACTIVE_PERIODS, AuthClientActiveCount, SiteMetric
 from .sponsor_membership import ProjectSponsorMembership, ProposalSponsorMembership
 from .sync_ticket import (
     CheckinParticipantProtocol,
@@ -238,15 +244,19 @@ from .update import VISIBILITY_STATE, Update
 from .utils import (
     AccountAndAnchor,
     IncompleteUserMigrationError,
+    MergePreview,
+    MigrationCount,
     getextid,
     getuser,
     merge_accounts,
+    preview_merge_accounts,
 )
 from .venue import Venue, VenueRoom, project_venue_primary_table
 from .video_mixin import VideoError, VideoMixin, parse_video_url
 
 __all__ = [
     "ACCOUNT_STATE",
+    "AUTH_CLIENT_ACTIVE_PERIODS",
     "EMAIL_DELIVERY_STATE",
     "LOGIN_SESSION_VALIDITY_PERIOD",
     "MODERATOR_REPORT_TYPE",
@@ -271,6 +281,7 @@ __all__ = [
     "Anchor",
     "AppenderQuery",
     "AuthClient",
+    "AuthClientActiveCount",
     "AuthClientCredential",
     "AuthClientPermissions",
     "AuthClientTeamPermissions",
@@ -330,6 +341,8 @@ __all__ = [
     "MembershipRecordTypeEnum",
     "MembershipRecordTypeError",
     "MembershipRevokedError",
+    "MergePreview",
+    "MigrationCount",
     "Model",
     "ModelBase",
     "ModelIdProtocol",
@@ -363,6 +376,7 @@ __all__ = [
     "ProjectLocation",
     "ProjectMembership",
     "ProjectRedirect",
+    "ProjectRsvpCount",
     "ProjectRsvpStateEnum",
     "ProjectSponsorMembership",
     "ProjectStartingNotification",
@@ -389,7 +403,9 @@ __all__ = [
     "SavedSession",
     "Session",
     "Shortlink",
+    "ShortlinkClickCount",
     "SiteMembership",
+    "SiteMetric",
     "SmsMessage",
     "SmsStatusEnum",
     "SyncTicket",
@@ -441,6 +457,7 @@ __all__ = [
     "membership_mixin",
     "merge_accounts",
     "moderation",
+    "name_to_bigint",
     "notification",
     "notification_categories",
     "notification_type_registry",
@@ -451,6 +468,7 @@ __all__ = [
     "phone_blake2b160_hash",
     "phone_number",
     "postgresql",
+    "preview_merge_accounts",
     "profanity",
     "project",
     "project_child_role_map",
@@ -478,6 +496,7 @@ __all__ = [
     "typing",
     "unknown_account",
     "update",
+    "url_blake2b160_hash",
     "user_signals",
     "utils",
     "valid_account_name",
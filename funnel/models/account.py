@@ -51,6 +51,11 @@ from coaster.sqlalchemy import (
 )
 from coaster.utils import LabeledEnum, NameTitle, newsecret, require_one_of, utcnow
 
+from ..signals import (
+    emailaddress_refcount_dropping,
+    phonenumber_refcount_dropping,
+    session_revoked,
+)
 from ..typing import OptionalMigratedTables
 from .base import (
     AppenderQuery,
@@ -1504,52 +1509,164 @@ class Account(UuidMixin, BaseMixin[int, 'Account'], Model):
         if not self.is_safe_to_delete():
             raise ValueError("Account cannot be deleted")
 
-        # 1. Delete contact information
-        for contact_source in cast(
-            list,
-            (
-                self.emails,
-                self.emailclaims,
-                self.phones,
-                self.externalids,
-            ),
+        self.delete_all([self])
+
+    @classmethod
+    def delete_all(cls, accounts: Sequence[Account]) -> None:
+        """
+        Delete accounts with a single statement per table.
+
+        This scrubs contact information, memberships, login sessions and tickets for all
+        the given accounts together, and marks them as deleted. Callers must first
+        confirm that each account is safe to delete (see :meth:`all_safe_to_delete`).
+        """
+        if not accounts:
+            return
+        account_ids = [account.id for account in accounts]
+
+        # 1. Delete contact information. Bulk deletes do not trigger ORM events, so
+        # refcount signals are sent explicitly for the email addresses and phone numbers
+        # that may now be forgotten
+        email_addresses = EmailAddress.query.filter(
+            sa.or_(
+                EmailAddress.id.in_(
+                    sa.select(AccountEmail.email_address_id).where(
+                        AccountEmail.account_id.in_(account_ids)
+                    )
+                ),
+                EmailAddress.id.in_(
+                    sa.select(AccountEmailClaim.email_address_id).where(
+                        AccountEmailClaim.account_id.in_(account_ids)
+                    )
+                ),
+            )
+        ).all()
+        phone_numbers = PhoneNumber.query.filter(
+            PhoneNumber.id.in_(
+                sa.select(AccountPhone.phone_number_id).where(
+                    AccountPhone.account_id.in_(account_ids)
+                )
+            )
+        ).all()
+        for primary_table in (account_email_primary_table, account_phone_primary_table):
+            db.session.execute(
+                sa.delete(primary_table).where(
+                    primary_table.c.account_id.in_(account_ids)
+                )
+            )
+        for contact_model in (
+            AccountEmail,
+            AccountEmailClaim,
+            AccountPhone,
+            AccountExternalId,
         ):
-            for contact in contact_source:
-                db.session.delete(contact)
+            db.session.execute(
+                sa.delete(contact_model).where(
+                    contact_model.account_id.in_(account_ids)
+                )
+            )
 
         # 2. Revoke all active memberships
-        for membership in self.active_memberships():
-            if callable(
-                freeze := getattr(membership, 'freeze_member_attribution', None)
-            ):
-                membership = freeze(self)  # noqa: PLW2901
-            if membership.revoke_on_member_delete:
-                membership.revoke(actor=self)
+        membership_models = {
+            getattr(cls, attr).property.mapper.class_
+            for attr in cls.__active_membership_attrs__
+        }
+        membership_models.add(SiteMembership)
+        for membership_model in membership_models:
+            active = sa.and_(
+                membership_model.member_id.in_(account_ids),
+                membership_model.is_active,
+            )
+            if hasattr(membership_model, 'freeze_member_attribution'):
+                # Freezing replaces the record, so it can't be done with an update.
+                # Only records that are not already frozen need this
+                for membership in membership_model.query.filter(
+                    active, membership_model._title.is_(None)
+                ):
+                    membership.freeze_member_attribution(membership.member)
+            if membership_model.revoke_on_member_delete:
+                db.session.execute(
+                    sa.update(membership_model)
+                    .where(active)
+                    .values(
+                        revoked_at=sa.func.utcnow(),
+                        revoked_by_id=membership_model.member_id,
+                    )
+                )
         # TODO: freeze fullname in unrevoked memberships (pending title column there)
-        if (
-            self.active_site_membership
-            and self.active_site_membership.revoke_on_member_delete
-        ):
-            self.active_site_membership.revoke(actor=self)
 
         # 3. Drop all team memberships
-        self.member_teams.clear()
+        db.session.execute(
+            sa.delete(team_membership).where(
+                team_membership.c.account_id.in_(account_ids)
+            )
+        )
 
         # 4. Revoke auth tokens
-        AuthToken.revoke_all_for(self)
-        AuthClientPermissions.revoke_all_for(self)
+        db.session.execute(
+            sa.delete(AuthToken).where(AuthToken.account_id.in_(account_ids))
+        )
+        db.session.execute(
+            sa.delete(AuthClientPermissions).where(
+                AuthClientPermissions.account_id.in_(account_ids)
+            )
+        )
 
-        # 5. Revoke all active login sessions
-        for login_session in self.active_login_sessions:
-            login_session.revoke()
+        # 5. Revoke all active login sessions. Only sessions shared with auth clients
+        # are loaded, as they are the only ones with listeners for the revoke signal
+        active_login_sessions = sa.select(LoginSession.id).where(
+            LoginSession.account_id.in_(account_ids),
+            LoginSession.revoked_at.is_(None),
+        )
+        notify_login_sessions = LoginSession.query.filter(
+            LoginSession.id.in_(active_login_sessions),
+            LoginSession.id.in_(
+                sa.select(auth_client_login_session.c.login_session_id)
+            ),
+        ).all()
+        db.session.execute(
+            sa.delete(AuthToken).where(
+                AuthToken.login_session_id.in_(active_login_sessions)
+            )
+        )
+        db.session.execute(
+            sa.update(LoginSession)
+            .where(LoginSession.id.in_(active_login_sessions))
+            .values(revoked_at=sa.func.utcnow())
+        )
 
-        # 6. Clear name (username), title (fullname) and stored password hash
-        self.name = None
-        self.title = ''
-        self.password = None
+        # 6. Clear name (username), title (fullname) and stored password hash, and
+        # mark as deleted. RSVP counts only include active accounts
+        db.session.execute(ProjectRsvpCount.add_participants(account_ids, -1))
+        db.session.execute(
+            sa.update(Account)
+            .where(Account.id.in_(account_ids))
+            .values(
+                name=None,
+                title='',
+                pw_hash=None,
+                pw_set_at=sa.func.utcnow(),
+                pw_expires_at=sa.func.utcnow() + sa.cast('1 year', sa.Interval),
+                _state=ACCOUNT_STATE.DELETED,
+            )
+        )
 
         # 7. Unassign tickets assigned to the user
-        self.ticket_participants = []  # pylint: disable=attribute-defined-outside-init
+        db.session.execute(
+            sa.update(TicketParticipant)
+            .where(TicketParticipant.participant_id.in_(account_ids))
+            .values(participant_id=None)
+        )
+
+        # Collections on the account objects were not updated by the bulk statements
+        for account in accounts:
+            db.session.expire(account)
+        for email_address in email_addresses:
+            emailaddress_refcount_dropping.send(email_address)
+        for phone_number in phone_numbers:
+            phonenumber_refcount_dropping.send(phone_number)
+        for login_session in notify_login_sessions:
+            session_revoked.send(login_session)
 
     @with_roles(call={'owner'})
     @profile_state.transition(
@@ -1572,6 +1689,16 @@ class Account(UuidMixin, BaseMixin[int, 'Account'], Model):
         """Test if account is not protected and has no projects."""
         return self.is_protected is False and self.projects.count() == 0
 
+    @classmethod
+    def all_safe_to_delete(cls, account_ids: Iterable[int]) -> Query[Self]:
+        """Return active accounts that are not protected and have no projects."""
+        return cls.query.filter(
+            cls.id.in_(account_ids),
+            cls.state.ACTIVE,
+            cls.is_protected.is_(False),
+            ~sa.exists().where(Project.account_id == cls.id),
+        )
+
     def is_safe_to_purge(self) -> bool:
         """Test if account is safe to delete and has no memberships (active or not)."""
         return self.is_safe_to_delete() and not self.has_any_memberships()
@@ -2476,17 +2603,6 @@ class AccountEmailClaim(EmailAddressMixin, BaseMixin[int, Account], Model):
         """Return email as a string."""
         return str(self.email)
 
-    @classmethod
-    def migrate_account(cls, old_account: Account, new_account: Account) -> None:
-        """Migrate one account's data to another when merging accounts."""
-        emails = {claim.email for claim in new_account.emailclaims}
-        for claim in list(old_account.emailclaims):
-            if claim.email not in emails:
-                claim.account = new_account
-            else:
-                # New user also made the same claim. Delete old user's claim
-                db.session.delete(claim)
-
     @overload
     @classmethod
     def get_for(
@@ -2907,7 +3023,11 @@ Anchor: TypeAlias = (
 # Tail imports
 from .account_membership import AccountMembership
 from .auth_client import AuthClient, AuthClientPermissions, AuthToken
-from .login_session import LOGIN_SESSION_VALIDITY_PERIOD, LoginSession
+from .login_session import (
+    LOGIN_SESSION_VALIDITY_PERIOD,
+    LoginSession,
+    auth_client_login_session,
+)
 from .mailer import Mailer
 from .membership_mixin import ImmutableMembershipMixin
 from .notification import NotificationPreferences, NotificationRecipient
@@ -2915,7 +3035,7 @@ from .project import Project, ProjectRedirect
 from .project_membership import ProjectMembership
 from .proposal import Proposal
 from .proposal_membership import ProposalMembership
-from .rsvp import Rsvp
+from .rsvp import ProjectRsvpCount, Rsvp
 from .saved import SavedProject, SavedSession
 from .session import Session
 from .site_membership import SiteMembership
@@ -2,20 +2,14 @@
 
 from __future__ import annotations
 
-from collections.abc import Sequence
+from collections.abc import Collection, Sequence
 from datetime import datetime
 from typing import TYPE_CHECKING, Any
 
 from werkzeug.utils import cached_property
 
 from baseframe import _, __
-from coaster.sqlalchemy import (
-    LazyRoleSet,
-    RoleAccessProxy,
-    StateManager,
-    role_check,
-    with_roles,
-)
+from coaster.sqlalchemy import RoleAccessProxy, StateManager, role_check, with_roles
 from coaster.utils import LabeledEnum, NameTitle
 
 from .account import (
@@ -212,6 +206,107 @@ class Commentset(UuidMixin, BaseMixin[int, Account], Model):
 
     with_roles(last_comment, read={'all'}, datasets={'primary'})
 
+    def roles_for_authors(self, account_ids: Collection[int]) -> dict[int, set[str]]:
+        """
+        Return crew and submitter roles of comment authors, by account id.
+
+        Roles are loaded for all the given accounts together: ``editor`` and
+        ``promoter`` from the project's crew, and ``submitter`` from the proposal's
+        members if this is a proposal's commentset.
+        """
+        roles: dict[int, set[str]] = {account_id: set() for account_id in account_ids}
+        if not roles:
+            return roles
+        project_id = None
+        if self.project is not None:
+            project_id = self.project.id
+        elif self.proposal is not None:
+            project_id = self.proposal.project_id
+            for member_id in db.session.scalars(
+                sa.select(ProposalMembership.member_id).where(
+                    ProposalMembership.proposal_id == self.proposal.id,
+                    ProposalMembership.is_active,  # type: ignore[has-type]  # FIXME
+                    ProposalMembership.member_id.in_(roles),
+                )
+            ):
+                roles[member_id].add('submitter')
+        if project_id is not None:
+            for member_id, is_editor, is_promoter in db.session.execute(
+                sa.select(
+                    ProjectMembership.member_id,
+                    ProjectMembership.is_editor,
+                    ProjectMembership.is_promoter,
+                ).where(
+                    ProjectMembership.project_id == project_id,
+                    ProjectMembership.is_active,  # type: ignore[has-type]  # FIXME
+                    ProjectMembership.member_id.in_(roles),
+                )
+            ):
+                if is_editor:
+                    roles[member_id].add('editor')
+                if is_promoter:
+                    roles[member_id].add('promoter')
+        return roles
+
+    def comment_tree(self) -> list[Comment]:
+        """
+        Return top-level comments, newest first, with all replies pre-loaded.
+
+        The entire thread is loaded in a single recursive query along with authors, and
+        the :attr:`Comment.replies` and :attr:`Comment.in_reply_to` relationships are
+        populated from the result, oldest reply first, so that walking the tree does
+        not cause further queries. Author roles for :attr:`Comment.badges` are also
+        loaded for all authors together. This is meant for rendering and will discard
+        any unflushed changes to these relationships.
+        """
+        tree = (
+            sa.select(Comment.id)
+            .where(Comment.commentset_id == self.id, Comment.in_reply_to_id.is_(None))
+            .cte('comment_tree', recursive=True)
+        )
+        tree = tree.union_all(
+            sa.select(Comment.id).where(Comment.in_reply_to_id == tree.c.id)
+        )
+        comments = (
+            Comment.query.join(tree, Comment.id == tree.c.id)
+            .options(sa_orm.joinedload(Comment._posted_by))
+            .order_by(Comment.created_at, Comment.id)
+            .all()
+        )
+        comments_by_id = {comment.id: comment for comment in comments}
+        replies: dict[int, list[Comment]] = {comment.id: [] for comment in comments}
+        toplevel_comments = []
+        for comment in comments:
+            if comment.in_reply_to_id is None:
+                toplevel_comments.append(comment)
+            else:
+                replies[comment.in_reply_to_id].append(comment)
+        # Populate relationships only after all replies are collected, as the value is
+        # copied into the relationship's collection
+        for comment in comments:
+            sa_orm.attributes.set_committed_value(
+                comment, 'replies', replies[comment.id]
+            )
+            if comment.in_reply_to_id is not None:
+                sa_orm.attributes.set_committed_value(
+                    comment, 'in_reply_to', comments_by_id[comment.in_reply_to_id]
+                )
+        author_roles = self.roles_for_authors(
+            {
+                comment.posted_by_id
+                for comment in comments
+                if comment.posted_by_id is not None
+            }
+        )
+        for comment in comments:
+            comment.author_roles = (
+                author_roles[comment.posted_by_id]
+                if comment.posted_by_id is not None
+                else set()
+            )
+        toplevel_comments.reverse()
+        return toplevel_comments
+
     @role_check('parent_participant')
     def has_parent_participant_role(
         self, actor: Account | None, _anchors: Sequence[Any] = ()
@@ -235,6 +330,7 @@ class Commentset(UuidMixin, BaseMixin[int, Account], Model):
             posted_by=actor, commentset=self, message=message, in_reply_to=in_reply_to
         )
         self.count = Commentset.count + 1
+        CommentsetMembership.increment_new_comment_count(self, actor)
         db.session.add(comment)
         return comment
 
@@ -310,7 +406,7 @@ class Comment(UuidMixin, BaseMixin[int, Account], Model):
     __tablename__ = 'comment'
 
     posted_by_id: Mapped[int | None] = sa_orm.mapped_column(
-        sa.ForeignKey('account.id'), default=None, nullable=True
+        sa.ForeignKey('account.id'), default=None, nullable=True, index=True
     )
     _posted_by: Mapped[Account | None] = with_roles(
         relationship(back_populates='comments'),
@@ -375,6 +471,8 @@ class Comment(UuidMixin, BaseMixin[int, Account], Model):
 
     __table_args__ = (
         sa.Index('ix_comment_search_vector', 'search_vector', postgresql_using='gin'),
+        # For site moderators to page through all comments by keyset
+        sa.Index('ix_comment_created_at_id', 'created_at', 'id'),
     )
 
     __mapper_args__ = {'version_id_col': revisionid}
@@ -483,16 +581,23 @@ class Comment(UuidMixin, BaseMixin[int, Account], Model):
 
     with_roles(title, read={'all'}, datasets={'primary', 'related', 'json'})
 
+    @cached_property
+    def author_roles(self) -> set[str]:
+        """
+        Crew and submitter roles of the author, for :attr:`badges`.
+
+        :meth:`Commentset.comment_tree` sets this for all comments in a thread.
+        """
+        if self.posted_by_id is None:
+            return set()
+        return self.commentset.roles_for_authors([self.posted_by_id])[self.posted_by_id]
+
     @property
     def badges(self) -> set[str]:
         badges = set()
-        roles: set[str] | LazyRoleSet = set()
-        if self.commentset.project is not None:
-            roles = self.commentset.project.roles_for(self._posted_by)
-        elif self.commentset.proposal is not None:
-            roles = self.commentset.proposal.project.roles_for(self._posted_by)
-            if 'submitter' in self.commentset.proposal.roles_for(self._posted_by):
-                badges.add(_("Submitter"))
+        roles = self.author_roles
+        if 'submitter' in roles:
+            badges.add(_("Submitter"))
         if 'editor' in roles:
             if 'promoter' in roles:
                 badges.add(_("Editor & Promoter"))
@@ -549,6 +654,8 @@ add_search_trigger(Comment, 'search_vector')
 # Tail imports for type checking
 from .commentset_membership import CommentsetMembership
 from .moderation import CommentModeratorReport
+from .project_membership import ProjectMembership
+from .proposal_membership import ProposalMembership
 
 if TYPE_CHECKING:
     from .project import Project
@@ -3,12 +3,12 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import TYPE_CHECKING, Self
+from typing import Self
 
 from werkzeug.utils import cached_property
 
 from .account import Account
-from .base import Mapped, Model, Query, relationship, sa, sa_orm
+from .base import Mapped, Model, Query, db, relationship, sa, sa_orm
 from .membership_mixin import ImmutableMembershipMixin
 
 __all__ = ['CommentsetMembership']
@@ -19,7 +19,7 @@ class CommentsetMembership(ImmutableMembershipMixin, Model):
 
     __tablename__ = 'commentset_membership'
 
-    __data_columns__ = ('last_seen_at', 'is_muted')
+    __data_columns__ = ('last_seen_at', 'is_muted', 'new_comment_count')
 
     __roles__ = {
         'member': {
@@ -50,9 +50,9 @@ class CommentsetMembership(ImmutableMembershipMixin, Model):
         sa.TIMESTAMP(timezone=True), nullable=False, default=sa.func.utcnow()
     )
 
-    if TYPE_CHECKING:
-        # The implementation is at bottom, following the tail imports
-        new_comment_count: Mapped[int]
+    #: Number of public comments posted since :attr:`last_seen_at`, incremented by
+    #: :meth:`Commentset.post_comment` and periodically reconciled against comments
+    new_comment_count: Mapped[int] = sa_orm.mapped_column(default=0, nullable=False)
 
     @cached_property
     def offered_roles(self) -> set[str]:
@@ -66,6 +66,47 @@ class CommentsetMembership(ImmutableMembershipMixin, Model):
     def update_last_seen_at(self) -> None:
         """Mark the member as having seen this commentset just now."""
         self.last_seen_at = sa.func.utcnow()
+        self.new_comment_count = 0
+
+    @classmethod
+    def increment_new_comment_count(
+        cls, commentset: Commentset, actor: Account
+    ) -> None:
+        """Increment the new comment count for all subscribers except the actor."""
+        db.session.execute(
+            sa.update(cls)
+            .where(
+                cls.commentset_id == commentset.id,
+                cls.is_active,
+                cls.member_id != actor.id,
+            )
+            .values(new_comment_count=cls.new_comment_count + 1)
+            .execution_options(synchronize_session=False)
+        )
+
+    @classmethod
+    def reconcile_new_comment_counts(cls) -> int:
+        """
+        Reset new comment counts that have drifted from the count of comments.
+
+        Counts drift when comments are deleted or change state after being posted.
+        Returns the number of memberships that were corrected.
+        """
+        true_count = (
+            sa.select(sa.func.count(Comment.id))
+            .where(Comment.commentset_id == cls.commentset_id)
+            .where(Comment.state.PUBLIC)  # type: ignore[has-type]  # FIXME
+            .where(Comment.created_at > cls.last_seen_at)
+            .correlate_except(Comment)
+            .scalar_subquery()
+        )
+        result = db.session.execute(
+            sa.update(cls)
+            .where(cls.is_active, cls.new_comment_count != true_count)
+            .values(new_comment_count=true_count)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
 
     @classmethod
     def for_user(cls, account: Account) -> Query[Self]:
@@ -100,12 +141,3 @@ from .comment import Comment, Commentset
 from .project import Project
 from .proposal import Proposal
 from .update import Update
-
-CommentsetMembership.new_comment_count = sa_orm.column_property(
-    sa.select(sa.func.count(Comment.id))
-    .where(Comment.commentset_id == CommentsetMembership.commentset_id)
-    .where(Comment.state.PUBLIC)  # type: ignore[has-type]  # FIXME
-    .where(Comment.created_at > CommentsetMembership.last_seen_at)
-    .correlate_except(Comment)
-    .scalar_subquery()
-)
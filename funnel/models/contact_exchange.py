@@ -9,7 +9,7 @@ from itertools import groupby
 from typing import Self
 from uuid import UUID
 
-from pytz import BaseTzInfo, timezone
+from pytz import BaseTzInfo
 from sqlalchemy.ext.associationproxy import association_proxy
 
 from coaster.sqlalchemy import with_roles
@@ -104,101 +104,59 @@ class ContactExchange(TimestampMixin, RoleMixin, Model):
         'subject': {'read': {'account', 'ticket_participant', 'scanned_at'}},
     }
 
-    @classmethod
-    def migrate_account(cls, old_account: Account, new_account: Account) -> None:
-        """Migrate one account's data to another when merging accounts."""
-        ticket_participant_ids = {
-            ce.ticket_participant_id for ce in new_account.scanned_contacts
-        }
-        for ce in old_account.scanned_contacts:
-            if ce.ticket_participant_id not in ticket_participant_ids:
-                ce.account = new_account
-            else:
-                # Discard duplicate contact exchange
-                db.session.delete(ce)
-
     @classmethod
     def grouped_counts_for(
         cls, account: Account, archived: bool = False
     ) -> list[tuple[ProjectId, list[DateCountContacts]]]:
-        """Return count of contacts grouped by project and date."""
-        subq = sa.select(
-            cls.scanned_at.label('scanned_at'),
-            Project.id.label('project_id'),
-            Project.uuid.label('project_uuid'),
-            Project.title.label('project_title'),
-            Project.timezone.label('project_timezone'),
-        ).filter(
-            cls.ticket_participant_id == TicketParticipant.id,
-            TicketParticipant.project_id == Project.id,
-            cls.account == account,
-        )
-
-        if not archived:
-            # If archived: return everything (contacts including archived contacts)
-            # If not archived: return only unarchived contacts
-            subq = subq.filter(cls.archived.is_(False))
-
+        """
+        Return contacts grouped by project and date, with a count of contacts per date.
+
+        This uses a single query that loads all the contacts along with their project
+        and the date of scanning in the project's timezone, grouping them in Python.
+        The contacts in each group are a list, with the ticket participant and their
+        account pre-loaded.
+        """
+        scan_date = sa.cast(
+            sa.func.date_trunc(
+                'day', sa.func.timezone(Project.timezone, cls.scanned_at)
+            ),
+            sa.Date,
+        ).label('scan_date')
         query = (
             db.session.query(
-                sa.column('project_id', sa.Integer()),
-                sa.column('project_uuid', sa.Uuid()),
-                sa.column('project_title', sa.String()),
-                sa.column('project_timezone', sa.String()),
-                sa.cast(
-                    sa.func.date_trunc(
-                        'day',
-                        sa.func.timezone(
-                            sa.column('project_timezone'), sa.column('scanned_at')
-                        ),
-                    ),
-                    sa.Date,
-                ).label('scan_date'),
-                sa.func.count().label('count'),
+                cls,
+                Project.id.label('project_id'),
+                Project.uuid.label('project_uuid'),
+                Project.title.label('project_title'),
+                Project.timezone.label('project_timezone'),
+                scan_date,
             )
-            .select_from(subq.subquery())
-            .group_by(
-                sa.column('project_id'),
-                sa.column('project_uuid'),
-                sa.column('project_title'),
-                sa.column('project_timezone'),
-                sa.column('scan_date'),
+            .join(TicketParticipant, cls.ticket_participant)
+            .join(Project, TicketParticipant.project)
+            .options(
+                sa_orm.contains_eager(cls.ticket_participant).options(
+                    sa_orm.joinedload(TicketParticipant.participant),
+                    sa_orm.joinedload(TicketParticipant.email_address),
+                )
             )
-            .order_by(sa.text('scan_date DESC'))
+            .filter(cls.account == account)
         )
 
-        # Issued SQL:
-        #
-        # SELECT
-        #   project_id,
-        #   project_uuid,
-        #   project_title,
-        #   project_timezone,
-        #   CAST(
-        #     date_trunc('day', timezone(project_timezone, scanned_at))
-        #     AS DATE
-        #   ) AS scan_date,
-        #   count(*) AS count
-        # FROM (
-        #   SELECT
-        #     contact_exchange.scanned_at AS scanned_at,
-        #     project.id AS project_id,
-        #     project.uuid AS project_uuid,
-        #     project.timezone AS project_timezone,
-        #     project.title AS project_title
-        #   FROM contact_exchange, project, ticket_participant
-        #   WHERE
-        #     contact_exchange.ticket_participant_id = ticket_participant.id
-        #     AND ticket_participant.project_id = project.id
-        #     AND :account_id = contact_exchange.account_id
-        #     AND contact_exchange.archived IS false
-        #   ) AS anon_1
-        # GROUP BY project_id, project_uuid, project_title, project_timezone, scan_date
-        # ORDER BY scan_date DESC
+        if not archived:
+            # If archived: return everything (contacts including archived contacts)
+            # If not archived: return only unarchived contacts
+            query = query.filter(cls.archived.is_(False))
+
+        # Rows are ordered by date, most recent first, and by project within a date so
+        # that each (project, date) group is contiguous. Consecutive dates for the same
+        # project are merged into a single project entry, so a project will appear
+        # more than once if dates for multiple projects are interleaved
+        query = query.order_by(scan_date.desc(), Project.id, cls.scanned_at)
 
         # The query result has rows of:
-        # (project_id, project_uuid, project_title, project_timezone, scan_date, count)
-        # with one row per date. It is then transformed into:
+        # (contact, project_id, project_uuid, project_title, project_timezone,
+        #  scan_date)
+        # with one row per contact. It is then transformed into:
         # [
         #   (ProjectId(id, uuid, uuid_b58, title, timezone), [
         #     DateCountContacts(date, count, contacts),
@@ -211,31 +169,29 @@ class ContactExchange(TimestampMixin, RoleMixin, Model):
         # We don't do it here, but this can easily be converted into a dictionary of
         # `{project: dates}` using `dict(result)`
 
-        return [
-            (
-                k,
-                [
+        result: list[tuple[ProjectId, list[DateCountContacts]]] = []
+        for k, g in groupby(
+            query,
+            lambda row: ProjectId(
+                id=row.project_id,
+                uuid=row.project_uuid,
+                uuid_b58=uuid_to_base58(row.project_uuid),
+                title=row.project_title,
+                timezone=row.project_timezone,
+            ),
+        ):
+            dates = []
+            for scan_date_value, date_rows in groupby(g, lambda row: row.scan_date):
+                contacts = [row.ContactExchange for row in date_rows]
+                dates.append(
                     DateCountContacts(
-                        r.scan_date,
-                        r.count,  # type: ignore[arg-type]  # FIXME
-                        cls.contacts_for_project_and_date(
-                            account, k, r.scan_date, archived
-                        ),
+                        scan_date_value,
+                        len(contacts),
+                        contacts,
                     )
-                    for r in g
-                ],
-            )
-            for k, g in groupby(
-                query,
-                lambda row: ProjectId(
-                    id=row.project_id,
-                    uuid=row.project_uuid,
-                    uuid_b58=uuid_to_base58(row.project_uuid),
-                    title=row.project_title,
-                    timezone=timezone(row.project_timezone),
-                ),
-            )
-        ]
+                )
+            result.append((k, dates))
+        return result
 
     @classmethod
     def contacts_for_project_and_date(
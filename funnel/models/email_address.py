@@ -5,7 +5,7 @@ from __future__ import annotations
 import hashlib
 import unicodedata
 import warnings
-from collections.abc import MutableMapping
+from collections.abc import Collection, MutableMapping
 from datetime import datetime
 from typing import TYPE_CHECKING, Any, ClassVar, Literal, Self, cast, overload
 
@@ -453,6 +453,42 @@ class EmailAddress(BaseMixin[int, 'Account'], Model):
             for backref_name in self.__backrefs__
         )
 
+    @classmethod
+    def referenced_ids(cls, ids: Collection[int]) -> set[int]:
+        """
+        Return the subset of the given ids that have active references.
+
+        This is the set-based equivalent of :meth:`refcount`, using one query per
+        referring table. Tables that never hold active references are skipped, and
+        tables that override the :attr:`~OptionalEmailAddressMixin.email_address_reference_is_active`
+        property are checked per row.
+        """
+        referenced: set[int] = set()
+        for backref_name in cls.__backrefs__:
+            remaining = set(ids) - referenced
+            if not remaining:
+                break
+            model = getattr(cls, backref_name).property.mapper.class_
+            is_active = model.email_address_reference_is_active
+            if is_active is False:
+                # This model's references never hold on to the email address
+                continue
+            query = model.query.filter(model.email_address_id.in_(remaining))
+            if is_active is OptionalEmailAddressMixin.email_address_reference_is_active:
+                # Default implementation: all references are active
+                referenced.update(
+                    db.session.scalars(
+                        query.with_entities(model.email_address_id).distinct()
+                    )
+                )
+            else:
+                referenced.update(
+                    obj.email_address_id
+                    for obj in query
+                    if obj.email_address_reference_is_active
+                )
+        return referenced
+
     @classmethod
     def mark_blocked(cls, email: str) -> None:
         """
@@ -2,13 +2,15 @@
 
 from __future__ import annotations
 
-from datetime import datetime
+import random
+from collections.abc import Collection
+from datetime import datetime, timedelta
 from typing import Self
 from uuid import UUID
 
 from baseframe import __
 from coaster.sqlalchemy import StateManager, with_roles
-from coaster.utils import LabeledEnum, NameTitle
+from coaster.utils import LabeledEnum, NameTitle, utcnow
 
 from .account import Account
 from .base import (
@@ -27,6 +29,9 @@ from .site_membership import SiteMembership
 
 __all__ = ['MODERATOR_REPORT_TYPE', 'CommentModeratorReport']
 
+#: Duration for which a report handed out for review is withheld from other moderators
+REPORT_LEASE_DURATION = timedelta(minutes=5)
+
 
 class MODERATOR_REPORT_TYPE(LabeledEnum):  # noqa: N801
     OK = (1, NameTitle('ok', __("Not spam")))
@@ -61,6 +66,28 @@ class CommentModeratorReport(UuidMixin, BaseMixin[UUID, Account], Model):
     resolved_at: Mapped[datetime | None] = sa_orm.mapped_column(
         sa.TIMESTAMP(timezone=True), nullable=True, index=True
     )
+    #: Random value in [0, 1) to sample unresolved reports from an index, see
+    #: :meth:`get_one`
+    random_key: Mapped[float] = sa_orm.mapped_column(
+        sa.Float, insert_default=sa.func.random(), default=None, nullable=False
+    )
+    #: Report is being reviewed by a moderator and is withheld from others until then
+    leased_until: Mapped[datetime | None] = sa_orm.mapped_column(
+        sa.TIMESTAMP(timezone=True), nullable=True
+    )
+
+    __table_args__ = (
+        sa.Index(
+            'ix_comment_moderator_report_random_key',
+            random_key,
+            postgresql_where=resolved_at.is_(None),
+        ),
+        sa.Index(
+            'ix_comment_moderator_report_comment_id_reported_by_id',
+            comment_id,
+            reported_by_id,
+        ),
+    )
 
     __datasets__ = {
         'primary': {
@@ -75,8 +102,40 @@ class CommentModeratorReport(UuidMixin, BaseMixin[UUID, Account], Model):
 
     @classmethod
     def get_one(cls, exclude_user: Account | None = None) -> Self | None:
-        reports = cls.get_all(exclude_user)
-        return reports.order_by(sa.func.random()).first()
+        """
+        Get an unresolved report at random and lease it for review.
+
+        Instead of sorting all reports randomly, this seeks to a random point in the
+        index on :attr:`random_key` and takes the first report after it, wrapping around
+        to the start if there are none. Reports that are leased, locked by a parallel
+        transaction, or (if ``exclude_user`` is provided) are for comments the user has
+        already reviewed are skipped. The caller must commit to save the lease.
+        """
+        now = utcnow()
+        reports = cls.query.filter(
+            cls.resolved_at.is_(None),
+            sa.or_(cls.leased_until.is_(None), cls.leased_until < now),
+        )
+        if exclude_user is not None:
+            reviewed = sa_orm.aliased(cls)
+            reports = reports.filter(
+                ~sa.exists().where(
+                    reviewed.comment_id == cls.comment_id,
+                    reviewed.reported_by_id == exclude_user.id,
+                )
+            )
+        pivot = random.random()  # noqa: S311
+        for condition in (cls.random_key >= pivot, cls.random_key < pivot):
+            report = (
+                reports.filter(condition)
+                .order_by(cls.random_key)
+                .with_for_update(skip_locked=True, of=cls)
+                .first()
+            )
+            if report is not None:
+                report.leased_until = now + REPORT_LEASE_DURATION
+                return report
+        return None
 
     @classmethod
     def get_all(cls, exclude_user: Account | None = None) -> Query[Self]:
@@ -110,6 +169,30 @@ class CommentModeratorReport(UuidMixin, BaseMixin[UUID, Account], Model):
             created = True
         return report, created
 
+    @classmethod
+    def submit_all(cls, actor: Account, comment_ids: Collection[int]) -> int:
+        """
+        Report comments as spam, skipping comments already reported by the actor.
+
+        Returns the number of new reports.
+        """
+        reported = set(
+            db.session.scalars(
+                sa.select(cls.comment_id).where(
+                    cls.reported_by_id == actor.id, cls.comment_id.in_(comment_ids)
+                )
+            )
+        )
+        new_ids = [
+            comment_id
+            for comment_id in dict.fromkeys(comment_ids)
+            if comment_id not in reported
+        ]
+        db.session.add_all(
+            [cls(reported_by=actor, comment_id=comment_id) for comment_id in new_ids]
+        )
+        return len(new_ids)
+
     @property
     def users_who_are_comment_moderators(self) -> Query[Account]:
         return Account.query.join(
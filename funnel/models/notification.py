@@ -82,7 +82,8 @@ and :class:`UserNotification`:
 
 from __future__ import annotations
 
-from collections.abc import Callable, Generator, Sequence
+from collections import defaultdict
+from collections.abc import Callable, Generator, Iterable, Sequence
 from contextlib import suppress
 from dataclasses import dataclass
 from datetime import datetime
@@ -632,6 +633,52 @@ class Notification(NoIdMixin, Model, Generic[_D, _F]):
         # TypeVar _F may be typed `None` in a subclass, but we can't type it so here
         return None  # type: ignore[return-value]
 
+    @classmethod
+    def prefetch(cls, notifications: Iterable[Notification]) -> None:
+        """
+        Load documents and fragments for many notifications, with one query per model.
+
+        This populates the :attr:`document` and :attr:`fragment` cached properties so
+        that a page of notifications does not load each of them separately. Objects
+        that are missing are not populated, so accessing them will raise
+        :exc:`~sqlalchemy.exc.NoResultFound` as usual.
+        """
+        notifications = list(notifications)
+        wanted: dict[type[ModelUuidProtocol], set[UUID]] = defaultdict(set)
+        for notification in notifications:
+            if 'document' not in notification.__dict__:
+                wanted[notification.document_model].add(notification.document_uuid)
+            if (
+                notification.fragment_model is not None
+                and notification.fragment_uuid is not None
+                and 'fragment' not in notification.__dict__
+            ):
+                wanted[notification.fragment_model].add(notification.fragment_uuid)
+        loaded: dict[tuple[type[ModelUuidProtocol], UUID], ModelUuidProtocol] = {}
+        for model, uuids in wanted.items():
+            for obj in model.query.filter(
+                model.uuid.in_(uuids)  # type: ignore[attr-defined]
+            ):
+                loaded[model, obj.uuid] = obj
+        for notification in notifications:
+            if (
+                document := loaded.get(
+                    (notification.document_model, notification.document_uuid)
+                )
+            ) is not None:
+                notification.document = document
+            if (
+                notification.fragment_model is not None
+                and notification.fragment_uuid is not None
+                and (
+                    fragment := loaded.get(
+                        (notification.fragment_model, notification.fragment_uuid)
+                    )
+                )
+                is not None
+            ):
+                notification.fragment = fragment
+
     @classmethod
     def renderer(cls, view: type[T]) -> type[T]:
         """
@@ -1085,20 +1132,21 @@ class NotificationRecipient(NoIdMixin, NotificationRecipientProtoMixin, Model):
             )
         return None
 
-    def rollup_previous(self) -> None:
+    def rollup_previous(self) -> int:
         """
         Rollup prior instances of :class:`UserNotification` against the same document.
 
-        Revokes and sets a shared rollup id on all prior user notifications.
+        Revokes and sets a shared rollup id on all prior user notifications. Returns the
+        number of unread notifications that were revoked, for unread counters.
         """
         if not self.notification.fragment_model:
             # We can only rollup fragments within a document. Rollup doesn't apply
             # for notifications without fragments.
-            return
+            return 0
 
         if self.is_revoked or self.rollupid is not None:
             # We've already been revoked or rolled up. Nothing to do.
-            return
+            return 0
 
         # For rollup: find most recent unread -- or read but created in the last day --
         # that has a rollupid. Reuse that id so that the current notification becomes
@@ -1133,6 +1181,7 @@ class NotificationRecipient(NoIdMixin, NotificationRecipientProtoMixin, Model):
             .limit(1)
             .scalar()
         )
+        revoked_unread = 0
         if not rollupid:
             # No previous rollupid? Then we're the first. The next notification
             # will use our rollupid as long as we're unread or within a day
@@ -1165,13 +1214,17 @@ class NotificationRecipient(NoIdMixin, NotificationRecipientProtoMixin, Model):
                     sa_orm.load_only(
                         NotificationRecipient.recipient_id,
                         NotificationRecipient.eventid,
+                        NotificationRecipient.read_at,
                         NotificationRecipient.revoked_at,
                         NotificationRecipient.rollupid,
                     )
                 )
             ):
+                if previous.read_at is None:
+                    revoked_unread += 1
                 previous.is_revoked = True
                 previous.rollupid = self.rollupid
+        return revoked_unread
 
     def rolledup_fragments(self) -> Query | None:
         """Return all fragments in the rolled up batch as a base query."""
@@ -1191,6 +1244,31 @@ class NotificationRecipient(NoIdMixin, NotificationRecipientProtoMixin, Model):
             )
         )
 
+    @classmethod
+    def rolledup_fragment_uuids(
+        cls, rollupids: Iterable[UUID]
+    ) -> dict[UUID, list[UUID]]:
+        """
+        Return fragment UUIDs for multiple rollups in a single query.
+
+        This is the batch equivalent of :meth:`rolledup_fragments`, returning a dict of
+        ``{rollupid: [fragment_uuid, ...]}``.
+        """
+        rollupids = set(rollupids)
+        if not rollupids:
+            return {}
+        result: dict[UUID, list[UUID]] = defaultdict(list)
+        for rollupid, fragment_uuid in (
+            db.session.query(cls.rollupid, Notification.fragment_uuid)
+            .select_from(cls)
+            .join(cls.notification)
+            .filter(
+                cls.rollupid.in_(rollupids), Notification.fragment_uuid.is_not(None)
+            )
+        ):
+            result[rollupid].append(fragment_uuid)
+        return result
+
     @classmethod
     def get_for(cls, user: Account, eventid_b58: str) -> NotificationRecipient | None:
         """Retrieve a :class:`UserNotification` using SQLAlchemy session cache."""
@@ -1208,7 +1286,11 @@ class NotificationRecipient(NoIdMixin, NotificationRecipientProtoMixin, Model):
         )
         if unread_only:
             query = query.filter(NotificationRecipient.read_at.is_(None))
-        return query.order_by(Notification.created_at.desc())
+        return query.options(
+            sa_orm.contains_eager(cls.notification).selectinload(
+                Notification.created_by
+            )
+        ).order_by(Notification.created_at.desc())
 
     @classmethod
     def unread_count_for(cls, user: Account) -> int:
@@ -1225,21 +1307,20 @@ class NotificationRecipient(NoIdMixin, NotificationRecipientProtoMixin, Model):
         )
 
     @classmethod
-    def migrate_account(cls, old_account: Account, new_account: Account) -> None:
-        """Migrate one account's data to another when merging accounts."""
-        for notification_recipient in cls.query.filter_by(
-            recipient_id=old_account.id
-        ).all():
-            existing = db.session.get(
-                cls, (new_account.id, notification_recipient.eventid)
+    def unread_counts_for_ids(cls, account_ids: Sequence[int]) -> dict[int, int]:
+        """Return unread notification counts for multiple accounts in a single query."""
+        return dict(
+            db.session.query(cls.recipient_id, sa.func.count())
+            .select_from(cls)
+            .join(Notification)
+            .filter(
+                Notification.type_.in_(notification_web_types),
+                cls.recipient_id.in_(account_ids),
+                cls.read_at.is_(None),
+                cls.revoked_at.is_(None),
             )
-            # TODO: Instead of dropping old_user's dupe notifications, check which of
-            # the two has a higher priority role and keep that. This may not be possible
-            # if the two copies are for different notifications under the same eventid.
-            if existing is not None:
-                db.session.delete(notification_recipient)
-        cls.query.filter(cls.recipient_id == old_account.id).update(
-            {'recipient_id': new_account.id}, synchronize_session=False
+            .group_by(cls.recipient_id)
+            .all()
         )
 
 
@@ -1399,16 +1480,6 @@ class NotificationPreferences(BaseMixin[int, Account], Model):
         # be dropped in migrations, but it's possible for the data to be outdated.
         return notification_type_registry.get(self.notification_type)
 
-    @classmethod
-    def migrate_account(cls, old_account: Account, new_account: Account) -> None:
-        """Migrate one account's data to another when merging accounts."""
-        for ntype, prefs in list(old_account.notification_preferences.items()):
-            if ntype in new_account.notification_preferences:
-                db.session.delete(prefs)
-        cls.query.filter(cls.account_id == old_account.id).update(
-            {'account_id': new_account.id}, synchronize_session=False
-        )
-
     @sa_orm.validates('notification_type')
     def _valid_notification_type(self, _key: str, value: str | None) -> str:
         if value == '':  # Special-cased name for main preferences
@@ -4,6 +4,7 @@ from __future__ import annotations
 
 import hashlib
 import warnings
+from collections.abc import Collection, Iterable
 from contextlib import suppress
 from datetime import datetime
 from typing import TYPE_CHECKING, Any, ClassVar, Literal, Self, overload
@@ -456,6 +457,42 @@ class PhoneNumber(BaseMixin[int, 'Account'], Model):
             for backref_name in self.__backrefs__
         )
 
+    @classmethod
+    def referenced_ids(cls, ids: Collection[int]) -> set[int]:
+        """
+        Return the subset of the given ids that have active references.
+
+        This is the set-based equivalent of :meth:`refcount`, using one query per
+        referring table. Tables that never hold active references are skipped, and
+        tables that override the :attr:`~OptionalPhoneNumberMixin.phone_number_reference_is_active`
+        property are checked per row.
+        """
+        referenced: set[int] = set()
+        for backref_name in cls.__backrefs__:
+            remaining = set(ids) - referenced
+            if not remaining:
+                break
+            model = getattr(cls, backref_name).property.mapper.class_
+            is_active = model.phone_number_reference_is_active
+            if is_active is False:
+                # This model's references never hold on to the phone number
+                continue
+            query = model.query.filter(model.phone_number_id.in_(remaining))
+            if is_active is OptionalPhoneNumberMixin.phone_number_reference_is_active:
+                # Default implementation: all references are active
+                referenced.update(
+                    db.session.scalars(
+                        query.with_entities(model.phone_number_id).distinct()
+                    )
+                )
+            else:
+                referenced.update(
+                    obj.phone_number_id
+                    for obj in query
+                    if obj.phone_number_reference_is_active
+                )
+        return referenced
+
     def mark_has_sms(self, value: bool) -> None:
         """Mark this phone number as having SMS capability (or not)."""
         self.has_sms = value
@@ -699,6 +736,22 @@ class PhoneNumber(BaseMixin[int, 'Account'], Model):
             return 'not_new'
         return None
 
+    @classmethod
+    def get_many(cls, numbers: Iterable[str]) -> list[Self]:
+        """
+        Get :class:`PhoneNumber` instances for many phone numbers in a single query.
+
+        Numbers must already be in E164 format as they are hashed without validation.
+        Numbers that are not in the database are skipped.
+        """
+        hashes = [
+            phone_blake2b160_hash(number, _pre_validated_formatted=True)
+            for number in numbers
+        ]
+        if not hashes:
+            return []
+        return cls.query.filter(cls.blake2b160.in_(hashes)).all()
+
     @classmethod
     def get_numbers(cls, prefix: str, remove: bool = True) -> set[str]:
         """
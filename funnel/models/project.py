@@ -14,6 +14,7 @@ from flask_babel import format_date, get_locale
 from furl import furl
 from isoweek import Week
 from pytz import BaseTzInfo, utc
+from sqlalchemy import event
 from sqlalchemy.ext.orderinglist import OrderingList, ordering_list
 from werkzeug.utils import cached_property
 
@@ -213,20 +214,33 @@ class Project(UuidMixin, BaseScopedNameMixin[int, Account], Model):
         write={'promoter'},
         datasets={'primary', 'without_parent', 'related'},
     )
-    #: Optional start time for schedule, cached from column property schedule_start_at
+    #: Optional start time for schedule, cached from schedule_start_at
     start_at: Mapped[datetime | None] = with_roles(
         sa_orm.mapped_column(sa.TIMESTAMP(timezone=True), nullable=True, index=True),
         read={'all'},
         write={'editor'},
         datasets={'primary', 'without_parent', 'related'},
     )
-    #: Optional end time for schedule, cached from column property schedule_end_at
+    #: Optional end time for schedule, cached from schedule_end_at
     end_at: Mapped[datetime | None] = with_roles(
         sa_orm.mapped_column(sa.TIMESTAMP(timezone=True), nullable=True, index=True),
         read={'all'},
         write={'editor'},
         datasets={'primary', 'without_parent', 'related'},
     )
+    #: Start time of the earliest session, maintained by listeners on
+    #: :class:`Session` (at the end of this module)
+    schedule_start_at: Mapped[datetime | None] = with_roles(
+        sa_orm.mapped_column(sa.TIMESTAMP(timezone=True), nullable=True),
+        read={'all'},
+        datasets={'primary', 'without_parent'},
+    )
+    #: End time of the latest session, maintained alongside :attr:`schedule_start_at`
+    schedule_end_at: Mapped[datetime | None] = with_roles(
+        sa_orm.mapped_column(sa.TIMESTAMP(timezone=True), nullable=True),
+        read={'all'},
+        datasets={'primary', 'without_parent'},
+    )
 
     cfp_start_at: Mapped[datetime | None] = sa_orm.mapped_column(
         sa.TIMESTAMP(timezone=True), nullable=True, index=True
@@ -466,10 +480,8 @@ class Project(UuidMixin, BaseScopedNameMixin[int, Account], Model):
     )
 
     if TYPE_CHECKING:
-        # These are column properties, defined at the end of the file
-        schedule_start_at: Mapped[datetime | None]
+        # This is a column property, defined at the end of the file
         next_session_at: Mapped[datetime | None]
-        schedule_end_at: Mapped[datetime | None]
         # This relationship is added by add_primary_relationship in models/venue.py
         primary_venue: Mapped[Venue | None] = relationship()
 
@@ -698,8 +710,9 @@ class Project(UuidMixin, BaseScopedNameMixin[int, Account], Model):
     cfp_state.add_conditional_state(
         'EXPIRED',
         cfp_state.PUBLIC,
-        lambda project: project.cfp_end_at is not None
-        and utcnow() >= project.cfp_end_at,
+        lambda project: (
+            project.cfp_end_at is not None and utcnow() >= project.cfp_end_at
+        ),
         lambda project: sa.and_(
             project.cfp_end_at.is_not(None), sa.func.utcnow() >= project.cfp_end_at
         ),
@@ -1021,29 +1034,58 @@ class Project(UuidMixin, BaseScopedNameMixin[int, Account], Model):
         )
 
     def rsvp_counts(self) -> dict[str, int]:
-        # pylint: disable=protected-access
-        return {
-            row[0]: row[1]
-            for row in db.session.query(Rsvp._state, sa.func.count(Rsvp._state))
-            .join(Account)
-            .filter(Account.state.ACTIVE, Rsvp.project == self)
-            .group_by(Rsvp._state)
-            .all()
-        }
+        """Return counts of RSVPs from active accounts, by state."""
+        return ProjectRsvpCount.counts_for(self)
 
     @cached_property
     def rsvp_count_going(self) -> int:
-        return (
-            self.rsvps.join(Account)
-            .filter(Account.state.ACTIVE, Rsvp.state.YES)
-            .count()
-        )
+        return self.rsvp_counts().get(RSVP_STATUS.YES, 0)
 
     def update_schedule_timestamps(self) -> None:
         """Update cached timestamps from sessions."""
+        start_at, end_at = _schedule_bounds_columns()
+        self.schedule_start_at, self.schedule_end_at = db.session.execute(
+            sa.select(start_at, end_at).where(Project.id == self.id)
+        ).one()
         self.start_at = self.schedule_start_at
         self.end_at = self.schedule_end_at
 
+    @classmethod
+    def refresh_schedule_bounds(cls) -> list[int]:
+        """
+        Correct stored schedule bounds that differ from sessions, in a single statement.
+
+        Projects with sessions also have :attr:`start_at` and :attr:`end_at` corrected.
+        Returns ids of corrected projects.
+        """
+        start_at, end_at = _schedule_bounds_columns()
+        return list(
+            db.session.scalars(
+                sa.update(cls)
+                .where(
+                    sa.or_(
+                        cls.schedule_start_at.is_distinct_from(start_at),
+                        cls.schedule_end_at.is_distinct_from(end_at),
+                        sa.and_(
+                            cls.schedule_start_at.is_not(None),
+                            sa.or_(
+                                cls.start_at.is_distinct_from(cls.schedule_start_at),
+                                cls.end_at.is_distinct_from(cls.schedule_end_at),
+                            ),
+                        ),
+                    )
+                )
+                .values(
+                    schedule_start_at=start_at,
+                    schedule_end_at=end_at,
+                    start_at=sa.func.coalesce(start_at, cls.start_at),
+                    end_at=sa.case((start_at.is_(None), cls.end_at), else_=end_at),
+                )
+                .returning(cls.id)
+                .execution_options(synchronize_session='fetch')
+            )
+        )
+
     @role_check('reader')
     def has_reader_role(
         self, _actor: Account | None, _anchors: Sequence[Any] = ()
@@ -1683,24 +1725,6 @@ class ProjectRedirect(TimestampMixin, Model):
             redirect.project = project
         return redirect
 
-    @classmethod
-    def migrate_account(cls, old_account: Account, new_account: Account) -> None:
-        """
-        Transfer project redirects when migrating accounts, discarding dupe names.
-
-        Since there is no account redirect, all project redirects will also be
-        unreachable after this transfer, unless the new account is renamed to take the
-        old account's name.
-        """
-        names = {pr.name for pr in new_account.project_redirects}
-        for pr in old_account.project_redirects:
-            if pr.name not in names:
-                pr.account = new_account
-            else:
-                # Discard project redirect since the name is already taken by another
-                # redirect in the new account
-                db.session.delete(pr)
-
 
 class ProjectLocation(TimestampMixin, Model):
     __tablename__ = 'project_location'
@@ -1728,7 +1752,7 @@ from .comment import SET_TYPE, Commentset
 from .label import Label
 from .project_membership import ProjectMembership
 from .proposal import Proposal
-from .rsvp import Rsvp, RsvpStateEnum
+from .rsvp import RSVP_STATUS, ProjectRsvpCount, Rsvp, RsvpStateEnum
 from .session import Session
 from .sponsor_membership import ProjectSponsorMembership
 from .sync_ticket import (
@@ -1761,51 +1785,119 @@ Project._has_featured_proposals = sa_orm.column_property(
 
 # Project schedule column expressions. Guide:
 # https://docs.sqlalchemy.org/en/13/orm/mapped_sql_expr.html#using-column-property
-Project.schedule_start_at = with_roles(
-    sa_orm.column_property(
-        sa.select(sa.func.min(Session.start_at))
-        .where(Session.start_at.is_not(None))
-        .where(Session.project_id == Project.id)
-        .correlate_except(Session)
-        .scalar_subquery()
-    ),
-    read={'all'},
-    datasets={'primary', 'without_parent'},
-)
 
+# The next session is the schedule's start if in the future. A schedule that has ended
+# has no next session. Only a schedule that is underway needs a lookup in sessions
 Project.next_session_at = with_roles(
     sa_orm.column_property(
-        sa.select(sa.func.min(sa.column('start_at')))
-        .select_from(
-            sa.select(sa.func.min(Session.start_at).label('start_at'))
-            .where(Session.start_at.is_not(None))
+        sa.case(
+            (Project.start_at >= sa.func.utcnow(), Project.start_at),
+            (
+                sa.or_(Project.end_at.is_(None), Project.end_at < sa.func.utcnow()),
+                sa.null(),
+            ),
+            else_=sa.select(sa.func.min(Session.start_at))
             .where(Session.start_at >= sa.func.utcnow())
             .where(Session.project_id == Project.id)
             .correlate_except(Session)
-            .union(
-                sa.select(Project.start_at.label('start_at'))
-                .where(Project.start_at.is_not(None))
-                .where(Project.start_at >= sa.func.utcnow())
-                .correlate(Project)
-            )
-            .subquery()
-        )
-        .scalar_subquery()
+            .scalar_subquery(),
+        ),
+        deferred=True,
     ),
     read={'all'},
 )
 
-Project.schedule_end_at = with_roles(
-    sa_orm.column_property(
+
+# MARK: Schedule bounds
+
+
+def _schedule_bounds_columns(
+    exclude_session_id: int | None = None,
+) -> tuple[sa.ScalarSelect, sa.ScalarSelect]:
+    """Return expressions for the schedule bounds of a project, computed from sessions."""
+    start_at = (
+        sa.select(sa.func.min(Session.start_at))
+        .where(Session.start_at.is_not(None))
+        .where(Session.project_id == Project.id)
+    )
+    end_at = (
         sa.select(sa.func.max(Session.end_at))
         .where(Session.end_at.is_not(None))
         .where(Session.project_id == Project.id)
-        .correlate_except(Session)
-        .scalar_subquery()
-    ),
-    read={'all'},
-    datasets={'primary', 'without_parent'},
-)
+    )
+    if exclude_session_id is not None:
+        start_at = start_at.where(Session.id != exclude_session_id)
+        end_at = end_at.where(Session.id != exclude_session_id)
+    return (
+        start_at.correlate_except(Session).scalar_subquery(),
+        end_at.correlate_except(Session).scalar_subquery(),
+    )
+
+
+def _update_schedule_bounds(
+    connection: sa.Connection,
+    target: Session,
+    project_ids: set[int],
+    exclude_session_id: int | None = None,
+) -> None:
+    """Update schedule bounds and cached timestamps for projects."""
+    start_at, end_at = _schedule_bounds_columns(exclude_session_id)
+    result = connection.execute(
+        sa.update(Project)
+        .where(Project.id.in_(project_ids))
+        .values(
+            schedule_start_at=start_at,
+            schedule_end_at=end_at,
+            start_at=start_at,
+            end_at=end_at,
+        )
+        .returning(Project.id, Project.schedule_start_at, Project.schedule_end_at)
+    )
+    # Update projects already loaded in this session, without marking them as changed
+    session = sa_orm.object_session(target)
+    if session is None:
+        return
+    for project_id, schedule_start_at, schedule_end_at in result:
+        project = session.identity_map.get(sa_orm.identity_key(Project, project_id))
+        if project is not None:
+            for attr, value in (
+                ('schedule_start_at', schedule_start_at),
+                ('schedule_end_at', schedule_end_at),
+                ('start_at', schedule_start_at),
+                ('end_at', schedule_end_at),
+            ):
+                sa_orm.attributes.set_committed_value(project, attr, value)
+
+
+@event.listens_for(Session, 'after_insert')
+def _session_inserted(_mapper: Any, connection: sa.Connection, target: Session) -> None:
+    if target.start_at is not None:
+        _update_schedule_bounds(connection, target, {target.project_id})
+
+
+@event.listens_for(Session, 'after_update')
+def _session_updated(_mapper: Any, connection: sa.Connection, target: Session) -> None:
+    attrs = sa.inspect(target).attrs
+    if not any(
+        attrs[attr].history.has_changes()
+        for attr in ('start_at', 'end_at', 'project_id')
+    ):
+        return
+    # A session moved to another project changes the bounds of both projects
+    _update_schedule_bounds(
+        connection, target, {target.project_id, *attrs.project_id.history.deleted}
+    )
+
+
+@event.listens_for(Session, 'before_delete')
+def _session_deleted(_mapper: Any, connection: sa.Connection, target: Session) -> None:
+    # This runs before the row is deleted (when its attributes can still be loaded), so
+    # the session is excluded from the bounds
+    if target.start_at is not None:
+        _update_schedule_bounds(
+            connection, target, {target.project_id}, exclude_session_id=target.id
+        )
+
 
 with_roles(
     Project.active_rsvps,
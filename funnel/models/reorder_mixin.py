@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+from collections.abc import Sequence
 from typing import TYPE_CHECKING, Any, Protocol, Self, TypeVar
 
 from .base import Mapped, db, declarative_mixin, sa, sa_orm
@@ -126,6 +127,71 @@ class ReorderMixin:
         self.seq = new_seq_number
         db.session.flush()
 
+    @classmethod
+    def reorder_all(cls, items: Sequence[Reorderable]) -> None:
+        """
+        Reorder all items within a parent to match the given order.
+
+        `items` must contain every item in the parent's scope. The existing sequence
+        numbers are reassigned in ascending order to the items in their new order, so
+        the set of numbers in use does not change. This is applied with two UPDATE
+        statements after locking the parent's items, so that a parallel reorder of the
+        same parent waits for this transaction to complete. The first statement moves
+        items to negative sequence numbers so that no intermediate state conflicts with
+        a unique constraint on the sequence.
+        """
+        if not items:
+            return
+        first = items[0]
+        if any(item.__class__ is not first.__class__ for item in items):
+            raise TypeError("Items must be of the same type")
+        if any(item.parent_id != first.parent_id for item in items):
+            raise ValueError("Items must have the same parent")
+        item_cls = first.__class__
+
+        # Lock all items in the parent and load their current sequence numbers
+        current = db.session.execute(
+            sa.select(item_cls.id_, item_cls.seq)
+            .where(first.parent_scoped_reorder_query_filter)
+            .with_for_update(of=item_cls)
+        ).all()
+        item_ids = [item.id_ for item in items]
+        if len(set(item_ids)) != len(item_ids) or set(item_ids) != {
+            row.id_ for row in current
+        }:
+            raise ValueError("Items must include every item in the parent exactly once")
+        new_seqs = dict(zip(item_ids, sorted(row.seq for row in current), strict=True))
+        if all(new_seqs[row.id_] == row.seq for row in current):
+            # Already in the requested order. Nothing to do.
+            return
+
+        db.session.execute(
+            sa.update(item_cls)
+            .where(item_cls.id_.in_(item_ids))
+            .values(
+                {
+                    item_cls.seq: sa.case(
+                        {_id: -seq for _id, seq in new_seqs.items()},
+                        value=item_cls.id_,
+                    )
+                }
+            )
+            .execution_options(synchronize_session=False)
+        )
+        db.session.execute(
+            sa.update(item_cls)
+            .where(item_cls.id_.in_(item_ids))
+            .values({item_cls.seq: -item_cls.seq})
+            .execution_options(synchronize_session=False)
+        )
+        # Update loaded items, using the underlying attribute as `seq` may be a synonym
+        seq_prop = sa.inspect(item_cls).attrs['seq']
+        seq_key = (
+            seq_prop.name if isinstance(seq_prop, sa_orm.SynonymProperty) else 'seq'
+        )
+        for item in items:
+            sa_orm.attributes.set_committed_value(item, seq_key, new_seqs[item.id_])
+
     def reorder_before(
         self: ReorderSubclassProtocol, other: ReorderSubclassProtocol
     ) -> None:
@@ -2,18 +2,26 @@
 
 from __future__ import annotations
 
+from collections.abc import Collection
 from dataclasses import dataclass
 from enum import ReprEnum
 from typing import TYPE_CHECKING, Any, Literal, Self, overload
 
-from flask import current_app
+from sqlalchemy import event
 
 from baseframe import __
 from coaster.sqlalchemy import StateManager, with_roles
 from coaster.utils import DataclassFromType, LabeledEnum, NameTitle
 
+from ..typing import OptionalMigratedTables
 from . import types
-from .account import Account, AccountEmail, AccountEmailClaim, AccountPhone
+from .account import (
+    ACCOUNT_STATE,
+    Account,
+    AccountEmail,
+    AccountEmailClaim,
+    AccountPhone,
+)
 from .base import (
     Mapped,
     Model,
@@ -21,6 +29,7 @@ from .base import (
     UuidMixin,
     db,
     declared_attr,
+    postgresql,
     relationship,
     sa,
     sa_orm,
@@ -28,7 +37,7 @@ from .base import (
 from .project import Project
 from .project_membership import project_child_role_map
 
-__all__ = ['RSVP_STATUS', 'Rsvp', 'RsvpStateEnum']
+__all__ = ['RSVP_STATUS', 'ProjectRsvpCount', 'Rsvp', 'RsvpStateEnum']
 
 
 class RSVP_STATUS(LabeledEnum):  # noqa: N801
@@ -58,6 +67,16 @@ class RsvpStateEnum(_RsvpOptions, ReprEnum):
 
 class Rsvp(UuidMixin, NoIdMixin, Model):
     __tablename__ = 'rsvp'
+    __table_args__ = (
+        # For the participant list, which is paginated in this order
+        sa.Index(
+            'ix_rsvp_project_id_state_updated_at',
+            'project_id',
+            'state',
+            'updated_at',
+            'uuid',
+        ),
+    )
     project_id: Mapped[int] = sa_orm.mapped_column(
         sa.ForeignKey('project.id'), default=None, nullable=False, primary_key=True
     )
@@ -91,6 +110,8 @@ class Rsvp(UuidMixin, NoIdMixin, Model):
         ),
         default=RsvpStateEnum.AWAITING,
         nullable=False,
+        # Load the previous state on change, to update counts
+        active_history=True,
     )
     state = with_roles(
         StateManager['Rsvp']('_state', RSVP_STATUS, doc="RSVP answer"),
@@ -159,22 +180,6 @@ class Rsvp(UuidMixin, NoIdMixin, Model):
         """Participant's preferred phone number for this registration."""
         return self.participant.transport_for_sms(self.project.account) or ''
 
-    @classmethod
-    def migrate_account(cls, old_account: Account, new_account: Account) -> None:
-        """Migrate one account's data to another when merging accounts."""
-        project_ids = {rsvp.project_id for rsvp in new_account.rsvps}
-        for rsvp in old_account.rsvps:
-            if rsvp.project_id not in project_ids:
-                rsvp.participant = new_account
-            else:
-                current_app.logger.warning(
-                    "Discarding conflicting RSVP (%s) from %r on %r",
-                    rsvp._state,  # pylint: disable=protected-access
-                    old_account,
-                    rsvp.project,
-                )
-                db.session.delete(rsvp)
-
     @overload
     @classmethod
     def get_for(
@@ -204,3 +209,209 @@ class Rsvp(UuidMixin, NoIdMixin, Model):
                 db.session.add(result)
             return result
         return None
+
+
+class ProjectRsvpCount(NoIdMixin, Model):
+    """Count of RSVPs from active accounts in a project, for each RSVP state."""
+
+    __tablename__ = 'project_rsvp_count'
+
+    #: Id of the project
+    project_id: Mapped[int] = sa_orm.mapped_column(
+        sa.ForeignKey('project.id', ondelete='CASCADE'), primary_key=True
+    )
+    #: Project with these RSVPs
+    project: Mapped[Project] = relationship()
+    #: RSVP state code (see :class:`RSVP_STATUS`)
+    state: Mapped[str] = sa_orm.mapped_column(sa.CHAR(1), primary_key=True)
+    #: Number of RSVPs in this state from active accounts
+    count: Mapped[int] = sa_orm.mapped_column(default=0)
+
+    @classmethod
+    def add_counts(cls, counts: sa.Select) -> postgresql.Insert:
+        """
+        Return a statement that adds to stored counts, creating them as necessary.
+
+        :param counts: Select of (project_id, state, count) rows. Counts may be negative
+        """
+        stmt = postgresql.insert(cls).from_select(
+            ['project_id', 'state', 'count'], counts
+        )
+        return stmt.on_conflict_do_update(
+            index_elements=[cls.project_id, cls.state],
+            set_={
+                'count': cls.count + stmt.excluded.count,
+                'updated_at': sa.func.utcnow(),
+            },
+        )
+
+    @classmethod
+    def add_participants(
+        cls, account_ids: Collection[int], sign: Literal[1, -1]
+    ) -> postgresql.Insert:
+        """Return a statement that adds or removes all RSVPs from these accounts."""
+        # pylint: disable=protected-access
+        return cls.add_counts(
+            sa.select(Rsvp.project_id, Rsvp._state, sa.func.count() * sign)
+            .where(Rsvp.participant_id.in_(account_ids))
+            .group_by(Rsvp.project_id, Rsvp._state)
+        )
+
+    @classmethod
+    def migrate_account(
+        cls, old_account: Account, new_account: Account
+    ) -> OptionalMigratedTables:
+        """
+        Adjust counts for RSVPs of an account that is being merged into another.
+
+        This runs before RSVPs are migrated with SQL, which bypasses the RSVP event
+        listeners. RSVPs in projects where the new account has also responded are
+        discarded, so they are removed from counts. Other RSVPs move to the new account,
+        and are only recounted if the two accounts differ in being active.
+        """
+        # pylint: disable=protected-access
+        existing = sa_orm.aliased(Rsvp)
+        old_rsvps = (
+            sa.select(Rsvp.project_id, Rsvp._state, sa.func.count())
+            .where(Rsvp.participant_id == old_account.id)
+            .group_by(Rsvp.project_id, Rsvp._state)
+        )
+        if old_account.state.ACTIVE:
+            db.session.execute(
+                cls.add_counts(
+                    old_rsvps.with_only_columns(
+                        Rsvp.project_id, Rsvp._state, -sa.func.count()
+                    )
+                )
+            )
+        if new_account.state.ACTIVE:
+            db.session.execute(
+                cls.add_counts(
+                    old_rsvps.where(
+                        ~sa.exists().where(
+                            existing.project_id == Rsvp.project_id,
+                            existing.participant_id == new_account.id,
+                        )
+                    )
+                )
+            )
+        return None
+
+    @classmethod
+    def counts_for(cls, project: Project) -> dict[str, int]:
+        """Return non-zero RSVP counts for a project, by state."""
+        return dict(
+            db.session.execute(
+                sa.select(cls.state, cls.count).where(
+                    cls.project_id == project.id, cls.count > 0
+                )
+            ).tuples()
+        )
+
+    @classmethod
+    def refresh(cls) -> list[int]:
+        """
+        Correct stored counts that differ from RSVPs, in a single statement.
+
+        Returns ids of projects with corrected counts.
+        """
+        # pylint: disable=protected-access
+        actual = (
+            sa.select(
+                Rsvp.project_id,
+                Rsvp._state.label('state'),
+                sa.func.count().label('count'),
+            )
+            .join(Account, Rsvp.participant_id == Account.id)
+            .where(Account.state.ACTIVE)
+            .group_by(Rsvp.project_id, Rsvp._state)
+            .subquery()
+        )
+        stored = sa.select(cls.project_id, cls.state, cls.count).subquery()
+        count = sa.func.coalesce(actual.c.count, 0)
+        drifted = (
+            sa.select(
+                sa.func.coalesce(actual.c.project_id, stored.c.project_id),
+                sa.func.coalesce(actual.c.state, stored.c.state),
+                count,
+            )
+            .select_from(
+                actual.join(
+                    stored,
+                    sa.and_(
+                        actual.c.project_id == stored.c.project_id,
+                        actual.c.state == stored.c.state,
+                    ),
+                    full=True,
+                )
+            )
+            .where(count != sa.func.coalesce(stored.c.count, 0))
+        )
+        stmt = postgresql.insert(cls).from_select(
+            ['project_id', 'state', 'count'], drifted
+        )
+        return sorted(
+            set(
+                db.session.scalars(
+                    stmt.on_conflict_do_update(
+                        index_elements=[cls.project_id, cls.state],
+                        set_={
+                            'count': stmt.excluded.count,
+                            'updated_at': sa.func.utcnow(),
+                        },
+                    ).returning(cls.project_id)
+                )
+            )
+        )
+
+
+# MARK: RSVP counters
+
+
+def _count_rsvp(connection: sa.Connection, target: Rsvp, state: str, sign: int) -> None:
+    """Add or remove an RSVP from counts, if the participant's account is active."""
+    connection.execute(
+        ProjectRsvpCount.add_counts(
+            sa.select(
+                sa.literal(target.project_id, sa.Integer),
+                sa.literal(state, sa.CHAR(1)),
+                sa.literal(sign, sa.Integer),
+            ).where(Account.id == target.participant_id, Account.state.ACTIVE)
+        )
+    )
+
+
+@event.listens_for(Rsvp, 'after_insert')
+def _rsvp_inserted(_mapper: Any, connection: sa.Connection, target: Rsvp) -> None:
+    # pylint: disable=protected-access
+    _count_rsvp(connection, target, target._state, 1)
+
+
+@event.listens_for(Rsvp, 'after_update')
+def _rsvp_updated(_mapper: Any, connection: sa.Connection, target: Rsvp) -> None:
+    history = sa.inspect(target).attrs._state.history
+    for state in history.deleted:
+        _count_rsvp(connection, target, state, -1)
+    for state in history.added:
+        _count_rsvp(connection, target, state, 1)
+
+
+@event.listens_for(Rsvp, 'after_delete')
+def _rsvp_deleted(_mapper: Any, connection: sa.Connection, target: Rsvp) -> None:
+    # pylint: disable=protected-access
+    _count_rsvp(connection, target, target._state, -1)
+
+
+@event.listens_for(Account, 'after_update', propagate=True)
+def _participant_state_updated(
+    _mapper: Any, connection: sa.Connection, target: Account
+) -> None:
+    history = sa.inspect(target).attrs._state.history
+    if not history.deleted or not history.added:
+        return
+    was_active = history.deleted[0] == ACCOUNT_STATE.ACTIVE
+    is_active = history.added[0] == ACCOUNT_STATE.ACTIVE
+    if was_active != is_active:
+        connection.execute(
+            ProjectRsvpCount.add_participants([target.id], 1 if is_active else -1)
+        )
@@ -7,7 +7,7 @@ from datetime import datetime
 from coaster.sqlalchemy import with_roles
 
 from .account import Account
-from .base import Mapped, Model, NoIdMixin, db, relationship, sa, sa_orm
+from .base import Mapped, Model, NoIdMixin, relationship, sa, sa_orm
 from .project import Project
 from .session import Session
 
@@ -46,16 +46,6 @@ class SavedProject(NoIdMixin, Model):
         sa.UnicodeText, nullable=True
     )
 
-    @classmethod
-    def migrate_account(cls, old_account: Account, new_account: Account) -> None:
-        """Migrate one account's data to another when merging accounts."""
-        project_ids = {sp.project_id for sp in new_account.saved_projects}
-        for sp in old_account.saved_projects:
-            if sp.project_id not in project_ids:
-                sp.account = new_account
-            else:
-                db.session.delete(sp)
-
 
 class SavedSession(NoIdMixin, Model):
     __tablename__ = 'saved_session'
@@ -90,15 +80,3 @@ class SavedSession(NoIdMixin, Model):
     description: Mapped[str | None] = sa_orm.mapped_column(
         sa.UnicodeText, nullable=True
     )
-
-    @classmethod
-    def migrate_account(cls, old_account: Account, new_account: Account) -> None:
-        """Migrate one account's data to another when merging accounts."""
-        session_ids = {ss.session_id for ss in new_account.saved_sessions}
-        for ss in old_account.saved_sessions:
-            if ss.session_id not in session_ids:
-                ss.account = new_account
-            else:
-                # TODO: `if ss.description`, don't discard, but add it to existing's
-                # description
-                db.session.delete(ss)
@@ -5,16 +5,19 @@ from __future__ import annotations
 import hashlib
 import re
 from base64 import urlsafe_b64decode, urlsafe_b64encode
-from collections.abc import Iterable
+from collections.abc import Callable, Iterable, Mapping
+from datetime import datetime
 from os import urandom
-from typing import Literal, overload
+from typing import Any, Literal, overload
 
 from furl import furl
+from sqlalchemy import event, inspect
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.hybrid import Comparator
 
 from coaster.sqlalchemy import immutable, with_roles
 
+from ..signals import shortlink_changed
 from .account import Account
 from .base import (
     Mapped,
@@ -23,13 +26,14 @@ from .base import (
     UrlType,
     db,
     hybrid_property,
+    postgresql,
     relationship,
     sa,
     sa_orm,
 )
 from .helpers import profanity
 
-__all__ = ['Shortlink']
+__all__ = ['Shortlink', 'ShortlinkClickCount', 'name_to_bigint', 'url_blake2b160_hash']
 
 
 # MARK: Constants ----------------------------------------------------------------------
@@ -154,7 +158,8 @@ def url_blake2b160_hash(value: str | furl) -> bytes:
     """
     Hash a URL, for duplicate URL lookup.
 
-    This function is currently not used as its utility is uncertain:
+    This function is used for keys in the URL to shortlink cache, but is not stored in
+    the database as its utility there is uncertain:
 
     1. Since hashes are shorter than full URLs, a URL lookup by hash may have better
        performance.
@@ -278,6 +283,7 @@ class Shortlink(NoIdMixin, Model):
         shorter: bool = False,
         reuse: Literal[False] = False,
         actor: Account | None = None,
+        id_source: Callable[[], int | None] | None = None,
     ) -> Shortlink: ...
 
     @overload
@@ -290,6 +296,7 @@ class Shortlink(NoIdMixin, Model):
         shorter: bool = False,
         reuse: Literal[True] = True,
         actor: Account | None = None,
+        id_source: Callable[[], int | None] | None = None,
     ) -> Shortlink: ...
 
     @classmethod
@@ -301,12 +308,18 @@ class Shortlink(NoIdMixin, Model):
         shorter: bool = False,
         reuse: bool = False,
         actor: Account | None = None,
+        id_source: Callable[[], int | None] | None = None,
     ) -> Shortlink:
         """
         Create a new shortlink.
 
         This method MUST be used instead of the default constructor. It ensures the
         generated Shortlink instance has a unique id.
+
+        :param id_source: Optional callable that returns a reserved id for a shorter
+            shortlink, or `None` if it has none. Reserved ids must be known to be unused
+            and free of profanity (see :meth:`unused_short_ids`), as they are added to the
+            session without a collision check
         """
         # This method is not named __new__ because SQLAlchemy depends on the default
         # implementation of __new__ when loading instances from the database.
@@ -351,7 +364,15 @@ class Shortlink(NoIdMixin, Model):
                 raise ValueError(f"Shortlink name is not available: {name}") from exc
             return shortlink
 
-        # Not a custom name. Keep trying ids until one succeeds
+        # Not a custom name. Use a reserved id if available, as that does not need a
+        # savepoint and can be inserted whenever the session is next flushed
+        if shorter and id_source is not None and (reserved_id := id_source()):
+            shortlink = cls(id=reserved_id, url=url, created_by=actor)
+            shortlink.is_new = True
+            db.session.add(shortlink)
+            return shortlink
+
+        # Keep trying random ids until one succeeds
         shortlink = cls(id=random_bigint(shorter), url=url, created_by=actor)
         shortlink.is_new = True
         while True:
@@ -368,6 +389,106 @@ class Shortlink(NoIdMixin, Model):
                 shortlink.id = random_bigint(shorter)
         return shortlink
 
+    @classmethod
+    def new_many(
+        cls,
+        urls: Iterable[str | furl],
+        *,
+        shorter: bool = False,
+        actor: Account | None = None,
+        id_source: Callable[[], int | None] | None = None,
+    ) -> dict[str, Shortlink]:
+        """
+        Create or reuse shortlinks for many URLs at once, for batch jobs.
+
+        Existing shortlinks are found in a single query. Shortlinks for the remaining
+        URLs are inserted in bulk, skipping ids that are already in use and retrying
+        those URLs with new ids. Returns a dict of the given URLs to their shortlinks.
+
+        :param shorter: Use shorter ids, as in :meth:`new`
+        :param actor: Account creating the shortlinks
+        :param id_source: Source of reserved ids, as in :meth:`new`
+        """
+        normalized = {str(url): str(normalize_url(url)) for url in urls}
+        wanted = set(normalized.values())
+        if not wanted:
+            return {}
+        query = cls.query.filter(cls.url.in_(wanted), cls.enabled.is_(True))
+        if shorter:
+            query = query.filter(cls.id > 0, cls.id < SHORT_LINK_ID_UPPER_BOUND)
+        result: dict[str, Shortlink] = {}
+        for existing in query.order_by(cls.created_at):
+            result.setdefault(str(existing.url), existing)
+
+        def next_id() -> int:
+            if shorter and id_source is not None and (reserved_id := id_source()):
+                return reserved_id
+            while True:
+                candidate = random_bigint(shorter)
+                if not profanity.contains_profanity(bigint_to_name(candidate)):
+                    return candidate
+
+        def assign_ids(targets: Iterable[str]) -> dict[int, str]:
+            assigned: dict[int, str] = {}
+            for target in targets:
+                while (_id := next_id()) in assigned:
+                    pass
+                assigned[_id] = target
+            return assigned
+
+        pending = assign_ids(wanted - result.keys())
+        created_ids: list[int] = []
+        while pending:
+            inserted = set(
+                db.session.scalars(
+                    postgresql.insert(cls)
+                    .values(
+                        [
+                            {
+                                'id': _id,
+                                'url': url,
+                                'created_by_id': actor.id if actor else None,
+                                'enabled': True,
+                            }
+                            for _id, url in pending.items()
+                        ]
+                    )
+                    .on_conflict_do_nothing(index_elements=[cls.id])
+                    .returning(cls.id)
+                )
+            )
+            created_ids.extend(inserted)
+            # Retry collisions with new ids
+            pending = assign_ids(
+                url for _id, url in pending.items() if _id not in inserted
+            )
+        if created_ids:
+            for shortlink in cls.query.filter(cls.id.in_(created_ids)):
+                shortlink.is_new = True
+                result[str(shortlink.url)] = shortlink
+        return {url: result[target] for url, target in normalized.items()}
+
+    @classmethod
+    def unused_short_ids(cls, count: int) -> set[int]:
+        """
+        Return up to `count` random ids for shorter shortlinks that are not in use.
+
+        The ids are free of profanity and are checked against the database in a single
+        query. This is used to maintain a pool of reserved ids for :meth:`new`, and
+        uniqueness is not guaranteed if a parallel process inserts the same id later.
+        """
+        candidates = {random_bigint(smaller=True) for _c in range(count)}
+        candidates = {
+            _id
+            for _id in candidates
+            if not profanity.contains_profanity(bigint_to_name(_id))
+        }
+        if not candidates:
+            return set()
+        return candidates - set(
+            db.session.scalars(sa.select(cls.id).where(cls.id.in_(candidates)))
+        )
+
     @classmethod
     def name_available(cls, name: str) -> bool:
         """Check if a name is available to use for a new shortlink."""
@@ -399,3 +520,98 @@ class Shortlink(NoIdMixin, Model):
         if obj is not None and (ignore_enabled or obj.enabled):
             return obj
         return None
+
+
+# Cached redirects must be invalidated when a shortlink is enabled or disabled, but only
+# after the change is committed, or a concurrent request may cache the old state again.
+# Changes are collected in the session as (id, url) pairs, as the instances are expired
+# by the time the transaction is committed
+
+
+@event.listens_for(Shortlink, 'after_update')
+def _shortlink_updated(_mapper: Any, _connection: Any, target: Shortlink) -> None:
+    if inspect(target).attrs.enabled.history.has_changes():
+        session = sa_orm.object_session(target)
+        if session is not None:
+            session.info.setdefault('shortlink_changed', set()).add(
+                (target.id, str(target.url))
+            )
+
+
+@event.listens_for(sa_orm.Session, 'after_commit')
+def _send_shortlink_changed(session: sa_orm.Session) -> None:
+    for shortlink_id, url in session.info.pop('shortlink_changed', ()):
+        shortlink_changed.send(shortlink_id, url=url)
+
+
+@event.listens_for(sa_orm.Session, 'after_soft_rollback')
+def _discard_shortlink_changed(
+    session: sa_orm.Session, previous_transaction: sa_orm.SessionTransaction
+) -> None:
+    # Keep changes outside a rolled back savepoint. They may also be discarded by a
+    # later rollback, but an extra invalidation is harmless
+    if previous_transaction.parent is None:
+        session.info.pop('shortlink_changed', None)
+
+
+class ShortlinkClickCount(NoIdMixin, Model):
+    """Hourly count of clicks on a shortlink, recorded in batches."""
+
+    __tablename__ = 'shortlink_click_count'
+
+    #: Id of the shortlink that was clicked
+    shortlink_id: Mapped[int] = sa_orm.mapped_column(
+        sa.BigInteger,
+        sa.ForeignKey('shortlink.id', ondelete='CASCADE'),
+        primary_key=True,
+    )
+    #: Shortlink that was clicked
+    shortlink: Mapped[Shortlink] = relationship()
+    #: Start of the hour in which the clicks were counted
+    hour: Mapped[datetime] = sa_orm.mapped_column(
+        sa.TIMESTAMP(timezone=True), primary_key=True
+    )
+    #: Number of clicks in this hour
+    count: Mapped[int] = sa_orm.mapped_column(sa.BigInteger, default=0)
+
+    @classmethod
+    def add_counts(cls, hour: datetime, counts: Mapping[int, int]) -> None:
+        """
+        Add to click counts for many shortlinks in an hour, in a single statement.
+
+        Counts are added to any existing counts for the hour, so a batch may be
+        recorded in parts. Counts for shortlinks that no longer exist are discarded.
+        """
+        if not counts:
+            return
+        existing_ids = set(
+            db.session.scalars(
+                sa.select(Shortlink.id).where(Shortlink.id.in_(counts.keys()))
+            )
+        )
+        values = [
+            {'shortlink_id': _id, 'hour': hour, 'count': count}
+            for _id, count in counts.items()
+            if _id in existing_ids
+        ]
+        if not values:
+            return
+        stmt = postgresql.insert(cls).values(values)
+        db.session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[cls.shortlink_id, cls.hour],
+                set_={
+                    'count': cls.count + stmt.excluded.count,
+                    'updated_at': sa.func.utcnow(),
+                },
+            )
+        )
+
+    @classmethod
+    def total_for(cls, shortlink: Shortlink) -> int:
+        """Return total recorded clicks for a shortlink."""
+        return db.session.scalar(
+            sa.select(sa.func.coalesce(sa.func.sum(cls.count), 0)).where(
+                cls.shortlink_id == shortlink.id
+            )
+        )
@@ -0,0 +1,225 @@
+"""Precomputed site metrics for the site admin dashboard."""
+
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy.dialects.postgresql import INTERVAL
+
+from .account import Account, User
+from .auth_client import AuthClient
+from .base import Mapped, Model, NoIdMixin, db, postgresql, relationship, sa, sa_orm
+from .login_session import LoginSession, auth_client_login_session
+
+__all__ = ['AUTH_CLIENT_ACTIVE_PERIODS', 'AuthClientActiveCount', 'SiteMetric']
+
+#: Periods for counting active users of auth clients, from shortest to longest, as
+#: (name, Postgres interval) pairs
+AUTH_CLIENT_ACTIVE_PERIODS: tuple[tuple[str, str], ...] = (
+    ('hour', '1 hour'),
+    ('day', '1 day'),
+    ('week', '1 week'),
+    ('month', '1 month'),
+    ('quarter', '3 months'),
+    ('halfyear', '6 months'),
+    ('year', '1 year'),
+)
+
+
+def _interval_ago(interval: str) -> sa.ColumnElement[datetime]:
+    """Return an expression for the timestamp this interval before now."""
+    return sa.func.utcnow() - sa.cast(interval, INTERVAL)
+
+
+class SiteMetric(NoIdMixin, Model):
+    """
+    Site-wide count of users, in time buckets.
+
+    Metrics and their buckets:
+
+    * ``users``: Active user accounts, per day
+    * ``dau``: Users with a login session accessed since the start of the day
+    * ``mau``: Users with a login session accessed in the 30 days before the refresh,
+      per day
+    * ``signups``: Active user accounts that joined in the month, per month
+
+    Counts for the current bucket are replaced on each refresh, and a bucket retains
+    the count from its last refresh once it is past.
+    """
+
+    __tablename__ = 'site_metric'
+
+    #: Name of the metric
+    metric: Mapped[str] = sa_orm.mapped_column(sa.Unicode, primary_key=True)
+    #: Start of the time bucket
+    bucket: Mapped[datetime] = sa_orm.mapped_column(
+        sa.TIMESTAMP(timezone=True), primary_key=True
+    )
+    #: Count for this metric in this bucket
+    count: Mapped[int] = sa_orm.mapped_column(default=0)
+
+    @classmethod
+    def upsert(cls, rows: sa.Select | sa.CompoundSelect) -> None:
+        """Replace stored counts with (metric, bucket, count) rows."""
+        stmt = postgresql.insert(cls).from_select(['metric', 'bucket', 'count'], rows)
+        db.session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[cls.metric, cls.bucket],
+                set_={'count': stmt.excluded.count, 'updated_at': sa.func.utcnow()},
+            )
+        )
+
+    @classmethod
+    def refresh(cls, full: bool = False) -> None:
+        """
+        Refresh metrics for the current buckets.
+
+        Signups are counted from the month of the last refresh, or from the beginning
+        if `full` is specified or there are no stored signups.
+        """
+        today = sa.func.date_trunc('day', sa.func.utcnow())
+        active_sessions = (
+            sa.select(sa.func.count(sa.func.distinct(LoginSession.account_id)))
+            .join(Account, LoginSession.account_id == Account.id)
+            .where(Account.state.ACTIVE)
+        )
+        cls.upsert(
+            sa.select(
+                sa.literal('users'),
+                today,
+                sa.select(sa.func.count())
+                .select_from(User)
+                .where(User.state.ACTIVE, User.type_filter())
+                .scalar_subquery(),
+            ).union_all(
+                sa.select(
+                    sa.literal('dau'),
+                    today,
+                    active_sessions.where(
+                        LoginSession.accessed_at >= today
+                    ).scalar_subquery(),
+                ),
+                sa.select(
+                    sa.literal('mau'),
+                    today,
+                    active_sessions.where(
+                        LoginSession.accessed_at > _interval_ago('30 days')
+                    ).scalar_subquery(),
+                ),
+            )
+        )
+
+        since = (
+            None
+            if full
+            else db.session.scalar(
+                sa.select(sa.func.max(cls.bucket)).where(cls.metric == 'signups')
+            )
+        )
+        month = sa.func.date_trunc('month', Account.joined_at)
+        signups = (
+            sa.select(sa.literal('signups'), month, sa.func.count())
+            .select_from(Account)
+            .where(
+                Account.state.ACTIVE,
+                Account.joined_at.is_not(None),
+                User.type_filter(),
+            )
+            .group_by(month)
+        )
+        if since is not None:
+            signups = signups.where(Account.joined_at >= since)
+        cls.upsert(signups)
+
+    @classmethod
+    def latest(cls, metric: str) -> int:
+        """Return the count in the latest bucket for a metric."""
+        return (
+            db.session.scalar(
+                sa.select(cls.count)
+                .where(cls.metric == metric)
+                .order_by(cls.bucket.desc())
+                .limit(1)
+            )
+            or 0
+        )
+
+    @classmethod
+    def series(cls, metric: str) -> list[tuple[datetime, int]]:
+        """Return (bucket, count) pairs for a metric, in order of time."""
+        return list(
+            db.session.execute(
+                sa.select(cls.bucket, cls.count)
+                .where(cls.metric == metric)
+                .order_by(cls.bucket)
+            ).tuples()
+        )
+
+
+class AuthClientActiveCount(NoIdMixin, Model):
+    """
+    Count of active users of an auth client over each of a set of periods.
+
+    A user is counted in every period that includes their last login session access
+    via the auth client (see :data:`AUTH_CLIENT_ACTIVE_PERIODS`).
+    """
+
+    __tablename__ = 'auth_client_active_count'
+
+    #: Id of the auth client
+    auth_client_id: Mapped[int] = sa_orm.mapped_column(
+        sa.ForeignKey('auth_client.id', ondelete='CASCADE'), primary_key=True
+    )
+    #: Auth client with these active users
+    auth_client: Mapped[AuthClient] = relationship()
+    #: Name of the period (see :data:`AUTH_CLIENT_ACTIVE_PERIODS`)
+    period: Mapped[str] = sa_orm.mapped_column(sa.Unicode, primary_key=True)
+    #: Number of active users in this period
+    count: Mapped[int] = sa_orm.mapped_column(default=0)
+
+    @classmethod
+    def refresh(cls) -> None:
+        """Replace all counts, scanning client login sessions in the longest period."""
+        longest = AUTH_CLIENT_ACTIVE_PERIODS[-1][1]
+        accessed_at = auth_client_login_session.c.accessed_at
+        counts = (
+            sa.select(
+                auth_client_login_session.c.auth_client_id,
+                *(
+                    sa.func.count(sa.func.distinct(LoginSession.account_id))
+                    .filter(accessed_at >= _interval_ago(interval))
+                    .label(period)
+                    for period, interval in AUTH_CLIENT_ACTIVE_PERIODS
+                ),
+            )
+            .join(
+                LoginSession,
+                auth_client_login_session.c.login_session_id == LoginSession.id,
+            )
+            .join(Account, LoginSession.account_id == Account.id)
+            .where(Account.state.ACTIVE, accessed_at >= _interval_ago(longest))
+            .group_by(auth_client_login_session.c.auth_client_id)
+            .subquery()
+        )
+        rows = sa.union_all(
+            *(
+                sa.select(
+                    counts.c.auth_client_id, sa.literal(period), counts.c[period]
+                ).where(counts.c[period] > 0)
+                for period, _interval in AUTH_CLIENT_ACTIVE_PERIODS
+            )
+        )
+        db.session.execute(sa.delete(cls))
+        db.session.execute(
+            sa.insert(cls).from_select(['auth_client_id', 'period', 'count'], rows)
+        )
+
+    @classmethod
+    def counts(cls) -> dict[AuthClient, dict[str, int]]:
+        """Return non-zero counts by period for each auth client."""
+        result: dict[AuthClient, dict[str, int]] = {}
+        for auth_client, period, count in db.session.execute(
+            sa.select(AuthClient, cls.period, cls.count).join(cls.auth_client)
+        ).tuples():
+            result.setdefault(auth_client, {})[period] = count
+        return result
@@ -3,7 +3,8 @@
 from __future__ import annotations
 
 from contextlib import suppress
-from typing import Literal, NamedTuple, TypeVar, overload
+from functools import cache
+from typing import Literal, NamedTuple, TypeVar, cast, overload
 
 import phonenumbers
 from sqlalchemy import PrimaryKeyConstraint, UniqueConstraint
@@ -25,9 +26,12 @@ from .typing import ModelIdProtocol
 __all__ = [
     'AccountAndAnchor',
     'IncompleteUserMigrationError',
+    'MergePreview',
+    'MigrationCount',
     'getextid',
     'getuser',
     'merge_accounts',
+    'preview_merge_accounts',
 ]
 
 
@@ -137,23 +141,48 @@ _A1 = TypeVar('_A1', bound=Account)
 _A2 = TypeVar('_A2', bound=Account)
 
 
-def merge_accounts(current_account: _A1, other_account: _A2) -> _A1 | _A2 | None:
-    """Merge two user accounts and return the new user account."""
-    keep_account: _A1 | _A2
-    merge_account: _A1 | _A2
+class MigrationCount(NamedTuple):
+    """Rows referring to an instance in one table column, as changed by a migration."""
 
-    app.logger.info(
-        "Preparing to merge accounts %s and %s", current_account, other_account
-    )
+    table: str
+    column: str
+    #: Rows moved to the new instance
+    moved: int
+    #: Rows discarded because the new instance had a conflicting row
+    discarded: int
+
+
+class MergePreview(NamedTuple):
+    """Dry run of :func:`merge_accounts`."""
+
+    keep_account: Account
+    merge_account: Account
+    #: Whether the merge will succeed
+    safe: bool
+    #: Changes per table column, for columns that referred to the merged account
+    counts: list[MigrationCount]
+
+
+def _keep_and_merge(
+    current_account: _A1, other_account: _A2
+) -> tuple[_A1 | _A2, _A1 | _A2]:
+    """Return the account to keep and the account to merge into it."""
     # Always keep the older account and merge from the newer account. This keeps the
     # UUID stable when there are multiple mergers as new accounts are easy to create,
     # but old accounts cannot be created.
     current_account_date = current_account.joined_at or current_account.created_at
     other_account_date = other_account.joined_at or other_account.created_at
     if current_account_date < other_account_date:
-        keep_account, merge_account = current_account, other_account
-    else:
-        keep_account, merge_account = other_account, current_account
+        return current_account, other_account
+    return other_account, current_account
+
+
+def merge_accounts(current_account: _A1, other_account: _A2) -> _A1 | _A2 | None:
+    """Merge two user accounts and return the new user account."""
+    app.logger.info(
+        "Preparing to merge accounts %s and %s", current_account, other_account
+    )
+    keep_account, merge_account = _keep_and_merge(current_account, other_account)
 
     # 1. Inspect all tables for foreign key references to merge_account and switch to
     # keep_account.
@@ -193,6 +222,112 @@ def merge_accounts(current_account: _A1, other_account: _A2) -> _A1 | _A2 | None
     return None
 
 
+def preview_merge_accounts(
+    current_account: Account, other_account: Account
+) -> MergePreview:
+    """
+    Report the changes :func:`merge_accounts` will make, without making them.
+
+    The merge is performed in a savepoint that is then rolled back.
+    """
+    keep_account, merge_account = _keep_and_merge(current_account, other_account)
+    safe, counts = preview_migrate_instances(
+        merge_account, keep_account, 'migrate_account'
+    )
+    return MergePreview(keep_account, merge_account, safe, counts)
+
+
+# MARK: Migration engine ---------------------------------------------------------------
+
+# Migrations are planned from table metadata once per model. Every column with a
+# foreign key to the model's id is migrated with a single UPDATE statement. If the
+# column is part of a unique or primary key constraint, rows that would conflict with
+# the new instance's existing rows are first discarded with a single DELETE statement.
+# Models that need to merge conflicting rows rather than discard them implement a
+# helper method (`migrate_account` for accounts), and the tables they process are
+# skipped. Columns that are unique by themselves, or are part of a partial unique
+# index, cannot be migrated without a helper and will abort the migration.
+
+
+class TableMigration(NamedTuple):
+    """Plan to migrate one column that refers to the instance being migrated."""
+
+    table: sa.Table
+    column: sa.Column
+    #: Other columns in each unique constraint that includes this column. A row
+    #: conflicts if the new instance has a row with the same values in any of these
+    conflict_keys: tuple[tuple[sa.Column, ...], ...]
+    #: Reason this column cannot be migrated without a helper method, if any
+    blocked: str | None
+
+
+class MigrationPlan(NamedTuple):
+    """Plan to migrate all references to instances of a model."""
+
+    #: Models with a helper method, which are called first
+    helpers: list[type[Model]]
+    #: Tables to migrate with SQL statements, unless already processed by a helper
+    tables: list[TableMigration]
+    #: All columns that refer to the model, including in tables processed by helpers
+    references: list[sa.Column]
+
+
+def _plan_table(table: sa.Table, column: sa.Column) -> TableMigration:
+    if column.unique:
+        return TableMigration(table, column, (), "column is unique")
+    conflict_keys = [
+        tuple(c for c in constraint.columns if c is not column)
+        for constraint in table.constraints
+        if isinstance(constraint, PrimaryKeyConstraint | UniqueConstraint)
+        and column in constraint.columns
+    ]
+    for index in table.indexes:
+        if index.unique and column in index.columns:
+            if index.dialect_kwargs.get('postgresql_where') is not None:
+                return TableMigration(
+                    table, column, (), f"column is in partial unique index {index.name}"
+                )
+            conflict_keys.append(tuple(c for c in index.columns if c is not column))
+    if () in conflict_keys:
+        return TableMigration(table, column, (), "column is unique")
+    return TableMigration(table, column, tuple(conflict_keys), None)
+
+
+@cache
+def plan_migration(
+    model: type[ModelIdProtocol], helper_method: str | None = None
+) -> MigrationPlan:
+    """
+    Plan the migration of references to instances of a model.
+
+    The model must derive from :class:`Model` and must have a single primary key
+    column named ``id`` (typically provided by :class:`BaseMixin`).
+    """
+    # Instance id column (for foreign keys); 'id' is from IdMixin via BaseMixin
+    id_column = model.__table__.c.id
+    helpers = [
+        subclass
+        for subclass in Model.__subclasses__()
+        if subclass is not model
+        and helper_method is not None
+        and hasattr(subclass, helper_method)
+    ]
+    references = [
+        column
+        for table in Model.metadata.sorted_tables
+        for column in table.columns
+        if any(fkey.column is id_column for fkey in column.foreign_keys)
+    ]
+    # Tables of models with helper methods are never migrated with SQL
+    helper_tables = {subclass.__table__.name for subclass in helpers}
+    tables = [
+        _plan_table(column.table, column)
+        for column in references
+        if column.table.name not in helper_tables
+    ]
+    return MigrationPlan(helpers, tables, references)
+
+
 def do_migrate_instances(
     old_instance: ModelIdProtocol,
     new_instance: ModelIdProtocol,
@@ -202,119 +337,118 @@ def do_migrate_instances(
     Migrate references to old instance of any model to provided new instance.
 
     The model must derive from :class:`Model` and must have a single primary key
-    column named ``id`` (typically provided by :class:`BaseMixin`).
+    column named ``id`` (typically provided by :class:`BaseMixin`). Returns `False` if
+    some references could not be migrated, in which case the caller must roll back.
     """
     if old_instance == new_instance:
         raise ValueError("Old and new are the same")
 
-    # User id column (for foreign keys); 'id' is from IdMixin via BaseMixin
-    id_column = old_instance.__class__.__table__.c.id
-
+    plan = plan_migration(old_instance.__class__, helper_method)
     # Session (for queries)
     session = old_instance.query.session
-
     # Keep track of all migrated tables
     migrated_tables: set[str] = set()
     safe_to_remove_instance = True
 
-    def do_migrate_table(table: sa.Table) -> bool:
-        target_columns = []
-        for column in table.columns:
-            for fkey in column.foreign_keys:
-                if fkey.column is id_column:
-                    # This table needs migration on this column
-                    target_columns.append(column)
-                    break
-
-        # Check for unique constraint on instance id columns (single or multi-index)
-        # If so, return False (migration incomplete)
-        for column in target_columns:
-            if column.unique:
-                # Note: This will fail for secondary relationship tables, which
-                # will have a unique index but no model on which to place
-                # helper_method, unless one of the related models handles
-                # migrations AND signals a way for this table to be skipped
-                # here. This is why model.helper_method below (migrate_account) returns
-                # a list of table names it has processed.
-                app.logger.error(
-                    "do_migrate_table interrupted because column is unique: {column}",
-                    extra={'column': column},
-                )
-                return False
-
-        # Now check for multi-column indexes
-        for constraint in table.constraints:
-            if isinstance(constraint, PrimaryKeyConstraint | UniqueConstraint):
-                for column in constraint.columns:
-                    if column in target_columns:
-                        # The target column (typically account_id) is part of a unique
-                        # or primary key constraint. We can't migrate automatically.
-                        app.logger.error(
-                            "do_migrate_table interrupted because column is part of a"
-                            " unique constraint: %s",
-                            column,
-                        )
-                        return False
-
-        # This following code is disabled but preserved because we don't fully
-        # understand multi-db bind setups. It isn't a current requirement because we
-        # don't have fkeys spanning databases, but we may in future (in which case it's
-        # a relationship and not a db-enforced foreign key). Original comment follows:
-
-        # If this table uses Flask-SQLAlchemy's bind_key mechanism,
-        # session.execute won't bind to the correct engine, so the table cannot be
-        # migrated. If we attempt to retrieve and connect to the correct engine, we may
-        # lose the transaction. We need to confirm this.
-
-        # if table.info.get('bind_key'):
-        #     app.logger.error(
-        #         "do_migrate_table interrupted because table has bind_key: %s",
-        #         table.name,
-        #     )
-        #     return False
-
-        for column in target_columns:
-            session.execute(
-                table.update()
-                .where(column == old_instance.id_)
-                .values(**{column.name: new_instance.id_})
+    for model in plan.helpers:
+        try:
+            result: OptionalMigratedTables = getattr(model, cast(str, helper_method))(
+                old_instance, new_instance
             )
             session.flush()
+            if isinstance(result, list | tuple | set):
+                migrated_tables.update(result)
+            migrated_tables.add(model.__table__.name)
+        except IncompleteUserMigrationError:
+            safe_to_remove_instance = False
+            app.logger.error(
+                "do_migrate_instances interrupted because"
+                " IncompleteUserMigrationError raised by %s",
+                model,
+            )
 
-        # All done, table successfully migrated. Hurrah!
-        return True
+    # Push pending changes to the database before migrating with SQL statements
+    session.flush()
+    for step in plan.tables:
+        if step.table.name in migrated_tables:
+            continue
+        if step.blocked:
+            app.logger.error(
+                "do_migrate_instances cannot migrate %s: %s", step.column, step.blocked
+            )
+            safe_to_remove_instance = False
+            continue
+        for key in step.conflict_keys:
+            existing = step.table.alias()
+            session.execute(
+                step.table.delete().where(
+                    step.column == old_instance.id_,
+                    sa.exists().where(
+                        existing.c[step.column.name] == new_instance.id_,
+                        *(existing.c[c.name] == c for c in key),
+                    ),
+                )
+            )
+        session.execute(
+            step.table.update()
+            .where(step.column == old_instance.id_)
+            .values({step.column.name: new_instance.id_})
+        )
+    return safe_to_remove_instance
 
-    # Look up all subclasses of the base class
-    for model in Model.__subclasses__():
-        if model != old_instance.__class__:
-            if helper_method and hasattr(model, helper_method):
-                try:
-                    result: OptionalMigratedTables = getattr(model, helper_method)(
-                        old_instance, new_instance
-                    )
-                    session.flush()
-                    if isinstance(result, list | tuple | set):
-                        migrated_tables.update(result)
-                    migrated_tables.add(model.__table__.name)
-                except IncompleteUserMigrationError:
-                    safe_to_remove_instance = False
-                    app.logger.error(
-                        "_do_merge_into interrupted because"
-                        "  IncompleteUserMigrationError raised by %s",
-                        model,
-                    )
-            else:
-                # No model-backed migration. Figure out all foreign key references to
-                # user table
-                if not do_migrate_table(model.__table__):
-                    safe_to_remove_instance = False
-                migrated_tables.add(model.__table__.name)
-
-    # Now look in the metadata for any tables we missed
-    for table in Model.metadata.tables.values():
-        if table.name not in migrated_tables:
-            if not do_migrate_table(table):
-                safe_to_remove_instance = False
-            migrated_tables.add(table.name)
 
-    return safe_to_remove_instance
+def _reference_counts(
+    columns: list[sa.Column], old_id: int, new_id: int
+) -> list[tuple[int, int]]:
+    """Count rows referring to the old and new instances in each column."""
+    return [
+        tuple(
+            db.session.execute(
+                sa.select(
+                    sa.func.count().filter(column == old_id),
+                    sa.func.count().filter(column == new_id),
+                ).where(column.in_([old_id, new_id]))
+            ).one()
+        )
+        for column in columns
+    ]
+
+
+def preview_migrate_instances(
+    old_instance: ModelIdProtocol,
+    new_instance: ModelIdProtocol,
+    helper_method: str | None = None,
+) -> tuple[bool, list[MigrationCount]]:
+    """
+    Report the changes :func:`do_migrate_instances` will make, without making them.
+
+    The migration is performed in a savepoint that is then rolled back. Returns whether
+    the migration will succeed, and the rows moved and discarded in each column that
+    refers to the old instance.
+    """
+    plan = plan_migration(old_instance.__class__, helper_method)
+    old_id, new_id = old_instance.id_, new_instance.id_
+    db.session.flush()
+    before = _reference_counts(plan.references, old_id, new_id)
+    savepoint = db.session.begin_nested()
+    try:
+        safe = do_migrate_instances(old_instance, new_instance, helper_method)
+        db.session.flush()
+        after = _reference_counts(plan.references, old_id, new_id)
+    finally:
+        savepoint.rollback()
+    counts = []
+    for column, (old_before, new_before), (old_after, new_after) in zip(
+        plan.references, before, after, strict=True
+    ):
+        if old_before:
+            moved = new_after - new_before
+            counts.append(
+                MigrationCount(
+                    column.table.name,
+                    column.name,
+                    moved,
+                    old_before - old_after - moved,
+                )
+            )
+    return safe, counts
@@ -0,0 +1,191 @@
+"""Breached password checks, with a local cache or an offline corpus."""
+
+from __future__ import annotations
+
+import mmap
+import os.path
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from hashlib import sha1
+from http import HTTPStatus
+from typing import IO
+
+import requests
+from flask import Flask
+
+from . import redis_store
+
+__all__ = ['BreachCorpus', 'PwnedPasswords', 'parse_range', 'pwned_passwords']
+
+RANGE_API_URL = 'https://api.pwnedpasswords.com/range/{prefix}'
+#: Range responses are cached in Redis for this long (seconds)
+RANGE_CACHE_TIMEOUT = 7 * 86400
+RANGE_CACHE_KEY = 'pwned_range/v1/'
+#: Hash field that marks a range as cached, since Redis does not store empty hashes
+RANGE_CACHE_SENTINEL = ''
+
+#: Breach corpus header. Records follow in ascending order of SHA-1 digest, each the
+#: 20 byte digest followed by the breach count as a 4 byte big-endian unsigned int
+CORPUS_MAGIC = b'PWNDSHA1'
+CORPUS_DIGEST_SIZE = 20
+CORPUS_RECORD_SIZE = CORPUS_DIGEST_SIZE + 4
+CORPUS_MAX_COUNT = 2**32 - 1
+
+
+def parse_range(text: str) -> dict[str, int]:
+    """Parse a range API response into a dict of hash suffix: breach count."""
+    # This API returns minimal plaintext containing ``suffix:count``, one per line.
+    # The following code is defensive, attempting to add mitigations (inner->outer):
+    # 1. If there's no : separator, assume a count of 1
+    # 2. Strip text on either side of the colon
+    # 3. Ensure the suffix is uppercase
+    # 4. If count is not a number, default it to 0 (ie, this is not a match)
+    return {
+        line_suffix.upper(): int(line_count) if line_count.isdigit() else 0
+        for line_suffix, line_count in (
+            (split1.strip(), split2.strip())
+            for split1, split2 in (
+                (line + (':1' if ':' not in line else '')).split(':', 1)
+                for line in text.splitlines()
+            )
+        )
+    }
+
+
+@dataclass
+class BreachCorpus:
+    """Memory-mapped breach corpus, searchable by SHA-1 digest."""
+
+    path: str
+    _mmap: mmap.mmap = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        with open(self.path, 'rb') as corpus_file:
+            self._mmap = mmap.mmap(corpus_file.fileno(), 0, access=mmap.ACCESS_READ)
+        if (
+            self._mmap[: len(CORPUS_MAGIC)] != CORPUS_MAGIC
+            or (len(self._mmap) - len(CORPUS_MAGIC)) % CORPUS_RECORD_SIZE
+        ):
+            self._mmap.close()
+            raise ValueError(f"{self.path} is not a breach corpus")
+
+    def __len__(self) -> int:
+        return (len(self._mmap) - len(CORPUS_MAGIC)) // CORPUS_RECORD_SIZE
+
+    def count(self, digest: bytes) -> int:
+        """Return the breach count for a SHA-1 digest, using a binary search."""
+        low, high = 0, len(self)
+        while low < high:
+            mid = (low + high) // 2
+            offset = len(CORPUS_MAGIC) + mid * CORPUS_RECORD_SIZE
+            record_digest = self._mmap[offset : offset + CORPUS_DIGEST_SIZE]
+            if record_digest < digest:
+                low = mid + 1
+            elif record_digest > digest:
+                high = mid
+            else:
+                return int.from_bytes(
+                    self._mmap[
+                        offset + CORPUS_DIGEST_SIZE : offset + CORPUS_RECORD_SIZE
+                    ]
+                )
+        return 0
+
+    def close(self) -> None:
+        self._mmap.close()
+
+    @staticmethod
+    def write(lines: Iterable[str], dest: IO[bytes]) -> int:
+        """
+        Write a breach corpus from ``HASH:COUNT`` lines, returning the record count.
+
+        This is the format of the Pwned Passwords downloader with SHA-1 hashes. Lines
+        must be in ascending order of hash, without duplicates.
+        """
+        dest.write(CORPUS_MAGIC)
+        previous = b''
+        records = 0
+        for lineno, line in enumerate(lines, 1):
+            if not (line := line.strip()):
+                continue
+            try:
+                phash, count = line.split(':', 1)
+                digest = bytes.fromhex(phash)
+                if len(digest) != CORPUS_DIGEST_SIZE:
+                    raise ValueError(phash)
+                count_bytes = min(int(count), CORPUS_MAX_COUNT).to_bytes(4)
+            except ValueError:
+                raise ValueError(
+                    f"Line {lineno} is not a SHA-1 hash and count"
+                ) from None
+            if digest <= previous:
+                raise ValueError(f"Line {lineno} is out of order")
+            dest.write(digest + count_bytes)
+            previous = digest
+            records += 1
+        return records
+
+
+@dataclass
+class PwnedPasswords:
+    """
+    Breach counts for passwords, from the Pwned Passwords range API or a corpus.
+
+    Range API responses are cached in Redis, keyed by the SHA-1 prefix, so the API is
+    called once per prefix per cache period. If an offline corpus is configured, it is
+    used instead of the API.
+    """
+
+    corpus: BreachCorpus | None = None
+    cache_timeout: int = RANGE_CACHE_TIMEOUT
+
+    def range(self, prefix: str) -> dict[str, int] | None:
+        """Fetch the range for a SHA-1 prefix from the API, or None if unavailable."""
+        try:
+            rv = requests.get(RANGE_API_URL.format(prefix=prefix), timeout=10)
+        except requests.RequestException:
+            return None
+        if rv.status_code != HTTPStatus.OK:
+            return None
+        return parse_range(rv.text)
+
+    def cached_range_count(self, prefix: str, suffix: str) -> int | None:
+        """Return the breach count from the range cache, fetching if not cached."""
+        cache_key = RANGE_CACHE_KEY + prefix
+        cached, count = redis_store.hmget(cache_key, [RANGE_CACHE_SENTINEL, suffix])
+        if cached is not None:
+            return int(count or 0)
+        matches = self.range(prefix)
+        if matches is None:
+            # Don't cache errors, and let the next call retry
+            return None
+        with redis_store.pipeline() as pipe:
+            pipe.delete(cache_key)
+            pipe.hset(cache_key, mapping={RANGE_CACHE_SENTINEL: 0, **matches})
+            pipe.expire(cache_key, self.cache_timeout)
+            pipe.execute()
+        return matches.get(suffix, 0)
+
+    def breach_count(self, password: str) -> int | None:
+        """Return number of times a password was found in breaches, None if unknown."""
+        phash = sha1(password.encode(), usedforsecurity=False)
+        if self.corpus is not None:
+            return self.corpus.count(phash.digest())
+        hexhash = phash.hexdigest().upper()
+        return self.cached_range_count(hexhash[:5], hexhash[5:])
+
+    def init_app(self, app: Flask) -> None:
+        if 'PWNED_PASSWORDS_CACHE_TIMEOUT' in app.config:
+            self.cache_timeout = int(app.config['PWNED_PASSWORDS_CACHE_TIMEOUT'])
+        if app.config.get('PWNED_PASSWORDS_CORPUS'):
+            if not os.path.exists(app.config['PWNED_PASSWORDS_CORPUS']):
+                app.logger.warning(
+                    "Pwned passwords corpus missing at %s",
+                    app.config['PWNED_PASSWORDS_CORPUS'],
+                )
+            else:
+                self.corpus = BreachCorpus(app.config['PWNED_PASSWORDS_CORPUS'])
+
+
+# Export a singleton
+pwned_passwords = PwnedPasswords()
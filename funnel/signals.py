@@ -48,6 +48,10 @@ phonenumber_refcount_dropping = model_signals.signal(
     'phonenumber-refcount-dropping',
     doc="Signal indicating that a PhoneNumber’s refcount is about to drop",
 )
+shortlink_changed = model_signals.signal(
+    'shortlink-changed',
+    doc="Signal indicating that a Shortlink was enabled or disabled (after commit)",
+)
 
 # Higher level signals
 user_login = app_signals.signal('user-login')
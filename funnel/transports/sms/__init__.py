@@ -4,9 +4,11 @@
 
 from . import send, template
 from .send import (
+    MockSmsTransport,
     init,
     make_exotel_token,
     send_sms,
+    send_sms_many,
     send_via_exotel,
     send_via_twilio,
     validate_exotel_token,
@@ -15,6 +17,7 @@ from .template import DLT_VAR_MAX_LENGTH, SmsPriority, SmsTemplate, WebOtpTempla
 
 __all__ = [
     "DLT_VAR_MAX_LENGTH",
+    "MockSmsTransport",
     "SmsPriority",
     "SmsTemplate",
     "WebOtpTemplate",
@@ -22,6 +25,7 @@ __all__ = [
     "make_exotel_token",
     "send",
     "send_sms",
+    "send_sms_many",
     "send_via_exotel",
     "send_via_twilio",
     "template",
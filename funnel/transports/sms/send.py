@@ -2,10 +2,16 @@
 
 from __future__ import annotations
 
-from collections.abc import Callable
+import asyncio
+import json
+from collections.abc import Callable, Sequence
 from dataclasses import dataclass
+from functools import partial
+from secrets import token_hex
+from time import monotonic
 from typing import cast
 
+import httpx
 import itsdangerous
 import phonenumbers
 import requests
@@ -22,15 +28,18 @@ from ...models import PhoneNumber, PhoneNumberBlockedError, sa
 from ...serializers import token_serializer
 from ..exc import (
     TransportConnectionError,
+    TransportError,
     TransportRecipientError,
     TransportTransactionError,
 )
 from .template import SmsPriority, SmsTemplate
 
 __all__ = [
+    'MockSmsTransport',
     'init',
     'make_exotel_token',
     'send_sms',
+    'send_sms_many',
     'send_via_exotel',
     'send_via_twilio',
     'validate_exotel_token',
@@ -39,9 +48,28 @@ __all__ = [
 DND_END_HOUR = 9
 DND_START_HOUR = 19
 
+#: Maximum number of SMS messages in flight across all providers in a bulk send
+SMS_BULK_CONCURRENCY = 10
+#: Timeout for each provider API call, in seconds
+SMS_TIMEOUT = 30
+
 indian_timezone = timezone('Asia/Kolkata')
 
 
+@dataclass
+class SmsRequest:
+    """A prepared API call to an SMS provider, for use by single and bulk senders."""
+
+    #: Provider name, for error messages
+    provider: str
+    url: str
+    auth: tuple[str, str]
+    data: dict[str, str]
+    #: Parser for the provider's response (status code and text), returning a
+    #: transaction id or raising :exc:`TransportError`
+    parse: Callable[[int, str], str]
+
+
 @dataclass
 class SmsSender:
     """An SMS sender by number prefix."""
@@ -50,6 +78,10 @@ class SmsSender:
     requires_config: set
     func: Callable
     init: Callable | None = None
+    #: Request builder for bulk sending, returning `None` if the message is dropped
+    prepare: Callable[[PhoneNumber, SmsTemplate, bool], SmsRequest | None] | None = None
+    #: Maximum API calls per second in a bulk send
+    rate_limit: float = 1.0
 
 
 def get_phone_number(
@@ -111,21 +143,10 @@ def okay_to_message_in_india_right_now() -> bool:
     return bool(now.hour >= DND_END_HOUR and now.hour < DND_START_HOUR)
 
 
-def send_via_exotel(
-    phone: str | phonenumbers.PhoneNumber | PhoneNumber,
-    message: SmsTemplate,
-    callback: bool = True,
-) -> str:
-    """
-    Send the SMS using Exotel, for Indian phone numbers.
-
-    :param phone: Phone number
-    :param message: Message to deliver to phone number
-    :param callback: Whether to request a status callback
-    :return: Transaction id
-    """
-    phone_number = get_phone_number(phone)
-
+def exotel_request(
+    phone_number: PhoneNumber, message: SmsTemplate, callback: bool = True
+) -> SmsRequest | None:
+    """Prepare an Exotel API call, returning `None` if the message must be dropped."""
     sid = app.config['SMS_EXOTEL_SID']
     token = app.config['SMS_EXOTEL_TOKEN']
     payload = {
@@ -138,14 +159,14 @@ def send_via_exotel(
         app.logger.warning(
             "Dropping SMS message with unknown template id: %s", str(message)
         )
-        return ''
+        return None
     if (
         message.message_priority in (SmsPriority.OPTIONAL, SmsPriority.NORMAL)
         and not okay_to_message_in_india_right_now()
     ):
         # TODO: Implement deferred sending for `NORMAL` priority
         app.logger.warning("Dropping SMS message in DND time: %s", str(message))
-        return ''
+        return None
     payload['DltTemplateId'] = message.registered_templateid
     if callback:
         payload['StatusCallback'] = url_for(
@@ -154,29 +175,59 @@ def send_via_exotel(
             _method='POST',
             secret_token=make_exotel_token(cast(str, phone_number.number)),
         )
+    return SmsRequest(
+        provider='Exotel',
+        url=f'https://twilix.exotel.in/v1/Accounts/{sid}/Sms/send.json',
+        auth=(sid, token),
+        data=payload,
+        parse=_parse_exotel_response,
+    )
+
+
+def _parse_exotel_response(status_code: int, text: str) -> str:
+    if status_code in (200, 201):
+        # All good
+        try:
+            jsonresponse = json.loads(text)
+            if isinstance(jsonresponse, list | tuple) and jsonresponse:
+                jsonresponse = jsonresponse[0]
+            sid = jsonresponse['SMSMessage']['Sid']
+        except (ValueError, LookupError, TypeError) as exc:
+            raise TransportTransactionError(
+                _("Unparseable response from Exotel"), text
+            ) from exc
+        if not isinstance(sid, str):
+            raise TransportTransactionError(_("Unparseable response from Exotel"), text)
+        return sid
+    raise TransportTransactionError(_("Exotel API error"), status_code, text)
+
+
+def send_via_exotel(
+    phone: str | phonenumbers.PhoneNumber | PhoneNumber,
+    message: SmsTemplate,
+    callback: bool = True,
+) -> str:
+    """
+    Send the SMS using Exotel, for Indian phone numbers.
+
+    :param phone: Phone number
+    :param message: Message to deliver to phone number
+    :param callback: Whether to request a status callback
+    :return: Transaction id
+    """
+    phone_number = get_phone_number(phone)
+    request = exotel_request(phone_number, message, callback)
+    if request is None:
+        return ''
     try:
         r = requests.post(
-            f'https://twilix.exotel.in/v1/Accounts/{sid}/Sms/send.json',
-            timeout=30,
-            auth=(sid, token),
-            data=payload,
+            request.url, timeout=SMS_TIMEOUT, auth=request.auth, data=request.data
         )
-        if r.status_code in (200, 201):
-            # All good
-            jsonresponse = r.json()
-            if isinstance(jsonresponse, list | tuple) and jsonresponse:
-                transactionid = jsonresponse[0].get('SMSMessage', {}).get('Sid')
-            elif isinstance(jsonresponse, dict):
-                transactionid = jsonresponse.get('SMSMessage', {}).get('Sid')
-            else:
-                raise TransportTransactionError(
-                    _("Unparseable response from Exotel"), r.text
-                )
-            phone_number.msg_sms_sent_at = sa.func.utcnow()
-            return transactionid
-        raise TransportTransactionError(_("Exotel API error"), r.status_code, r.text)
     except requests.ConnectionError as exc:
         raise TransportConnectionError(_("Exotel not reachable")) from exc
+    transactionid = request.parse(r.status_code, r.text)
+    phone_number.msg_sms_sent_at = sa.func.utcnow()
+    return transactionid
 
 
 def send_via_twilio(
@@ -217,42 +268,80 @@ def send_via_twilio(
         phone_number.msg_sms_sent_at = sa.func.utcnow()
         return msg.sid
     except TwilioRestException as exc:
-        # Error codes from
-        # https://www.twilio.com/docs/iam/test-credentials#test-sms-messages-parameters-To
-        # https://support.twilio.com/hc/en-us/articles/223181868-Troubleshooting-Undelivered-Twilio-SMS-Messages
-        # https://www.twilio.com/docs/api/errors#2-anchor
-        if exc.code == 21211:
-            raise TransportRecipientError(_("This phone number is invalid")) from exc
-        if exc.code == 21408:
-            app.logger.error(
-                "Twilio unsupported country (21408) for %s", phone_number.number
-            )
-            raise TransportRecipientError(
-                _(
-                    "Hasgeek cannot send messages to phone numbers in this country."
-                    "Please contact support via email at {email} if this affects your"
-                    "use of the site"
-                ).format(email=app.config['SITE_SUPPORT_EMAIL'])
-            ) from exc
-        if exc.code == 21610:
-            raise TransportRecipientError(
-                _("This phone number has been blocked")
-            ) from exc
-        if exc.code == 21612:
-            app.logger.error(
-                "Twilio unsupported carrier (21612) for %s", phone_number.number
-            )
-            raise TransportRecipientError(
-                _("This phone number is unsupported at this time")
-            ) from exc
-        if exc.code == 21614:
-            raise TransportRecipientError(
-                _("This phone number cannot receive SMS messages")
-            ) from exc
-        app.logger.error("Unhandled Twilio error %d: %s", exc.code, exc.msg)
+        raise twilio_error(exc.code, exc.msg, phone_number.number) from exc
+
+
+def twilio_request(
+    phone_number: PhoneNumber, message: SmsTemplate, callback: bool = True
+) -> SmsRequest:
+    """Prepare a Twilio API call, for bulk sending without the Twilio client."""
+    account = app.config['SMS_TWILIO_SID']
+    token = app.config['SMS_TWILIO_TOKEN']
+    payload = {
+        'From': app.config['SMS_TWILIO_FROM'],
+        'To': cast(str, phone_number.number),
+        'Body': str(message),
+    }
+    if callback:
+        payload['StatusCallback'] = url_for(
+            'process_twilio_event', _external=True, _method='POST'
+        )
+    return SmsRequest(
+        provider='Twilio',
+        url=f'https://api.twilio.com/2010-04-01/Accounts/{account}/Messages.json',
+        auth=(account, token),
+        data=payload,
+        parse=partial(_parse_twilio_response, phone_number.number),
+    )
+
+
+def _parse_twilio_response(number: str | None, status_code: int, text: str) -> str:
+    try:
+        jsonresponse = json.loads(text)
+        if status_code in (200, 201):
+            return str(jsonresponse['sid'])
+        code, msg = jsonresponse.get('code'), jsonresponse.get('message')
+    except (ValueError, LookupError, TypeError, AttributeError) as exc:
         raise TransportTransactionError(
-            _("Hasgeek cannot send an SMS message to this phone number at this time")
+            _("Unparseable response from Twilio"), text
         ) from exc
+    raise twilio_error(code, msg, number)
+
+
+def twilio_error(
+    code: int | None, msg: str | None, number: str | None
+) -> TransportError:
+    """Return a transport exception for a Twilio error code."""
+    # Error codes from
+    # https://www.twilio.com/docs/iam/test-credentials#test-sms-messages-parameters-To
+    # https://support.twilio.com/hc/en-us/articles/223181868-Troubleshooting-Undelivered-Twilio-SMS-Messages
+    # https://www.twilio.com/docs/api/errors#2-anchor
+    if code == 21211:
+        return TransportRecipientError(_("This phone number is invalid"))
+    if code == 21408:
+        app.logger.error("Twilio unsupported country (21408) for %s", number)
+        return TransportRecipientError(
+            _(
+                "Hasgeek cannot send messages to phone numbers in this country."
+                "Please contact support via email at {email} if this affects your"
+                "use of the site"
+            ).format(email=app.config['SITE_SUPPORT_EMAIL'])
+        )
+    if code == 21610:
+        return TransportRecipientError(_("This phone number has been blocked"))
+    if code == 21612:
+        app.logger.error("Twilio unsupported carrier (21612) for %s", number)
+        return TransportRecipientError(
+            _("This phone number is unsupported at this time")
+        )
+    if code == 21614:
+        return TransportRecipientError(
+            _("This phone number cannot receive SMS messages")
+        )
+    app.logger.error("Unhandled Twilio error %s: %s", code, msg)
+    return TransportTransactionError(
+        _("Hasgeek cannot send an SMS message to this phone number at this time")
+    )
 
 
 #: Supported senders (ordered by priority)
@@ -262,11 +351,15 @@ sender_registry = [
         {'SMS_EXOTEL_SID', 'SMS_EXOTEL_TOKEN', 'SMS_DLT_ENTITY_ID'},
         send_via_exotel,
         lambda: SmsTemplate.init_app(app),  # Only init DLT ids if Exotel is configured
+        prepare=exotel_request,
+        rate_limit=3,  # Exotel's default limit is 200 calls per minute
     ),
     SmsSender(
         '+',
         {'SMS_TWILIO_SID', 'SMS_TWILIO_TOKEN', 'SMS_TWILIO_FROM'},
         send_via_twilio,
+        prepare=twilio_request,
+        rate_limit=10,
     ),
 ]
 
@@ -280,12 +373,16 @@ senders_by_prefix: list[
     ]
 ] = []
 
+#: Available senders as per config, for bulk sending
+active_senders: list[SmsSender] = []
+
 
 def init() -> bool:
     """Process available senders."""
     for provider in sender_registry:
         if all(app.config.get(var) for var in provider.requires_config):
             senders_by_prefix.append((provider.prefix, provider.func))
+            active_senders.append(provider)
             if provider.init:
                 provider.init()
     return bool(senders_by_prefix)
@@ -310,3 +407,178 @@ def send_sms(
         if phone.startswith(prefix):
             return sender(phone_number, message, callback)
     raise TransportRecipientError(_("No service provider available for this recipient"))
+
+
+# MARK: Bulk sending -------------------------------------------------------------------
+
+
+class _RateLimiter:
+    """Space out the start of API calls to stay within a provider's rate limit."""
+
+    def __init__(self, rate: float) -> None:
+        self.interval = 1 / rate
+        self.next_at = 0.0
+
+    async def wait(self) -> None:
+        # There is no await between reading and updating `next_at`, so concurrent
+        # tasks in the event loop are each assigned a distinct slot
+        now = monotonic()
+        start_at = max(now, self.next_at)
+        self.next_at = start_at + self.interval
+        if start_at > now:
+            await asyncio.sleep(start_at - now)
+
+
+class MockSmsTransport(httpx.AsyncBaseTransport):
+    """
+    Mock SMS provider for tests and benchmarks of :func:`send_sms_many`.
+
+    Responds to every API call with a random transaction id after a delay, in Twilio's
+    format for Twilio URLs and in Exotel's format otherwise. The number of calls and
+    the peak number of concurrent calls are recorded.
+    """
+
+    def __init__(self, latency: float = 0.1) -> None:
+        self.latency = latency
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+        sid = token_hex(16)
+        if request.url.host == 'api.twilio.com':
+            return httpx.Response(201, json={'sid': sid})
+        return httpx.Response(200, json={'SMSMessage': {'Sid': sid}})
+
+
+async def _send_requests(
+    requests_by_index: dict[int, tuple[SmsRequest, SmsSender]],
+    transport: httpx.AsyncBaseTransport | None,
+    on_result: Callable[[int, str | TransportError], None],
+) -> None:
+    """Make prepared API calls concurrently over a shared connection pool."""
+    semaphore = asyncio.Semaphore(SMS_BULK_CONCURRENCY)
+    limiters = {
+        sender.prefix: _RateLimiter(sender.rate_limit)
+        for _request, sender in requests_by_index.values()
+    }
+
+    async with httpx.AsyncClient(
+        transport=transport,
+        timeout=SMS_TIMEOUT,
+        limits=httpx.Limits(max_connections=SMS_BULK_CONCURRENCY),
+    ) as client:
+
+        async def send(request: SmsRequest, sender: SmsSender) -> str | TransportError:
+            await limiters[sender.prefix].wait()
+            async with semaphore:
+                try:
+                    response = await client.post(
+                        request.url, auth=request.auth, data=request.data
+                    )
+                except httpx.TransportError as exc:
+                    app.logger.warning("%s not reachable: %r", request.provider, exc)
+                    return TransportConnectionError(
+                        _("{provider} not reachable").format(provider=request.provider)
+                    )
+            try:
+                return request.parse(response.status_code, response.text)
+            except TransportError as exc:
+                return exc
+
+        async def send_and_report(
+            index: int, request: SmsRequest, sender: SmsSender
+        ) -> None:
+            try:
+                result = await send(request, sender)
+            except Exception as exc:  # noqa: BLE001
+                # An unexpected error must not stop the rest of the batch. The message
+                # may have been sent, so it is reported as a transaction error
+                app.logger.exception(
+                    "Unexpected error sending SMS via %s", request.provider
+                )
+                result = TransportTransactionError(str(exc))
+            on_result(index, result)
+
+        # Exceptions in `on_result` are returned instead of cancelling other sends,
+        # and raised after all the sends are complete
+        for exc in await asyncio.gather(
+            *(
+                send_and_report(index, request, sender)
+                for index, (request, sender) in requests_by_index.items()
+            ),
+            return_exceptions=True,
+        ):
+            if isinstance(exc, BaseException):
+                raise exc
+
+
+def send_sms_many(
+    messages: Sequence[
+        tuple[str | phonenumbers.PhoneNumber | PhoneNumber, SmsTemplate]
+    ],
+    callback: bool = True,
+    transport: httpx.AsyncBaseTransport | None = None,
+    on_result: Callable[[int, str | TransportError], None] | None = None,
+) -> list[str | TransportError]:
+    """
+    Send many SMS messages concurrently and return a transaction id for each.
+
+    Provider API calls share a connection pool, with up to :data:`SMS_BULK_CONCURRENCY`
+    in flight, and are spaced out to stay within each provider's rate limit. Errors are
+    returned in place of transaction ids so that one failure does not affect the other
+    messages. As with :func:`send_sms`, an empty transaction id indicates a message
+    that was dropped.
+
+    :param messages: Sequence of phone numbers and messages
+    :param callback: Whether to request status callbacks
+    :param transport: Alternative transport for API calls, like :class:`MockSmsTransport`
+    :param on_result: Optional callable that receives the index and result of each
+        message as soon as it is known, to save results that are already sent even if
+        a later message fails
+    """
+    results: list[str | TransportError] = [''] * len(messages)
+
+    def report(index: int, result: str | TransportError) -> None:
+        results[index] = result
+        if not isinstance(result, TransportError) and index in phone_numbers:
+            phone_numbers[index].msg_sms_sent_at = sa.func.utcnow()
+        if on_result is not None:
+            on_result(index, result)
+
+    phone_numbers: dict[int, PhoneNumber] = {}
+    requests_by_index: dict[int, tuple[SmsRequest, SmsSender]] = {}
+    for index, (phone, message) in enumerate(messages):
+        try:
+            phone_number = get_phone_number(phone)
+            number = cast(str, phone_number.number)  # Guaranteed not None
+            sender = next(
+                (_s for _s in active_senders if number.startswith(_s.prefix)), None
+            )
+            if sender is None:
+                raise TransportRecipientError(
+                    _("No service provider available for this recipient")
+                )
+            if sender.prepare is None:
+                report(index, sender.func(phone_number, message, callback))
+                continue
+            request = sender.prepare(phone_number, message, callback)
+        except TransportError as exc:
+            report(index, exc)
+            continue
+        if request is None:
+            report(index, '')
+        else:
+            phone_numbers[index] = phone_number
+            requests_by_index[index] = (request, sender)
+
+    if requests_by_index:
+        asyncio.run(_send_requests(requests_by_index, transport, report))
+    return results
@@ -74,7 +74,8 @@ class SmsTemplate:
 
     Format fields for the Python template can be set and accessed directly from the
     class instance. The formatted string is available as :property:`text`, or by casting
-    the template object to a string.
+    the template object to a string. Call :meth:`render` to format it immediately and
+    freeze it against further changes, as when it will be sent from another context.
 
     Templates can be split into a base "registered template" class and an "application
     template" subclass. This pattern allows for multiple application templates riding
@@ -142,6 +143,7 @@ class SmsTemplate:
     # Type hints for mypy. These attributes are set in __init__
     _text: str | None
     _plaintext: str | None
+    _frozen: bool
     _format_kwargs: dict[str, Any]
     template_static_len: ClassVar[int]
     template_var_len: int
@@ -150,6 +152,7 @@ class SmsTemplate:
         """Initialize template with variables."""
         object.__setattr__(self, '_text', None)
         object.__setattr__(self, '_plaintext', None)
+        object.__setattr__(self, '_frozen', False)
         object.__setattr__(self, '_format_kwargs', {})
         # Calculate the formatted length before variables are inserted. Subclasses
         # can use this to truncate variables to fit. We do this in the instance and not
@@ -220,6 +223,19 @@ class SmsTemplate:
             Formatter().vformat(self.template, (), self),  # type: ignore[call-overload]
         )
 
+    def render(self) -> str:
+        """
+        Format the template now and freeze the text against further changes.
+
+        Templates may use lazy strings that format in the current locale, so this must
+        be called with the recipient's locale active when the message will be sent
+        from elsewhere.
+        """
+        if self._text is None:
+            self.format()
+        object.__setattr__(self, '_frozen', True)
+        return self.text
+
     @property
     def text(self) -> str:
         """Format template into text."""
@@ -265,6 +281,12 @@ class SmsTemplate:
             object.__setattr__(self, attr, value)
         else:
             # If not, assume template variable
+            if self._frozen:
+                raise AttributeError(
+                    f"Template has been rendered and is frozen: {attr}",
+                    name=attr,
+                    obj=self,
+                )
             self._format_kwargs[attr] = value
             object.__setattr__(self, '_text', None)
             # We do not reset `_plaintext` here as the `plaintext` property checks only
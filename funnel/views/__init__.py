@@ -12,6 +12,7 @@ from . import (  # skipcq: PY-W2000
     auth_client,
     auth_notify,
     comment,
+    comment_search,
     contact,
     decorators,
     email,
@@ -24,11 +25,13 @@ from . import (  # skipcq: PY-W2000
     membership,
     mixins,
     notification,
+    notification_counter,
     notification_feed,
     notification_preferences,
     notifications,
     organization,
     otp,
+    otp_store,
     profile,
     project,
     project_sponsor,
@@ -69,7 +69,6 @@ from .helpers import (
     autoset_timezone_and_locale,
     avatar_color_count,
     render_redirect,
-    validate_rate_limit,
 )
 from .login import LogoutBrowserDataTemplate
 from .login_session import (
@@ -678,10 +677,7 @@ class AccountView(ClassView):
             flash(_("This OTP has expired"), category='error')
             return render_redirect(url_for('add_email'))
 
-        form = EmailOtpForm(valid_otp=otp_session.otp)
-        if form.is_submitted():
-            # Allow 5 guesses per 60 seconds
-            validate_rate_limit('account_email-otp', otp_session.token, 5, 60)
+        form = EmailOtpForm(verify_otp=otp_session.verify)
         if form.validate_on_submit():
             OtpSession.delete()
             if TYPE_CHECKING:
@@ -902,10 +898,7 @@ class AccountView(ClassView):
             flash(_("This OTP has expired"), category='error')
             return render_redirect(url_for('add_phone'))
 
-        form = OtpForm(valid_otp=otp_session.otp)
-        if form.is_submitted():
-            # Allow 5 guesses per 60 seconds
-            validate_rate_limit('account_phone-otp', otp_session.token, 5, 60)
+        form = OtpForm(verify_otp=otp_session.verify)
         if form.validate_on_submit():
             OtpSession.delete()
             if TYPE_CHECKING:
@@ -1,12 +1,14 @@
 """Helper functions for account delete validation."""
 
-from collections.abc import Callable
+from collections.abc import Callable, Collection
 from dataclasses import dataclass
 from typing import TypeVar
 
-from baseframe import __
+from baseframe import __, statsd
 
-from ..models import Account
+from .. import app, redis_store, rq
+from ..models import Account, db
+from .jobs import queue_forget_email_phone
 
 # MARK: Delete validator registry ------------------------------------------------------
 
@@ -103,3 +105,93 @@ def validate_account_delete(obj: Account) -> DeleteValidator | None:
         if not proceed:
             return validator
     return None
+
+
+# MARK: Bulk account deletion ----------------------------------------------------------
+
+# Site admins can delete many accounts at once (such as spam accounts) by adding their
+# ids to a queue in Redis. A background job deletes them in batches, using one
+# statement per table for each batch and committing after each, so no single
+# transaction holds locks for long. Ids are removed from the queue only after their
+# batch is committed, so a job that is interrupted can be resumed by queueing again.
+# The job holds the lock while it works, so only one job processes the queue at a time.
+
+#: Redis set of account ids waiting to be deleted
+ACCOUNT_DELETE_QUEUE = 'account_delete_queue'
+#: Redis hash with counts of queued, deleted and skipped accounts
+ACCOUNT_DELETE_PROGRESS = 'account_delete_progress'
+#: Lock held by the job while processing the queue. The job renews it on each batch,
+#: and it expires in case the job is lost
+ACCOUNT_DELETE_LOCK = 'lock/account_delete_queue'
+ACCOUNT_DELETE_LOCK_TIMEOUT = 15 * 60
+#: Number of accounts to delete in each database transaction
+ACCOUNT_DELETE_BATCH_SIZE = 100
+
+
+def queue_account_delete(account_ids: Collection[int]) -> int:
+    """
+    Queue accounts for deletion in a background job, returning the count queued.
+
+    This can be called with no ids to resume processing an interrupted queue.
+    """
+    if account_ids and not redis_store.exists(
+        ACCOUNT_DELETE_QUEUE, ACCOUNT_DELETE_LOCK
+    ):
+        # Nothing is pending, so start counting progress afresh
+        redis_store.delete(ACCOUNT_DELETE_PROGRESS)
+    queued = redis_store.sadd(ACCOUNT_DELETE_QUEUE, *account_ids) if account_ids else 0
+    if queued:
+        redis_store.hincrby(ACCOUNT_DELETE_PROGRESS, 'queued', queued)
+    if redis_store.scard(ACCOUNT_DELETE_QUEUE) and redis_store.set(
+        ACCOUNT_DELETE_LOCK, 1, nx=True, ex=ACCOUNT_DELETE_LOCK_TIMEOUT
+    ):
+        process_account_delete_queue.enqueue()
+    return queued
+
+
+def account_delete_progress() -> dict[str, int]:
+    """Return counts of queued, deleted, skipped and pending accounts."""
+    progress = {'queued': 0, 'deleted': 0, 'skipped': 0} | {
+        key: int(value)
+        for key, value in redis_store.hgetall(ACCOUNT_DELETE_PROGRESS).items()
+    }
+    progress['pending'] = redis_store.scard(ACCOUNT_DELETE_QUEUE)
+    return progress
+
+
+def delete_accounts(account_ids: Collection[int]) -> int:
+    """Delete accounts that pass all delete validators, returning the count deleted."""
+    accounts = [
+        account
+        for account in Account.all_safe_to_delete(account_ids)
+        .order_by(Account.id)
+        .with_for_update(of=Account)
+        if account.views.validate_account_delete() is None
+    ]
+    Account.delete_all(accounts)
+    db.session.commit()
+    # There is no request teardown here, so queue the email addresses and phone numbers
+    # released by this batch right away
+    queue_forget_email_phone()
+    if accounts:
+        statsd.incr('account.deleted', count=len(accounts))
+    return len(accounts)
+
+
+@rq.job(queue='funnel')
+def process_account_delete_queue() -> None:
+    """Delete all accounts waiting in the queue, one batch at a time."""
+    while batch := redis_store.srandmember(
+        ACCOUNT_DELETE_QUEUE, ACCOUNT_DELETE_BATCH_SIZE
+    ):
+        redis_store.expire(ACCOUNT_DELETE_LOCK, ACCOUNT_DELETE_LOCK_TIMEOUT)
+        deleted = delete_accounts([int(account_id) for account_id in batch])
+        redis_store.srem(ACCOUNT_DELETE_QUEUE, *batch)
+        app.logger.info("Deleted %d of %d queued accounts", deleted, len(batch))
+        pipe = redis_store.pipeline()
+        pipe.hincrby(ACCOUNT_DELETE_PROGRESS, 'deleted', deleted)
+        pipe.hincrby(ACCOUNT_DELETE_PROGRESS, 'skipped', len(batch) - deleted)
+        pipe.execute()
+    redis_store.delete(ACCOUNT_DELETE_LOCK)
+    # Accounts queued after the last batch was read would have found the lock taken
+    queue_account_delete(())
@@ -149,10 +149,7 @@ def reset_otp() -> ReturnView:
         flash(_("This OTP has expired"), category='error')
         return render_redirect(url_for('reset'))
 
-    form = OtpForm(valid_otp=otp_session.otp)
-    if form.is_submitted():
-        # Allow 5 guesses per 60 seconds
-        validate_rate_limit('account_reset_otp', otp_session.token, 5, 60)
+    form = OtpForm(verify_otp=otp_session.verify)
     if form.validate_on_submit():
         # If the OTP is correct, continue with the email reset link flow
         otp_session.mark_transport_active()
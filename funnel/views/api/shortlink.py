@@ -9,7 +9,7 @@ from coaster.views import requestform
 from ... import app, shortlinkapp
 from ...auth import current_auth
 from ...models import Shortlink, db
-from ..helpers import app_url_for, validate_is_app_url
+from ..helpers import app_url_for, reserved_shortlink_id, validate_is_app_url
 
 
 # Add future hasjobapp route here
@@ -48,7 +48,9 @@ def create_shortlink(
                 }, 422
             sl = existing  # Return existing if it's a match
     else:
-        sl = Shortlink.new(url, shorter=shorter, reuse=True)
+        sl = Shortlink.new(
+            url, shorter=shorter, reuse=True, id_source=reserved_shortlink_id
+        )
     status_code = 201 if sl.is_new else 200
     db.session.add(sl)
     db.session.commit()
@@ -75,10 +75,9 @@ def comment_url(obj: Comment) -> str | None:
 
 @Commentset.views('json_comments')
 def commentset_json(obj: Commentset) -> list[RoleAccessProxy[Comment]]:
-    toplevel_comments = obj.toplevel_comments.order_by(Comment.created_at.desc())
     return [
         comment.current_access(datasets=('json', 'related'))
-        for comment in toplevel_comments
+        for comment in obj.comment_tree()
         if comment.state.PUBLIC or comment.has_replies
     ]
 
@@ -0,0 +1,239 @@
+"""Comment search and bulk spam reports for site moderators."""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+from dataclasses import asdict, dataclass
+from datetime import UTC, date, datetime, time, timedelta
+from hashlib import blake2b
+from typing import Any, Self
+
+from flask import abort
+
+from baseframe import cache, statsd
+from coaster.utils import utcnow
+
+from .. import app, rq
+from ..models import (
+    Account,
+    Comment,
+    CommentModeratorReport,
+    Query,
+    User,
+    db,
+    sa,
+    sa_orm,
+)
+from ..utils import abort_null
+
+#: Comment states that can be searched for. ``reportable`` includes all states in
+#: which a comment can be reported as spam
+COMMENT_SEARCH_STATES = (
+    'reportable',
+    'submitted',
+    'screened',
+    'hidden',
+    'verified',
+    'spam',
+    'deleted',
+)
+COMMENT_SEARCH_PAGE_SIZE = 100
+COMMENT_SEARCH_MAX_PAGE_SIZE = 500
+#: Counts require a scan of all matching comments, so they are cached briefly
+COMMENT_SEARCH_COUNT_TIMEOUT = 5 * 60
+#: Number of comments reported per transaction in a bulk report
+COMMENT_REPORT_BATCH_SIZE = 500
+#: Maximum number of comments that can be reported in one bulk report
+COMMENT_REPORT_MAX_COUNT = 10_000
+
+
+@dataclass
+class CommentSearch:
+    """Filters for a search across all comments."""
+
+    #: Text to search for in the comment or in the name of the author
+    query: str = ''
+    #: One of :data:`COMMENT_SEARCH_STATES`
+    state: str = 'reportable'
+    #: Earliest date of the comment (UTC)
+    since: date | None = None
+    #: Last date of the comment (UTC)
+    until: date | None = None
+    #: Maximum age of the author's account in days, to find comments by new accounts
+    author_age: int | None = None
+
+    @classmethod
+    def from_args(cls, args: Mapping[str, str]) -> Self:
+        """Make a search from request arguments, aborting with 400 if invalid."""
+        state = args.get('state') or 'reportable'
+        since = args.get('since')
+        until = args.get('until')
+        author_age = args.get('author_age')
+        if state not in COMMENT_SEARCH_STATES:
+            abort(400)
+        try:
+            search = cls(
+                query=abort_null(args.get('query', '')),
+                state=state,
+                since=date.fromisoformat(since) if since else None,
+                until=date.fromisoformat(until) if until else None,
+                author_age=int(author_age) if author_age else None,
+            )
+        except ValueError:
+            abort(400)
+        return search
+
+    def as_args(self) -> dict[str, str]:
+        """Return non-empty filters as request arguments."""
+        return {
+            key: str(value)
+            for key, value in asdict(self).items()
+            if value is not None and value != ''
+        }
+
+    @property
+    def is_bulk_reportable(self) -> bool:
+        """
+        Test if all comments matching this search can be reported as spam at once.
+
+        This requires a search for reportable comments with at least one filter, so
+        that a bulk report cannot include every comment on the site.
+        """
+        return self.state == 'reportable' and (
+            bool(self.query)
+            or self.since is not None
+            or self.until is not None
+            or self.author_age is not None
+        )
+
+    def comments(self, after: tuple[datetime, int] | None = None) -> Query[Comment]:
+        """
+        Return comments matching the filters, newest first.
+
+        The text query is matched against the comment and the author's name as a union
+        of lookups in their search vector indexes, instead of a join that must test
+        every comment.
+
+        :param after: Continue after this (created_at, id) position
+        """
+        comments = Comment.query.filter(getattr(Comment.state, self.state.upper()))
+        if self.query:
+            tsquery = sa.func.websearch_to_tsquery(self.query)
+            comments = comments.filter(
+                Comment.id.in_(
+                    sa.union(
+                        sa.select(Comment.id).where(
+                            Comment.search_vector.bool_op('@@')(tsquery)
+                        ),
+                        sa.select(Comment.id).where(
+                            Comment.posted_by_id.in_(
+                                sa.select(Account.id).where(
+                                    Account.search_vector.bool_op('@@')(tsquery)
+                                )
+                            )
+                        ),
+                    )
+                )
+            )
+        if self.since is not None:
+            comments = comments.filter(
+                Comment.created_at >= datetime.combine(self.since, time(), UTC)
+            )
+        if self.until is not None:
+            comments = comments.filter(
+                Comment.created_at
+                < datetime.combine(self.until + timedelta(days=1), time(), UTC)
+            )
+        if self.author_age is not None:
+            comments = comments.filter(
+                Comment.posted_by_id.in_(
+                    sa.select(User.id).where(
+                        User.joined_at >= utcnow() - timedelta(days=self.author_age)
+                    )
+                )
+            )
+        if after is not None:
+            comments = comments.filter(
+                sa.tuple_(Comment.created_at, Comment.id) < after
+            )
+        return comments.order_by(Comment.created_at.desc(), Comment.id.desc())
+
+    def count(self) -> int:
+        """Return the number of matching comments."""
+        cache_key = (
+            'comment_search_count/v1/'
+            + blake2b(repr(asdict(self)).encode(), digest_size=16).hexdigest()
+        )
+        count: int | None = cache.get(cache_key)
+        if count is None:
+            count = self.comments().order_by(None).count()
+            cache.set(cache_key, count, timeout=COMMENT_SEARCH_COUNT_TIMEOUT)
+        return count
+
+    def page(
+        self, after: str = '', per_page: int = COMMENT_SEARCH_PAGE_SIZE
+    ) -> tuple[list[Comment], str | None]:
+        """
+        Return a page of comments with their authors, and a cursor for the next page.
+
+        Pages are fetched by keyset, continuing after the comment identified by
+        `after`, so later pages are as fast as the first.
+        """
+        cursor = None
+        if after:
+            row = db.session.execute(
+                sa.select(Comment.created_at, Comment.id).where(
+                    Comment.uuid_b58 == after
+                )
+            ).first()
+            if row is None:
+                abort(400)
+            cursor = (row.created_at, row.id)
+        # Fetch one more than required to find if there is a next page
+        items = (
+            self.comments(cursor)
+            .options(sa_orm.joinedload(Comment.posted_by))
+            .limit(per_page + 1)
+            .all()
+        )
+        if len(items) > per_page:
+            return items[:per_page], items[per_page - 1].uuid_b58
+        return items, None
+
+
+@rq.job(queue='funnel')
+def report_comments_by_search(
+    actor_id: int, search: dict[str, Any], limit: int = COMMENT_REPORT_MAX_COUNT
+) -> None:
+    """
+    Report comments matching a search as spam, one batch at a time.
+
+    At most `limit` comments are reported, newest first, which should be the count
+    confirmed by the moderator.
+    """
+    actor = db.session.get(Account, actor_id)
+    if actor is None:
+        return
+    comment_search = CommentSearch(**search)
+    if not comment_search.is_bulk_reportable:
+        app.logger.warning("%r cannot bulk report comments matching %r", actor, search)
+        return
+    limit = min(limit, COMMENT_REPORT_MAX_COUNT)
+    cursor = None
+    seen = 0
+    total = 0
+    while seen < limit and (
+        batch := (
+            comment_search.comments(cursor)
+            .with_entities(Comment.created_at, Comment.id)
+            .limit(min(COMMENT_REPORT_BATCH_SIZE, limit - seen))
+            .all()
+        )
+    ):
+        total += CommentModeratorReport.submit_all(actor, [row.id for row in batch])
+        db.session.commit()
+        seen += len(batch)
+        cursor = (batch[-1].created_at, batch[-1].id)
+    app.logger.info("%r reported %d comments matching %r", actor, total, search)
+    if total:
+        statsd.incr('comment.reported', count=total)
@@ -2,12 +2,14 @@
 
 from __future__ import annotations
 
+import csv
 import gzip
+import io
 import zlib
 import zoneinfo
 from base64 import urlsafe_b64encode
-from collections.abc import Callable, Iterator, Mapping
-from contextlib import AbstractContextManager, nullcontext
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from contextlib import AbstractContextManager, contextmanager, nullcontext
 from datetime import datetime, timedelta
 from hashlib import blake2b
 from importlib import resources
@@ -29,6 +31,7 @@ from flask import (
     render_template,
     request,
     session,
+    stream_with_context,
     url_for,
 )
 from flask.sessions import SessionMixin
@@ -44,16 +47,31 @@ from coaster.sqlalchemy import RoleAccessProxy, RoleMixin
 from coaster.utils import utcnow
 from coaster.views import ClassView
 
-from .. import app, shortlinkapp
+from .. import app, redis_store, shortlinkapp
 from ..auth import CurrentAuth, current_auth
 from ..forms import supported_locales
-from ..models import Account, Project, Shortlink, db, profanity
+from ..models import Account, Project, Shortlink, db, profanity, url_blake2b160_hash
 from ..proxies import RequestWants, request_wants
 from ..typing import ResponseType, ReturnResponse
 from ..utils import JinjaTemplateBase, jinja_global, jinja_undefined
+from .jobs import (
+    SHORTLINK_POOL_KEY,
+    SHORTLINK_POOL_LOW_WATERMARK,
+    SHORTLINK_POOL_REFILL_LOCK,
+    refill_shortlink_pool,
+)
 
 nocache_expires = utc.localize(datetime(1990, 1, 1))
 
+#: Cache period for the URL to shortlink name cache
+SHORTLINK_URL_CACHE_TIMEOUT = 24 * 60 * 60
+#: Shortlink name in links rendered by :func:`collect_shortlink_urls`
+SHORTLINK_PLACEHOLDER_NAME = 'placeholder'
+
+#: Rows per chunk in streaming CSV exports. Export queries should fetch from the
+#: database in batches of the same size
+CSV_EXPORT_BATCH_SIZE = 500
+
 # Six avatar colours defined in _variable.scss
 avatar_color_count = 6
 
@@ -518,6 +536,14 @@ TOKEN_BYTES_LEN = 3
 TEXT_TOKEN_PREFIX = 'temp_token/v1/'  # noqa: S105
 
 
+def make_text_token() -> str:
+    """Make a short random text token that does not contain profanity."""
+    while True:
+        token = urlsafe_b64encode(urandom(TOKEN_BYTES_LEN)).decode().rstrip('=')
+        if not profanity.contains_profanity(token):
+            return token
+
+
 def make_cached_token(payload: dict, timeout: int = 24 * 60 * 60) -> str:
     """
     Make a short text token that references data in cache with a timeout period.
@@ -534,10 +560,7 @@ def make_cached_token(payload: dict, timeout: int = 24 * 60 * 60) -> str:
     :param timeout: Timeout period for token in seconds (default 24 hours)
     """
     while True:
-        token = urlsafe_b64encode(urandom(TOKEN_BYTES_LEN)).decode().rstrip('=')
-        if profanity.contains_profanity(token):
-            # Contains profanity, try another
-            continue
+        token = make_text_token()
         if cache.get(TEXT_TOKEN_PREFIX + token) is not None:
             # Token in use, try another
             continue
@@ -627,6 +650,49 @@ def compress_response(response: BaseResponse) -> None:
             response.vary.add('Accept-Encoding')
 
 
+def csv_response(
+    filename: str,
+    header: Iterable[str],
+    rows: Iterable[Iterable[Any]],
+    batch_size: int = CSV_EXPORT_BATCH_SIZE,
+) -> Response:
+    """
+    Return a CSV file download that is streamed as rows are produced.
+
+    Rows are written to the response in chunks of `batch_size`, so memory use is
+    constant regardless of the size of the export. The header is sent immediately so
+    that the download starts without waiting for the first database batch. `rows`
+    should be a generator over a query using
+    :meth:`~sqlalchemy.orm.Query.yield_per` with eager loading of all the
+    relationships required for each row.
+
+    The request context is retained until the stream is complete, so the generator
+    may use the database session and :data:`current_auth`.
+    """
+
+    def generate() -> Iterator[str]:
+        buffer = io.StringIO(newline='')
+        out = csv.writer(buffer)
+        out.writerow(header)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        for count, row in enumerate(rows, 1):
+            out.writerow(row)
+            if count % batch_size == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+
+    return Response(
+        stream_with_context(generate()),
+        content_type='text/csv',
+        headers=[('Content-Disposition', f'attachment;filename="{filename}"')],
+    )
+
+
 # MARK: Template helpers ---------------------------------------------------------------
 
 
@@ -734,14 +800,35 @@ def shortlink(
     :param shorter: Use a shorter shortlink, ideal for SMS or a small database
     :param header: Insert a brand header into the shortlink, for SMS DLT
     """
-    sl = Shortlink.new(url, reuse=True, shorter=shorter, actor=actor)
-    db.session.add(sl)
-    g.require_db_commit = True
+    if (collected := g.get('shortlink_urls')) is not None:
+        # Collecting URLs for :func:`prefetched_shortlinks`. This link is discarded
+        collected.add((url, shorter))
+        name = SHORTLINK_PLACEHOLDER_NAME
+    elif (url, shorter) in (prefetched := g.get('shortlink_names', {})):
+        name = prefetched[url, shorter]
+    else:
+        cache_key = shortlink_url_cache_key(url, shorter)
+        name = redis_store.get(cache_key)
+        if name is None:
+            sl = Shortlink.new(
+                url,
+                reuse=True,
+                shorter=shorter,
+                actor=actor,
+                id_source=reserved_shortlink_id,
+            )
+            db.session.add(sl)
+            g.require_db_commit = True
+            name = sl.name
+            # A new shortlink is not cached until it is found again in a later
+            # request, as the transaction that creates it may yet be rolled back
+            if not sl.is_new:
+                redis_store.set(cache_key, name, ex=SHORTLINK_URL_CACHE_TIMEOUT)
     if header is not None:
         return app_url_for(
-            shortlinkapp, 'link', name=sl.name, header=header, _external=True
+            shortlinkapp, 'link', name=name, header=header, _external=True
         )
-    return app_url_for(shortlinkapp, 'link', name=sl.name, _external=True)
+    return app_url_for(shortlinkapp, 'link', name=name, _external=True)
 
 
 def sms_shortlink(url: str) -> str:
@@ -754,6 +841,97 @@ def sms_shortlink(url: str) -> str:
     )
 
 
+def shortlink_names(
+    urls: Iterable[str], actor: Account | None = None, shorter: bool = True
+) -> dict[str, str]:
+    """
+    Return shortlink names for many URLs at once, for batch jobs.
+
+    URLs are looked up in cache, and the rest are created or reused with a bulk insert.
+    Returns a dict of URL to shortlink name. Caller must perform a database commit.
+    """
+    urls = list(dict.fromkeys(urls))
+    if not urls:
+        return {}
+    cached = redis_store.mget([shortlink_url_cache_key(url, shorter) for url in urls])
+    names = {url: name for url, name in zip(urls, cached, strict=True) if name}
+    if missing := [url for url in urls if url not in names]:
+        shortlinks = Shortlink.new_many(
+            missing, shorter=shorter, actor=actor, id_source=reserved_shortlink_id
+        )
+        pipe = redis_store.pipeline()
+        for url in missing:
+            sl = shortlinks[url]
+            names[url] = sl.name
+            if not sl.is_new:
+                pipe.set(
+                    shortlink_url_cache_key(url, shorter),
+                    sl.name,
+                    ex=SHORTLINK_URL_CACHE_TIMEOUT,
+                )
+        pipe.execute()
+    return names
+
+
+@contextmanager
+def collect_shortlink_urls() -> Iterator[set[tuple[str, bool]]]:
+    """
+    Collect (url, shorter) pairs passed to :func:`shortlink`, without creating them.
+
+    Links rendered in this context point to a placeholder and must be discarded.
+    """
+    collected: set[tuple[str, bool]] = set()
+    g.shortlink_urls = collected
+    try:
+        yield collected
+    finally:
+        g.pop('shortlink_urls', None)
+
+
+@contextmanager
+def prefetched_shortlinks(
+    urls: Iterable[tuple[str, bool]], actor: Account | None = None
+) -> Iterator[None]:
+    """
+    Create or reuse shortlinks for (url, shorter) pairs with :func:`shortlink_names`.
+
+    Within this context, :func:`shortlink` uses these names without any queries.
+    Caller must perform a database commit.
+    """
+    urls = list(urls)
+    names: dict[tuple[str, bool], str] = {}
+    for shorter in (True, False):
+        batch = [url for url, url_shorter in urls if url_shorter is shorter]
+        for url, name in shortlink_names(batch, actor=actor, shorter=shorter).items():
+            names[url, shorter] = name
+    g.shortlink_names = names
+    try:
+        yield
+    finally:
+        g.pop('shortlink_names', None)
+
+
+def shortlink_url_cache_key(url: str | furl, shorter: bool) -> str:
+    """Return cache key for the shortlink name of a URL."""
+    return (
+        f'shortlink_url/{"short" if shorter else "long"}'
+        f'/{url_blake2b160_hash(url).hex()}'
+    )
+
+
+def reserved_shortlink_id() -> int | None:
+    """Take an id from the pool of reserved shortlink ids, refilling when running low."""
+    pipe = redis_store.pipeline()
+    pipe.spop(SHORTLINK_POOL_KEY)
+    pipe.scard(SHORTLINK_POOL_KEY)
+    reserved_id, remaining = pipe.execute()
+    if remaining < SHORTLINK_POOL_LOW_WATERMARK and redis_store.set(
+        SHORTLINK_POOL_REFILL_LOCK, 1, nx=True, ex=5 * 60
+    ):
+        refill_shortlink_pool.enqueue()
+    return int(reserved_id) if reserved_id is not None else None
+
+
 # MARK: Request/response handlers ------------------------------------------------------
 
 
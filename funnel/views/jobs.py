@@ -3,14 +3,16 @@
 from __future__ import annotations
 
 from collections import defaultdict
+from collections.abc import Collection
 from typing import Any
 
+import base58
 import requests
 from flask import g
 
 from baseframe import statsd
 
-from .. import app, rq
+from .. import app, redis_store, rq
 from ..extapi.boxoffice import Boxoffice
 from ..extapi.explara import ExplaraAPI
 from ..models import (
@@ -19,6 +21,7 @@ from ..models import (
     PhoneNumber,
     Project,
     ProjectLocation,
+    Shortlink,
     TicketClient,
     db,
 )
@@ -108,16 +111,67 @@ def send_auth_client_notice(
     requests.request(method, url, params=params, data=data, timeout=30)
 
 
+# MARK: Shortlink id pool --------------------------------------------------------------
+
+#: Redis set of reserved ids for shorter shortlinks. Ids are taken from this pool by
+#: :func:`~funnel.views.helpers.reserved_shortlink_id` so that new shortlinks don't
+#: need a collision check, and the pool is topped up by :func:`refill_shortlink_pool`
+SHORTLINK_POOL_KEY = 'shortlink_pool'
+#: Number of ids to hold in the pool
+SHORTLINK_POOL_SIZE = 2000
+#: Refill the pool when it drops below this size
+SHORTLINK_POOL_LOW_WATERMARK = 500
+#: Lock to prevent more than one refill job from being queued at a time
+SHORTLINK_POOL_REFILL_LOCK = 'lock/shortlink_pool'
+
+
+@rq.job(queue='funnel')
+def refill_shortlink_pool() -> None:
+    """Top up the pool of reserved shortlink ids."""
+    try:
+        shortfall = SHORTLINK_POOL_SIZE - redis_store.scard(SHORTLINK_POOL_KEY)
+        if shortfall > 0:
+            unused_ids = Shortlink.unused_short_ids(shortfall)
+            if unused_ids:
+                redis_store.sadd(SHORTLINK_POOL_KEY, *unused_ids)
+                statsd.incr('shortlink.pool.refill', count=len(unused_ids))
+    finally:
+        redis_store.delete(SHORTLINK_POOL_REFILL_LOCK)
+
+
+# MARK: Forget email and phone ---------------------------------------------------------
+
 # If an email address had a reference count drop during the request, make a note of
-# its email_hash, and at the end of the request, queue a background job. The job will
-# call .refcount() and if it still has zero references, it will be marked as forgotten
-# by having the email column set to None.
+# its email_hash, and at the end of the request, add it to a queue in Redis for a
+# background job. The job will check for references and if there are none, the email
+# address will be marked as forgotten by having the email column set to None.
 
 # It is possible for an email address to have its refcount drop and rise again within
 # the request, so it's imperative to wait until the end of the request before attempting
 # to forget it. Ideally, this job should wait even longer, for several minutes or even
 # up to a day.
 
+# The queue is a Redis set, so a hash touched by many requests is only checked once.
+# Only one job is queued at a time: requests add to the set and queue a job only if
+# they can take the lock. The job holds the lock while it works through the set, and
+# removes each batch of hashes from the set only after the batch is committed, so
+# hashes are not lost if the job fails. Hashes added while the job is running are
+# processed by it. The lock is released when the set is empty or the job fails, and
+# the set is checked again after release for hashes added just before. Hashes
+# accumulate while the job waits for a worker, so the number of jobs drops as the
+# rate of changes rises.
+
+#: Redis set of email hashes waiting to be checked
+FORGET_EMAIL_QUEUE = 'forget_queue/email'
+#: Redis set of phone hashes waiting to be checked
+FORGET_PHONE_QUEUE = 'forget_queue/phone'
+#: Lock to prevent more than one forget job from being queued at a time. The lock
+#: expires in case the job is lost
+FORGET_QUEUE_LOCK = 'lock/forget_queue'
+FORGET_QUEUE_LOCK_TIMEOUT = 15 * 60
+#: Number of hashes to check in each database transaction
+FORGET_BATCH_SIZE = 500
+
 
 @emailaddress_refcount_dropping.connect
 def forget_email_in_request_teardown(sender: EmailAddress) -> None:
@@ -135,34 +189,117 @@ def forget_phone_in_request_teardown(sender: PhoneNumber) -> None:
         g.forget_phone_hashes.add(sender.phone_hash)
 
 
+def queue_forget_email_phone() -> None:
+    """Move email and phone hashes collected in this context to the forget queues."""
+    email_hashes = g.pop('forget_email_hashes', None)
+    phone_hashes = g.pop('forget_phone_hashes', None)
+    if email_hashes or phone_hashes:
+        # Add to the queue before taking the lock (see note above)
+        if email_hashes:
+            redis_store.sadd(FORGET_EMAIL_QUEUE, *email_hashes)
+        if phone_hashes:
+            redis_store.sadd(FORGET_PHONE_QUEUE, *phone_hashes)
+        enqueue_forget_email_phone_queue()
+
+
+def enqueue_forget_email_phone_queue() -> None:
+    """Queue a job to process the forget queues, unless one is already pending."""
+    if redis_store.set(FORGET_QUEUE_LOCK, 1, nx=True, ex=FORGET_QUEUE_LOCK_TIMEOUT):
+        forget_email_phone_queue.enqueue()
+
+
 @app.after_request
 def forget_email_phone_in_background_job(response: ResponseType) -> ResponseType:
-    if hasattr(g, 'forget_email_hashes'):
-        for email_hash in g.forget_email_hashes:
-            forget_email.enqueue(email_hash)
-    if hasattr(g, 'forget_phone_hashes'):
-        for phone_hash in g.forget_phone_hashes:
-            forget_phone.enqueue(phone_hash)
+    queue_forget_email_phone()
     return response
 
 
+def forget_email_hashes(email_hashes: Collection[str]) -> None:
+    """Forget email addresses that have no inbound references."""
+    email_addresses = (
+        EmailAddress.query.filter(
+            EmailAddress.blake2b160.in_(
+                [base58.b58decode(email_hash) for email_hash in email_hashes]
+            )
+        )
+        # Lock the rows so that a parallel transaction adding a reference must either
+        # commit first (and be counted) or wait until this transaction is complete
+        .order_by(EmailAddress.id)
+        .with_for_update()
+        .all()
+    )
+    referenced = EmailAddress.referenced_ids([obj.id for obj in email_addresses])
+    forgotten = 0
+    for email_address in email_addresses:
+        if email_address.id not in referenced:
+            app.logger.info(
+                "Forgetting email address with hash %s", email_address.email_hash
+            )
+            email_address.email = None
+            forgotten += 1
+    db.session.commit()
+    if forgotten:
+        statsd.incr('email_address.forgotten', count=forgotten)
+
+
+def forget_phone_hashes(phone_hashes: Collection[str]) -> None:
+    """Forget phone numbers that have no inbound references."""
+    phone_numbers = (
+        PhoneNumber.query.filter(
+            PhoneNumber.blake2b160.in_(
+                [base58.b58decode(phone_hash) for phone_hash in phone_hashes]
+            )
+        )
+        # See note in `forget_email_hashes`
+        .order_by(PhoneNumber.id)
+        .with_for_update()
+        .all()
+    )
+    referenced = PhoneNumber.referenced_ids([obj.id for obj in phone_numbers])
+    forgotten = 0
+    for phone_number in phone_numbers:
+        if phone_number.id not in referenced:
+            app.logger.info(
+                "Forgetting phone number with hash %s", phone_number.phone_hash
+            )
+            phone_number.mark_forgotten()
+            forgotten += 1
+    db.session.commit()
+    if forgotten:
+        statsd.incr('phone_number.forgotten', count=forgotten)
+
+
+@rq.job(queue='funnel')
+def forget_email_phone_queue() -> None:
+    """Process all email and phone hashes waiting in the forget queues."""
+    try:
+        for queue, forget_hashes in (
+            (FORGET_EMAIL_QUEUE, forget_email_hashes),
+            (FORGET_PHONE_QUEUE, forget_phone_hashes),
+        ):
+            while batch := redis_store.srandmember(queue, FORGET_BATCH_SIZE):
+                redis_store.expire(FORGET_QUEUE_LOCK, FORGET_QUEUE_LOCK_TIMEOUT)
+                forget_hashes(batch)
+                redis_store.srem(queue, *batch)
+    finally:
+        # Release the lock even if this job failed, so that the next request will
+        # queue another job for the hashes remaining in the queue
+        redis_store.delete(FORGET_QUEUE_LOCK)
+    # Hashes queued after the last batch was read would have found the lock taken
+    if redis_store.exists(FORGET_EMAIL_QUEUE, FORGET_PHONE_QUEUE):
+        enqueue_forget_email_phone_queue()
+
+
+# Single hash jobs, retained for jobs queued before the batch queue was introduced
+
+
 @rq.job(queue='funnel')
 def forget_email(email_hash: str) -> None:
     """Remove an email address if it has no inbound references."""
-    email_address = EmailAddress.get(email_hash=email_hash)
-    if email_address is not None and email_address.refcount() == 0:
-        app.logger.info("Forgetting email address with hash %s", email_hash)
-        email_address.email = None
-        db.session.commit()
-        statsd.incr('email_address.forgotten')
+    forget_email_hashes([email_hash])
 
 
 @rq.job(queue='funnel')
 def forget_phone(phone_hash: str) -> None:
     """Remove a phone number if it has no inbound references."""
-    phone_number = PhoneNumber.get(phone_hash=phone_hash)
-    if phone_number is not None and phone_number.refcount() == 0:
-        app.logger.info("Forgetting phone number with hash %s", phone_hash)
-        phone_number.mark_forgotten()
-        db.session.commit()
-        statsd.incr('phone_number.forgotten')
+    forget_phone_hashes([phone_hash])
@@ -116,9 +116,9 @@ class AccountMergeTemplate(JinjaTemplate, template='account_merge.html.jinja2'):
 def get_otp_form(otp_session: OtpSession) -> OtpForm | RegisterOtpForm:
     """Return variant of OTP form depending on whether there's a user account."""
     if otp_session.user:
-        form = OtpForm(valid_otp=otp_session.otp)
+        form = OtpForm(verify_otp=otp_session.verify)
     else:
-        form = RegisterOtpForm(valid_otp=otp_session.otp)
+        form = RegisterOtpForm(verify_otp=otp_session.verify)
     return form
 
 
@@ -295,10 +295,6 @@ def login() -> ReturnView:
     elif request.method == 'POST' and formid == 'login-otp':
         try:
             otp_session = OtpSession.retrieve('login')
-
-            # Allow 5 guesses per 60 seconds
-            validate_rate_limit('login_otp', otp_session.token, 5, 60)
-
             otp_form = get_otp_form(otp_session)
             if otp_form.validate_on_submit():
                 if not otp_session.user:
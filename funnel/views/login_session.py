@@ -644,7 +644,7 @@ def requires_sudo(f: Callable[P, ReturnView]) -> Callable[P, ReturnView]:
                     # Use OtpForm only if an OTP could be sent. Failure messages are
                     # suppressed because the fallback option is to ask the user to set a
                     # password
-                    form = OtpForm(valid_otp=otp_session.otp)
+                    form = OtpForm(verify_otp=otp_session.verify)
 
             # If the user does not have a password and an OTP could not be sent (usable
             # form is None), ask the user to set a password
@@ -668,7 +668,7 @@ def requires_sudo(f: Callable[P, ReturnView]) -> Callable[P, ReturnView]:
                 except OtpTimeoutError:
                     # Reload the page to send another OTP
                     return render_redirect(request.url)
-                form = OtpForm(valid_otp=otp_session.otp)
+                form = OtpForm(verify_otp=otp_session.verify)
             elif formid == FORMID_SUDO_PASSWORD:
                 form = PasswordForm(edit_user=current_auth.user)
             else:
@@ -4,6 +4,8 @@
 
 from __future__ import annotations
 
+import json
+from collections.abc import Iterable
 from http import HTTPStatus
 from typing import TYPE_CHECKING, Any
 from uuid import UUID, uuid4
@@ -14,6 +16,7 @@ from werkzeug.datastructures import MultiDict
 from baseframe import _, forms
 from coaster.views import ModelView, UrlChangeCheck, UrlForView, route
 
+from .. import redis_store
 from ..auth import current_auth
 from ..forms import SavedProjectForm
 from ..models import (
@@ -24,6 +27,8 @@ from ..models import (
     ProjectRedirect,
     TicketEvent,
     db,
+    sa,
+    sa_orm,
 )
 from ..typing import ReturnView
 from .helpers import render_redirect
@@ -51,6 +56,90 @@ class AccountCheckMixin:
         return super().after_loader()  # type: ignore[misc]
 
 
+# MARK: Project URL resolution cache ---------------------------------------------------
+
+#: Redis key prefix for resolved project URLs, followed by account and project names
+PROJECT_URL_CACHE_PREFIX = 'project_url/'
+#: Cache period for resolved project URLs
+PROJECT_URL_CACHE_TIMEOUT = 24 * 60 * 60
+
+
+def project_url_cache_key(account: str, project: str) -> str:
+    """Return cache key for a project URL, normalizing the account name as in lookup."""
+    if not account.startswith('~'):
+        account = account.replace('-', '_').lower()
+    return f'{PROJECT_URL_CACHE_PREFIX}{account}/{project}'
+
+
+def invalidate_project_urls(
+    connection: sa.Connection, account_ids: Iterable[int], names: Iterable[str]
+) -> None:
+    """Remove cached resolutions for project names in the given accounts."""
+    names = set(names)
+    account_names = connection.execute(
+        sa.select(Account.name).where(Account.id.in_(set(account_ids)))
+    ).scalars()
+    keys = [
+        project_url_cache_key(account_name, name)
+        for account_name in account_names
+        if account_name is not None
+        for name in names
+    ]
+    if keys:
+        redis_store.delete(*keys)
+
+
+# Cached resolutions are also validated when used, so these listeners only need to
+# clear entries that would resolve to the wrong project or redirect
+
+
+@sa.event.listens_for(Project, 'after_insert')
+@sa.event.listens_for(Project, 'after_update')
+@sa.event.listens_for(Project, 'after_delete')
+def _project_url_changed(
+    _mapper: Any, connection: sa.Connection, target: Project
+) -> None:
+    attrs = sa.inspect(target).attrs
+    if (
+        sa.inspect(target).persistent
+        and not attrs.name.history.has_changes()
+        and not attrs.account_id.history.has_changes()
+    ):
+        return
+    invalidate_project_urls(
+        connection,
+        {target.account_id, *attrs.account_id.history.deleted},
+        {target.name, *attrs.name.history.deleted},
+    )
+
+
+@sa.event.listens_for(ProjectRedirect, 'after_insert')
+@sa.event.listens_for(ProjectRedirect, 'after_update')
+@sa.event.listens_for(ProjectRedirect, 'after_delete')
+def _project_redirect_changed(
+    _mapper: Any, connection: sa.Connection, target: ProjectRedirect
+) -> None:
+    attrs = sa.inspect(target).attrs
+    invalidate_project_urls(
+        connection,
+        {target.account_id, *attrs.account_id.history.deleted},
+        {target.name, *attrs.name.history.deleted},
+    )
+
+
+@sa.event.listens_for(Account, 'after_update', propagate=True)
+def _account_renamed(_mapper: Any, _connection: Any, target: Account) -> None:
+    for old_name in sa.inspect(target).attrs.name.history.deleted:
+        if old_name is not None:
+            keys = list(
+                redis_store.scan_iter(
+                    match=project_url_cache_key(old_name, '*'), count=1000
+                )
+            )
+            if keys:
+                redis_store.delete(*keys)
+
+
 class ProjectViewBase(
     AccountCheckMixin, UrlForView, UrlChangeCheck, ModelView[Project]
 ):
@@ -60,18 +149,67 @@ class ProjectViewBase(
     project: Project
     account: Account
 
-    def load(self, account: str, project: str, **_kwargs: Any) -> ReturnView | None:
+    @staticmethod
+    def resolve(
+        account: str, project: str
+    ) -> tuple[Project | None, ProjectRedirect | None]:
+        """Resolve URL names to a project or a redirect, using a cache if possible."""
+        cache_key = project_url_cache_key(account, project)
+        cached = redis_store.get(cache_key)
+        if cached is not None:
+            kind, *identity = json.loads(cached)
+            # Confirm the cached resolution still matches, in case of a missed
+            # invalidation
+            if kind == 'project':
+                obj = db.session.get(
+                    Project, identity[0], options=[sa_orm.joinedload(Project.account)]
+                )
+                if (
+                    obj is not None
+                    and obj.name == project
+                    and obj.account.name_is(account)
+                ):
+                    return obj, None
+            else:
+                obj_redirect = db.session.get(
+                    ProjectRedirect,
+                    tuple(identity),
+                    options=[sa_orm.joinedload(ProjectRedirect.account)],
+                )
+                if obj_redirect is not None and obj_redirect.account.name_is(account):
+                    return None, obj_redirect
+            redis_store.delete(cache_key)
+
         obj = (
             Project.query.join(Account, Project.account)
             .filter(Account.name_is(account), Project.name == project)
             .first()
         )
-        if obj is None:
-            obj_redirect = (
-                ProjectRedirect.query.join(Account, ProjectRedirect.account)
-                .filter(Account.name_is(account), ProjectRedirect.name == project)
-                .first_or_404()
+        if obj is not None:
+            redis_store.set(
+                cache_key,
+                json.dumps(['project', obj.id]),
+                ex=PROJECT_URL_CACHE_TIMEOUT,
             )
+            return obj, None
+        obj_redirect = (
+            ProjectRedirect.query.join(Account, ProjectRedirect.account)
+            .filter(Account.name_is(account), ProjectRedirect.name == project)
+            .first()
+        )
+        if obj_redirect is not None:
+            redis_store.set(
+                cache_key,
+                json.dumps(['redirect', obj_redirect.account_id, obj_redirect.name]),
+                ex=PROJECT_URL_CACHE_TIMEOUT,
+            )
+        return None, obj_redirect
+
+    def load(self, account: str, project: str, **_kwargs: Any) -> ReturnView | None:
+        obj, obj_redirect = ProjectViewBase.resolve(account, project)
+        if obj is None:
+            if obj_redirect is None:
+                abort(404)
             if obj_redirect.project is not None:
                 if TYPE_CHECKING:
                     assert request.endpoint is not None
@@ -4,6 +4,7 @@ from __future__ import annotations
 
 from collections import defaultdict
 from collections.abc import Callable, Sequence
+from contextlib import suppress
 from dataclasses import dataclass, fields
 from datetime import datetime
 from email.utils import formataddr
@@ -34,7 +35,8 @@ from ..models import (
 )
 from ..serializers import token_serializer
 from ..transports import TransportError, email, platform_transports, sms
-from .helpers import make_cached_token
+from .helpers import collect_shortlink_urls, make_cached_token, prefetched_shortlinks
+from .notification_counter import adjust_unread_count, is_counted_unread
 
 __all__ = [
     'DecisionBranchBase',
@@ -457,7 +459,8 @@ class RenderNotification:
 #    them into yet another background worker.
 # 3. Second background worker performs a roll-up on each UserNotification, then queues
 #    a background job for each eligible transport.
-# 4. Third set of per-transport background workers deliver one message each.
+# 4. Third set of per-transport background workers deliver the batch. Email is sent one
+#    message at a time while SMS is sent concurrently.
 
 
 def dispatch_notification(*notifications: Notification) -> None:
@@ -512,32 +515,49 @@ def transport_worker_wrapper(
     @wraps(func)
     def inner(notification_recipient_ids: Sequence[tuple[int, UUID]]) -> None:
         """Convert a notification id into an object for worker to process."""
-        queue = [
-            db.session.get(NotificationRecipient, identity)
-            for identity in notification_recipient_ids
-        ]
-        for notification_recipient in queue:
-            # The notification may be deleted or revoked by the time this worker
-            # processes it. If so, skip it.
-            if (
-                notification_recipient is not None
-                and not notification_recipient.is_revoked
-            ):
-                with force_locale(notification_recipient.recipient.locale or 'en'):
-                    view = notification_recipient.views.render
-                    try:
-                        func(notification_recipient, view)
-                        db.session.commit()
-                    except TransportError:
-                        if notification_recipient.notification.ignore_transport_errors:
-                            pass
-                        else:
-                            # TODO: Implement transport error handling code here
-                            pass
+        for notification_recipient in transport_worker_queue(
+            notification_recipient_ids
+        ):
+            with force_locale(notification_recipient.recipient.locale or 'en'):
+                view = notification_recipient.views.render
+                try:
+                    func(notification_recipient, view)
+                    db.session.commit()
+                except TransportError as exc:
+                    handle_transport_error(notification_recipient, exc)
 
     return inner
 
 
+def transport_worker_queue(
+    notification_recipient_ids: Sequence[tuple[int, UUID]],
+) -> list[NotificationRecipient]:
+    """Load notification recipients for a transport worker, skipping revoked ones."""
+    queue = [
+        db.session.get(NotificationRecipient, identity)
+        for identity in notification_recipient_ids
+    ]
+    # The notification may be deleted or revoked by the time this worker processes it.
+    # If so, skip it.
+    return [
+        notification_recipient
+        for notification_recipient in queue
+        if notification_recipient is not None and not notification_recipient.is_revoked
+    ]
+
+
+def handle_transport_error(
+    notification_recipient: NotificationRecipient,
+    exc: TransportError,  # noqa: ARG001
+) -> None:
+    """Handle a transport error in delivering a notification."""
+    if notification_recipient.notification.ignore_transport_errors:
+        pass
+    else:
+        # TODO: Implement transport error handling code here
+        pass
+
+
 @rq.job(queue='funnel')
 @transport_worker_wrapper
 def dispatch_transport_email(
@@ -591,32 +611,69 @@ def dispatch_transport_email(
 
 
 @rq.job(queue='funnel')
-@transport_worker_wrapper
 def dispatch_transport_sms(
-    notification_recipient: NotificationRecipient, view: RenderNotification
+    notification_recipient_ids: Sequence[tuple[int, UUID]],
 ) -> None:
-    """Deliver a user notification over SMS."""
-    if not notification_recipient.recipient.main_notification_preferences.by_transport(
-        'sms'
-    ):
-        # Cancel delivery if user's main switch is off. This was already checked, but
-        # the worker may be delayed and the user may have changed their preference.
-        notification_recipient.messageid_sms = 'cancelled'
-        return
-    try:
-        message = view.sms_with_unsubscribe()
-    except NotImplementedError:
-        notification_recipient.messageid_sms = 'not-implemented'
-        return
-    notification_recipient.messageid_sms = sms.send_sms(
-        str(view.transport_for('sms')), message
-    )
-    statsd.incr(
-        'notification.transport',
-        tags={
-            'notification_type': notification_recipient.notification_type,
-            'transport': 'sms',
-        },
+    """Deliver user notifications over SMS, sending the batch concurrently."""
+    recipients: list[tuple[NotificationRecipient, RenderNotification]] = []
+    for notification_recipient in transport_worker_queue(notification_recipient_ids):
+        if notification_recipient.messageid_sms:
+            # Already processed in an earlier attempt at this job
+            continue
+        preferences = notification_recipient.recipient.main_notification_preferences
+        if not preferences.by_transport('sms'):
+            # Cancel delivery if user's main switch is off. This was already checked,
+            # but the worker may be delayed and the user may have changed their
+            # preference.
+            notification_recipient.messageid_sms = 'cancelled'
+            continue
+        recipients.append((notification_recipient, notification_recipient.views.render))
+
+    # Render once to find the shortlinks in the messages, so they can be created
+    # together instead of once per message
+    with collect_shortlink_urls() as shortlink_urls:
+        for notification_recipient, view in recipients:
+            with (
+                force_locale(notification_recipient.recipient.locale or 'en'),
+                suppress(NotImplementedError),
+            ):
+                view.sms()
+
+    pending: list[tuple[NotificationRecipient, str, sms.SmsTemplate]] = []
+    with prefetched_shortlinks(shortlink_urls):
+        for notification_recipient, view in recipients:
+            with force_locale(notification_recipient.recipient.locale or 'en'):
+                try:
+                    message = view.sms_with_unsubscribe()
+                except NotImplementedError:
+                    notification_recipient.messageid_sms = 'not-implemented'
+                    continue
+                message.render()  # Freeze the text in the recipient's locale
+                pending.append(
+                    (notification_recipient, str(view.transport_for('sms')), message)
+                )
+    # Save new shortlinks and skipped recipients before sending
+    db.session.commit()
+
+    def save_result(index: int, result: str | TransportError) -> None:
+        # Commit each result as it arrives, so that messages already sent are not sent
+        # again if the job fails and is retried
+        notification_recipient = pending[index][0]
+        if isinstance(result, TransportError):
+            handle_transport_error(notification_recipient, result)
+        else:
+            notification_recipient.messageid_sms = result
+            statsd.incr(
+                'notification.transport',
+                tags={
+                    'notification_type': notification_recipient.notification_type,
+                    'transport': 'sms',
+                },
+            )
+        db.session.commit()
+
+    sms.send_sms_many(
+        [(phone, message) for _nr, phone, message in pending], on_result=save_result
     )
 
 
@@ -664,16 +721,24 @@ def dispatch_notification_recipients_job(
         for identity in notification_recipient_ids
     ]
     transport_batch: dict[str, list[tuple[int, UUID]]] = defaultdict(list)
+    unread_delta: dict[int, int] = defaultdict(int)
 
     for notification_recipient in queue:
         if notification_recipient is not None:
-            notification_recipient.rollup_previous()
+            revoked_unread = notification_recipient.rollup_previous()
             for transport in transport_workers:
                 if platform_transports[
                     transport
                 ] and notification_recipient.has_transport(transport):
                     transport_batch[transport].append(notification_recipient.identity)
             db.session.commit()
+            # The new notification replaces any unread ones it rolled up. If this job
+            # is retried, the counter may drift until the periodic reconciliation
+            unread_delta[notification_recipient.recipient_id] += (
+                is_counted_unread(notification_recipient) - revoked_unread
+            )
+    for account_id, delta in unread_delta.items():
+        adjust_unread_count(account_id, delta)
     for transport, batch in transport_batch.items():
         # Based on user preferences, a transport may have no recipients at all.
         # Only queue a background job when there is work to do.
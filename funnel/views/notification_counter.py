@@ -0,0 +1,115 @@
+"""Unread notification counters, maintained in Redis."""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+
+from .. import redis_store
+from ..models import Account, NotificationRecipient, notification_web_types
+
+__all__ = [
+    'UNREAD_COUNT_PREFIX',
+    'UNREAD_COUNT_TIMEOUT',
+    'adjust_unread_count',
+    'get_unread_count',
+    'is_counted_unread',
+    'reconcile_unread_counts',
+    'unread_count_channel',
+    'unread_count_key',
+]
+
+#: Redis key prefix for unread counters, followed by the account id
+UNREAD_COUNT_PREFIX = 'notification_unread/'
+#: Counters expire a day after they were computed, bounding the age of any drift from
+#: the database. The periodic reconciliation job corrects drift in live counters
+UNREAD_COUNT_TIMEOUT = 24 * 60 * 60
+
+# Adjust a counter only if it exists (a missing counter is recomputed on the next read
+# and will include this change), never letting it go below zero, and publish the new
+# value to listeners. KEYS = [counter, channel], ARGV = [delta]
+_ADJUST_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return nil
+end
+local value = redis.call('INCRBY', KEYS[1], ARGV[1])
+if value < 0 then
+    value = 0
+    redis.call('SET', KEYS[1], 0, 'KEEPTTL')
+end
+redis.call('PUBLISH', KEYS[2], value)
+return value
+"""
+
+
+def unread_count_key(account_id: int) -> str:
+    """Return the Redis key for an account's unread counter."""
+    return f'{UNREAD_COUNT_PREFIX}{account_id}'
+
+
+def unread_count_channel(account_id: int) -> str:
+    """Return the Redis pub/sub channel for changes to an account's unread counter."""
+    return f'notification_unread_channel/{account_id}'
+
+
+def is_counted_unread(notification_recipient: NotificationRecipient) -> bool:
+    """Check if this notification is included in the recipient's unread count."""
+    return (
+        notification_recipient.notification_type in notification_web_types
+        and not notification_recipient.is_read
+        and not notification_recipient.is_revoked
+    )
+
+
+def get_unread_count(account: Account) -> int:
+    """Return unread notification count for an account, from cache if available."""
+    cache_key = unread_count_key(account.id)
+    value = redis_store.get(cache_key)
+    if value is not None:
+        return int(value)
+    count = NotificationRecipient.unread_count_for(account)
+    # Use NX so that a counter populated and adjusted by a parallel process is not
+    # overwritten with this possibly stale value
+    redis_store.set(cache_key, count, ex=UNREAD_COUNT_TIMEOUT, nx=True)
+    return count
+
+
+def adjust_unread_count(account_id: int, delta: int) -> None:
+    """
+    Increment or decrement an account's unread counter after a database commit.
+
+    This must only be called after the change has been committed, or a parallel request
+    may recompute the counter from the database and then receive this change a second
+    time.
+    """
+    if delta:
+        redis_store.eval(
+            _ADJUST_SCRIPT,
+            2,
+            unread_count_key(account_id),
+            unread_count_channel(account_id),
+            delta,
+        )
+
+
+def reconcile_unread_counts(account_ids: Iterable[int]) -> int:
+    """
+    Reset counters for the given accounts to their true values from the database.
+
+    Returns the number of counters that had drifted and were corrected.
+    """
+    account_ids = list(account_ids)
+    if not account_ids:
+        return 0
+    counts = NotificationRecipient.unread_counts_for_ids(account_ids)
+    cached = redis_store.mget([unread_count_key(_id) for _id in account_ids])
+    corrected = 0
+    pipe = redis_store.pipeline()
+    for account_id, cached_value in zip(account_ids, cached, strict=True):
+        count = counts.get(account_id, 0)
+        # Counters that expired since they were listed are not recreated here
+        if cached_value is not None and int(cached_value) != count:
+            corrected += 1
+            pipe.set(unread_count_key(account_id), count, ex=UNREAD_COUNT_TIMEOUT)
+            pipe.publish(unread_count_channel(account_id), count)
+    pipe.execute()
+    return corrected
@@ -2,16 +2,124 @@
 
 from __future__ import annotations
 
-from flask import abort
+from collections import defaultdict
+from collections.abc import Iterator, Sequence
+from time import monotonic
+from typing import cast
+from uuid import UUID
 
-from baseframe import forms
+from flask import Response, abort
+from flask_babel import get_locale
+
+from baseframe import cache, forms
 from coaster.views import ClassView, render_with, requestargs, route
 
-from .. import app
+from .. import app, redis_store
 from ..auth import current_auth
-from ..models import NotificationRecipient, db
-from ..typing import ReturnRenderWith
+from ..models import ModelUuidProtocol, Notification, NotificationRecipient, db
+from ..typing import ReturnRenderWith, ReturnView
 from .login_session import requires_login
+from .notification import RenderNotification
+from .notification_counter import (
+    adjust_unread_count,
+    get_unread_count,
+    is_counted_unread,
+    unread_count_channel,
+)
+
+#: Duration of an unread count stream before the client is asked to reconnect (seconds)
+UNREAD_STREAM_DURATION = 60
+#: Interval between keepalive messages in the stream (seconds)
+UNREAD_STREAM_KEEPALIVE = 15
+#: Delay before the client reconnects after a stream closes (seconds)
+UNREAD_STREAM_RETRY = 5
+#: Cache period for rendered notifications, kept short as they contain relative
+#: timestamps and access checks (seconds)
+WEB_RENDER_CACHE_TIMEOUT = 5 * 60
+
+
+def web_render_cache_key(notification_recipient: NotificationRecipient) -> str:
+    """Return cache key for a web render of a notification in the current locale."""
+    return (
+        f'notification_web/{notification_recipient.recipient_id}'
+        f'/{notification_recipient.eventid_b58}/{get_locale()}'
+    )
+
+
+def prefetch_rolledup_fragments(
+    notification_recipients: Sequence[NotificationRecipient],
+) -> None:
+    """
+    Load fragments for the renderers of multiple notifications in a batch.
+
+    Renderers using the same fragment model share a query that uses their own ordering
+    and query options, instead of each loading their rolled up fragments separately.
+    The notifications' documents and fragments must already be known to be present.
+    """
+    rollups = NotificationRecipient.rolledup_fragment_uuids(
+        nr.rollupid
+        for nr in notification_recipients
+        if nr.rollupid is not None and nr.notification.fragment_model is not None
+    )
+    groups: dict[
+        tuple[type[RenderNotification], type[ModelUuidProtocol]],
+        list[tuple[RenderNotification, set[UUID]]],
+    ] = defaultdict(list)
+    for nr in notification_recipients:
+        fragment_model = nr.notification.fragment_model
+        if fragment_model is None or nr.notification.fragment_uuid is None:
+            continue
+        view = nr.views.render
+        if nr.rollupid is not None:
+            fragment_uuids = set(rollups.get(nr.rollupid, ()))
+        else:
+            fragment_uuids = {nr.notification.fragment_uuid}
+        groups[type(view), fragment_model].append((view, fragment_uuids))
+
+    for (_view_cls, fragment_model), members in groups.items():
+        first_view = members[0][0]
+        query = fragment_model.query.filter(
+            fragment_model.uuid.in_(  # type: ignore[attr-defined]
+                set().union(*(fragment_uuids for _view, fragment_uuids in members))
+            )
+        ).order_by(*first_view.fragments_order_by)
+        if query_options := first_view.fragments_query_options:
+            query = query.options(*query_options)
+        fragments = query.all()
+        for view, fragment_uuids in members:
+            view.fragments = [
+                _f.access_for(actor=view.notification_recipient.recipient)
+                for _f in fragments
+                if _f.uuid in fragment_uuids
+            ]
+
+
+def render_web_notifications(
+    notification_recipients: Sequence[NotificationRecipient],
+) -> list[str]:
+    """
+    Render notifications for the web, using cached renders where available.
+
+    Notifications not found in cache are rendered after a batch load of their rolled up
+    fragments, and are then cached.
+    """
+    cache_keys = [web_render_cache_key(nr) for nr in notification_recipients]
+    rendered: list[str | None] = list(cache.get_many(*cache_keys)) if cache_keys else []
+    pending = [
+        nr
+        for nr, html in zip(notification_recipients, rendered, strict=True)
+        if html is None
+    ]
+    if not pending:
+        return cast(list[str], rendered)
+    prefetch_rolledup_fragments(pending)
+    fresh: dict[str, str] = {}
+    for index, nr in enumerate(notification_recipients):
+        if rendered[index] is None:
+            html = nr.views.render.web()
+            rendered[index] = fresh[cache_keys[index]] = html
+    cache.set_many(fresh, timeout=WEB_RENDER_CACHE_TIMEOUT)
+    return cast(list[str], rendered)
 
 
 @route('/updates', init_app=app)
@@ -29,13 +137,24 @@ class AllNotificationsView(ClassView):
         pagination = NotificationRecipient.web_notifications_for(
             current_auth.user, unread_only
         ).paginate(page=page, per_page=per_page, max_per_page=100)
+        Notification.prefetch(nr.notification for nr in pagination.items)
+        # Notifications whose document or fragment is gone are revoked here, and must
+        # be removed from the unread counter if they were unread
+        notification_recipients: list[NotificationRecipient] = []
+        revoked_unread = 0
+        for nr in pagination.items:
+            if nr.is_not_deleted(revoke=True):
+                notification_recipients.append(nr)
+            elif not nr.is_read:
+                revoked_unread += 1
+        rendered = render_web_notifications(notification_recipients)
         results = {
             'unread_only': unread_only,
             'show_transport_alert': not current_auth.user.has_transport_sms(),
             'notifications': [
                 {
                     'notification': nr.current_access(datasets=('primary', 'related')),
-                    'html': nr.views.render.web(),
+                    'html': html,
                     'document_type': nr.notification.document_type,
                     'document': (
                         nr.document.current_access(datasets=('primary', 'related'))
@@ -49,8 +168,7 @@ class AllNotificationsView(ClassView):
                         else None
                     ),
                 }
-                for nr in pagination.items
-                if nr.is_not_deleted(revoke=True)
+                for nr, html in zip(notification_recipients, rendered, strict=True)
             ],
             'has_next': pagination.has_next,
             'has_prev': pagination.has_prev,
@@ -62,10 +180,11 @@ class AllNotificationsView(ClassView):
             'count': pagination.total,
         }
         db.session.commit()
+        adjust_unread_count(current_auth.user.id, -revoked_unread)
         return results
 
     def unread_count(self) -> int:
-        return NotificationRecipient.unread_count_for(current_auth.user)
+        return get_unread_count(current_auth.user)
 
     @route('count', endpoint='notifications_count')
     def unread(self) -> ReturnRenderWith:
@@ -78,6 +197,53 @@ class AllNotificationsView(ClassView):
             }
         return {'status': 'error', 'error': 'requires_login'}, 400
 
+    @route('count/stream', endpoint='notifications_count_stream')
+    def unread_stream(self) -> ReturnView:
+        """
+        Push changes to the unread count as server-sent events.
+
+        Each stream occupies a worker for its duration, so this is only available when
+        the app is served by async workers and ``NOTIFICATION_COUNT_STREAM`` is set.
+        """
+        if not app.config.get('NOTIFICATION_COUNT_STREAM'):
+            abort(404)
+        # As with :meth:`unread`, this view must not use `@requires_login`
+        if not current_auth.user:
+            return {'status': 'error', 'error': 'requires_login'}, 400
+        # Subscribe before reading the count so no change is missed in between
+        pubsub = redis_store.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(unread_count_channel(current_auth.user.id))
+        unread = self.unread_count()
+        # The stream does not need the database. Release the connection now, as the
+        # app context (and its session) is not retained while streaming
+        db.session.commit()
+
+        def stream() -> Iterator[str]:
+            try:
+                yield (
+                    f'retry: {UNREAD_STREAM_RETRY * 1000}\n'
+                    f'event: unread\ndata: {unread}\n\n'
+                )
+                deadline = monotonic() + UNREAD_STREAM_DURATION
+                while (remaining := deadline - monotonic()) > 0:
+                    message = pubsub.get_message(
+                        timeout=min(remaining, UNREAD_STREAM_KEEPALIVE)
+                    )
+                    if message is None:
+                        # Comment line to keep proxies from closing an idle connection
+                        yield ': keepalive\n\n'
+                    else:
+                        yield f'event: unread\ndata: {message["data"]}\n\n'
+            finally:
+                pubsub.close()
+
+        # The client reconnects after the stream closes at the end of its duration
+        return Response(
+            stream(),
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-store', 'X-Accel-Buffering': 'no'},
+        )
+
     @route(
         'mark_read/<eventid_b58>', endpoint='notification_mark_read', methods=['POST']
     )
@@ -88,8 +254,11 @@ class AllNotificationsView(ClassView):
             nr = NotificationRecipient.get_for(current_auth.user, eventid_b58)
             if nr is None:
                 abort(404)
+            counted = is_counted_unread(nr)
             nr.is_read = True
             db.session.commit()
+            if counted:
+                adjust_unread_count(current_auth.user.id, -1)
             return {'status': 'ok', 'unread': self.unread_count()}
         return {'status': 'error', 'error': 'csrf'}, 400
 
@@ -105,7 +274,10 @@ class AllNotificationsView(ClassView):
             nr = NotificationRecipient.get_for(current_auth.user, eventid_b58)
             if nr is None:
                 abort(404)
+            was_counted = is_counted_unread(nr)
             nr.is_read = False
             db.session.commit()
+            if not was_counted and is_counted_unread(nr):
+                adjust_unread_count(current_auth.user.id, 1)
             return {'status': 'ok', 'unread': self.unread_count()}
         return {'status': 'error', 'error': 'csrf'}, 400
@@ -38,14 +38,8 @@ from ..transports import (
 )
 from ..transports.email import jsonld_view_action, send_email
 from ..utils import blake2b160_hex, mask_email, mask_phone
-from .helpers import (
-    delete_cached_token,
-    make_cached_token,
-    retrieve_cached_token,
-    session_timeouts,
-    str_pw_set_at,
-    validate_rate_limit,
-)
+from .helpers import session_timeouts, str_pw_set_at, validate_rate_limit
+from .otp_store import OtpAttemptLimit, OtpVerifyResult, otp_store
 
 session_timeouts['otp'] = timedelta(minutes=15)
 
@@ -68,6 +62,10 @@ class OtpUserError(OtpError, Forbidden):
     """OTP is being used by a different user."""
 
 
+class OtpRateLimitError(OtpError, TooManyRequests):
+    """Too many attempts have been made to verify an OTP."""
+
+
 # MARK: Typing -------------------------------------------------------------------------
 
 #: Tell mypy that the type of ``OtpSession.user`` is same as ``OtpSession.make(user)``.
@@ -101,7 +99,8 @@ class OtpSession(Generic[OptionalAccountType]):
 
     reason: str
     token: str
-    otp: str
+    #: The OTP is only known when it is made. Use :attr:`otp` to read it
+    _otp: str | None
     user: OptionalAccountType
     email: str | None = None
     phone: str | None = None
@@ -148,37 +147,41 @@ class OtpSession(Generic[OptionalAccountType]):
         """
         # Safety check, only one of anchor or phone/email can be provided
         require_one_of(anchor=anchor, phone_or_email=(phone or email))
-        # Make an OTP valid for 15 minutes. Store this OTP in Redis cache and add a ref
-        # to this cache entry in the user's cookie session. The cookie never contains
-        # the actual OTP. See :func:`make_cached_token` for additional documentation.
+        # Make an OTP valid for 15 minutes. Store this OTP in the OTP store and add a
+        # ref to it in the user's cookie session. Neither the cookie nor the store
+        # contain the actual OTP. See :mod:`~funnel.views.otp_store` for details.
         otp = newpin()
         if isinstance(anchor, AccountPhone | PhoneNumber):
             phone = str(anchor)
         if isinstance(anchor, AccountEmail | AccountEmailClaim | EmailAddress):
             email = str(anchor)
-        token = make_cached_token(
+        token = otp_store.create(
             {
                 'reason': reason,
-                'otp': otp,
                 'user_buid': user.buid if user is not None else None,
                 'email': email,
                 'phone': phone,
             },
+            otp,
             timeout=15 * 60,
         )
         session['otp'] = token
         return cls(
-            reason=reason, token=token, otp=otp, user=user, email=email, phone=phone
+            reason=reason, token=token, _otp=otp, user=user, email=email, phone=phone
         )
 
     @classmethod
     def retrieve(cls, reason: str) -> Self:
-        """Retrieve an OTP from cache using the token in browser cookie session."""
+        """
+        Retrieve an OTP from the store using the token in browser cookie session.
+
+        The retrieved session does not have the OTP. Use :meth:`verify` to check it.
+        """
         otp_token = session.get('otp')
         if not otp_token:
             current_app.logger.info("%s OTP timed out: cookie_expired", reason)
             raise OtpTimeoutError('cookie_expired')
-        otp_data = retrieve_cached_token(otp_token)
+        otp_data = otp_store.retrieve(otp_token)
         if not otp_data:
             current_app.logger.info("%s OTP timed out: cache_expired", reason)
             raise OtpTimeoutError('cache_expired')
@@ -200,20 +203,64 @@ class OtpSession(Generic[OptionalAccountType]):
         return cls(
             reason=reason,
             token=otp_token,
-            otp=otp_data['otp'],
+            _otp=None,
             user=user,  # type: ignore[arg-type]
             email=otp_data['email'],
             phone=otp_data['phone'],
         )
 
+    @property
+    def otp(self) -> str:
+        """OTP to send, available only in a session made with :meth:`make`."""
+        if self._otp is None:
+            raise ValueError("The OTP is not available in a retrieved OtpSession")
+        return self._otp
+
+    def verify(self, otp: str) -> bool:
+        """
+        Verify an OTP, limiting attempts per OTP, phone or email, and IP address.
+
+        A correct OTP is consumed in the same step, so it is accepted only once even
+        if submitted concurrently. A later attempt will raise :exc:`OtpTimeoutError`.
+
+        :raises OtpTimeoutError: If the OTP has expired
+        :raises OtpRateLimitError: If too many attempts have been made
+        """
+        # Allow 5 failed guesses per 60 seconds per OTP, and fewer failed guesses per
+        # 15 minutes across all OTPs for the same phone, email or IP address. Successful
+        # verifications are not counted, so users behind a shared IP address are not
+        # locked out by each other's logins
+        limits = [OtpAttemptLimit('token/' + self.token, 5, 60)]
+        if self.phone is not None:
+            limits.append(
+                OtpAttemptLimit('phone/' + blake2b160_hex(self.phone), 10, 900)
+            )
+        if self.email is not None:
+            limits.append(
+                OtpAttemptLimit('email/' + blake2b160_hex(self.email), 10, 900)
+            )
+        limits.append(OtpAttemptLimit('ipaddr/' + (request.remote_addr or ''), 50, 900))
+        result = otp_store.verify(self.token, otp, limits)
+        if result is OtpVerifyResult.EXPIRED:
+            current_app.logger.info("%s OTP timed out: cache_expired", self.reason)
+            raise OtpTimeoutError('cache_expired')
+        if result is OtpVerifyResult.LIMITED:
+            current_app.logger.info("%s OTP attempts exceeded", self.reason)
+            raise OtpRateLimitError('rate_limited')
+        return result is OtpVerifyResult.VALID
+
     @staticmethod
     def delete() -> bool:
-        """Delete OTP request from cookie session and cache."""
+        """
+        Delete OTP request from cookie session and the OTP store.
+
+        Returns `False` if the OTP was already removed from the store, as happens when
+        it is verified.
+        """
         token = session.pop('otp', None)
         if not token:
             return False
-        delete_cached_token(token)
-        return True
+        return otp_store.consume(token)
 
     @cached_property
     def display_phone(self) -> str:
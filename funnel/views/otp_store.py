@@ -0,0 +1,241 @@
+"""Storage for OTPs with atomic attempt limiting."""
+
+from __future__ import annotations
+
+import hmac
+import json
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Sequence
+from enum import Enum
+from hashlib import sha256
+from threading import Lock
+from typing import Any, NamedTuple
+
+from .. import app, redis_store
+from .helpers import make_text_token
+
+__all__ = [
+    'MemoryOtpStore',
+    'OtpAttemptLimit',
+    'OtpStore',
+    'OtpVerifyResult',
+    'RedisOtpStore',
+    'otp_digest',
+    'otp_store',
+]
+
+# Changing these prefixes will break pending OTPs. Do not change
+OTP_KEY_PREFIX = 'otp/v1/'
+OTP_ATTEMPTS_KEY_PREFIX = 'otp_attempts/v1/'
+
+# KEYS[1] is the OTP, KEYS[2:] are attempt counters. ARGV[1] is the digest of the OTP
+# being verified, followed by the attempt limits and then the window for each counter.
+# Limits are checked, the digest compared and either the OTP consumed or the failed
+# attempt counted together, so concurrent guesses cannot exceed a limit and a correct
+# OTP is accepted only once. The digest is an HMAC that cannot be computed without the
+# secret key, so comparing it here reveals nothing useful
+OTP_VERIFY_SCRIPT = """
+local stored = redis.call('GET', KEYS[1])
+if not stored then
+    return 'expired'
+end
+local counters = #KEYS - 1
+for i = 1, counters do
+    local count = tonumber(redis.call('GET', KEYS[i + 1]) or '0')
+    if count >= tonumber(ARGV[i + 1]) then
+        return 'limited'
+    end
+end
+if cjson.decode(stored)['digest'] == ARGV[1] then
+    redis.call('DEL', KEYS[1])
+    return 'valid'
+end
+for i = 1, counters do
+    if redis.call('INCR', KEYS[i + 1]) == 1 then
+        redis.call('EXPIRE', KEYS[i + 1], ARGV[counters + i + 1])
+    end
+end
+return 'invalid'
+"""
+
+
+class OtpVerifyResult(Enum):
+    """Result of an OTP verification."""
+
+    VALID = 'valid'
+    INVALID = 'invalid'
+    EXPIRED = 'expired'
+    LIMITED = 'limited'
+
+
+class OtpAttemptLimit(NamedTuple):
+    """Number of verification attempts allowed against an identifier in a window."""
+
+    #: Identifier for the attempt counter, such as ``'ipaddr/' + ip_address``
+    identifier: str
+    #: Number of attempts allowed
+    attempts: int
+    #: Duration in seconds from the first attempt before the counter resets
+    window: int
+
+
+def otp_digest(token: str, otp: str) -> str:
+    """
+    Return a digest of the OTP bound to its token.
+
+    OTP stores keep this digest instead of the OTP, and verification compares
+    digests in constant time.
+    """
+    return hmac.new(
+        app.config['SECRET_KEYS'][0].encode(), f'{token}:{otp}'.encode(), sha256
+    ).hexdigest()
+
+
+class OtpStore(ABC):
+    """
+    Base class for OTP storage.
+
+    An OTP is created against a short text token and a payload. Verification refuses
+    once any given limit is reached, whether or not the OTP is correct, and counts
+    failed attempts against every limit. A correct OTP is consumed by verification, so
+    only one caller will succeed in verifying it. Consuming an OTP without verifying
+    removes it, and only one caller will succeed in consuming it.
+    """
+
+    @abstractmethod
+    def create(self, payload: dict[str, Any], otp: str, timeout: int) -> str:
+        """Store an OTP with a payload for `timeout` seconds and return its token."""
+
+    @abstractmethod
+    def retrieve(self, token: str) -> dict[str, Any] | None:
+        """Return the payload for an OTP, or `None` if it has expired."""
+
+    @abstractmethod
+    def verify(
+        self, token: str, otp: str, limits: Sequence[OtpAttemptLimit] = ()
+    ) -> OtpVerifyResult:
+        """Verify and consume an OTP, counting a failed attempt against the limits."""
+
+    @abstractmethod
+    def consume(self, token: str) -> bool:
+        """Remove an OTP, returning `True` if this call removed it."""
+
+
+class RedisOtpStore(OtpStore):
+    """OTP store in Redis, shared across all HTTP workers."""
+
+    def create(self, payload: dict[str, Any], otp: str, timeout: int) -> str:
+        """Store an OTP with a payload for `timeout` seconds and return its token."""
+        while True:
+            token = make_text_token()
+            value = json.dumps({'payload': payload, 'digest': otp_digest(token, otp)})
+            # Use this token only if it is not in use
+            if redis_store.set(OTP_KEY_PREFIX + token, value, nx=True, ex=timeout):
+                return token
+
+    def retrieve(self, token: str) -> dict[str, Any] | None:
+        """Return the payload for an OTP, or `None` if it has expired."""
+        value = redis_store.get(OTP_KEY_PREFIX + token)
+        if value is None:
+            return None
+        return json.loads(value)['payload']
+
+    def verify(
+        self, token: str, otp: str, limits: Sequence[OtpAttemptLimit] = ()
+    ) -> OtpVerifyResult:
+        """Verify and consume an OTP, counting a failed attempt against the limits."""
+        return OtpVerifyResult(
+            redis_store.eval(
+                OTP_VERIFY_SCRIPT,
+                len(limits) + 1,
+                OTP_KEY_PREFIX + token,
+                *(OTP_ATTEMPTS_KEY_PREFIX + limit.identifier for limit in limits),
+                otp_digest(token, otp),
+                *(limit.attempts for limit in limits),
+                *(limit.window for limit in limits),
+            )
+        )
+
+    def consume(self, token: str) -> bool:
+        """Remove an OTP, returning `True` if this call removed it."""
+        return bool(redis_store.delete(OTP_KEY_PREFIX + token))
+
+
+class MemoryOtpStore(OtpStore):
+    """OTP store in process memory, for tests."""
+
+    def __init__(self) -> None:
+        self.lock = Lock()
+        #: Token: (payload, digest, expiry timestamp)
+        self.otps: dict[str, tuple[dict[str, Any], str, float]] = {}
+        #: Identifier: (count, expiry timestamp)
+        self.attempts: dict[str, tuple[int, float]] = {}
+
+    def _get(self, token: str) -> tuple[dict[str, Any], str, float] | None:
+        """Return an unexpired OTP record. Caller must hold the lock."""
+        record = self.otps.get(token)
+        if record is not None and record[2] <= time.monotonic():
+            del self.otps[token]
+            return None
+        return record
+
+    def _count(self, identifier: str) -> int:
+        """Return an unexpired attempt count. Caller must hold the lock."""
+        count, expires_at = self.attempts.get(identifier, (0, 0.0))
+        return count if expires_at > time.monotonic() else 0
+
+    def create(self, payload: dict[str, Any], otp: str, timeout: int) -> str:
+        """Store an OTP with a payload for `timeout` seconds and return its token."""
+        with self.lock:
+            while True:
+                token = make_text_token()
+                if self._get(token) is None:
+                    break
+            self.otps[token] = (
+                payload,
+                otp_digest(token, otp),
+                time.monotonic() + timeout,
+            )
+        return token
+
+    def retrieve(self, token: str) -> dict[str, Any] | None:
+        """Return the payload for an OTP, or `None` if it has expired."""
+        with self.lock:
+            record = self._get(token)
+        return record[0] if record is not None else None
+
+    def verify(
+        self, token: str, otp: str, limits: Sequence[OtpAttemptLimit] = ()
+    ) -> OtpVerifyResult:
+        """Verify and consume an OTP, counting a failed attempt against the limits."""
+        with self.lock:
+            record = self._get(token)
+            if record is None:
+                return OtpVerifyResult.EXPIRED
+            if any(self._count(limit.identifier) >= limit.attempts for limit in limits):
+                return OtpVerifyResult.LIMITED
+            if hmac.compare_digest(record[1], otp_digest(token, otp)):
+                del self.otps[token]
+                return OtpVerifyResult.VALID
+            now = time.monotonic()
+            for limit in limits:
+                count = self._count(limit.identifier)
+                if count:
+                    self.attempts[limit.identifier] = (
+                        count + 1,
+                        self.attempts[limit.identifier][1],
+                    )
+                else:
+                    self.attempts[limit.identifier] = (1, now + limit.window)
+        return OtpVerifyResult.INVALID
+
+    def consume(self, token: str) -> bool:
+        """Remove an OTP, returning `True` if this call removed it."""
+        with self.lock:
+            return self._get(token) is not None and bool(self.otps.pop(token))
+
+
+#: OTP store used by :class:`~funnel.views.otp.OtpSession`. Tests may replace this
+#: with a :class:`MemoryOtpStore`
+otp_store: OtpStore = RedisOtpStore()
@@ -7,7 +7,7 @@ from typing import Any
 
 from flask import abort, current_app, flash, jsonify, render_template, request
 
-from baseframe import _
+from baseframe import _, cache
 from baseframe.filters import date_filter, datetime_filter
 from baseframe.forms import render_form
 from coaster.utils import parse_isoformat
@@ -29,7 +29,19 @@ from ..forms import (
     ProfileLogoForm,
     ProfileTransitionForm,
 )
-from ..models import Account, AccountMembership, Project, Session, db, sa
+from ..models import (
+    Account,
+    AccountMembership,
+    Project,
+    ProjectMembership,
+    ProjectSponsorMembership,
+    Proposal,
+    ProposalSponsorMembership,
+    Session,
+    db,
+    sa,
+    sa_orm,
+)
 from ..typing import ReturnRenderWith, ReturnView
 from .decorators import idempotent_request
 from .helpers import render_redirect
@@ -81,6 +93,174 @@ def feature_profile_following_count(obj: Account) -> int:
     return obj.active_following_memberships.count()
 
 
+# MARK: Profile page data --------------------------------------------------------------
+
+#: Cache period for the public sections of an account's profile page
+PROFILE_PAGE_CACHE_TIMEOUT = 15 * 60
+
+
+def profile_page_cache_key(account_id: int) -> str:
+    """Return cache key for the public sections of an account's profile page."""
+    return f'profile_page/{account_id}'
+
+
+def profile_public_sections(account: Account) -> dict[str, Any]:
+    """
+    Return ids of projects and proposals in the public sections of a profile page.
+
+    These sections are the same for every viewer, including anonymous visitors, so
+    they are cached per account along with the featured project's schedule. Upcoming,
+    featured and CFP-open projects come from a single query.
+    """
+    cache_key = profile_page_cache_key(account.id)
+    sections: dict[str, Any] | None = cache.get(cache_key)
+    if sections is not None:
+        return sections
+
+    upcoming_filter = sa.or_(
+        Project.state.LIVE,
+        Project.state.UPCOMING,
+        sa.and_(Project.start_at.is_(None), Project.published_at.is_not(None)),
+    )
+    # `order_by(None)` clears any existing order defined in relationship.
+    # listed_projects already includes a filter on Project.state.PUBLISHED
+    projects = (
+        account.listed_projects.order_by(None)
+        .filter(sa.or_(upcoming_filter, Project.cfp_state.OPEN))
+        .order_by(Project.order_by_date())
+        .all()
+    )
+    upcoming_projects = [
+        _p
+        for _p in projects
+        if _p.state.LIVE
+        or _p.state.UPCOMING
+        or (_p.start_at is None and _p.published_at is not None)
+    ]
+    featured_project = next((_p for _p in upcoming_projects if _p.site_featured), None)
+    featured_project_sessions = (
+        session_list_data(featured_project.scheduled_sessions, with_modal_url='view')
+        if featured_project is not None
+        else None
+    )
+    membership_project = account.membership_project
+    sections = {
+        'upcoming_projects': [
+            _p.id for _p in upcoming_projects if _p is not featured_project
+        ],
+        'featured_project': (
+            featured_project.id if featured_project is not None else None
+        ),
+        'featured_project_sessions': featured_project_sessions,
+        'featured_project_schedule': (
+            schedule_data(
+                featured_project,
+                with_slots=False,
+                scheduled_sessions=featured_project_sessions,
+            )
+            if featured_project is not None
+            else None
+        ),
+        'open_cfp_projects': [_p.id for _p in projects if _p.cfp_state.OPEN],
+        'sponsored_projects': list(
+            db.session.scalars(
+                account.project_sponsor_memberships.with_entities(
+                    ProjectSponsorMembership.project_id
+                )
+            )
+        ),
+        'sponsored_submissions': list(
+            db.session.scalars(
+                account.proposal_sponsor_memberships.with_entities(
+                    ProposalSponsorMembership.proposal_id
+                )
+            )
+        ),
+        'membership_project': (
+            membership_project.id if membership_project is not None else None
+        ),
+    }
+    cache.set(cache_key, sections, timeout=PROFILE_PAGE_CACHE_TIMEOUT)
+    return sections
+
+
+def profile_viewer_projects(account: Account) -> tuple[list[Project], list[Project]]:
+    """
+    Return draft and unscheduled projects of an account visible to the current user.
+
+    Admins see all such projects, while other users see projects they are crew in.
+    Both lists come from a single query, and anonymous visitors need no query.
+    """
+    viewer_filter = sa.or_(
+        Project.state.DRAFT,
+        Project.cfp_state.DRAFT,
+        Project.state.PUBLISHED_WITHOUT_SESSIONS,
+    )
+    if account.current_roles.admin:
+        projects = account.projects.filter(viewer_filter).all()
+    elif current_auth.user is not None:
+        projects = [
+            membership.project
+            for membership in current_auth.user.projects_as_crew_active_memberships.join(
+                Project
+            )
+            .filter(Project.account_id == account.id, viewer_filter)
+            .options(sa_orm.contains_eager(ProjectMembership.project))
+        ]
+    else:
+        return [], []
+    return (
+        [_p for _p in projects if _p.state.DRAFT or _p.cfp_state.DRAFT],
+        [_p for _p in projects if _p.state.PUBLISHED_WITHOUT_SESSIONS],
+    )
+
+
+def invalidate_profile_page(*account_ids: int | None) -> None:
+    """Remove cached profile page sections for the given accounts."""
+    cache.delete_many(
+        *(profile_page_cache_key(_id) for _id in set(account_ids) if _id is not None)
+    )
+
+
+# The cache is cleared when changes are flushed, before they are committed. A parallel
+# request may cache the previous state in this interval, so the cache period is short
+
+
+@sa.event.listens_for(Project, 'after_insert')
+@sa.event.listens_for(Project, 'after_update')
+@sa.event.listens_for(Project, 'after_delete')
+def _project_changed(_mapper: Any, _connection: Any, target: Project) -> None:
+    # A project moved to another account changes both profile pages
+    invalidate_profile_page(
+        target.account_id, *sa.inspect(target).attrs.account_id.history.deleted
+    )
+
+
+@sa.event.listens_for(Session, 'after_insert')
+@sa.event.listens_for(Session, 'after_update')
+@sa.event.listens_for(Session, 'before_delete')
+def _session_changed(_mapper: Any, _connection: Any, target: Session) -> None:
+    # Sessions appear in the featured project's schedule
+    invalidate_profile_page(target.project.account_id)
+
+
+@sa.event.listens_for(ProjectSponsorMembership, 'after_insert')
+@sa.event.listens_for(ProjectSponsorMembership, 'after_update')
+@sa.event.listens_for(ProjectSponsorMembership, 'after_delete')
+@sa.event.listens_for(ProposalSponsorMembership, 'after_insert')
+@sa.event.listens_for(ProposalSponsorMembership, 'after_update')
+@sa.event.listens_for(ProposalSponsorMembership, 'after_delete')
+def _sponsorship_changed(
+    _mapper: Any,
+    _connection: Any,
+    target: ProjectSponsorMembership | ProposalSponsorMembership,
+) -> None:
+    invalidate_profile_page(target.member_id)
+
+
+# MARK: Views --------------------------------------------------------------------------
+
+
 def template_switcher(templateargs: Mapping[str, Any]) -> str:
     templateargs = dict(templateargs)
     template = templateargs.pop('template')
@@ -119,49 +299,48 @@ class ProfileView(UrlChangeCheck, AccountViewBase):
 
         else:
             template_name = 'profile.html.jinja2'
-
-            # `order_by(None)` clears any existing order defined in relationship.
-            # We're using it because we want to define our own order here.
-            # listed_projects already includes a filter on Project.state.PUBLISHED
-            projects = self.obj.listed_projects.order_by(None)
-            upcoming_projects = (
-                projects.filter(
-                    sa.or_(
-                        Project.state.LIVE,
-                        Project.state.UPCOMING,
-                        sa.and_(
-                            Project.start_at.is_(None),
-                            Project.published_at.is_not(None),
-                        ),
-                    ),
+            sections = profile_public_sections(self.obj)
+
+            # Load projects and proposals for all sections in one query each
+            projects_by_id = {
+                _p.id: _p
+                for _p in Project.query.filter(
+                    Project.id.in_(
+                        [
+                            *sections['upcoming_projects'],
+                            *sections['open_cfp_projects'],
+                            *sections['sponsored_projects'],
+                            *filter(
+                                None,
+                                [
+                                    sections['featured_project'],
+                                    sections['membership_project'],
+                                ],
+                            ),
+                        ]
+                    )
                 )
-                .order_by(Project.order_by_date())
-                .all()
+            }
+            proposals_by_id = (
+                {
+                    _p.id: _p
+                    for _p in Proposal.query.filter(
+                        Proposal.id.in_(sections['sponsored_submissions'])
+                    )
+                }
+                if sections['sponsored_submissions']
+                else {}
             )
 
-            featured_project = (
-                projects.filter(
-                    sa.or_(
-                        Project.state.LIVE,
-                        Project.state.UPCOMING,
-                        sa.and_(
-                            Project.start_at.is_(None),
-                            Project.published_at.is_not(None),
-                        ),
-                    ),
-                    Project.site_featured.is_(True),
-                )
-                .order_by(Project.order_by_date())
-                .limit(1)
-                .first()
-            )
-            scheduled_sessions_list = (
-                session_list_data(
-                    featured_project.scheduled_sessions, with_modal_url='view'
-                )
-                if featured_project is not None
-                else None
-            )
+            def project_list(key: str) -> list[Project]:
+                return [
+                    projects_by_id[_id]
+                    for _id in sections[key]
+                    if _id in projects_by_id
+                ]
+
+            featured_project = projects_by_id.get(sections['featured_project'])
+            membership_project = projects_by_id.get(sections['membership_project'])
             featured_project_venues = (
                 [
                     venue.current_access(datasets=('without_parent', 'related'))
@@ -170,38 +349,7 @@ class ProfileView(UrlChangeCheck, AccountViewBase):
                 if featured_project is not None
                 else None
             )
-            featured_project_schedule = (
-                schedule_data(
-                    featured_project,
-                    with_slots=False,
-                    scheduled_sessions=scheduled_sessions_list,
-                )
-                if featured_project is not None
-                else None
-            )
-            if featured_project is not None and featured_project in upcoming_projects:
-                upcoming_projects.remove(featured_project)
-            open_cfp_projects = (
-                projects.filter(Project.cfp_state.OPEN)
-                .order_by(Project.order_by_date())
-                .all()
-            )
-
-            # If the user is an admin of this account, show all draft projects.
-            # Else, only show the drafts they have a crew role in
-            if self.obj.current_roles.admin:
-                draft_projects: list[Project] = self.obj.draft_projects.all()
-                unscheduled_projects = self.obj.projects.filter(
-                    Project.state.PUBLISHED_WITHOUT_SESSIONS
-                ).all()
-            else:
-                draft_projects = self.obj.draft_projects_for(current_auth.user)
-                unscheduled_projects = self.obj.unscheduled_projects_for(
-                    current_auth.user
-                )
-
-            sponsored_projects = self.obj.sponsored_projects
-            sponsored_submissions = self.obj.sponsored_proposals
+            draft_projects, unscheduled_projects = profile_viewer_projects(self.obj)
 
             ctx = {
                 'template': template_name,
@@ -212,11 +360,11 @@ class ProfileView(UrlChangeCheck, AccountViewBase):
                 ],
                 'upcoming_projects': [
                     p.current_access(datasets=('without_parent', 'related'))
-                    for p in upcoming_projects
+                    for p in project_list('upcoming_projects')
                 ],
                 'open_cfp_projects': [
                     p.current_access(datasets=('without_parent', 'related'))
-                    for p in open_cfp_projects
+                    for p in project_list('open_cfp_projects')
                 ],
                 'draft_projects': [
                     p.current_access(datasets=('without_parent', 'related'))
@@ -230,21 +378,22 @@ class ProfileView(UrlChangeCheck, AccountViewBase):
                     else None
                 ),
                 'featured_project_venues': featured_project_venues,
-                'featured_project_sessions': scheduled_sessions_list,
-                'featured_project_schedule': featured_project_schedule,
+                'featured_project_sessions': sections['featured_project_sessions'],
+                'featured_project_schedule': sections['featured_project_schedule'],
                 'sponsored_projects': [
                     _p.current_access(datasets=('primary', 'related'))
-                    for _p in sponsored_projects
+                    for _p in project_list('sponsored_projects')
                 ],
                 'sponsored_submissions': [
-                    _p.current_access(datasets=('primary', 'related'))
-                    for _p in sponsored_submissions
+                    proposals_by_id[_id].current_access(datasets=('primary', 'related'))
+                    for _id in sections['sponsored_submissions']
+                    if _id in proposals_by_id
                 ],
                 'membership_project': (
-                    self.obj.membership_project.current_access(
+                    membership_project.current_access(
                         datasets=('without_parent', 'related')
                     )
-                    if self.obj.membership_project is not None
+                    if membership_project is not None
                     else None
                 ),
             }
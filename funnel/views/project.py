@@ -1,7 +1,6 @@
 """Views for projects."""
 
-import csv
-import io
+from collections.abc import Iterator
 from dataclasses import dataclass
 from json import JSONDecodeError
 from types import SimpleNamespace
@@ -13,7 +12,7 @@ from markupsafe import Markup
 from baseframe import _, __, forms
 from baseframe.forms import render_delete_sqla, render_form, render_message
 from coaster.utils import getbool, make_name, utcnow
-from coaster.views import get_next_url, render_with, requires_roles, route
+from coaster.views import get_next_url, render_with, requestargs, requires_roles, route
 
 from .. import app
 from ..auth import current_auth
@@ -32,9 +31,15 @@ from ..forms import (
 )
 from ..models import (
     Account,
+    AccountEmail,
+    AccountEmailClaim,
+    AccountPhone,
+    EmailAddress,
     Project,
     ProjectRsvpStateEnum,
     Proposal,
+    ProposalMembership,
+    Query,
     RegistrationCancellationNotification,
     RegistrationConfirmationNotification,
     Rsvp,
@@ -42,12 +47,19 @@ from ..models import (
     SavedProject,
     db,
     sa,
+    sa_orm,
 )
 from ..signals import project_data_change, project_role_change
 from ..typing import ReturnRenderWith, ReturnView
-from ..utils import TIMEDELTA_1DAY
+from ..utils import TIMEDELTA_1DAY, abort_null
 from .decorators import idempotent_request
-from .helpers import FormLayoutTemplate, html_in_json, render_redirect
+from .helpers import (
+    CSV_EXPORT_BATCH_SIZE,
+    FormLayoutTemplate,
+    csv_response,
+    html_in_json,
+    render_redirect,
+)
 from .jobs import import_tickets, tag_locations
 from .login_session import (
     requires_login,
@@ -154,6 +166,90 @@ numeric_count = CountWords(
 )
 
 
+def account_contact_options() -> list[sa_orm.interfaces.LoaderOption]:
+    """Return loader options for an account's email address and phone number."""
+    return [
+        sa_orm.selectinload(Account.primary_email).joinedload(
+            AccountEmail.email_address
+        ),
+        sa_orm.selectinload(Account.primary_phone).joinedload(
+            AccountPhone.phone_number
+        ),
+        # Fallbacks used when there is no primary email address or phone number
+        sa_orm.selectinload(Account.emails).joinedload(AccountEmail.email_address),
+        sa_orm.selectinload(Account.phones).joinedload(AccountPhone.phone_number),
+        sa_orm.selectinload(Account.emailclaims).joinedload(
+            AccountEmailClaim.email_address
+        ),
+    ]
+
+
+#: RSVP states that can be listed in the participant list, by name
+RSVP_LIST_STATES = {
+    'yes': RsvpStateEnum.YES,
+    'maybe': RsvpStateEnum.MAYBE,
+    'no': RsvpStateEnum.NO,
+}
+#: Participants in each page of the participant list
+RSVP_LIST_PAGE_SIZE = 50
+RSVP_LIST_MAX_PAGE_SIZE = 500
+
+
+def rsvp_list_query(
+    project: Project, state: RsvpStateEnum, query: str = ''
+) -> Query[Rsvp]:
+    """
+    Return RSVPs in a state matching a search query, most recent response first.
+
+    The query is matched against the participant's name and username, or against
+    their email addresses if it is an email address.
+    """
+    rsvps = project.rsvps_with(state)
+    if query:
+        email_filter = EmailAddress.get_filter(email=query) if '@' in query else None
+        if email_filter is not None:
+            rsvps = rsvps.filter(
+                Account.emails.any(AccountEmail.email_address.has(email_filter))
+            )
+        else:
+            rsvps = rsvps.filter(
+                Account.search_vector.bool_op('@@')(sa.func.websearch_to_tsquery(query))
+            )
+    return rsvps.order_by(Rsvp.updated_at.desc(), Rsvp.uuid.desc())
+
+
+def rsvp_list_page(
+    project: Project,
+    state: RsvpStateEnum,
+    query: str = '',
+    after: str = '',
+    per_page: int = RSVP_LIST_PAGE_SIZE,
+) -> tuple[list[Rsvp], str | None]:
+    """
+    Return a page of RSVPs with participant contacts loaded, and a cursor for the next.
+
+    Pages are fetched by keyset, continuing after the RSVP identified by `after`, so
+    later pages are as fast as the first.
+    """
+    rsvps = rsvp_list_query(project, state, query).options(
+        sa_orm.contains_eager(Rsvp.participant).options(*account_contact_options())
+    )
+    if after:
+        cursor = db.session.execute(
+            sa.select(Rsvp.updated_at, Rsvp.uuid).where(
+                Rsvp.project_id == project.id, Rsvp.uuid_b58 == after
+            )
+        ).first()
+        if cursor is None:
+            abort(400)
+        rsvps = rsvps.filter(sa.tuple_(Rsvp.updated_at, Rsvp.uuid) < tuple(cursor))
+    # Fetch one more than required to find if there is a next page
+    items = rsvps.limit(per_page + 1).all()
+    if len(items) > per_page:
+        return items[:per_page], items[per_page - 1].uuid_b58
+    return items, None
+
+
 def get_registration_text(
     count: int, registered: bool = False, follow_mode: bool = False
 ) -> str:
@@ -390,27 +486,22 @@ class ProjectView(ProjectViewBase, DraftViewProtoMixin):
     @requires_login
     @requires_roles({'editor'})
     def proposals_csv(self) -> Response:
-        filename = f'submissions-{self.obj.account.name}-{self.obj.name}.csv'
-        outfile = io.StringIO(newline='')
-        out = csv.writer(outfile)
-        out.writerow(
-            [
-                'title',
-                'url',
-                'proposer',
-                'username',
-                'email',
-                'phone',
-                'state',
-                'labels',
-                'body',
-                'datetime',
-            ]
-        )
-        for proposal in self.obj.proposals:
-            user = proposal.first_user
-            out.writerow(
-                [
+        proposals = (
+            self.obj.proposals.options(
+                sa_orm.selectinload(Proposal.memberships)
+                .joinedload(ProposalMembership.member)
+                .options(*account_contact_options()),
+                sa_orm.joinedload(Proposal.created_by).options(
+                    *account_contact_options()
+                ),
+                sa_orm.selectinload(Proposal.labels),
+            )
+        ).yield_per(CSV_EXPORT_BATCH_SIZE)
+
+        def rows() -> Iterator[list]:
+            for proposal in proposals:
+                user = proposal.first_user
+                yield [
                     proposal.title,
                     proposal.url_for(_external=True),
                     user.fullname,
@@ -422,13 +513,22 @@ class ProjectView(ProjectViewBase, DraftViewProtoMixin):
                     proposal.body,
                     proposal.datetime.replace(second=0, microsecond=0).isoformat(),
                 ]
-            )
 
-        outfile.seek(0)
-        return Response(
-            outfile.getvalue(),
-            content_type='text/csv',
-            headers=[('Content-Disposition', f'attachment;filename="{filename}"')],
+        return csv_response(
+            f'submissions-{self.obj.account.name}-{self.obj.name}.csv',
+            [
+                'title',
+                'url',
+                'proposer',
+                'username',
+                'email',
+                'phone',
+                'state',
+                'labels',
+                'body',
+                'datetime',
+            ],
+            rows(),
         )
 
     @route('videos')
@@ -786,17 +886,58 @@ class ProjectView(ProjectViewBase, DraftViewProtoMixin):
         return render_redirect(self.obj.url_for())
 
     @route('rsvp_list')
-    @render_with('project_rsvp_list.html.jinja2')
+    @render_with('project_rsvp_list.html.jinja2', json=True)
     @requires_login
     @requires_roles({'promoter'})
-    def rsvp_list(self) -> ReturnRenderWith:
-        """List all project participants."""
+    @requestargs(
+        ('state', abort_null),
+        ('q', abort_null),
+        ('after', abort_null),
+        ('per_page', int),
+    )
+    def rsvp_list(
+        self,
+        state: str = 'yes',
+        q: str = '',
+        after: str = '',
+        per_page: int = RSVP_LIST_PAGE_SIZE,
+    ) -> ReturnRenderWith:
+        """List project participants, one page at a time."""
+        rsvp_state = RSVP_LIST_STATES.get(state)
+        if rsvp_state is None:
+            abort(400)
+        per_page = min(max(per_page, 1), RSVP_LIST_MAX_PAGE_SIZE)
+        rsvps, next_cursor = rsvp_list_page(self.obj, rsvp_state, q, after, per_page)
+        account = self.obj.account
         return {
             'project': self.obj.current_access(datasets=('primary', 'related')),
-            'going_rsvps': [
-                _r.current_access(datasets=('without_parent', 'related', 'related'))
-                for _r in self.obj.rsvps_with(RsvpStateEnum.YES)
+            'state': state,
+            'states': {
+                name: str(list_state.label)
+                for name, list_state in RSVP_LIST_STATES.items()
+            },
+            'query': q,
+            'count': self.obj.rsvp_counts().get(str(rsvp_state), 0),
+            'participants': [
+                {
+                    'fullname': rsvp.participant.fullname,
+                    'email': str(rsvp.participant.default_email(context=account) or ''),
+                    'phone': str(
+                        rsvp.participant.transport_for_sms(context=account) or ''
+                    ),
+                    'responded_at': rsvp.updated_at,
+                    'form': rsvp.form or {},
+                }
+                for rsvp in rsvps
             ],
+            'next_cursor': next_cursor,
+            'next_url': (
+                self.obj.url_for(
+                    'rsvp_list', state=state, q=q or None, after=next_cursor
+                )
+                if next_cursor
+                else None
+            ),
             'rsvp_form_fields': (
                 [
                     field.get('name', '')
@@ -812,33 +953,32 @@ class ProjectView(ProjectViewBase, DraftViewProtoMixin):
 
     def get_rsvp_state_csv(self, state: RsvpStateEnum) -> Response:
         """Export participant list as a CSV."""
-        outfile = io.StringIO(newline='')
-        out = csv.writer(outfile)
-        out.writerow(['fullname', 'email', 'phone', 'created_at'])
-        for rsvp in self.obj.rsvps_with(state):
-            out.writerow(
-                [
+        rsvps = (
+            self.obj.rsvps_with(state)
+            .options(
+                sa_orm.contains_eager(Rsvp.participant).options(
+                    *account_contact_options()
+                )
+            )
+            .yield_per(CSV_EXPORT_BATCH_SIZE)
+        )
+        account = self.obj.account
+
+        def rows() -> Iterator[list]:
+            for rsvp in rsvps:
+                yield [
                     rsvp.participant.fullname,
-                    rsvp.participant.default_email(context=rsvp.project.account) or '',
-                    rsvp.participant.transport_for_sms(context=rsvp.project.account)
-                    or '',
+                    rsvp.participant.default_email(context=account) or '',
+                    rsvp.participant.transport_for_sms(context=account) or '',
                     rsvp.created_at.astimezone(self.obj.timezone)
                     .replace(second=0, microsecond=0, tzinfo=None)
                     .isoformat(),  # Strip precision from timestamp
                 ]
-            )
 
-        outfile.seek(0)
-        return Response(
-            outfile.getvalue(),
-            content_type='text/csv',
-            headers=[
-                (
-                    'Content-Disposition',
-                    f'attachment;filename='
-                    f'"ticket-participants-{make_name(self.obj.title)}-{state}.csv"',
-                )
-            ],
+        return csv_response(
+            f'ticket-participants-{make_name(self.obj.title)}-{state}.csv',
+            ['fullname', 'email', 'phone', 'created_at'],
+            rows(),
         )
 
     @route('rsvp_list/yes.csv')
@@ -334,8 +334,6 @@ class ProjectScheduleView(ProjectViewBase):
                     self.obj.name,
                     repr(session),
                 )
-        self.obj.update_schedule_timestamps()
-        db.session.commit()
         return {'status': 'ok'}
 
 
@@ -106,8 +106,6 @@ def session_edit(
             else:
                 db.session.add(session)
         db.session.commit()
-        session.project.update_schedule_timestamps()
-        db.session.commit()
         if request_wants.html_in_json:
             data = {
                 'id': session.url_id,
@@ -242,8 +240,6 @@ class SessionView(AccountCheckMixin, UrlChangeCheck, UrlForView, ModelView[Sessi
         else:
             self.obj.make_unscheduled()
         db.session.commit()
-        self.obj.project.update_schedule_timestamps()
-        db.session.commit()
         if self.obj.project.features.schedule_no_sessions():
             # FIXME: return 'status': 'ok'
             return {
@@ -2,16 +2,125 @@
 
 from __future__ import annotations
 
-from datetime import timedelta
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from threading import Lock
+from time import monotonic
 
 from flask import abort, redirect
 
 from coaster.utils import utcnow
 
-from .. import app, shortlinkapp, unsubscribeapp
-from ..models import Shortlink
+from .. import app, redis_store, shortlinkapp, unsubscribeapp
+from ..models import Shortlink, db, name_to_bigint, sa_orm
+from ..signals import shortlink_changed
 from ..typing import Response
-from .helpers import app_url_for
+from .helpers import app_url_for, shortlink_url_cache_key
+
+#: Redis key prefix for cached shortlink targets, followed by the shortlink id
+SHORTLINK_CACHE_PREFIX = 'shortlink/'
+#: Cache period for shortlink targets in Redis
+SHORTLINK_CACHE_TIMEOUT = 60 * 60
+#: Cache period for shortlink targets in process memory. Processes are not notified
+#: when a shortlink is disabled, so this is the delay before they stop redirecting
+SHORTLINK_LOCAL_CACHE_TIMEOUT = 60
+#: Number of shortlinks held in process memory
+SHORTLINK_LOCAL_CACHE_SIZE = 4096
+#: Redis key prefix for hourly click counters, followed by the hour as `YYYYMMDDHH`
+SHORTLINK_CLICKS_PREFIX = 'shortlink_clicks/'
+#: Redis key prefix for click counters that are being flushed to the database
+SHORTLINK_CLICKS_FLUSH_PREFIX = 'shortlink_clicks_flush/'
+#: Format of the hour in click counter keys
+SHORTLINK_CLICKS_HOUR_FORMAT = '%Y%m%d%H'
+#: Click counters that have not been flushed to the database expire after this period
+SHORTLINK_CLICKS_TIMEOUT = 7 * 24 * 60 * 60
+
+# Shortlink id: (expiry time, URL or '' if disabled), in least recently used order
+_local_cache: OrderedDict[int, tuple[float, str]] = OrderedDict()
+_local_cache_lock = Lock()
+
+
+# MARK: Shortlink target cache ---------------------------------------------------------
+
+
+def shortlink_cache_key(shortlink_id: int) -> str:
+    """Return the Redis key for a shortlink's cached target."""
+    return f'{SHORTLINK_CACHE_PREFIX}{shortlink_id}'
+
+
+def shortlink_target(name: str) -> tuple[int, str] | None:
+    """
+    Return id and target URL for a shortlink name, with an empty URL if disabled.
+
+    Targets are looked up in process memory, then in Redis, and then in the database.
+    Returns `None` if the shortlink does not exist.
+    """
+    try:
+        shortlink_id = name_to_bigint(name)
+    except (ValueError, TypeError):
+        return None
+    now = monotonic()
+    with _local_cache_lock:
+        cached = _local_cache.get(shortlink_id)
+        if cached is not None:
+            if cached[0] > now:
+                _local_cache.move_to_end(shortlink_id)
+                return shortlink_id, cached[1]
+            del _local_cache[shortlink_id]
+
+    url = redis_store.get(shortlink_cache_key(shortlink_id))
+    if url is None:
+        sl = db.session.get(
+            Shortlink,
+            shortlink_id,
+            options=[sa_orm.load_only(Shortlink.id, Shortlink.url, Shortlink.enabled)],
+        )
+        if sl is None:
+            # Missing shortlinks are not cached, as they may be created later
+            return None
+        url = str(sl.url) if sl.enabled else ''
+        redis_store.set(
+            shortlink_cache_key(shortlink_id), url, ex=SHORTLINK_CACHE_TIMEOUT
+        )
+
+    with _local_cache_lock:
+        _local_cache[shortlink_id] = (now + SHORTLINK_LOCAL_CACHE_TIMEOUT, url)
+        _local_cache.move_to_end(shortlink_id)
+        while len(_local_cache) > SHORTLINK_LOCAL_CACHE_SIZE:
+            _local_cache.popitem(last=False)
+    return shortlink_id, url
+
+
+@shortlink_changed.connect
+def invalidate_shortlink_cache(sender: int, url: str) -> None:
+    """Remove an enabled or disabled shortlink from caches in Redis and this process."""
+    with _local_cache_lock:
+        _local_cache.pop(sender, None)
+    redis_store.delete(
+        shortlink_cache_key(sender),
+        shortlink_url_cache_key(url, shorter=True),
+        shortlink_url_cache_key(url, shorter=False),
+    )
+
+
+# MARK: Click counters -----------------------------------------------------------------
+
+
+def shortlink_clicks_key(hour: datetime) -> str:
+    """Return the Redis key for click counters in the given hour."""
+    return SHORTLINK_CLICKS_PREFIX + hour.strftime(SHORTLINK_CLICKS_HOUR_FORMAT)
+
+
+def count_shortlink_click(shortlink_id: int) -> None:
+    """Count a click in Redis, to be flushed to the database by a periodic job."""
+    key = shortlink_clicks_key(utcnow())
+    pipe = redis_store.pipeline(transaction=False)
+    pipe.hincrby(key, str(shortlink_id), 1)
+    pipe.expire(key, SHORTLINK_CLICKS_TIMEOUT)
+    pipe.execute()
+
+
+# MARK: Views --------------------------------------------------------------------------
 
 
 @shortlinkapp.route('/', endpoint='index')
@@ -24,12 +133,14 @@ def shortlink_index() -> Response:
 @shortlinkapp.route('/<name>', defaults={'header': None})
 def link(name: str, header: str | None = None) -> Response:  # noqa: ARG001
     """Redirect from a shortlink to the full link."""
-    sl = Shortlink.get(name, True)
-    if sl is None:
+    target = shortlink_target(name)
+    if target is None:
         abort(404)
-    if not sl.enabled:
+    shortlink_id, url = target
+    if not url:
         abort(410)
-    response = redirect(str(sl.url), 301)
+    count_shortlink_click(shortlink_id)
+    response = redirect(url, 301)
     response.cache_control.private = True
     response.cache_control.max_age = 90
     response.expires = utcnow() + timedelta(seconds=90)
@@ -41,7 +152,6 @@ def link(name: str, header: str | None = None) -> Response:  # noqa: ARG001
     # Needs Werkzeug >= 2.0.2
     response.content_security_policy['referrer'] = 'always'
     response.headers['Referrer-Policy'] = 'unsafe-url'
-    # TODO: Perform analytics here: log client, set session cookie, etc
     return response
 
 
@@ -5,14 +5,12 @@ from __future__ import annotations
 import csv
 from collections import Counter
 from collections.abc import Callable
-from dataclasses import dataclass, field
-from datetime import timedelta
+from dataclasses import asdict, dataclass, field
 from functools import wraps
 from io import StringIO
 from typing import Any
 
 from flask import abort, current_app, flash, request, url_for
-from sqlalchemy.dialects.postgresql import INTERVAL
 
 try:
     import rq_dashboard
@@ -27,19 +25,27 @@ from .. import app
 from ..auth import current_auth
 from ..forms import ModeratorReportForm
 from ..models import (
+    AUTH_CLIENT_ACTIVE_PERIODS,
     MODERATOR_REPORT_TYPE,
     Account,
-    AuthClient,
+    AuthClientActiveCount,
     Comment,
     CommentModeratorReport,
-    LoginSession,
-    User,
-    auth_client_login_session,
+    SiteMetric,
     db,
     sa,
 )
 from ..typing import P, ReturnRenderWith, ReturnResponse, ReturnView, T
 from ..utils import abort_null
+from .account_delete import account_delete_progress, queue_account_delete
+from .comment_search import (
+    COMMENT_REPORT_MAX_COUNT,
+    COMMENT_SEARCH_MAX_PAGE_SIZE,
+    COMMENT_SEARCH_PAGE_SIZE,
+    COMMENT_SEARCH_STATES,
+    CommentSearch,
+    report_comments_by_search,
+)
 from .helpers import LayoutTemplate, render_redirect
 from .login_session import requires_login
 
@@ -53,6 +59,7 @@ class SiteadminGenerateShortlinksTemplate(
 class AuthDashboardTemplate(LayoutTemplate, template='auth_dashboard.html.jinja2'):
     user_count: int
     mau: int
+    dau: int
 
 
 # XXX: Replace with TypedDict when upgrading to Python 3.8+
@@ -156,19 +163,11 @@ class SiteadminView(ClassView):
     @requires_siteadmin
     def dashboard(self) -> ReturnView:
         """Render siteadmin dashboard landing page."""
-        user_count = User.active_count()
-        mau: int = (
-            db.session.query(sa.func.count(sa.func.distinct(LoginSession.account_id)))
-            .select_from(LoginSession)
-            .join(Account, LoginSession.account)
-            .filter(
-                Account.state.ACTIVE,
-                LoginSession.accessed_at > sa.func.utcnow() - timedelta(days=30),
-            )
-            .scalar()
-        )
-
-        return AuthDashboardTemplate(user_count=user_count, mau=mau).render_template()
+        return AuthDashboardTemplate(
+            user_count=SiteMetric.latest('users'),
+            mau=SiteMetric.latest('mau'),
+            dau=SiteMetric.latest('dau'),
+        ).render_template()
 
     @route('shortlink', endpoint='shortlink')
     def generate_shortlink(self) -> ReturnView:
@@ -179,23 +178,10 @@ class SiteadminView(ClassView):
     @requires_siteadmin
     def dashboard_data_users_by_month(self) -> ReturnView:
         """Render CSV of registered users by month."""
-        users_by_month = (
-            db.session.query(
-                sa.func.date_trunc('month', Account.joined_at).label('month'),
-                sa.func.count().label('count'),
-            )
-            .select_from(Account)
-            .filter(
-                Account.state.ACTIVE, Account.joined_at.is_not(None), User.type_filter()
-            )
-            .group_by('month')
-            .order_by('month')
-        )
-
         outfile = StringIO(newline='')
         out = csv.writer(outfile, 'excel')
         out.writerow(['month', 'count'])
-        for month, count in users_by_month:
+        for month, count in SiteMetric.series('signups'):
             out.writerow([month.strftime('%Y-%m-%d'), count])
         return outfile.getvalue(), 200, {'Content-Type': 'text/plain'}
 
@@ -203,66 +189,22 @@ class SiteadminView(ClassView):
     @requires_siteadmin
     def dashboard_data_users_by_client(self) -> ReturnView:
         """Render CSV of active user counts per time period and auth client."""
-        client_users: dict[int, AuthClientUserReport] = {}
-
-        for label, interval in (
-            ('hour', "'1 hour'"),
-            ('day', "'1 day'"),
-            ('week', "'1 week'"),
-            ('month', "'1 month'"),
-            ('quarter', "'3 months'"),
-            ('halfyear', "'6 months'"),
-            ('year', "'1 year'"),
-        ):
-            query_client_users = (
-                db.session.query(
-                    LoginSession.account_id.label('account_id'),
-                    auth_client_login_session.c.auth_client_id.label('auth_client_id'),
-                )
-                .select_from(LoginSession, auth_client_login_session, Account)
-                .filter(
-                    LoginSession.account_id == Account.id,
-                    auth_client_login_session.c.login_session_id == LoginSession.id,
-                    Account.state.ACTIVE,
-                    auth_client_login_session.c.accessed_at
-                    >= sa.func.utcnow() - sa.func.cast(sa.text(interval), INTERVAL),
-                )
-                .group_by(
-                    auth_client_login_session.c.auth_client_id, LoginSession.account_id
-                )
-                .subquery()
+        client_users: list[AuthClientUserReport] = []
+        for auth_client, period_counts in AuthClientActiveCount.counts().items():
+            report = AuthClientUserReport(
+                auth_client_id=auth_client.id,
+                title=auth_client.title,
+                website=auth_client.website,
             )
-
-            clients = (
-                db.session.query(
-                    query_client_users.c.auth_client_id.label('auth_client_id'),
-                    sa.func.count().label('count'),
-                    AuthClient.title.label('title'),
-                    AuthClient.website.label('website'),
-                )
-                .select_from(query_client_users, AuthClient)
-                .filter(AuthClient.id == query_client_users.c.auth_client_id)
-                .group_by(
-                    query_client_users.c.auth_client_id,
-                    AuthClient.title,
-                    AuthClient.website,
-                )
-                .order_by(sa.text('count DESC'))
-                .all()
-            )
-            for row in clients:
-                if row.auth_client_id not in client_users:
-                    client_users[row.auth_client_id] = AuthClientUserReport(
-                        auth_client_id=row.auth_client_id,
-                        title=row.title,
-                        website=row.website,
-                    )
-                client_users[row.auth_client_id].counts[label] = row.count - sum(
-                    client_users[row.auth_client_id].counts.values()
+            # Stored counts are cumulative. Report users in the shortest period only
+            for period, _interval in AUTH_CLIENT_ACTIVE_PERIODS:
+                report.counts[period] = period_counts.get(period, 0) - sum(
+                    report.counts.values()
                 )
+            client_users.append(report)
 
         users_by_client = sorted(
-            client_users.values(),
+            client_users,
             key=lambda r: sum(r.counts.values()),
             reverse=True,
         )
@@ -288,51 +230,136 @@ class SiteadminView(ClassView):
             )
         return outfile.getvalue(), 200, {'Content-Type': 'text/plain'}
 
+    @route(
+        'accounts/delete', endpoint='siteadmin_delete_accounts', methods=['GET', 'POST']
+    )
+    @requires_user_moderator
+    @render_with('siteadmin_delete_accounts.html.jinja2')
+    def delete_accounts(self) -> ReturnRenderWith:
+        """Queue accounts (typically spam) for deletion in a background job."""
+        delete_form = Form()
+        if request.method == 'POST':
+            if delete_form.validate_on_submit():
+                # Accounts are selected by id from the comments list, or named in the
+                # form on this page
+                names = [
+                    name.lstrip('@')
+                    for name in request.form.get('accounts', '').split()
+                ]
+                account_ids = {
+                    account_id
+                    for (account_id,) in Account.query.filter(
+                        Account.uuid_b58.in_(request.form.getlist('account_id'))
+                    ).with_entities(Account.id)
+                } | {account.id for account in Account.all(names=names)}
+                queued = queue_account_delete(account_ids)
+                flash(
+                    _("{count} account(s) queued for deletion").format(count=queued),
+                    category='info',
+                )
+            else:
+                flash(
+                    _("There was a problem deleting the accounts. Try again?"),
+                    category='error',
+                )
+            return render_redirect(url_for('siteadmin_delete_accounts'))
+        return {
+            'title': _("Delete accounts"),
+            'delete_form': delete_form,
+            'progress': account_delete_progress(),
+        }
+
+    @route('accounts/delete/progress', endpoint='siteadmin_delete_accounts_progress')
+    @requires_user_moderator
+    @render_with(json=True)
+    def delete_accounts_progress(self) -> ReturnRenderWith:
+        """Report progress of queued account deletions."""
+        return account_delete_progress()
+
     @route('comments', endpoint='siteadmin_comments', methods=['GET', 'POST'])
     @requires_comment_moderator
     @render_with('siteadmin_comments.html.jinja2')
-    @requestargs(('query', abort_null), ('page', int), ('per_page', int))
+    @requestargs(('after', abort_null), ('per_page', int))
     def comments(
-        self, query: str = '', page: int | None = None, per_page: int = 100
+        self, after: str = '', per_page: int = COMMENT_SEARCH_PAGE_SIZE
     ) -> ReturnRenderWith:
-        """Render a list of all comments matching a query."""
-        comments = Comment.query.filter(Comment.state.REPORTABLE).order_by(
-            Comment.created_at.desc()
-        )
-        tsquery = sa.func.websearch_to_tsquery(query or '')
-        if query:
-            comments = comments.join(Account).filter(
-                sa.or_(
-                    Comment.search_vector.bool_op('@@')(tsquery),
-                    Account.search_vector.bool_op('@@')(tsquery),
-                )
-            )
-
-        pagination = comments.paginate(page=page, per_page=per_page)
+        """Render a list of all comments matching a search, one page at a time."""
+        search = CommentSearch.from_args(request.args)
+        per_page = min(max(per_page, 1), COMMENT_SEARCH_MAX_PAGE_SIZE)
+        comments, next_cursor = search.page(after, per_page)
 
         return {
             'title': _("Comments"),
-            'query': query,
-            'comments': pagination.items,
-            'total_comments': pagination.total,
-            'pages': list(range(1, pagination.pages + 1)),  # list of page numbers
-            'current_page': pagination.page,
+            'search': search,
+            'search_args': search.as_args(),
+            'states': COMMENT_SEARCH_STATES,
+            'comments': comments,
+            'total_comments': search.count(),
+            'max_report_count': COMMENT_REPORT_MAX_COUNT,
+            'next_url': (
+                url_for('siteadmin_comments', after=next_cursor, **search.as_args())
+                if next_cursor
+                else None
+            ),
             'comment_spam_form': Form(),
         }
 
     @route('comments/markspam', endpoint='siteadmin_comments_spam', methods=['POST'])
     @requires_comment_moderator
     def markspam(self) -> ReturnResponse:
-        """Mark comments as spam."""
+        """Mark selected comments or all comments matching a search as spam."""
         comment_spam_form = Form()
         # TODO: Create a CommentReportForm that has a QuerySelectMultiField on Comment.
         # Avoid request.form.getlist('comment_id') here
         if comment_spam_form.validate_on_submit():
-            comments = Comment.query.filter(
-                Comment.uuid_b58.in_(request.form.getlist('comment_id'))
-            )
-            for comment in comments:
-                CommentModeratorReport.submit(actor=current_auth.user, comment=comment)
+            if request.form.get('select') == 'search':
+                search = CommentSearch.from_args(request.form)
+                count = search.count()
+                if not search.is_bulk_reportable:
+                    flash(
+                        _(
+                            "Search for reportable comments with a query, date or"
+                            " author age to report all matching comments"
+                        ),
+                        category='error',
+                    )
+                elif count > COMMENT_REPORT_MAX_COUNT:
+                    flash(
+                        _(
+                            "Only {max} comments can be reported at once. Narrow the"
+                            " search and try again"
+                        ).format(max=COMMENT_REPORT_MAX_COUNT),
+                        category='error',
+                    )
+                elif request.form.get('confirm_count') != str(count):
+                    flash(
+                        _(
+                            "The number of matching comments has changed. Review them"
+                            " and try again"
+                        ),
+                        category='error',
+                    )
+                else:
+                    report_comments_by_search.enqueue(
+                        current_auth.user.id, asdict(search), count
+                    )
+                    flash(
+                        _(
+                            "{count} comment(s) matching the search will be reported"
+                            " as spam"
+                        ).format(count=count),
+                        category='info',
+                    )
+                return render_redirect(
+                    url_for('siteadmin_comments', **search.as_args())
+                )
+            comment_ids = [
+                comment_id
+                for (comment_id,) in Comment.query.filter(
+                    Comment.uuid_b58.in_(request.form.getlist('comment_id'))
+                ).with_entities(Comment.id)
+            ]
+            CommentModeratorReport.submit_all(current_auth.user, comment_ids)
             db.session.commit()
             flash(_("Comment(s) successfully reported as spam"), category='info')
         else:
@@ -349,6 +376,7 @@ class SiteadminView(ClassView):
         """Evaluate an existing comment spam report, selected at random."""
         random_report = CommentModeratorReport.get_one(exclude_user=current_auth.user)
         if random_report is not None:
+            db.session.commit()  # Save the lease
             return render_redirect(
                 url_for('siteadmin_review_comment', report=random_report.uuid_b58)
             )
@@ -439,6 +467,8 @@ class SiteadminView(ClassView):
                     report_type=report_form.report_type.data,
                 )
                 db.session.add(new_report)
+                # Release the lease so that another moderator can break the tie
+                comment_report.leased_until = None
             db.session.commit()
 
             # Redirect to a new report
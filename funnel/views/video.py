@@ -2,178 +2,425 @@
 
 from __future__ import annotations
 
+import asyncio
+from collections.abc import Collection, Iterable
 from datetime import datetime
-from typing import TypedDict, cast
+from typing import Any, TypedDict, cast
 
-import requests
-import vimeo
-from flask import current_app
+import httpx
+from flask import current_app, g
 from pytz import utc
 from sentry_sdk import capture_exception
 
 from coaster.utils import parse_duration, parse_isoformat
 
-from .. import redis_store
-from ..models import Proposal, Session, VideoError, VideoMixin
+from .. import app, redis_store, rq
+from ..models import Proposal, Session, VideoError, VideoMixin, sa
+from ..typing import ResponseType
+
+#: Video sources that have a metadata API. Other sources only have placeholder data
+VIDEO_METADATA_SOURCES = ('youtube', 'vimeo')
+YOUTUBE_API_URL = 'https://www.googleapis.com/youtube/v3/videos'
+VIMEO_API_URL = 'https://api.vimeo.com/videos/'
+#: The YouTube API returns up to 50 videos per call
+YOUTUBE_BATCH_SIZE = 50
+#: Number of API calls to have in flight at a time
+VIDEO_API_CONCURRENCY = 5
+VIDEO_API_TIMEOUT = 30
+#: Cache metadata for 2 days if the video exists at source, and 6 hours if not
+VIDEO_CACHE_TIMEOUT = 2 * 24 * 60 * 60
+VIDEO_MISSING_CACHE_TIMEOUT = 6 * 60 * 60
+#: Queue a refresh when a cache entry is this close to expiring, so that it is replaced
+#: before it expires
+VIDEO_REFRESH_AHEAD = 60 * 60
+#: Wait this long before fetching a video again after the API failed
+VIDEO_ERROR_RETRY = 15 * 60
+
+#: Redis set of ``source/id`` strings for videos waiting to be fetched
+VIDEO_QUEUE = 'video_queue'
+#: Lock to prevent more than one fetch job from being queued at a time. The lock
+#: expires in case the job is lost
+VIDEO_QUEUE_LOCK = 'lock/video_queue'
+VIDEO_QUEUE_LOCK_TIMEOUT = 15 * 60
+#: Number of videos to fetch in each round of API calls
+VIDEO_QUEUE_BATCH_SIZE = 500
 
 
 class YoutubeApiError(VideoError):
     """The YouTube API failed."""
 
 
-class VideoData(TypedDict):
+class VideoMetadata(TypedDict):
+    """Dictionary for video metadata, as fetched from the source and cached."""
+
+    duration: float
+    uploaded_at: str | datetime
+    thumbnail: str
+
+
+class VideoData(VideoMetadata):
     """Dictionary for video data, as used in templates."""
 
     source: str
     id: str
     url: str
     embeddable_url: str
-    duration: float
-    uploaded_at: str | datetime
-    thumbnail: str
 
 
-def video_cache_key(obj: VideoMixin) -> str:
-    if obj.video_source and obj.video_id:
-        return 'video_cache/' + obj.video_source + '/' + obj.video_id
-    raise VideoError("No video source or ID to create a cache key")
+# MARK: Cache --------------------------------------------------------------------------
 
+# Metadata is fetched in a background job and never during a request. A request that
+# finds no metadata in the cache adds the video to a queue in Redis and renders with
+# placeholder data. The job will fetch all videos in the queue together, batching
+# YouTube ids into a single API call and making Vimeo calls concurrently. A request
+# that finds metadata close to expiry will also queue the video, so that frequently
+# viewed videos are refreshed before the cache expires and don't fall back to
+# placeholder data. The queue uses the same pattern as the forget queue in `jobs.py`.
 
-def get_video_cache(obj: VideoMixin) -> VideoData | None:
-    data = redis_store.hgetall(video_cache_key(obj))
-    if data:
-        if data.get('uploaded_at'):
-            data['uploaded_at'] = parse_isoformat(data['uploaded_at'], naive=False)
-        if data.get('duration'):
-            data['duration'] = float(data['duration'])
-    return data
 
+def video_cache_key(video_source: str, video_id: str) -> str:
+    """Return the Redis key for a video's cached metadata."""
+    return f'video_cache/{video_source}/{video_id}'
 
-def set_video_cache(obj: VideoMixin, data: VideoData, exists: bool = True) -> None:
-    cache_key = video_cache_key(obj)
 
-    copied_data = data.copy()
-    if copied_data['uploaded_at']:
-        copied_data['uploaded_at'] = cast(
-            datetime, copied_data['uploaded_at']
-        ).isoformat()
-    redis_store.hset(cache_key, mapping=copied_data)
+def get_video_cache(
+    video_source: str, video_id: str
+) -> tuple[VideoMetadata | None, int]:
+    """
+    Return cached metadata for a video and the time remaining until it expires.
 
-    # if video exists at source, cache for 2 days, if not, for 6 hours
-    hours_to_cache = 2 * 24 if exists else 6
-    redis_store.expire(cache_key, 60 * 60 * hours_to_cache)
+    Metadata is `None` if the video is not in the cache.
+    """
+    cache_key = video_cache_key(video_source, video_id)
+    pipe = redis_store.pipeline()
+    pipe.hgetall(cache_key)
+    pipe.ttl(cache_key)
+    data, ttl = pipe.execute()
+    if not data:
+        return None, ttl
+    return {
+        'duration': float(data.get('duration') or 0),
+        'uploaded_at': (
+            parse_isoformat(data['uploaded_at'], naive=False)
+            if data.get('uploaded_at')
+            else ''
+        ),
+        'thumbnail': data.get('thumbnail', ''),
+    }, ttl
 
 
-@Proposal.views('video', cached_property=True)
-@Session.views('video', cached_property=True)
-def video_property(obj: VideoMixin) -> VideoData | None:
-    data: VideoData | None = None
-    exists = True
-    if obj.video_source and obj.video_id:
-        # Check for cached data
-        data = get_video_cache(obj)
-
-        if not data:
-            data = {
-                'source': obj.video_source,
-                'id': obj.video_id,
-                'url': cast(str, obj.video_url),
-                'embeddable_url': cast(str, obj.embeddable_video_url),
+def set_video_cache(
+    videos: dict[tuple[str, str], VideoMetadata | None],
+) -> None:
+    """Cache metadata for videos, with `None` marking a video missing at source."""
+    pipe = redis_store.pipeline()
+    for (video_source, video_id), metadata in videos.items():
+        cache_key = video_cache_key(video_source, video_id)
+        if metadata is None:
+            # Cache placeholder data so that the video is not fetched again until the
+            # cache expires
+            mapping: dict[str, Any] = {
                 'duration': 0.0,
                 'uploaded_at': '',
                 'thumbnail': '',
             }
-            if obj.video_source == 'youtube':
-                video_url = (
-                    f'https://www.googleapis.com/youtube/v3/videos'
-                    f'?part=snippet,contentDetails&id={obj.video_id}'
-                    f'&key={current_app.config["YOUTUBE_API_KEY"]}'
+            timeout = VIDEO_MISSING_CACHE_TIMEOUT
+        else:
+            mapping = dict(metadata)
+            if mapping['uploaded_at']:
+                mapping['uploaded_at'] = cast(
+                    datetime, mapping['uploaded_at']
+                ).isoformat()
+            timeout = VIDEO_CACHE_TIMEOUT
+        pipe.hset(cache_key, mapping=mapping)
+        pipe.expire(cache_key, timeout)
+    pipe.execute()
+
+
+def defer_video_refresh(videos: Iterable[tuple[str, str]]) -> None:
+    """
+    Delay the next fetch for videos that could not be fetched due to an API error.
+
+    The cache entry is set to expire so that a refresh is queued again only after
+    :data:`VIDEO_ERROR_RETRY`. Existing metadata is retained, and videos without
+    metadata get placeholder data.
+    """
+    pipe = redis_store.pipeline()
+    for video_source, video_id in videos:
+        cache_key = video_cache_key(video_source, video_id)
+        pipe.hsetnx(cache_key, 'duration', 0.0)
+        pipe.expire(cache_key, VIDEO_REFRESH_AHEAD + VIDEO_ERROR_RETRY)
+    pipe.execute()
+
+
+def queue_video_fetch(video_source: str, video_id: str) -> None:
+    """Queue a video for fetching at the end of the request."""
+    if g:  # Only do this if we have an app context
+        if not hasattr(g, 'video_fetch_queue'):
+            g.video_fetch_queue = set()
+        g.video_fetch_queue.add(f'{video_source}/{video_id}')
+
+
+@app.after_request
+def fetch_videos_in_background_job(response: ResponseType) -> ResponseType:
+    videos = g.get('video_fetch_queue')
+    if videos:
+        # Add to the queue before taking the lock (see note in `jobs.py`)
+        redis_store.sadd(VIDEO_QUEUE, *videos)
+        if redis_store.set(VIDEO_QUEUE_LOCK, 1, nx=True, ex=VIDEO_QUEUE_LOCK_TIMEOUT):
+            process_video_queue.enqueue()
+    return response
+
+
+@sa.event.listens_for(Proposal, 'after_insert')
+@sa.event.listens_for(Proposal, 'after_update')
+@sa.event.listens_for(Session, 'after_insert')
+@sa.event.listens_for(Session, 'after_update')
+def _prefetch_changed_video(_mapper: Any, _connection: Any, target: VideoMixin) -> None:
+    """Fetch metadata for a new video URL before the first page that shows it."""
+    if (
+        target.video_source in VIDEO_METADATA_SOURCES
+        and target.video_id
+        and sa.inspect(target).attrs.video_id.history.has_changes()
+    ):
+        queue_video_fetch(target.video_source, target.video_id)
+
+
+# MARK: Metadata APIs ------------------------------------------------------------------
+
+
+def youtube_metadata(item: dict[str, Any]) -> VideoMetadata:
+    """Extract metadata from an item in a YouTube API response."""
+    metadata: VideoMetadata = {'duration': 0.0, 'uploaded_at': '', 'thumbnail': ''}
+    if 'contentDetails' in item and 'duration' in item['contentDetails']:
+        metadata['duration'] = parse_duration(
+            item['contentDetails']['duration']
+        ).total_seconds()
+    if 'snippet' in item:
+        if 'publishedAt' in item['snippet']:
+            metadata['uploaded_at'] = parse_isoformat(
+                item['snippet']['publishedAt'], naive=False
+            )
+        if 'thumbnails' in item['snippet']:
+            all_thumbnails = item['snippet']['thumbnails']
+            metadata['thumbnail'] = (
+                all_thumbnails.get('medium', {})
+                or all_thumbnails.get('standard', {})
+                or all_thumbnails.get('default', {})
+            ).get('url', '')
+    return metadata
+
+
+def vimeo_metadata(video: dict[str, Any]) -> VideoMetadata:
+    """Extract metadata from a Vimeo API response."""
+    return {
+        'duration': float(video['duration']),
+        # Vimeo returns naive datetime, we will add utc timezone to it
+        'uploaded_at': utc.localize(parse_isoformat(video['release_time'])),
+        'thumbnail': video['pictures']['sizes'][1]['link'],
+    }
+
+
+async def _fetch_youtube_videos(
+    client: httpx.AsyncClient,
+    semaphore: asyncio.Semaphore,
+    api_key: str,
+    video_ids: list[str],
+) -> dict[tuple[str, str], VideoMetadata | None]:
+    """Fetch metadata for up to :data:`YOUTUBE_BATCH_SIZE` videos in one API call."""
+    async with semaphore:
+        try:
+            response = await client.get(
+                YOUTUBE_API_URL,
+                params={
+                    'part': 'snippet,contentDetails',
+                    'id': ','.join(video_ids),
+                    'key': api_key,
+                },
+            )
+        except httpx.HTTPError as exc:
+            current_app.logger.error("YouTube API request error: %s", repr(exc))
+            capture_exception(exc)
+            return {}
+    if response.status_code != 200:
+        current_app.logger.error(
+            "HTTP %s: YouTube API request failed for ids %s",
+            response.status_code,
+            ','.join(video_ids),
+        )
+        return {}
+    try:
+        result = response.json()
+        if not isinstance(result, dict) or 'items' not in result:
+            raise YoutubeApiError("API Error: Check the YouTube URL or API key")
+    except (ValueError, YoutubeApiError) as exc:
+        current_app.logger.error("YouTube API response error: %s", repr(exc))
+        capture_exception(exc)
+        return {}
+    # Videos removed from YouTube are missing from the response
+    videos: dict[tuple[str, str], VideoMetadata | None] = dict.fromkeys(
+        (('youtube', video_id) for video_id in video_ids), None
+    )
+    for item in result['items']:
+        if item.get('id') in video_ids:
+            videos['youtube', item['id']] = youtube_metadata(item)
+    return videos
+
+
+async def _fetch_vimeo_video(
+    client: httpx.AsyncClient,
+    semaphore: asyncio.Semaphore,
+    auth: httpx.Auth | None,
+    headers: dict[str, str],
+    video_id: str,
+) -> dict[tuple[str, str], VideoMetadata | None]:
+    """Fetch metadata for a single Vimeo video."""
+    async with semaphore:
+        try:
+            response = await client.get(
+                VIMEO_API_URL + video_id, auth=auth, headers=headers
+            )
+        except httpx.HTTPError as exc:
+            current_app.logger.error("Vimeo API request error: %s", repr(exc))
+            capture_exception(exc)
+            return {}
+    if response.status_code == 200:
+        try:
+            return {('vimeo', video_id): vimeo_metadata(response.json())}
+        except (ValueError, KeyError, IndexError) as exc:
+            current_app.logger.error("Vimeo API response error: %s", repr(exc))
+            capture_exception(exc)
+            return {}
+    if response.status_code != 404:
+        # Vimeo API down or returning unexpected values. Treat the video as missing so
+        # that it is retried when the shorter cache period expires
+        current_app.logger.error(
+            "HTTP %s: Vimeo API request failed for video %s",
+            response.status_code,
+            video_id,
+        )
+    return {('vimeo', video_id): None}
+
+
+async def _fetch_videos(
+    youtube_ids: list[str],
+    vimeo_ids: list[str],
+    youtube_api_key: str,
+    vimeo_auth: httpx.Auth | None,
+    vimeo_headers: dict[str, str],
+) -> dict[tuple[str, str], VideoMetadata | None]:
+    semaphore = asyncio.Semaphore(VIDEO_API_CONCURRENCY)
+    async with httpx.AsyncClient(
+        timeout=VIDEO_API_TIMEOUT,
+        limits=httpx.Limits(max_connections=VIDEO_API_CONCURRENCY),
+    ) as client:
+        results = await asyncio.gather(
+            *(
+                _fetch_youtube_videos(
+                    client,
+                    semaphore,
+                    youtube_api_key,
+                    youtube_ids[i : i + YOUTUBE_BATCH_SIZE],
                 )
-                try:
-                    youtube_resp = requests.get(video_url, timeout=30)
-                except requests.exceptions.RequestException as exc:
-                    current_app.logger.error("YouTube API request error: %s", repr(exc))
-                    capture_exception(exc)
-                    return data
-                if youtube_resp.status_code == 200:
-                    try:
-                        youtube_video = youtube_resp.json()
-                    except requests.exceptions.JSONDecodeError as exc:
-                        youtube_video = None
-                        current_app.logger.error(
-                            "Unable to parse JSON response while calling '%s'",
-                            video_url,
-                        )
-                        capture_exception(exc)
-                    if not youtube_video or 'items' not in youtube_video:
-                        raise YoutubeApiError(
-                            "API Error: Check the YouTube URL or API key"
-                        )
-                    if not youtube_video['items']:
-                        # Response has zero item for our given video ID. This will
-                        # happen if the video has been removed from YouTube.
-                        exists = False
-                    else:
-                        youtube_video = youtube_video['items'][0]
-
-                        if (
-                            'contentDetails' in youtube_video
-                            and 'duration' in youtube_video['contentDetails']
-                        ):
-                            data['duration'] = parse_duration(
-                                youtube_video['contentDetails']['duration']
-                            ).total_seconds()
-                        if 'snippet' in youtube_video:
-                            if 'publishedAt' in youtube_video['snippet']:
-                                data['uploaded_at'] = parse_isoformat(
-                                    youtube_video['snippet']['publishedAt'], naive=False
-                                )
-                            if 'thumbnails' in youtube_video['snippet']:
-                                all_thumbnails = youtube_video['snippet']['thumbnails']
-                                data['thumbnail'] = (
-                                    all_thumbnails.get('medium', {})
-                                    or all_thumbnails.get('standard', {})
-                                    or all_thumbnails.get('default', {})
-                                ).get('url', '')
-                else:
-                    current_app.logger.error(
-                        "HTTP %s: YouTube API request failed for url '%s'",
-                        youtube_resp.status_code,
-                        video_url,
-                    )
-            elif obj.video_source == 'vimeo':
-                vimeo_client = vimeo.VimeoClient(
-                    token=current_app.config.get('VIMEO_ACCESS_TOKEN'),
-                    key=current_app.config.get('VIMEO_CLIENT_ID'),
-                    secret=current_app.config.get('VIMEO_CLIENT_SECRET'),
+                for i in range(0, len(youtube_ids), YOUTUBE_BATCH_SIZE)
+            ),
+            *(
+                _fetch_vimeo_video(
+                    client, semaphore, vimeo_auth, vimeo_headers, video_id
                 )
+                for video_id in vimeo_ids
+            ),
+        )
+    videos: dict[tuple[str, str], VideoMetadata | None] = {}
+    for result in results:
+        videos.update(result)
+    return videos
+
+
+def fetch_video_metadata(
+    videos: Iterable[tuple[str, str]],
+) -> dict[tuple[str, str], VideoMetadata | None]:
+    """
+    Fetch metadata for videos from their sources.
 
-                video_url = f'/videos/{obj.video_id}'
-                try:
-                    vimeo_resp = vimeo_client.get(video_url)
-                except requests.exceptions.RequestException as exc:
-                    current_app.logger.error("Vimeo API request error: %s", repr(exc))
-                    capture_exception(exc)
-                    return data
-                if vimeo_resp.status_code == 200:
-                    vimeo_video = vimeo_resp.json()
-
-                    data['duration'] = float(vimeo_video['duration'])
-                    # Vimeo returns naive datetime, we will add utc timezone to it
-                    data['uploaded_at'] = utc.localize(
-                        parse_isoformat(vimeo_video['release_time'])
-                    )
-                    data['thumbnail'] = vimeo_video['pictures']['sizes'][1]['link']
-                elif vimeo_resp.status_code == 404:
-                    # Video doesn't exist on Vimeo anymore
-                    exists = False
-                else:
-                    # Vimeo API down or returning unexpected values
-                    exists = False
-                    current_app.logger.error(
-                        "HTTP %s: Vimeo API request failed for url '%s'",
-                        vimeo_resp.status_code,
-                        video_url,
-                    )
-            set_video_cache(obj, data, exists)
+    Returns metadata for each ``(source, id)`` pair, or `None` if the video does not
+    exist at source. Videos that could not be fetched due to an error are not included.
+    """
+    youtube_ids: list[str] = []
+    vimeo_ids: list[str] = []
+    for video_source, video_id in set(videos):
+        if video_source == 'youtube':
+            youtube_ids.append(video_id)
+        elif video_source == 'vimeo':
+            vimeo_ids.append(video_id)
+    if not youtube_ids and not vimeo_ids:
+        return {}
+
+    vimeo_auth: httpx.Auth | None = None
+    vimeo_headers = {'Accept': 'application/vnd.vimeo.*+json;version=3.4'}
+    if current_app.config.get('VIMEO_ACCESS_TOKEN'):
+        vimeo_headers['Authorization'] = (
+            f'bearer {current_app.config["VIMEO_ACCESS_TOKEN"]}'
+        )
+    elif current_app.config.get('VIMEO_CLIENT_ID'):
+        vimeo_auth = httpx.BasicAuth(
+            current_app.config['VIMEO_CLIENT_ID'],
+            current_app.config.get('VIMEO_CLIENT_SECRET') or '',
+        )
+    return asyncio.run(
+        _fetch_videos(
+            youtube_ids,
+            vimeo_ids,
+            current_app.config.get('YOUTUBE_API_KEY') or '',
+            vimeo_auth,
+            vimeo_headers,
+        )
+    )
+
+
+def refresh_videos(videos: Collection[str]) -> None:
+    """Fetch and cache metadata for videos, given as ``source/id`` strings."""
+    wanted = {
+        cast(tuple[str, str], tuple(video.split('/', 1)))
+        for video in videos
+        if '/' in video
+    }
+    fetched = fetch_video_metadata(wanted)
+    set_video_cache(fetched)
+    # Videos not fetched due to an API error are retried later, not on every view
+    defer_video_refresh(wanted - fetched.keys())
+
+
+@rq.job(queue='funnel')
+def process_video_queue() -> None:
+    """Fetch metadata for all videos waiting in the queue."""
+    redis_store.delete(VIDEO_QUEUE_LOCK)
+    while videos := redis_store.spop(VIDEO_QUEUE, VIDEO_QUEUE_BATCH_SIZE):
+        refresh_videos(videos)
+
+
+# MARK: Views --------------------------------------------------------------------------
+
+
+@Proposal.views('video', cached_property=True)
+@Session.views('video', cached_property=True)
+def video_property(obj: VideoMixin) -> VideoData | None:
+    if not (obj.video_source and obj.video_id):
+        return None
+    data: VideoData = {
+        'source': obj.video_source,
+        'id': obj.video_id,
+        'url': cast(str, obj.video_url),
+        'embeddable_url': cast(str, obj.embeddable_video_url),
+        'duration': 0.0,
+        'uploaded_at': '',
+        'thumbnail': '',
+    }
+    if obj.video_source in VIDEO_METADATA_SOURCES:
+        metadata, ttl = get_video_cache(obj.video_source, obj.video_id)
+        if metadata is not None:
+            data.update(metadata)
+        if metadata is None or ttl < VIDEO_REFRESH_AHEAD:
+            # Render with placeholder or current data, and fetch in the background
+            queue_video_fetch(obj.video_source, obj.video_id)
     return data
@@ -0,0 +1,47 @@
+"""Add shortlink click count.
+
+Revision ID: 3c1f0a7d9e52
+Revises: b2ff82e10160
+Create Date: 2026-10-19 11:20:42.108315
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '3c1f0a7d9e52'
+down_revision: str = 'b2ff82e10160'
+branch_labels: str | tuple[str, ...] | None = None
+depends_on: str | tuple[str, ...] | None = None
+
+
+def upgrade(engine_name: str = '') -> None:
+    """Upgrade all databases."""
+    # Do not modify. Edit `upgrade_` instead
+    globals().get(f'upgrade_{engine_name}', lambda: None)()
+
+
+def downgrade(engine_name: str = '') -> None:
+    """Downgrade all databases."""
+    # Do not modify. Edit `downgrade_` instead
+    globals().get(f'downgrade_{engine_name}', lambda: None)()
+
+
+def upgrade_() -> None:
+    """Upgrade default database."""
+    op.create_table(
+        'shortlink_click_count',
+        sa.Column('shortlink_id', sa.BigInteger(), nullable=False),
+        sa.Column('hour', sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column('count', sa.BigInteger(), nullable=False),
+        sa.Column('created_at', sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column('updated_at', sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(['shortlink_id'], ['shortlink.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('shortlink_id', 'hour'),
+    )
+
+
+def downgrade_() -> None:
+    """Downgrade default database."""
+    op.drop_table('shortlink_click_count')
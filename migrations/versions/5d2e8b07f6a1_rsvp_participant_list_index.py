@@ -0,0 +1,43 @@
+"""Add index for the paginated RSVP participant list.
+
+Revision ID: 5d2e8b07f6a1
+Revises: c4e7a19d3b52
+Create Date: 2026-10-19 19:41:52.630418
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2e8b07f6a1'
+down_revision: str = 'c4e7a19d3b52'
+branch_labels: str | tuple[str, ...] | None = None
+depends_on: str | tuple[str, ...] | None = None
+
+
+def upgrade(engine_name: str = '') -> None:
+    """Upgrade all databases."""
+    # Do not modify. Edit `upgrade_` instead
+    globals().get(f'upgrade_{engine_name}', lambda: None)()
+
+
+def downgrade(engine_name: str = '') -> None:
+    """Downgrade all databases."""
+    # Do not modify. Edit `downgrade_` instead
+    globals().get(f'downgrade_{engine_name}', lambda: None)()
+
+
+def upgrade_() -> None:
+    """Upgrade default database."""
+    with op.batch_alter_table('rsvp', schema=None) as batch_op:
+        batch_op.create_index(
+            'ix_rsvp_project_id_state_created_at',
+            ['project_id', 'state', 'created_at', 'uuid'],
+            unique=False,
+        )
+
+
+def downgrade_() -> None:
+    """Downgrade default database."""
+    with op.batch_alter_table('rsvp', schema=None) as batch_op:
+        batch_op.drop_index('ix_rsvp_project_id_state_created_at')
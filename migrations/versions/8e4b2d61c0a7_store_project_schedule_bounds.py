@@ -0,0 +1,62 @@
+"""Store project schedule bounds.
+
+Revision ID: 8e4b2d61c0a7
+Revises: 3c1f0a7d9e52
+Create Date: 2026-10-19 14:02:17.534861
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '8e4b2d61c0a7'
+down_revision: str = '3c1f0a7d9e52'
+branch_labels: str | tuple[str, ...] | None = None
+depends_on: str | tuple[str, ...] | None = None
+
+
+def upgrade(engine_name: str = '') -> None:
+    """Upgrade all databases."""
+    # Do not modify. Edit `upgrade_` instead
+    globals().get(f'upgrade_{engine_name}', lambda: None)()
+
+
+def downgrade(engine_name: str = '') -> None:
+    """Downgrade all databases."""
+    # Do not modify. Edit `downgrade_` instead
+    globals().get(f'downgrade_{engine_name}', lambda: None)()
+
+
+def upgrade_() -> None:
+    """Upgrade default database."""
+    with op.batch_alter_table('project', schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column('schedule_start_at', sa.TIMESTAMP(timezone=True), nullable=True)
+        )
+        batch_op.add_column(
+            sa.Column('schedule_end_at', sa.TIMESTAMP(timezone=True), nullable=True)
+        )
+    op.execute(
+        sa.text(
+            '''
+            UPDATE project SET
+                schedule_start_at = bounds.start_at,
+                schedule_end_at = bounds.end_at
+            FROM (
+                SELECT project_id, MIN(start_at) AS start_at, MAX(end_at) AS end_at
+                FROM session
+                WHERE start_at IS NOT NULL
+                GROUP BY project_id
+            ) AS bounds
+            WHERE project.id = bounds.project_id
+            '''
+        )
+    )
+
+
+def downgrade_() -> None:
+    """Downgrade default database."""
+    with op.batch_alter_table('project', schema=None) as batch_op:
+        batch_op.drop_column('schedule_end_at')
+        batch_op.drop_column('schedule_start_at')
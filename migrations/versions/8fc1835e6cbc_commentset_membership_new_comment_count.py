@@ -0,0 +1,63 @@
+"""Store new comment count in commentset membership.
+
+Revision ID: 8fc1835e6cbc
+Revises: 8e4b2d61c0a7
+Create Date: 2026-10-19 16:41:08.219734
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '8fc1835e6cbc'
+down_revision: str = '8e4b2d61c0a7'
+branch_labels: str | tuple[str, ...] | None = None
+depends_on: str | tuple[str, ...] | None = None
+
+
+def upgrade(engine_name: str = '') -> None:
+    """Upgrade all databases."""
+    # Do not modify. Edit `upgrade_` instead
+    globals().get(f'upgrade_{engine_name}', lambda: None)()
+
+
+def downgrade(engine_name: str = '') -> None:
+    """Downgrade all databases."""
+    # Do not modify. Edit `downgrade_` instead
+    globals().get(f'downgrade_{engine_name}', lambda: None)()
+
+
+def upgrade_() -> None:
+    """Upgrade default database."""
+    with op.batch_alter_table('commentset_membership', schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column(
+                'new_comment_count',
+                sa.Integer(),
+                nullable=False,
+                server_default=sa.text('0'),
+            )
+        )
+    # Comment states 1 and 6 are SUBMITTED and VERIFIED, the PUBLIC states
+    op.execute(
+        sa.text(
+            '''
+            UPDATE commentset_membership SET new_comment_count = (
+                SELECT COUNT(*) FROM comment
+                WHERE comment.commentset_id = commentset_membership.commentset_id
+                AND comment.state IN (1, 6)
+                AND comment.created_at > commentset_membership.last_seen_at
+            )
+            WHERE commentset_membership.revoked_at IS NULL
+            '''
+        )
+    )
+    with op.batch_alter_table('commentset_membership', schema=None) as batch_op:
+        batch_op.alter_column('new_comment_count', server_default=None)
+
+
+def downgrade_() -> None:
+    """Downgrade default database."""
+    with op.batch_alter_table('commentset_membership', schema=None) as batch_op:
+        batch_op.drop_column('new_comment_count')
@@ -0,0 +1,72 @@
+"""Add precomputed site metrics.
+
+Revision ID: 9b3f6d0e4c18
+Revises: 5d2e8b07f6a1
+Create Date: 2026-10-19 21:12:46.508317
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '9b3f6d0e4c18'
+down_revision: str = '5d2e8b07f6a1'
+branch_labels: str | tuple[str, ...] | None = None
+depends_on: str | tuple[str, ...] | None = None
+
+
+def upgrade(engine_name: str = '') -> None:
+    """Upgrade all databases."""
+    # Do not modify. Edit `upgrade_` instead
+    globals().get(f'upgrade_{engine_name}', lambda: None)()
+
+
+def downgrade(engine_name: str = '') -> None:
+    """Downgrade all databases."""
+    # Do not modify. Edit `downgrade_` instead
+    globals().get(f'downgrade_{engine_name}', lambda: None)()
+
+
+def upgrade_() -> None:
+    """Upgrade default database."""
+    op.create_table(
+        'site_metric',
+        sa.Column('metric', sa.Unicode(), nullable=False),
+        sa.Column('bucket', sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column('updated_at', sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('metric', 'bucket'),
+    )
+    op.create_table(
+        'auth_client_active_count',
+        sa.Column('auth_client_id', sa.Integer(), nullable=False),
+        sa.Column('period', sa.Unicode(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column('updated_at', sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(
+            ['auth_client_id'], ['auth_client.id'], ondelete='CASCADE'
+        ),
+        sa.PrimaryKeyConstraint('auth_client_id', 'period'),
+    )
+    # Backfill signup history. Account state 1 is ACTIVE, type U is User. Other
+    # metrics are counted by the `flask periodic site_metrics` command
+    op.execute(
+        sa.text(
+            '''
+            INSERT INTO site_metric (metric, bucket, count, created_at, updated_at)
+            SELECT 'signups', DATE_TRUNC('month', joined_at), COUNT(*), NOW(), NOW()
+            FROM account
+            WHERE state = 1 AND joined_at IS NOT NULL AND type = 'U'
+            GROUP BY DATE_TRUNC('month', joined_at)
+            '''
+        )
+    )
+
+
+def downgrade_() -> None:
+    """Downgrade default database."""
+    op.drop_table('auth_client_active_count')
+    op.drop_table('site_metric')
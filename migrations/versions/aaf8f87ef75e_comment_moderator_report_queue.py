@@ -0,0 +1,67 @@
+"""Add random sampling and lease columns to comment moderator reports.
+
+Revision ID: aaf8f87ef75e
+Revises: 8fc1835e6cbc
+Create Date: 2026-10-19 18:12:44.503172
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'aaf8f87ef75e'
+down_revision: str = '8fc1835e6cbc'
+branch_labels: str | tuple[str, ...] | None = None
+depends_on: str | tuple[str, ...] | None = None
+
+
+def upgrade(engine_name: str = '') -> None:
+    """Upgrade all databases."""
+    # Do not modify. Edit `upgrade_` instead
+    globals().get(f'upgrade_{engine_name}', lambda: None)()
+
+
+def downgrade(engine_name: str = '') -> None:
+    """Downgrade all databases."""
+    # Do not modify. Edit `downgrade_` instead
+    globals().get(f'downgrade_{engine_name}', lambda: None)()
+
+
+def upgrade_() -> None:
+    """Upgrade default database."""
+    with op.batch_alter_table('comment_moderator_report', schema=None) as batch_op:
+        # A volatile server default is evaluated separately for each existing row
+        batch_op.add_column(
+            sa.Column(
+                'random_key',
+                sa.Float(),
+                nullable=False,
+                server_default=sa.text('random()'),
+            )
+        )
+        batch_op.add_column(
+            sa.Column('leased_until', sa.TIMESTAMP(timezone=True), nullable=True)
+        )
+    with op.batch_alter_table('comment_moderator_report', schema=None) as batch_op:
+        batch_op.alter_column('random_key', server_default=None)
+        batch_op.create_index(
+            'ix_comment_moderator_report_random_key',
+            ['random_key'],
+            unique=False,
+            postgresql_where=sa.text('resolved_at IS NULL'),
+        )
+        batch_op.create_index(
+            'ix_comment_moderator_report_comment_id_reported_by_id',
+            ['comment_id', 'reported_by_id'],
+            unique=False,
+        )
+
+
+def downgrade_() -> None:
+    """Downgrade default database."""
+    with op.batch_alter_table('comment_moderator_report', schema=None) as batch_op:
+        batch_op.drop_index('ix_comment_moderator_report_comment_id_reported_by_id')
+        batch_op.drop_index('ix_comment_moderator_report_random_key')
+        batch_op.drop_column('leased_until')
+        batch_op.drop_column('random_key')
@@ -0,0 +1,49 @@
+"""Index the RSVP participant list by response time.
+
+Revision ID: b7c41e9d2a05
+Revises: e61a2c94f7b0
+Create Date: 2026-10-19 23:52:18.406117
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7c41e9d2a05'
+down_revision: str = 'e61a2c94f7b0'
+branch_labels: str | tuple[str, ...] | None = None
+depends_on: str | tuple[str, ...] | None = None
+
+
+def upgrade(engine_name: str = '') -> None:
+    """Upgrade all databases."""
+    # Do not modify. Edit `upgrade_` instead
+    globals().get(f'upgrade_{engine_name}', lambda: None)()
+
+
+def downgrade(engine_name: str = '') -> None:
+    """Downgrade all databases."""
+    # Do not modify. Edit `downgrade_` instead
+    globals().get(f'downgrade_{engine_name}', lambda: None)()
+
+
+def upgrade_() -> None:
+    """Upgrade default database."""
+    with op.batch_alter_table('rsvp', schema=None) as batch_op:
+        batch_op.drop_index('ix_rsvp_project_id_state_created_at')
+        batch_op.create_index(
+            'ix_rsvp_project_id_state_updated_at',
+            ['project_id', 'state', 'updated_at', 'uuid'],
+            unique=False,
+        )
+
+
+def downgrade_() -> None:
+    """Downgrade default database."""
+    with op.batch_alter_table('rsvp', schema=None) as batch_op:
+        batch_op.drop_index('ix_rsvp_project_id_state_updated_at')
+        batch_op.create_index(
+            'ix_rsvp_project_id_state_created_at',
+            ['project_id', 'state', 'created_at', 'uuid'],
+            unique=False,
+        )
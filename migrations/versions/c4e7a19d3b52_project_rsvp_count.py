@@ -0,0 +1,60 @@
+"""Add stored project RSVP counts.
+
+Revision ID: c4e7a19d3b52
+Revises: aaf8f87ef75e
+Create Date: 2026-10-19 19:04:17.281930
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e7a19d3b52'
+down_revision: str = 'aaf8f87ef75e'
+branch_labels: str | tuple[str, ...] | None = None
+depends_on: str | tuple[str, ...] | None = None
+
+
+def upgrade(engine_name: str = '') -> None:
+    """Upgrade all databases."""
+    # Do not modify. Edit `upgrade_` instead
+    globals().get(f'upgrade_{engine_name}', lambda: None)()
+
+
+def downgrade(engine_name: str = '') -> None:
+    """Downgrade all databases."""
+    # Do not modify. Edit `downgrade_` instead
+    globals().get(f'downgrade_{engine_name}', lambda: None)()
+
+
+def upgrade_() -> None:
+    """Upgrade default database."""
+    op.create_table(
+        'project_rsvp_count',
+        sa.Column('project_id', sa.Integer(), nullable=False),
+        sa.Column('state', sa.CHAR(1), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column('updated_at', sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(['project_id'], ['project.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('project_id', 'state'),
+    )
+    # Account state 1 is ACTIVE
+    op.execute(
+        sa.text(
+            '''
+            INSERT INTO project_rsvp_count
+                (project_id, state, count, created_at, updated_at)
+            SELECT rsvp.project_id, rsvp.state, COUNT(*), NOW(), NOW()
+            FROM rsvp JOIN account ON rsvp.participant_id = account.id
+            WHERE account.state = 1
+            GROUP BY rsvp.project_id, rsvp.state
+            '''
+        )
+    )
+
+
+def downgrade_() -> None:
+    """Downgrade default database."""
+    op.drop_table('project_rsvp_count')
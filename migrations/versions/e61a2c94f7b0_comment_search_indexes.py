@@ -0,0 +1,45 @@
+"""Add indexes for comment search by site moderators.
+
+Revision ID: e61a2c94f7b0
+Revises: 9b3f6d0e4c18
+Create Date: 2026-10-19 22:37:05.914263
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'e61a2c94f7b0'
+down_revision: str = '9b3f6d0e4c18'
+branch_labels: str | tuple[str, ...] | None = None
+depends_on: str | tuple[str, ...] | None = None
+
+
+def upgrade(engine_name: str = '') -> None:
+    """Upgrade all databases."""
+    # Do not modify. Edit `upgrade_` instead
+    globals().get(f'upgrade_{engine_name}', lambda: None)()
+
+
+def downgrade(engine_name: str = '') -> None:
+    """Downgrade all databases."""
+    # Do not modify. Edit `downgrade_` instead
+    globals().get(f'downgrade_{engine_name}', lambda: None)()
+
+
+def upgrade_() -> None:
+    """Upgrade default database."""
+    with op.batch_alter_table('comment', schema=None) as batch_op:
+        batch_op.create_index(
+            batch_op.f('ix_comment_posted_by_id'), ['posted_by_id'], unique=False
+        )
+        batch_op.create_index(
+            'ix_comment_created_at_id', ['created_at', 'id'], unique=False
+        )
+
+
+def downgrade_() -> None:
+    """Downgrade default database."""
+    with op.batch_alter_table('comment', schema=None) as batch_op:
+        batch_op.drop_index('ix_comment_created_at_id')
+        batch_op.drop_index(batch_op.f('ix_comment_posted_by_id'))
@@ -4,6 +4,7 @@
 
 from __future__ import annotations
 
+from pathlib import Path
 from unittest.mock import patch
 
 import httpx
@@ -11,10 +12,14 @@ import pytest
 from click.testing import CliRunner
 from respx import MockRouter
 
+from funnel import models
 from funnel.cli.periodic import mnrl as cli_mnrl, periodic
 
+from ...conftest import scoped_session
+
 MNRL_FILES_URL = 'https://mnrl.trai.gov.in/api/mnrl/files/{apikey}'
 MNRL_JSON_URL = 'https://mnrl.trai.gov.in/api/mnrl/json/{filename}/{apikey}'
+MNRL_FIXTURE_FILE = Path(__file__).parent / 'data' / 'mnrl_test.json'
 
 
 @pytest.fixture(scope='module')
@@ -94,6 +99,45 @@ async def test_mnrl_file_numbers(
         ) == ('test.json', {'1111111111', '2222222222', '3333333333'})
 
 
+async def test_mnrl_file_numbers_batched(respx_mock: MockRouter) -> None:
+    """MNRL numbers are streamed in batches, skipping nulls."""
+    respx_mock.get(MNRL_JSON_URL.format(apikey='12345', filename='test.json')).mock(
+        return_value=httpx.Response(200, content=MNRL_FIXTURE_FILE.read_bytes())
+    )
+    async with httpx.AsyncClient(http2=True) as client:
+        batches = [
+            batch
+            async for batch in cli_mnrl.iter_mnrl_json_file_numbers(
+                client, '12345', 'test.json', batch_size=4
+            )
+        ]
+    assert batches == [
+        ['1111111111', '2222222222', '3333333333', '8123456789'],
+        ['4444444444', '5555555555'],
+    ]
+
+
+async def test_mnrl_process_files(
+    respx_mock: MockRouter, db_session: scoped_session
+) -> None:
+    """MNRL files are matched against known phone numbers, tolerating failures."""
+    models.PhoneNumber.add('+918123456789')
+    models.PhoneNumber.add('+918123456780')
+    db_session.commit()
+    respx_mock.get(MNRL_JSON_URL.format(apikey='12345', filename='test.json')).mock(
+        return_value=httpx.Response(200, content=MNRL_FIXTURE_FILE.read_bytes())
+    )
+    respx_mock.get(MNRL_JSON_URL.format(apikey='12345', filename='fail.json')).mock(
+        return_value=httpx.Response(500)
+    )
+    revoked, total, failures = await cli_mnrl.process_mnrl_files(
+        '12345', '+91', ['test.json', 'fail.json']
+    )
+    assert revoked == {'8123456789'}
+    assert total == 6
+    assert failures == 1
+
+
 # MARK: CLI interface
 
 
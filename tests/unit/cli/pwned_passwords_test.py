@@ -0,0 +1,150 @@
+"""Tests for breached password checks and the corpus import command."""
+
+# pylint: disable=redefined-outer-name
+
+from __future__ import annotations
+
+from collections.abc import Generator
+from hashlib import sha1
+from pathlib import Path
+from types import SimpleNamespace
+from typing import cast
+
+import pytest
+from click.testing import CliRunner
+from flask.ctx import AppContext
+from requests_mock import Mocker
+
+from baseframe.forms import PasswordField, StopValidation
+
+from funnel import forms, redis_store
+from funnel.cli.pwned_passwords import pwned
+from funnel.pwned_passwords import BreachCorpus, PwnedPasswords, pwned_passwords
+
+PWNED_FIXTURE_FILE = Path(__file__).parent / 'data' / 'pwned_passwords_test.txt'
+
+
+@pytest.fixture
+def corpus_path(tmp_path: Path) -> Path:
+    """Import the fixture corpus, returning the path to the corpus file."""
+    path = tmp_path / 'pwned.corpus'
+    result = CliRunner().invoke(pwned, ['import', str(PWNED_FIXTURE_FILE), str(path)])
+    assert result.exit_code == 0
+    assert "Imported 4 hashes" in result.output
+    return path
+
+
+@pytest.fixture
+def corpus(corpus_path: Path) -> Generator[BreachCorpus, None, None]:
+    """Fixture corpus."""
+    breach_corpus = BreachCorpus(str(corpus_path))
+    yield breach_corpus
+    breach_corpus.close()
+
+
+@pytest.fixture
+def range_cache(app_context: AppContext) -> Generator[None, None, None]:
+    """Clear cached range responses."""
+    redis_store.flushdb()
+    yield
+    redis_store.flushdb()
+
+
+def test_breach_corpus(corpus: BreachCorpus) -> None:
+    """The corpus returns breach counts by SHA-1 digest."""
+    assert len(corpus) == 4
+    for password, count in (
+        ('123456', 37359195),
+        ('password', 9545824),
+        ('thisisone1', 12),
+        ('correct horse battery staple', 384),
+        ('this is unlikely to be in the breach list', 0),
+    ):
+        assert (
+            corpus.count(sha1(password.encode(), usedforsecurity=False).digest())
+            == count
+        )
+    # Lookups before the first and after the last records
+    assert corpus.count(b'\x00' * 20) == 0
+    assert corpus.count(b'\xff' * 20) == 0
+
+
+def test_import_rejects_invalid_source(tmp_path: Path) -> None:
+    """Import fails on lines that are unsorted or not SHA-1 hashes."""
+    dest = tmp_path / 'pwned.corpus'
+    source = tmp_path / 'source.txt'
+    lines = PWNED_FIXTURE_FILE.read_text().splitlines()
+    for text, error in (
+        ('\n'.join(reversed(lines)), "Line 2 is out of order"),
+        ('\n'.join([*lines, lines[-1]]), "Line 5 is out of order"),
+        ('1F074:12', "Line 1 is not a SHA-1 hash and count"),
+        ('5BAA61E4C9B93F3F0682250B6CF8331B7EE68FD8', "Line 1 is not a SHA-1 hash"),
+    ):
+        source.write_text(text)
+        result = CliRunner().invoke(pwned, ['import', str(source), str(dest)])
+        assert result.exit_code == 1
+        assert error in result.output
+        assert not dest.exists()
+    assert list(tmp_path.iterdir()) == [source]
+
+
+def test_not_a_corpus(tmp_path: Path) -> None:
+    """Files without the corpus header are rejected."""
+    path = tmp_path / 'pwned.corpus'
+    path.write_bytes(PWNED_FIXTURE_FILE.read_bytes())
+    with pytest.raises(ValueError, match="not a breach corpus"):
+        BreachCorpus(str(path))
+
+
+@pytest.mark.usefixtures('app_context')
+def test_validator_with_corpus(
+    monkeypatch: pytest.MonkeyPatch, corpus: BreachCorpus
+) -> None:
+    """With a corpus, passwords are validated without calling the range API."""
+    monkeypatch.setattr(pwned_passwords, 'corpus', corpus)
+    forms.pwned_password_validator(
+        None,
+        cast(
+            PasswordField,
+            SimpleNamespace(data='this is unlikely to be in the breach list'),
+        ),
+    )
+    with pytest.raises(StopValidation, match='12 times and is not safe'):
+        forms.pwned_password_validator(
+            None, cast(PasswordField, SimpleNamespace(data='thisisone1'))
+        )
+
+
+@pytest.mark.usefixtures('range_cache')
+def test_range_cache(requests_mock: Mocker) -> None:
+    """Range responses are cached by prefix, but failed responses are not."""
+    checker = PwnedPasswords()
+    endpoint = requests_mock.get(
+        'https://api.pwnedpasswords.com/range/7C4A8', status_code=503
+    )
+    assert checker.breach_count('123456') is None
+    assert checker.breach_count('123456') is None
+    assert endpoint.call_count == 2
+
+    endpoint = requests_mock.get(
+        'https://api.pwnedpasswords.com/range/7C4A8',
+        text='D09CA3762AF61E59520943DC26494F8941B:37359195\r\n'
+        'D0A4AA2E841C50022BB2EA424E43F8FC403:23',
+    )
+    assert checker.breach_count('123456') == 37359195
+    assert checker.breach_count('123456') == 37359195
+    # Another password with the same prefix is found in the cached range
+    assert (
+        checker.cached_range_count('7C4A8', 'D0A4AA2E841C50022BB2EA424E43F8FC403') == 23
+    )
+    assert (
+        checker.cached_range_count('7C4A8', 'D0000000000000000000000000000000000') == 0
+    )
+    assert endpoint.call_count == 1
+    assert 0 < redis_store.ttl('pwned_range/v1/7C4A8') <= checker.cache_timeout
+
+    # An empty range is also cached
+    endpoint = requests_mock.get('https://api.pwnedpasswords.com/range/00000', text='')
+    assert checker.cached_range_count('00000', '0' * 35) == 0
+    assert checker.cached_range_count('00000', '0' * 35) == 0
+    assert endpoint.call_count == 1
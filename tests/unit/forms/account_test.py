@@ -13,7 +13,7 @@ from requests_mock import Mocker
 
 from baseframe.forms import PasswordField, StopValidation
 
-from funnel import forms
+from funnel import forms, redis_store
 
 MAX_PASSWORD_STRENGTH = 4
 
@@ -146,6 +146,14 @@ D0A4AA2E841C50022BB2EA424E43F8FC403:d
 D10B1F9D5901978256CE5B2AD832F292D5A:e'''
 
 
+@pytest.fixture
+def _clear_pwned_range_cache() -> Generator[None, None, None]:
+    """Clear range responses cached by a previous test."""
+    redis_store.flushdb()
+    yield
+    redis_store.flushdb()
+
+
 # This parametrizing technique is documented at
 # https://docs.pytest.org/en/6.2.x/example/parametrize.html
 # #parametrizing-conditional-raising
@@ -159,6 +167,7 @@ D10B1F9D5901978256CE5B2AD832F292D5A:e'''
         (resp5, does_not_raise()),
     ],
 )
+@pytest.mark.usefixtures('_clear_pwned_range_cache')
 def test_mangled_response_pwned_password_validator(
     requests_mock: Mocker, text: str, expectation: AbstractContextManager
 ) -> None:
@@ -4,7 +4,10 @@
 
 from __future__ import annotations
 
+from typing import Any
+
 import pytest
+import sqlalchemy as sa
 from sqlalchemy.exc import IntegrityError
 
 from funnel import models
@@ -97,3 +100,126 @@ def test_commentset_delete_cascades_to_comments(
     assert commentset is None
     assert comment1_reload is None
     assert comment2_reload is None
+
+
+def test_comment_tree(
+    db_session: scoped_session,
+    project_expo2010: models.Project,
+    user_rincewind: models.User,
+    comment1: models.Comment,
+    comment2: models.Comment,
+) -> None:
+    """The comment tree is loaded with replies populated."""
+    commentset = project_expo2010.commentset
+    reply1 = commentset.post_comment(user_rincewind, "Reply 1", in_reply_to=comment1)
+    db_session.commit()
+    reply2 = commentset.post_comment(user_rincewind, "Reply 2", in_reply_to=comment1)
+    db_session.commit()
+    nested = commentset.post_comment(user_rincewind, "Nested", in_reply_to=reply1)
+    db_session.commit()
+    db_session.expire_all()
+
+    tree = commentset.comment_tree()
+    # Top-level comments are newest first, replies oldest first
+    assert tree == [comment2, comment1]
+    assert comment1.replies == [reply1, reply2]
+    assert reply1.replies == [nested]
+    assert nested.in_reply_to == reply1
+    assert comment2.replies == []
+
+
+@pytest.mark.usefixtures('request_context')
+def test_comment_tree_queries(
+    db_session: scoped_session,
+    project_expo2010: models.Project,
+    user_vetinari: models.User,
+    user_rincewind: models.User,
+    user_twoflower: models.User,
+    user_ridcully: models.User,
+    user_librarian: models.User,
+) -> None:
+    """Comment JSON is rendered in a fixed number of queries, regardless of authors."""
+    commentset = project_expo2010.commentset
+    db_session.add(
+        models.ProjectMembership(
+            parent=project_expo2010,
+            member=user_rincewind,
+            is_promoter=True,
+            granted_by=user_vetinari,
+        )
+    )
+    comment = commentset.post_comment(user_rincewind, "First")
+    db_session.commit()
+    commentset.post_comment(user_rincewind, "Reply", in_reply_to=comment)
+    db_session.commit()
+
+    def json_comments_queries() -> int:
+        statements: list[str] = []
+
+        def before_cursor_execute(*args: Any) -> None:
+            statements.append(args[2])
+
+        bind = db_session.get_bind()
+        sa.event.listen(bind, 'before_cursor_execute', before_cursor_execute)
+        try:
+            commentset.views.json_comments()
+        finally:
+            sa.event.remove(bind, 'before_cursor_execute', before_cursor_execute)
+        return len(statements)
+
+    queries = json_comments_queries()
+    for user in (user_twoflower, user_ridcully, user_librarian):
+        comment = commentset.post_comment(user, "More")
+        db_session.commit()
+        commentset.post_comment(user_rincewind, "Reply", in_reply_to=comment)
+        db_session.commit()
+        commentset.post_comment(user, "Reply again", in_reply_to=comment)
+        db_session.commit()
+    assert json_comments_queries() == queries
+    assert {
+        comment.posted_by_id: {str(badge) for badge in comment.badges}
+        for comment in commentset.comment_tree()
+    } == {
+        user_rincewind.id: {"Promoter"},
+        user_twoflower.id: set(),
+        user_ridcully.id: set(),
+        user_librarian.id: set(),
+    }
+
+
+def test_new_comment_count(
+    db_session: scoped_session,
+    project_expo2010: models.Project,
+    user_rincewind: models.User,
+    user_twoflower: models.User,
+) -> None:
+    """New comment counts are incremented on posting and reset on viewing."""
+    commentset = project_expo2010.commentset
+    commentset.add_subscriber(actor=user_rincewind, member=user_rincewind)
+    commentset.add_subscriber(actor=user_twoflower, member=user_twoflower)
+    db_session.commit()
+
+    commentset.post_comment(user_rincewind, "Test message")
+    db_session.commit()
+    rincewind_sub, twoflower_sub = (
+        models.CommentsetMembership.query.filter_by(
+            commentset=commentset, member=member, is_active=True
+        ).one()
+        for member in (user_rincewind, user_twoflower)
+    )
+    db_session.refresh(rincewind_sub)
+    db_session.refresh(twoflower_sub)
+    assert rincewind_sub.new_comment_count == 0
+    assert twoflower_sub.new_comment_count == 1
+
+    commentset.update_last_seen_at(member=user_twoflower)
+    db_session.commit()
+    assert twoflower_sub.new_comment_count == 0
+
+    # Drift is corrected by reconciliation
+    twoflower_sub.new_comment_count = 5
+    db_session.commit()
+    assert models.CommentsetMembership.reconcile_new_comment_counts() == 1
+    db_session.commit()
+    db_session.refresh(twoflower_sub)
+    assert twoflower_sub.new_comment_count == 0
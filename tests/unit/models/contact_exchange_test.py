@@ -0,0 +1,56 @@
+"""Tests for ContactExchange model."""
+
+from datetime import datetime
+
+import pytest
+from pytz import utc
+
+from funnel import models
+
+from ...conftest import scoped_session
+
+
+@pytest.mark.usefixtures('app_context')
+def test_grouped_counts_for(
+    db_session: scoped_session,
+    user_vetinari: models.User,
+    project_expo2010: models.Project,
+) -> None:
+    """Contacts are grouped by project and date, with counts."""
+    project_expo2010.timezone = utc
+    scan_times = [
+        datetime(2010, 5, 1, 10, tzinfo=utc),
+        datetime(2010, 5, 1, 12, tzinfo=utc),
+        datetime(2010, 5, 2, 9, tzinfo=utc),
+    ]
+    contacts = []
+    for count, scanned_at in enumerate(scan_times):
+        contact = models.ContactExchange(
+            account=user_vetinari,
+            ticket_participant=models.TicketParticipant(
+                project=project_expo2010,
+                email=f'participant{count}@example.com',
+                fullname=f"Participant {count}",
+            ),
+            scanned_at=scanned_at,
+        )
+        contacts.append(contact)
+    contacts[2].archived = True
+    db_session.add_all(contacts)
+    db_session.commit()
+
+    result = models.ContactExchange.grouped_counts_for(user_vetinari)
+    assert len(result) == 1
+    project_id, dates = result[0]
+    assert project_id.id == project_expo2010.id
+    assert project_id.timezone == utc
+    assert [(d.date.isoformat(), d.count) for d in dates] == [('2010-05-01', 2)]
+    assert dates[0].contacts == contacts[:2]
+
+    result = models.ContactExchange.grouped_counts_for(user_vetinari, archived=True)
+    dates = result[0][1]
+    assert [(d.date.isoformat(), d.count) for d in dates] == [
+        ('2010-05-02', 1),
+        ('2010-05-01', 2),
+    ]
+    assert dates[0].contacts == [contacts[2]]
@@ -657,6 +657,25 @@ def test_email_address_refcount_drop(
     assert ea.refcount() == 0
 
 
+def test_email_address_referenced_ids(
+    email_models: SimpleNamespace, db_session: scoped_session
+) -> None:
+    """EmailAddress.referenced_ids is a set-based equivalent of refcount."""
+    ea1 = models.EmailAddress.add('example1@example.com')
+    ea2 = models.EmailAddress.add('example2@example.com')
+    ea3 = models.EmailAddress.add('example3@example.com')
+    user = email_models.EmailUser()
+    doc = email_models.EmailDocument(email_address=ea1)
+    link = email_models.EmailLink(emailuser=user, email_address=ea2)
+    db_session.add_all([ea1, ea2, ea3, user, doc, link])
+    db_session.commit()
+
+    ids = {ea1.id, ea2.id, ea3.id}
+    assert models.EmailAddress.referenced_ids(ids) == {ea1.id, ea2.id}
+    assert {ea.id for ea in (ea1, ea2, ea3) if ea.refcount()} == {ea1.id, ea2.id}
+    assert models.EmailAddress.referenced_ids(set()) == set()
+
+
 def test_email_address_validate_for(
     email_models: SimpleNamespace, db_session: scoped_session
 ) -> None:
@@ -255,3 +255,48 @@ def test_getextid(db_session: scoped_session, user_rincewind: models.User) -> No
     result = models.getextid(service, userid=userid)
     assert isinstance(result, models.AccountExternalId)
     assert result == externalid
+
+
+def test_preview_merge_accounts(
+    db_session: scoped_session,
+    user_death: models.User,
+    user_rincewind: models.User,
+    project_expo2010: models.Project,
+) -> None:
+    """A merge preview reports changes per table without making them."""
+    db_session.add_all(
+        [
+            models.SavedProject(account=user_death, project=project_expo2010),
+            models.SavedProject(account=user_rincewind, project=project_expo2010),
+            models.Comment(
+                posted_by=user_rincewind,
+                commentset=project_expo2010.commentset,
+                message="Test comment",
+            ),
+        ]
+    )
+    db_session.commit()
+
+    preview = models.preview_merge_accounts(user_rincewind, user_death)
+    assert preview.keep_account == user_death
+    assert preview.merge_account == user_rincewind
+    assert preview.safe is True
+    counts = {(count.table, count.column): count for count in preview.counts}
+    # Rincewind's saved project conflicts with Death's and will be discarded
+    assert counts['saved_project', 'account_id'] == models.MigrationCount(
+        'saved_project', 'account_id', moved=0, discarded=1
+    )
+    assert counts['comment', 'posted_by_id'] == models.MigrationCount(
+        'comment', 'posted_by_id', moved=1, discarded=0
+    )
+
+    # Nothing was changed
+    assert user_rincewind.state.ACTIVE
+    assert models.SavedProject.query.filter_by(account=user_rincewind).count() == 1
+    assert models.Comment.query.filter_by(posted_by_id=user_rincewind.id).count() == 1
+
+    merged = models.merge_accounts(user_rincewind, user_death)
+    assert merged == user_death
+    assert models.SavedProject.query.filter_by(account=user_death).count() == 1
+    assert models.SavedProject.query.filter_by(account=user_rincewind).count() == 0
+    assert models.Comment.query.filter_by(posted_by_id=user_death.id).count() == 1
@@ -0,0 +1,62 @@
+"""Tests for comment moderator reports."""
+
+from __future__ import annotations
+
+import pytest
+
+from funnel import models
+from funnel.models import moderation
+
+from ...conftest import scoped_session
+
+
+@pytest.mark.parametrize('pivot', [0.0, 0.5, 0.999999])
+def test_get_one(
+    monkeypatch: pytest.MonkeyPatch,
+    db_session: scoped_session,
+    project_expo2010: models.Project,
+    user_rincewind: models.User,
+    user_twoflower: models.User,
+    user_vetinari: models.User,
+    user_ridcully: models.User,
+    pivot: float,
+) -> None:
+    """Reports are sampled from any point and leased to one moderator at a time."""
+    monkeypatch.setattr(moderation.random, 'random', lambda: pivot)
+    comments = [
+        models.Comment(
+            posted_by=user_rincewind,
+            commentset=project_expo2010.commentset,
+            message=f"Spam {i}",
+        )
+        for i in range(3)
+    ]
+    db_session.add_all(comments)
+    reports = [
+        models.CommentModeratorReport(reported_by=user_twoflower, comment=comment)
+        for comment in comments
+    ]
+    db_session.add_all(reports)
+    db_session.commit()
+    # Resolved reports are not sampled
+    reports[2].resolved_at = db_session.query(models.sa.func.utcnow()).scalar()
+    db_session.commit()
+
+    # Reports for comments the moderator has already reviewed are skipped
+    assert models.CommentModeratorReport.get_one(exclude_user=user_twoflower) is None
+
+    first = models.CommentModeratorReport.get_one(exclude_user=user_vetinari)
+    assert first in reports[:2]
+    assert first.leased_until is not None
+    db_session.commit()
+
+    # The leased report is withheld from other moderators until the lease expires
+    second = models.CommentModeratorReport.get_one(exclude_user=user_ridcully)
+    assert second in reports[:2]
+    assert second is not first
+    db_session.commit()
+    assert models.CommentModeratorReport.get_one(exclude_user=user_rincewind) is None
+
+    first.leased_until = first.leased_until - moderation.REPORT_LEASE_DURATION
+    db_session.commit()
+    assert models.CommentModeratorReport.get_one(exclude_user=user_rincewind) is first
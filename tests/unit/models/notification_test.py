@@ -10,7 +10,7 @@ from uuid import uuid4
 
 import pytest
 import sqlalchemy.orm as sa_orm
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy.exc import IntegrityError, NoResultFound
 
 from funnel import models
 
@@ -307,6 +307,33 @@ def test_invalid_notification_dispatch(
     assert not list(notification.dispatch())
 
 
+def test_notification_prefetch(
+    notification_types: SimpleNamespace,
+    update: models.Update,
+    db_session: scoped_session,
+) -> None:
+    """Prefetch populates documents that exist and leaves missing ones to raise."""
+    notification: models.Notification = notification_types.TestNewUpdateNotification(
+        update
+    )
+    missing: models.Notification = notification_types.TestNewUpdateNotification(
+        document_uuid=uuid4()
+    )
+    db_session.add_all([notification, missing])
+    db_session.commit()
+    db_session.expunge_all()
+    notification, missing = (
+        db_session.get(models.Notification, notification.identity),
+        db_session.get(models.Notification, missing.identity),
+    )
+    models.Notification.prefetch([notification, missing])
+    assert 'document' in notification.__dict__
+    assert notification.document.uuid == update.uuid
+    assert 'document' not in missing.__dict__
+    with pytest.raises(NoResultFound):
+        _ = missing.document
+
+
 def test_account_notification_preferences(
     notification_types: SimpleNamespace, db_session: scoped_session
 ) -> None:
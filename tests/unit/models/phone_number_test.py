@@ -582,6 +582,19 @@ def test_get_numbers(db_session: scoped_session) -> None:
     }
 
 
+def test_get_many(db_session: scoped_session) -> None:
+    """Get phone numbers by a bulk hash lookup."""
+    pn_in = models.PhoneNumber.add(EXAMPLE_NUMBER_IN)
+    pn_gb = models.PhoneNumber.add(EXAMPLE_NUMBER_GB)
+    db_session.commit()
+    assert set(
+        models.PhoneNumber.get_many(
+            [EXAMPLE_NUMBER_IN, EXAMPLE_NUMBER_GB, EXAMPLE_NUMBER_US]
+        )
+    ) == {pn_in, pn_gb}
+    assert models.PhoneNumber.get_many([]) == []
+
+
 def test_phone_number_mixin(  # pylint: disable=too-many-locals,too-many-statements
     phone_models: SimpleNamespace, db_session: scoped_session
 ) -> None:
@@ -225,6 +225,100 @@ def test_project_dates(  # pylint: disable=too-many-locals,too-many-statements
     )
 
 
+def assert_schedule_bounds_match(
+    db_session: scoped_session, project: models.Project
+) -> None:
+    """Confirm stored schedule bounds match bounds computed live from sessions."""
+    live_start_at, live_end_at = db_session.execute(
+        models.sa.select(
+            models.sa.func.min(models.Session.start_at),
+            models.sa.func.max(models.Session.end_at),
+        ).where(models.Session.project_id == project.id)
+    ).one()
+    # Check values both in memory and as reloaded from the database
+    for _reload in (False, True):
+        assert project.schedule_start_at == live_start_at
+        assert project.schedule_end_at == live_end_at
+        if live_start_at is not None:
+            assert project.start_at == live_start_at
+            assert project.end_at == live_end_at
+        db_session.expire(project)
+
+
+def test_project_schedule_bounds_stay_in_sync(
+    db_session: scoped_session, new_project: models.Project
+) -> None:
+    """Stored schedule bounds follow session creation, edits and deletion."""
+    assert_schedule_bounds_match(db_session, new_project)
+    start_at = utcnow().replace(microsecond=0) + timedelta(days=7)
+
+    # Create sessions
+    session_a = models.Session(
+        project=new_project,
+        title="Session A",
+        start_at=start_at,
+        end_at=start_at + timedelta(hours=1),
+    )
+    session_b = models.Session(
+        project=new_project,
+        title="Session B",
+        start_at=start_at + timedelta(days=1),
+        end_at=start_at + timedelta(days=1, hours=1),
+    )
+    db_session.add_all([session_a, session_b])
+    db_session.commit()
+    assert_schedule_bounds_match(db_session, new_project)
+    assert new_project.schedule_start_at == session_a.start_at
+
+    # Reschedule the first session to after the second
+    session_a.start_at = start_at + timedelta(days=2)
+    session_a.end_at = start_at + timedelta(days=2, hours=1)
+    db_session.commit()
+    assert_schedule_bounds_match(db_session, new_project)
+    assert new_project.schedule_start_at == session_b.start_at
+    assert new_project.schedule_end_at == session_a.end_at
+
+    # Unschedule a session
+    session_a.start_at = None
+    session_a.end_at = None
+    db_session.commit()
+    assert_schedule_bounds_match(db_session, new_project)
+    assert new_project.schedule_end_at == session_b.end_at
+
+    # Delete the remaining scheduled session
+    db_session.delete(session_b)
+    db_session.commit()
+    assert_schedule_bounds_match(db_session, new_project)
+    assert new_project.schedule_start_at is None
+
+    # Nothing needs repair
+    assert models.Project.refresh_schedule_bounds() == []
+
+
+def test_project_refresh_schedule_bounds(
+    db_session: scoped_session, new_project: models.Project
+) -> None:
+    """Drifted schedule bounds are repaired."""
+    start_at = utcnow().replace(microsecond=0) + timedelta(days=7)
+    db_session.add(
+        models.Session(
+            project=new_project,
+            title="Session",
+            start_at=start_at,
+            end_at=start_at + timedelta(hours=1),
+        )
+    )
+    db_session.commit()
+    # Simulate drift from a direct database update
+    db_session.execute(
+        models.sa.update(models.Project)
+        .where(models.Project.id == new_project.id)
+        .values(schedule_start_at=None, schedule_end_at=None)
+    )
+    assert models.Project.refresh_schedule_bounds() == [new_project.id]
+    assert_schedule_bounds_match(db_session, new_project)
+
+
 @pytest.fixture
 def second_organization(
     db_session: scoped_session, new_user2: models.User
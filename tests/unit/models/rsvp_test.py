@@ -0,0 +1,84 @@
+"""Tests for Rsvp model."""
+
+from funnel import models
+
+from ...conftest import scoped_session
+
+
+def test_project_rsvp_counts(
+    db_session: scoped_session,
+    project_expo2010: models.Project,
+    user_rincewind: models.User,
+    user_twoflower: models.User,
+    user_ridcully: models.User,
+) -> None:
+    """RSVP counts follow RSVP transitions and participant account state."""
+    rsvps = [
+        models.Rsvp(project=project_expo2010, participant=user)
+        for user in (user_rincewind, user_twoflower, user_ridcully)
+    ]
+    db_session.add_all(rsvps)
+    rsvps[0].rsvp_yes()
+    rsvps[1].rsvp_yes()
+    rsvps[2].rsvp_maybe()
+    db_session.commit()
+    assert project_expo2010.rsvp_counts() == {'Y': 2, 'M': 1}
+
+    rsvps[1].rsvp_no()
+    db_session.commit()
+    assert project_expo2010.rsvp_counts() == {'Y': 1, 'N': 1, 'M': 1}
+
+    # RSVPs from inactive accounts are not counted
+    user_rincewind.mark_suspended()
+    db_session.commit()
+    assert project_expo2010.rsvp_counts() == {'N': 1, 'M': 1}
+    user_rincewind.mark_active()
+    db_session.commit()
+    assert project_expo2010.rsvp_counts() == {'Y': 1, 'N': 1, 'M': 1}
+
+    db_session.delete(rsvps[2])
+    db_session.commit()
+    assert project_expo2010.rsvp_counts() == {'Y': 1, 'N': 1}
+    assert project_expo2010.rsvp_count_going == 1
+    assert models.ProjectRsvpCount.refresh() == []
+
+    # Simulate drift from a direct database update
+    db_session.execute(
+        models.sa.update(models.ProjectRsvpCount)
+        .where(models.ProjectRsvpCount.project_id == project_expo2010.id)
+        .values(count=5)
+    )
+    assert models.ProjectRsvpCount.refresh() == [project_expo2010.id]
+    assert project_expo2010.rsvp_counts() == {'Y': 1, 'N': 1}
+
+
+def test_project_rsvp_counts_merge(
+    db_session: scoped_session,
+    project_expo2010: models.Project,
+    project_expo2011: models.Project,
+    user_rincewind: models.User,
+    user_twoflower: models.User,
+) -> None:
+    """RSVPs discarded when merging accounts are removed from counts."""
+    rsvps = {
+        user: models.Rsvp(project=project_expo2010, participant=user)
+        for user in (user_rincewind, user_twoflower)
+    }
+    rsvp_other = models.Rsvp(project=project_expo2011, participant=user_rincewind)
+    db_session.add_all([*rsvps.values(), rsvp_other])
+    rsvps[user_rincewind].rsvp_yes()
+    rsvps[user_twoflower].rsvp_no()
+    rsvp_other.rsvp_maybe()
+    db_session.commit()
+    assert project_expo2010.rsvp_counts() == {'Y': 1, 'N': 1}
+    assert project_expo2011.rsvp_counts() == {'M': 1}
+
+    keep_account = models.merge_accounts(user_rincewind, user_twoflower)
+    assert keep_account is not None
+    # The merged account's RSVP to a project the kept account also responded to is
+    # discarded, while other RSVPs move to the kept account and remain counted
+    assert project_expo2010.rsvp_counts() == (
+        {'Y': 1} if keep_account == user_rincewind else {'N': 1}
+    )
+    assert project_expo2011.rsvp_counts() == {'M': 1}
+    assert models.ProjectRsvpCount.refresh() == []
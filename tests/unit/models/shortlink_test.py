@@ -398,3 +398,56 @@ def test_shortlink_lookup_multiple() -> None:
     assert models.shortlink.Shortlink.query.filter(
         models.shortlink.Shortlink.name.in_(['example', 'example_com', 'unknown'])
     ).all() == [sl1, sl2]
+
+
+@pytest.mark.usefixtures('db_session')
+def test_shortlink_new_many() -> None:
+    """Shortlinks can be created in bulk, reusing existing shortlinks."""
+    sl1 = models.shortlink.Shortlink.new('https://example.com/', reuse=True)
+    result = models.shortlink.Shortlink.new_many(
+        ['https://example.com', 'https://example.org/', 'https://example.net/']
+    )
+    assert set(result) == {
+        'https://example.com',
+        'https://example.org/',
+        'https://example.net/',
+    }
+    assert result['https://example.com'] == sl1
+    assert not result['https://example.com'].is_new
+    assert result['https://example.org/'].is_new
+    assert result['https://example.org/'] != result['https://example.net/']
+    # A second call finds the shortlinks created in the first
+    again = models.shortlink.Shortlink.new_many(['https://example.org/'])
+    assert again['https://example.org/'] == result['https://example.org/']
+
+
+@pytest.mark.usefixtures('db_session')
+def test_shortlink_new_many_id_collisions() -> None:
+    """Bulk creation retries ids that collide in the batch or in the database."""
+    with patch('funnel.models.shortlink.random_bigint', MockRandomBigint([101])):
+        sl = models.shortlink.Shortlink.new('https://example.com/')
+    assert sl.id == 101
+    with patch(
+        'funnel.models.shortlink.random_bigint',
+        MockRandomBigint([101, 101, 102, 103]),
+    ):
+        result = models.shortlink.Shortlink.new_many(
+            ['https://example.org/', 'https://example.net/']
+        )
+    assert {shortlink.id for shortlink in result.values()} == {102, 103}
+    assert {str(shortlink.url) for shortlink in result.values()} == {
+        'https://example.org/',
+        'https://example.net/',
+    }
+
+
+@pytest.mark.usefixtures('db_session')
+def test_shortlink_unused_short_ids() -> None:
+    """Reserved short ids are in range and not in use."""
+    sl = models.shortlink.Shortlink.new('https://example.com/', shorter=True)
+    with patch(
+        'funnel.models.shortlink.random_bigint',
+        MockRandomBigint([sl.id, sl.id + 1, sl.id + 2]),
+    ):
+        ids = models.shortlink.Shortlink.unused_short_ids(3)
+    assert ids == {sl.id + 1, sl.id + 2}
@@ -0,0 +1,75 @@
+"""Tests for precomputed site metrics."""
+
+from __future__ import annotations
+
+from datetime import timedelta
+
+from coaster.utils import buid, utcnow
+
+from funnel import models
+
+from ...conftest import scoped_session
+
+
+def test_site_metric_refresh(
+    db_session: scoped_session,
+    user_rincewind: models.User,
+    user_twoflower: models.User,
+    client_hex: models.AuthClient,
+) -> None:
+    """Site metrics and auth client active counts are refreshed from source tables."""
+    login_sessions = [
+        models.LoginSession(
+            buid=buid(),
+            account=user,
+            ipaddr='',
+            user_agent='',
+            accessed_at=utcnow() - timedelta(days=days),
+        )
+        for user, days in ((user_rincewind, 0), (user_twoflower, 2))
+    ]
+    db_session.add_all(login_sessions)
+    for login_session in login_sessions:
+        client_hex.login_sessions.append(login_session)
+    db_session.flush()
+    db_session.execute(
+        models.sa.update(models.auth_client_login_session)
+        .where(
+            models.auth_client_login_session.c.login_session_id == login_sessions[1].id
+        )
+        .values(accessed_at=utcnow() - timedelta(days=2))
+    )
+    assert models.SiteMetric.latest('mau') == 0
+
+    models.SiteMetric.refresh()
+    models.AuthClientActiveCount.refresh()
+    user_count = models.User.active_count()
+    assert models.SiteMetric.latest('users') == user_count
+    assert models.SiteMetric.latest('dau') == 1
+    assert models.SiteMetric.latest('mau') == 2
+    assert models.SiteMetric.series('signups')[-1][1] == user_count
+    assert models.AuthClientActiveCount.counts() == {
+        client_hex: {
+            'hour': 1,
+            'day': 1,
+            'week': 2,
+            'month': 2,
+            'quarter': 2,
+            'halfyear': 2,
+            'year': 2,
+        }
+    }
+
+    # Refreshing again replaces counts in the current buckets
+    user_twoflower.mark_suspended()
+    db_session.flush()
+    models.SiteMetric.refresh()
+    models.AuthClientActiveCount.refresh()
+    assert models.SiteMetric.latest('users') == user_count - 1
+    assert models.SiteMetric.latest('mau') == 1
+    assert models.SiteMetric.series('signups')[-1][1] == user_count - 1
+    assert models.AuthClientActiveCount.counts() == {
+        client_hex: {
+            period: 1 for period, _interval in models.AUTH_CLIENT_ACTIVE_PERIODS
+        }
+    }
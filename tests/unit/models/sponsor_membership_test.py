@@ -154,6 +154,35 @@ def test_expo_sponsor_reorder(
     assert dibbler_sponsor.seq == 1
 
 
+def test_expo_sponsor_reorder_all(
+    db_session: scoped_session,
+    project_expo2010: models.Project,
+    citywatch_sponsor: models.ProjectSponsorMembership,
+    uu_sponsor: models.ProjectSponsorMembership,
+    dibbler_sponsor: models.ProjectSponsorMembership,
+) -> None:
+    """Sponsors can be re-ordered in bulk."""
+    db_session.commit()
+
+    models.ProjectSponsorMembership.reorder_all(
+        [uu_sponsor, dibbler_sponsor, citywatch_sponsor]
+    )
+    db_session.commit()
+    assert uu_sponsor.seq == 1
+    assert dibbler_sponsor.seq == 2
+    assert citywatch_sponsor.seq == 3
+    db_session.expire_all()
+    assert list(project_expo2010.sponsors) == [
+        uu_sponsor.member,
+        dibbler_sponsor.member,
+        citywatch_sponsor.member,
+    ]
+
+    # The ordering must include every sponsor
+    with pytest.raises(ValueError, match="every item"):
+        models.ProjectSponsorMembership.reorder_all([citywatch_sponsor, uu_sponsor])
+
+
 def test_expo_sponsor_seq_reissue(
     db_session: scoped_session,
     project_expo2010: models.Project,
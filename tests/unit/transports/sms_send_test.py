@@ -3,21 +3,33 @@
 from datetime import datetime
 from unittest.mock import patch
 
+import httpx
 import pytest
 import requests
 from flask import Response
 from pytz import utc
 
-from funnel.transports import TransportConnectionError, TransportRecipientError
+from funnel.transports import (
+    TransportConnectionError,
+    TransportError,
+    TransportRecipientError,
+    TransportTransactionError,
+)
 from funnel.transports.sms import (
+    MockSmsTransport,
     WebOtpTemplate,
     make_exotel_token,
     send_sms,
+    send_sms_many,
+    send_via_twilio,
     validate_exotel_token,
 )
 from funnel.transports.sms.send import (
+    SMS_BULK_CONCURRENCY,
+    SmsSender,
     indian_timezone,
     okay_to_message_in_india_right_now,
+    twilio_request,
 )
 
 # Target Numbers (Test Only). See this
@@ -118,3 +130,74 @@ def test_okay_to_message_in_india_right_now(now: datetime, okay: bool) -> None:
             assert 9 <= now_in.hour < 19
         else:
             assert now_in.hour >= 19 or now_in.hour < 9
+
+
+@pytest.mark.mock_config(
+    'app',
+    {
+        'SMS_TWILIO_SID': 'test',
+        'SMS_TWILIO_TOKEN': 'test',
+        'SMS_TWILIO_FROM': '+15005550006',
+    },
+)
+@pytest.mark.usefixtures('app_context', 'db_session')
+def test_send_sms_many() -> None:
+    """Bulk send uses the mock provider concurrently, within the in-flight limit."""
+    transport = MockSmsTransport(latency=0.05)
+    sender = SmsSender(
+        '+', set(), send_via_twilio, prepare=twilio_request, rate_limit=1000
+    )
+    phones = [f'+9198765432{_i:02d}' for _i in range(25)]
+    with patch('funnel.transports.sms.send.active_senders', [sender]):
+        results = send_sms_many(
+            [(phone, MESSAGE) for phone in phones], callback=False, transport=transport
+        )
+    assert len(results) == len(phones)
+    assert all(isinstance(result, str) and result for result in results)
+    assert len(set(results)) == len(phones)
+    assert transport.calls == len(phones)
+    assert 1 < transport.max_in_flight <= SMS_BULK_CONCURRENCY
+
+
+@pytest.mark.mock_config(
+    'app',
+    {
+        'SMS_TWILIO_SID': 'test',
+        'SMS_TWILIO_TOKEN': 'test',
+        'SMS_TWILIO_FROM': '+15005550006',
+    },
+)
+@pytest.mark.usefixtures('app_context', 'db_session')
+def test_send_sms_many_unparseable_response() -> None:
+    """An unparseable response is an error for that message alone."""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if b'9876543200' in request.content:
+            return httpx.Response(201, json=['unexpected'])
+        return httpx.Response(201, json={'sid': 'ok'})
+
+    sender = SmsSender(
+        '+', set(), send_via_twilio, prepare=twilio_request, rate_limit=1000
+    )
+    reported: dict[int, str | TransportError] = {}
+    with patch('funnel.transports.sms.send.active_senders', [sender]):
+        results = send_sms_many(
+            [(f'+9198765432{_i:02d}', MESSAGE) for _i in range(3)],
+            callback=False,
+            transport=httpx.MockTransport(handler),
+            on_result=reported.__setitem__,
+        )
+    assert isinstance(results[0], TransportTransactionError)
+    assert results[1:] == ['ok', 'ok']
+    assert reported == dict(enumerate(results))
+
+
+@pytest.mark.usefixtures('app_context', 'db_session')
+def test_send_sms_many_errors_in_place() -> None:
+    """Bulk send returns errors in place of transaction ids."""
+    transport = MockSmsTransport(latency=0)
+    with patch('funnel.transports.sms.send.active_senders', []):
+        results = send_sms_many([(EXOTEL_TO, MESSAGE)], transport=transport)
+    assert len(results) == 1
+    assert isinstance(results[0], TransportRecipientError)
+    assert transport.calls == 0
@@ -232,6 +232,17 @@ def test_object_use(msgt: SimpleNamespace) -> None:
     assert msg.plaintext == "sample3 here"
 
 
+def test_render_freezes(msgt: SimpleNamespace) -> None:
+    # pylint: disable=attribute-defined-outside-init
+    msg = msgt.MyMessage(var="sample1")
+    assert msg.render() == "Insert sample1 here"
+    with pytest.raises(AttributeError, match="frozen"):
+        msg.var = "sample2"
+    assert msg.var == "sample1"
+    assert str(msg) == "Insert sample1 here"
+    assert msg.plaintext == "sample1 here"
+
+
 # MARK: Test the registered templates
 
 
@@ -0,0 +1,70 @@
+"""Tests for bulk account deletion."""
+
+from __future__ import annotations
+
+from unittest.mock import Mock
+
+import pytest
+from flask.ctx import AppContext
+
+from funnel import models, redis_store
+from funnel.views import account_delete, jobs
+
+from ...conftest import scoped_session
+
+
+def test_queue_account_delete(
+    monkeypatch: pytest.MonkeyPatch,
+    app_context: AppContext,
+    db_session: scoped_session,
+    org_ankhmorpork: models.Organization,
+    user_vetinari: models.User,
+    user_rincewind: models.User,
+    user_twoflower: models.User,
+    user_death: models.User,
+) -> None:
+    """Queued accounts are deleted in batches, skipping those that are protected."""
+    process_account_delete_queue = account_delete.process_account_delete_queue
+    job = Mock()
+    monkeypatch.setattr(account_delete, 'process_account_delete_queue', job)
+    monkeypatch.setattr(jobs, 'forget_email_phone_queue', Mock())
+    monkeypatch.setattr(account_delete, 'ACCOUNT_DELETE_BATCH_SIZE', 2)
+    accountemail = user_rincewind.add_email('rincewind@example.org')
+    email_hash = accountemail.email_address.email_hash
+    membership = models.AccountMembership(
+        member=user_rincewind,
+        account=org_ankhmorpork,
+        granted_by=user_vetinari,
+        is_admin=True,
+    )
+    db_session.add(membership)
+    db_session.commit()
+
+    account_ids = [user_rincewind.id, user_twoflower.id, user_death.id]
+    assert account_delete.queue_account_delete(account_ids) == 3
+    assert account_delete.queue_account_delete(account_ids) == 0
+    job.enqueue.assert_called_once_with()
+    assert account_delete.account_delete_progress() == {
+        'queued': 3,
+        'deleted': 0,
+        'skipped': 0,
+        'pending': 3,
+    }
+
+    process_account_delete_queue()
+    assert account_delete.account_delete_progress() == {
+        'queued': 3,
+        'deleted': 2,
+        'skipped': 1,
+        'pending': 0,
+    }
+    assert not redis_store.exists(account_delete.ACCOUNT_DELETE_LOCK)
+    assert user_rincewind.state.DELETED
+    assert user_rincewind.name is None
+    assert user_rincewind.emails == []
+    assert user_twoflower.state.DELETED
+    assert user_death.state.ACTIVE
+    db_session.refresh(membership)
+    assert membership.revoked_at is not None
+    assert membership.revoked_by == user_rincewind
+    assert redis_store.smembers(jobs.FORGET_EMAIL_QUEUE) == {email_hash}
@@ -0,0 +1,101 @@
+"""Tests for comment search by site moderators."""
+
+from __future__ import annotations
+
+from datetime import timedelta
+
+from coaster.utils import utcnow
+
+from funnel import models
+from funnel.views.comment_search import CommentSearch, report_comments_by_search
+
+from ...conftest import scoped_session
+
+
+def test_comment_search(
+    db_session: scoped_session,
+    project_expo2010: models.Project,
+    user_rincewind: models.User,
+    user_twoflower: models.User,
+    user_vetinari: models.User,
+) -> None:
+    """Comments are found by text or author, paged by keyset and reported in bulk."""
+    comments = [
+        models.Comment(
+            posted_by=user,
+            commentset=project_expo2010.commentset,
+            message=message,
+        )
+        for user, message in (
+            (user_rincewind, "Buy cheap luggage"),
+            (user_twoflower, "Cheap luggage for sale"),
+            (user_twoflower, "Hello from the Agatean Empire"),
+        )
+    ]
+    db_session.add_all(comments)
+    db_session.commit()
+    for hours, comment in enumerate(comments):
+        comment.created_at = utcnow() - timedelta(hours=hours)
+    db_session.commit()
+
+    assert CommentSearch(query='luggage').comments().all() == comments[:2]
+    assert CommentSearch(query='Twoflower').comments().all() == comments[1:]
+    assert CommentSearch(query='luggage').count() == 2
+    assert CommentSearch(state='spam').comments().all() == []
+
+    page, cursor = CommentSearch().page(per_page=2)
+    assert page == comments[:2]
+    assert cursor == comments[1].uuid_b58
+    page, cursor = CommentSearch().page(after=cursor, per_page=2)
+    assert page == comments[2:]
+    assert cursor is None
+
+    # Old author accounts are excluded by author age
+    user_twoflower.joined_at = utcnow() - timedelta(days=10)
+    db_session.commit()
+    assert CommentSearch(author_age=7).comments().all() == comments[:1]
+
+    models.CommentModeratorReport.submit(actor=user_vetinari, comment=comments[0])
+    db_session.commit()
+    report_comments_by_search(user_vetinari.id, {'query': 'luggage'})
+    assert {report.comment for report in user_vetinari.moderator_reports} == set(
+        comments[:2]
+    )
+    assert user_vetinari.moderator_reports.count() == 2
+
+
+def test_report_comments_by_search_limits(
+    db_session: scoped_session,
+    project_expo2010: models.Project,
+    user_twoflower: models.User,
+    user_vetinari: models.User,
+) -> None:
+    """Bulk reports require a filter on reportable comments, and are capped."""
+    comments = [
+        models.Comment(
+            posted_by=user_twoflower,
+            commentset=project_expo2010.commentset,
+            message=f"Cheap luggage, offer {number}",
+        )
+        for number in range(3)
+    ]
+    db_session.add_all(comments)
+    db_session.commit()
+    for hours, comment in enumerate(comments):
+        comment.created_at = utcnow() - timedelta(hours=hours)
+    db_session.commit()
+
+    assert CommentSearch(query='luggage').is_bulk_reportable
+    assert CommentSearch(author_age=7).is_bulk_reportable
+    assert not CommentSearch().is_bulk_reportable
+    assert not CommentSearch(query='luggage', state='spam').is_bulk_reportable
+
+    report_comments_by_search(user_vetinari.id, {})
+    report_comments_by_search(user_vetinari.id, {'query': 'luggage', 'state': 'hidden'})
+    assert user_vetinari.moderator_reports.count() == 0
+
+    # Only the confirmed number of comments are reported, newest first
+    report_comments_by_search(user_vetinari.id, {'query': 'luggage'}, 2)
+    assert {report.comment for report in user_vetinari.moderator_reports} == set(
+        comments[:2]
+    )
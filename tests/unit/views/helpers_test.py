@@ -3,6 +3,7 @@
 # pylint: disable=redefined-outer-name
 
 from base64 import urlsafe_b64decode
+from collections.abc import Iterator
 from datetime import UTC, datetime
 from typing import Any
 from unittest.mock import patch
@@ -214,3 +215,46 @@ def test_compress_decompress() -> None:
             vhelpers.decompress(vhelpers.compress(sample, algorithm), algorithm)
             == sample
         )
+
+
+def test_csv_response(testapp: Flask) -> None:
+    """CSV responses are streamed in batches, starting with the header."""
+
+    def rows() -> Iterator[list]:
+        for count in range(5):
+            yield [count, f'row {count}']
+
+    with testapp.test_request_context():
+        response = vhelpers.csv_response('test.csv', ['id', 'name'], rows(), 2)
+        assert response.is_streamed
+        assert response.mimetype == 'text/csv'
+        assert response.headers['Content-Disposition'] == (
+            'attachment;filename="test.csv"'
+        )
+        chunks = list(response.response)
+    assert chunks == [
+        'id,name\r\n',
+        '0,row 0\r\n1,row 1\r\n',
+        '2,row 2\r\n3,row 3\r\n',
+        '4,row 4\r\n',
+    ]
+
+
+@pytest.mark.usefixtures('db_session')
+def test_prefetched_shortlinks(app: Flask) -> None:
+    """Shortlinks collected from a render are created together and then reused."""
+    with app.test_request_context():
+        with vhelpers.collect_shortlink_urls() as urls:
+            placeholder = vhelpers.shortlink('https://example.com/')
+        assert urls == {('https://example.com/', True)}
+        assert vhelpers.SHORTLINK_PLACEHOLDER_NAME in placeholder
+        with (
+            vhelpers.prefetched_shortlinks(urls),
+            patch('funnel.views.helpers.Shortlink.new') as mock_new,
+        ):
+            url = vhelpers.shortlink('https://example.com/')
+        mock_new.assert_not_called()
+        name = urlsplit(url).path.lstrip('/')
+        shortlink = vhelpers.Shortlink.get(name)
+        assert shortlink is not None
+        assert str(shortlink.url) == 'https://example.com/'
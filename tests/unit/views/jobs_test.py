@@ -0,0 +1,47 @@
+"""Tests for background jobs."""
+
+from __future__ import annotations
+
+from unittest.mock import Mock
+
+import pytest
+from flask.ctx import AppContext
+
+from funnel import redis_store
+from funnel.views import jobs
+
+from ...conftest import scoped_session
+
+
+def test_forget_email_phone_queue_failure(
+    monkeypatch: pytest.MonkeyPatch,
+    app_context: AppContext,
+    db_session: scoped_session,  # Flushes Redis after the test
+) -> None:
+    """Hashes stay in the forget queue until their batch is committed."""
+    redis_store.sadd(jobs.FORGET_EMAIL_QUEUE, 'email1', 'email2')
+    redis_store.sadd(jobs.FORGET_PHONE_QUEUE, 'phone1')
+    redis_store.set(jobs.FORGET_QUEUE_LOCK, 1)
+    monkeypatch.setattr(
+        jobs, 'forget_email_hashes', Mock(side_effect=RuntimeError("Database error"))
+    )
+    forget_phone_hashes = Mock()
+    monkeypatch.setattr(jobs, 'forget_phone_hashes', forget_phone_hashes)
+
+    with pytest.raises(RuntimeError):
+        jobs.forget_email_phone_queue()
+    # Nothing was lost, and the lock was released for the next request to retry
+    assert redis_store.smembers(jobs.FORGET_EMAIL_QUEUE) == {'email1', 'email2'}
+    assert redis_store.smembers(jobs.FORGET_PHONE_QUEUE) == {'phone1'}
+    assert not redis_store.exists(jobs.FORGET_QUEUE_LOCK)
+    forget_phone_hashes.assert_not_called()
+
+    forget_email_hashes = Mock()
+    monkeypatch.setattr(jobs, 'forget_email_hashes', forget_email_hashes)
+    redis_store.set(jobs.FORGET_QUEUE_LOCK, 1)
+    jobs.forget_email_phone_queue()
+    assert set(forget_email_hashes.call_args[0][0]) == {'email1', 'email2'}
+    assert set(forget_phone_hashes.call_args[0][0]) == {'phone1'}
+    assert not redis_store.exists(
+        jobs.FORGET_EMAIL_QUEUE, jobs.FORGET_PHONE_QUEUE, jobs.FORGET_QUEUE_LOCK
+    )
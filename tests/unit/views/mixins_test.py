@@ -0,0 +1,52 @@
+"""Tests for view mixins."""
+
+import pytest
+
+from funnel import models, redis_store
+from funnel.views.mixins import ProjectViewBase, project_url_cache_key
+
+from ...conftest import scoped_session
+
+
+@pytest.mark.usefixtures('app_context')
+def test_project_url_cache_key_normalized() -> None:
+    """Account names are normalized in the cache key, except for UUID names."""
+    assert project_url_cache_key('Ankh-Morpork', 'expo') == project_url_cache_key(
+        'ankh_morpork', 'expo'
+    )
+    assert project_url_cache_key('~Abc-D', 'expo').endswith('/~Abc-D/expo')
+
+
+@pytest.mark.usefixtures('app_context')
+def test_project_url_cache_invalidated(
+    db_session: scoped_session,
+    org_ankhmorpork: models.Organization,
+    project_expo2010: models.Project,
+) -> None:
+    """Project URL resolution is cached until the project or account is renamed."""
+    resolve = ProjectViewBase.resolve
+    account_name = org_ankhmorpork.name
+    old_name = project_expo2010.name
+    cache_key = project_url_cache_key(account_name, old_name)
+
+    assert resolve(account_name, old_name) == (project_expo2010, None)
+    assert redis_store.get(cache_key) is not None
+    # A cache hit returns the same project
+    assert resolve(account_name, old_name) == (project_expo2010, None)
+
+    # Renaming the project clears the cache, and the old name now resolves to the
+    # redirect created by the rename
+    project_expo2010.name = 'expo2010-renamed'
+    db_session.commit()
+    assert redis_store.get(cache_key) is None
+    obj, redirect = resolve(account_name, old_name)
+    assert obj is None
+    assert redirect is not None
+    assert redirect.project == project_expo2010
+    assert redis_store.get(cache_key) is not None
+
+    # Renaming the account clears all cached project URLs in it
+    org_ankhmorpork.name = 'ankh-morpork-renamed'
+    db_session.commit()
+    assert redis_store.get(cache_key) is None
+    assert resolve(account_name, old_name) == (None, None)
@@ -11,9 +11,14 @@ from flask import url_for
 
 from funnel import models
 from funnel.transports.sms import SmsTemplate
+from funnel.views.notification_counter import (
+    adjust_unread_count,
+    get_unread_count,
+    reconcile_unread_counts,
+)
 from funnel.views.notifications.mixins import TemplateVarMixin
 
-from ...conftest import Flask, TestClient, scoped_session
+from ...conftest import Flask, LoginFixtureProtocol, TestClient, scoped_session
 
 
 @pytest.fixture
@@ -96,6 +101,45 @@ def test_notification_recipient_is_user_vetinari(
     assert update_notification_recipient.recipient == user_vetinari
 
 
+def test_unread_counter_matches_database(
+    db_session: scoped_session,
+    update_notification_recipient: models.NotificationRecipient,
+    user_vetinari: models.User,
+) -> None:
+    """The cached unread counter is populated from and reconciled with the database."""
+    assert models.NotificationRecipient.unread_count_for(user_vetinari) == 1
+    assert get_unread_count(user_vetinari) == 1
+    # Simulate drift, then reconcile
+    adjust_unread_count(user_vetinari.id, 5)
+    assert get_unread_count(user_vetinari) == 6
+    assert reconcile_unread_counts([user_vetinari.id]) == 1
+    assert get_unread_count(user_vetinari) == 1
+    # Mark as read and decrement the counter
+    update_notification_recipient.is_read = True
+    db_session.commit()
+    adjust_unread_count(user_vetinari.id, -1)
+    assert get_unread_count(user_vetinari) == 0
+    assert models.NotificationRecipient.unread_counts_for_ids([user_vetinari.id]) == {}
+    assert reconcile_unread_counts([user_vetinari.id]) == 0
+    # The counter never goes below zero
+    adjust_unread_count(user_vetinari.id, -1)
+    assert get_unread_count(user_vetinari) == 0
+
+
+@pytest.mark.mock_config('app', {'NOTIFICATION_COUNT_STREAM': ...})
+def test_unread_stream_requires_config(
+    app: Flask,
+    client: TestClient,
+    login: LoginFixtureProtocol,
+    user_vetinari: models.User,
+) -> None:
+    """The unread count stream is not available unless enabled in config."""
+    app.config.pop('NOTIFICATION_COUNT_STREAM', None)
+    login.as_(user_vetinari)
+    rv = client.get(url_for('notifications_count_stream'))
+    assert rv.status_code == 404
+
+
 @pytest.fixture
 def unsubscribe_sms_short_url(
     update_notification_recipient: models.NotificationRecipient,
@@ -0,0 +1,87 @@
+"""Tests for OTP stores."""
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from flask.ctx import AppContext
+
+from funnel.views.otp_store import (
+    MemoryOtpStore,
+    OtpAttemptLimit,
+    OtpStore,
+    OtpVerifyResult,
+    RedisOtpStore,
+)
+
+from ...conftest import scoped_session
+
+
+@pytest.fixture(params=[MemoryOtpStore, RedisOtpStore])
+def store(
+    request: pytest.FixtureRequest,
+    app_context: AppContext,
+    db_session: scoped_session,  # Flushes Redis after the test
+) -> OtpStore:
+    """OTP store for each backend."""
+    return request.param()
+
+
+def test_otp_store(store: OtpStore) -> None:
+    """OTPs are verified against their token and consumed once."""
+    payload = {'reason': 'login', 'email': 'rincewind@example.org'}
+    token = store.create(payload, '1234', timeout=60)
+    other_token = store.create(payload, '5678', timeout=60)
+    assert token != other_token
+    assert store.retrieve(token) == payload
+    assert store.verify(token, '5678') is OtpVerifyResult.INVALID
+    # A correct OTP is consumed when verified
+    assert store.verify(token, '1234') is OtpVerifyResult.VALID
+    assert store.retrieve(token) is None
+    assert store.verify(token, '1234') is OtpVerifyResult.EXPIRED
+    assert store.consume(token) is False
+    assert store.consume(other_token) is True
+    assert store.consume(other_token) is False
+    assert store.verify(other_token, '5678') is OtpVerifyResult.EXPIRED
+
+
+def test_otp_store_verify_race(store: OtpStore) -> None:
+    """When a correct OTP is verified concurrently, only one attempt is accepted."""
+    token = store.create({}, '1234', timeout=60)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(lambda _i: store.verify(token, '1234'), range(8)))
+    assert results.count(OtpVerifyResult.VALID) == 1
+    assert results.count(OtpVerifyResult.EXPIRED) == 7
+
+
+def test_otp_store_attempt_limits(store: OtpStore) -> None:
+    """Once any attempt limit is reached, even the correct OTP is refused."""
+    token = store.create({}, '1234', timeout=60)
+    other_token = store.create({}, '5678', timeout=60)
+    shared_limit = OtpAttemptLimit('email/test-otp-store-limits', 3, 60)
+    for _i in range(2):
+        assert (
+            store.verify(token, '0000', [OtpAttemptLimit('token/' + token, 5, 60)])
+            is OtpVerifyResult.INVALID
+        )
+    assert store.verify(token, '0000', [shared_limit]) is OtpVerifyResult.INVALID
+    assert store.verify(other_token, '0000', [shared_limit]) is (
+        OtpVerifyResult.INVALID
+    )
+    # Successful attempts are not counted
+    for _i in range(5):
+        valid_token = store.create({}, '5678', timeout=60)
+        assert store.verify(valid_token, '5678', [shared_limit]) is (
+            OtpVerifyResult.VALID
+        )
+    assert store.verify(other_token, '0000', [shared_limit]) is (
+        OtpVerifyResult.INVALID
+    )
+    # The shared limit is exhausted across both tokens
+    assert store.verify(token, '1234', [shared_limit]) is OtpVerifyResult.LIMITED
+    # The per-token limit still allows attempts
+    assert (
+        store.verify(token, '1234', [OtpAttemptLimit('token/' + token, 5, 60)])
+        is OtpVerifyResult.VALID
+    )
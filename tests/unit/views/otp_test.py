@@ -0,0 +1,28 @@
+"""Tests for OTP sessions."""
+
+from __future__ import annotations
+
+import pytest
+
+from funnel import models
+from funnel.views.otp import OtpSession, OtpTimeoutError
+
+from ...conftest import scoped_session
+
+
+@pytest.mark.usefixtures('request_context')
+def test_otp_session_verified_once(
+    db_session: scoped_session,  # Flushes Redis after the test
+    user_rincewind: models.User,
+) -> None:
+    """A retrieved OTP session has no OTP, and accepts the correct OTP only once."""
+    otp_session = OtpSession.make(
+        'login', user_rincewind, None, email='rincewind@example.org'
+    )
+    retrieved = OtpSession.retrieve('login')
+    with pytest.raises(ValueError, match="not available"):
+        _otp = retrieved.otp
+    assert retrieved.verify('invalid') is False
+    assert retrieved.verify(otp_session.otp) is True
+    with pytest.raises(OtpTimeoutError):
+        retrieved.verify(otp_session.otp)
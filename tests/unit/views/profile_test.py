@@ -0,0 +1,49 @@
+"""Tests for account profile views."""
+
+# pylint: disable=redefined-outer-name
+
+import pytest
+
+from baseframe import cache
+
+from funnel import models
+from funnel.views.profile import profile_page_cache_key, profile_public_sections
+
+from ...conftest import scoped_session
+
+
+@pytest.mark.usefixtures('app_context')
+def test_profile_sections_cached_and_invalidated(
+    db_session: scoped_session,
+    org_ankhmorpork: models.Organization,
+    org_uu: models.Organization,
+    user_vetinari: models.User,
+    project_expo2010: models.Project,
+) -> None:
+    """Public profile sections are cached until a project or sponsorship changes."""
+    project_expo2010.publish()
+    db_session.commit()
+    cache_key = profile_page_cache_key(org_ankhmorpork.id)
+
+    sections = profile_public_sections(org_ankhmorpork)
+    assert sections['upcoming_projects'] == [project_expo2010.id]
+    assert sections['featured_project'] is None
+    assert cache.get(cache_key) == sections
+
+    # Editing a project clears the cache for its account
+    project_expo2010.title = "Ankh-Morpork 2010 Expo"
+    db_session.commit()
+    assert cache.get(cache_key) is None
+
+    # Sponsoring a project clears the cache for the sponsor
+    assert profile_public_sections(org_uu)['sponsored_projects'] == []
+    db_session.add(
+        models.ProjectSponsorMembership(
+            granted_by=user_vetinari, member=org_uu, project=project_expo2010
+        )
+    )
+    db_session.commit()
+    assert cache.get(profile_page_cache_key(org_uu.id)) is None
+    assert profile_public_sections(org_uu)['sponsored_projects'] == [
+        project_expo2010.id
+    ]
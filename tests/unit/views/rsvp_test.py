@@ -11,7 +11,7 @@ from werkzeug.datastructures import MultiDict
 
 from funnel import models
 
-from ...conftest import LoginFixtureProtocol, TestClient
+from ...conftest import LoginFixtureProtocol, TestClient, scoped_session
 
 valid_schema = {
     'fields': [
@@ -200,3 +200,66 @@ def test_invalid_json_register(
         headers={'Content-Type': 'application/json'},
     )
     assert rv.status_code == 400
+
+
+def test_rsvp_list_pages(
+    client: TestClient,
+    login: LoginFixtureProtocol,
+    db_session: scoped_session,
+    user_vetinari: models.User,
+    user_twoflower: models.User,
+    user_rincewind: models.User,
+    user_ridcully: models.User,
+    project_expo2010: models.Project,
+) -> None:
+    """The participant list is returned in pages and can be searched."""
+    for user in (user_twoflower, user_rincewind, user_ridcully):
+        rsvp = models.Rsvp(project=project_expo2010, participant=user)
+        db_session.add(rsvp)
+        rsvp.rsvp_yes()
+    db_session.commit()
+    login.as_(user_vetinari)
+    endpoint = project_expo2010.url_for('rsvp_list')
+
+    rv = client.get(
+        endpoint, query_string={'per_page': 2}, headers={'Accept': 'application/json'}
+    )
+    assert rv.status_code == 200
+    assert rv.json['count'] == 3
+    first_page = [participant['fullname'] for participant in rv.json['participants']]
+    assert len(first_page) == 2
+    assert rv.json['next_cursor'] is not None
+
+    rv = client.get(
+        endpoint,
+        query_string={'per_page': 2, 'after': rv.json['next_cursor']},
+        headers={'Accept': 'application/json'},
+    )
+    assert rv.status_code == 200
+    second_page = [participant['fullname'] for participant in rv.json['participants']]
+    assert len(second_page) == 1
+    assert rv.json['next_cursor'] is None
+    assert set(first_page + second_page) == {
+        user_twoflower.fullname,
+        user_rincewind.fullname,
+        user_ridcully.fullname,
+    }
+
+    rv = client.get(
+        endpoint,
+        query_string={'q': 'Twoflower'},
+        headers={'Accept': 'application/json'},
+    )
+    assert [participant['fullname'] for participant in rv.json['participants']] == [
+        user_twoflower.fullname
+    ]
+    assert client.get(endpoint, query_string={'state': 'invalid'}).status_code == 400
+
+    # The list is ordered by the most recent response, as shown in `responded_at`.
+    # Timestamps are the same within a test transaction, so set a later response time
+    rsvp = models.Rsvp.get_for(project_expo2010, user_rincewind)
+    assert rsvp is not None
+    rsvp.updated_at += datetime.timedelta(hours=1)
+    db_session.commit()
+    rv = client.get(endpoint, headers={'Accept': 'application/json'})
+    assert rv.json['participants'][0]['fullname'] == user_rincewind.fullname
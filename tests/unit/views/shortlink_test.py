@@ -6,13 +6,22 @@ from collections.abc import Generator
 from urllib.parse import urlsplit
 
 import pytest
+from click.testing import CliRunner
 from flask.testing import FlaskClient
 
 from funnel import models
+from funnel.cli.periodic import periodic
+from funnel.views import shortlink as shortlink_views
 
 from ...conftest import Flask, scoped_session
 
 
+@pytest.fixture(autouse=True)
+def _clear_local_cache() -> None:
+    """Clear the in-process shortlink cache, as test databases reuse shortlink ids."""
+    shortlink_views._local_cache.clear()  # pylint: disable=protected-access
+
+
 @pytest.fixture
 def shortlink_client(
     db_session: scoped_session, shortlinkapp: Flask
@@ -56,3 +65,42 @@ def test_shortlink_410(
     db_session.commit()
     rv = shortlink_client.get('/example')
     assert rv.status_code == 410
+
+
+@pytest.mark.dbcommit
+def test_shortlink_disable_invalidates_cache(
+    db_session: scoped_session, shortlink_client: FlaskClient
+) -> None:
+    sl = models.Shortlink.new('https://example.com/', name='example')
+    db_session.add(sl)
+    db_session.commit()
+    assert shortlink_client.get('/example').status_code == 301
+    sl.enabled = False
+    db_session.flush()
+    # The cache is not invalidated until the change is committed
+    assert shortlink_client.get('/example').status_code == 301
+    db_session.commit()
+    assert shortlink_client.get('/example').status_code == 410
+    # Re-enabling also invalidates the cache
+    sl.enabled = True
+    db_session.commit()
+    assert shortlink_client.get('/example').status_code == 301
+
+
+@pytest.mark.dbcommit
+def test_shortlink_clicks_recorded(
+    db_session: scoped_session, shortlink_client: FlaskClient
+) -> None:
+    sl = models.Shortlink.new('https://example.com/', name='example')
+    db_session.add(sl)
+    db_session.commit()
+    for _i in range(3):
+        assert shortlink_client.get('/example').status_code == 301
+    # Clicks are not recorded in the database until the periodic job runs
+    assert models.ShortlinkClickCount.total_for(sl) == 0
+    result = CliRunner().invoke(periodic, ['shortlink_clicks'])
+    assert result.exit_code == 0
+    assert models.ShortlinkClickCount.total_for(sl) == 3
+    # A second run does not record the same clicks again
+    CliRunner().invoke(periodic, ['shortlink_clicks'])
+    assert models.ShortlinkClickCount.total_for(sl) == 3
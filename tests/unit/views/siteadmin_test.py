@@ -5,10 +5,13 @@
 from __future__ import annotations
 
 import types
+from unittest.mock import Mock
+from urllib.parse import urlsplit
 
 import pytest
 
 from funnel import models
+from funnel.views import siteadmin
 
 from ...conftest import Flask, LoginFixtureProtocol, TestClient, scoped_session
 
@@ -35,6 +38,18 @@ def user_vetinari_sysadmin(
     return site_membership
 
 
+@pytest.fixture
+def user_vetinari_user_moderator(
+    db_session: scoped_session, user_vetinari: models.User
+) -> models.SiteMembership:
+    site_membership = models.SiteMembership(
+        granted_by=user_vetinari, member=user_vetinari, is_user_moderator=True
+    )
+    db_session.add(site_membership)
+    db_session.commit()
+    return site_membership
+
+
 @pytest.mark.usefixtures('rq_dashboard')
 def test_cant_access_rq_dashboard(
     app: Flask,
@@ -59,3 +74,47 @@ def test_can_access_rq_dashboard(
     login.as_(user_vetinari)
     rv = client.get(app.url_for('rq_dashboard.queues_overview'))
     assert rv.status_code == 200
+
+
+@pytest.mark.usefixtures('user_vetinari_user_moderator')
+def test_delete_accounts(
+    monkeypatch: pytest.MonkeyPatch,
+    app: Flask,
+    client: TestClient,
+    login: LoginFixtureProtocol,
+    csrf_token: str,
+    user_vetinari: models.User,
+    user_rincewind: models.User,
+    user_twoflower: models.User,
+) -> None:
+    """User moderators can queue accounts for deletion and see progress."""
+    queue_account_delete = Mock(return_value=2)
+    monkeypatch.setattr(siteadmin, 'queue_account_delete', queue_account_delete)
+    login.as_(user_vetinari)
+    rv = client.get(app.url_for('siteadmin_delete_accounts'))
+    assert rv.status_code == 200
+    assert 'id="account-delete-progress"' in rv.get_data(as_text=True)
+
+    rv = client.post(
+        app.url_for('siteadmin_delete_accounts'),
+        data={
+            'csrf_token': csrf_token,
+            'accounts': f'@{user_rincewind.username}\n',
+            'account_id': [user_twoflower.uuid_b58],
+        },
+    )
+    assert rv.status_code == 303
+    assert urlsplit(rv.location).path == '/siteadmin/accounts/delete'
+    queue_account_delete.assert_called_once_with({user_rincewind.id, user_twoflower.id})
+
+
+def test_delete_accounts_requires_user_moderator(
+    app: Flask,
+    client: TestClient,
+    login: LoginFixtureProtocol,
+    user_rincewind: models.User,
+) -> None:
+    """Users who are not user moderators cannot delete accounts."""
+    login.as_(user_rincewind)
+    rv = client.get(app.url_for('siteadmin_delete_accounts'))
+    assert rv.status_code == 403
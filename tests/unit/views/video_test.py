@@ -1,14 +1,25 @@
 """Test embedded video view helpers."""
 
+import json
 import logging
+import threading
+import time
+from collections.abc import Iterator
 from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from unittest.mock import Mock
+from urllib.parse import parse_qs, urlsplit
 
+import httpx
 import pytest
-import requests
+from flask import Response, g
+from flask.ctx import RequestContext
 from pytz import utc
-from requests_mock import Mocker
+from respx import MockRouter
 
-from funnel import models
+from funnel import models, redis_store
+from funnel.views import video
 
 from ...conftest import scoped_session
 
@@ -48,35 +59,6 @@ def test_youtube_video_delete(
     assert new_proposal.video_id is None
 
 
-@pytest.mark.enable_socket
-@pytest.mark.requires_config('app', 'youtube')
-@pytest.mark.usefixtures('app_context')
-def test_youtube(db_session: scoped_session, new_proposal: models.Proposal) -> None:
-    assert new_proposal.title == "Test Proposal"
-
-    new_proposal.video_url = 'https://www.youtube.com/watch?v=dQw4w9WgXcQ'
-    db_session.commit()
-
-    check_proposal = models.Proposal.query.filter_by(id=new_proposal.id).first()
-    assert check_proposal is not None
-    assert check_proposal.video_source == 'youtube'
-    assert check_proposal.video_id == 'dQw4w9WgXcQ'
-    assert check_proposal.video_url == 'https://www.youtube.com/watch?v=dQw4w9WgXcQ'
-
-    # the first returned value of .video will be calculated values
-    # and then it'll cache everything in redis
-    check_video = check_proposal.views.video
-    assert check_video['source'] == check_proposal.video_source
-    assert check_video['id'] == check_proposal.video_id
-    assert check_video['url'] == check_proposal.video_url
-    assert check_video['duration'] == 214
-    assert check_video['uploaded_at'] == utc.localize(datetime(2009, 10, 25, 6, 57, 33))
-    assert (
-        check_video['thumbnail']
-        == f'https://i.ytimg.com/vi/{check_proposal.video_id}/mqdefault.jpg'
-    )
-
-
 def test_vimeo_video_delete(
     db_session: scoped_session, new_proposal: models.Proposal
 ) -> None:
@@ -95,61 +77,308 @@ def test_vimeo_video_delete(
     assert new_proposal.video_id is None
 
 
+# MARK: Metadata fetch from stub API servers -------------------------------------------
+
+
+class VideoApiServer(ThreadingHTTPServer):
+    """Local stand-in for the YouTube and Vimeo APIs."""
+
+    def __init__(self) -> None:
+        super().__init__(('127.0.0.1', 0), VideoApiHandler)
+        self.youtube_videos: set[str] = set()
+        self.vimeo_videos: set[str] = set()
+        self.status = 200
+        self.youtube_calls: list[list[str]] = []
+        self.vimeo_calls: list[str] = []
+        self.authorization: set[str | None] = set()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self.server_port}'
+
+
+class VideoApiHandler(BaseHTTPRequestHandler):
+    server: VideoApiServer
+
+    def do_GET(self) -> None:
+        with self.server.lock:
+            self.server.in_flight += 1
+            self.server.max_in_flight = max(
+                self.server.max_in_flight, self.server.in_flight
+            )
+        try:
+            time.sleep(0.05)  # Latency, so that concurrent calls overlap
+            self.respond()
+        finally:
+            with self.server.lock:
+                self.server.in_flight -= 1
+
+    def respond(self) -> None:
+        url = urlsplit(self.path)
+        body: dict[str, Any] = {}
+        status = self.server.status
+        if url.path == '/youtube/v3/videos':
+            video_ids = parse_qs(url.query)['id'][0].split(',')
+            self.server.youtube_calls.append(video_ids)
+            body = {
+                'items': [
+                    {
+                        'id': video_id,
+                        'contentDetails': {'duration': 'PT3M34S'},
+                        'snippet': {
+                            'publishedAt': '2009-10-25T06:57:33Z',
+                            'thumbnails': {
+                                'medium': {
+                                    'url': f'https://i.ytimg.com/vi/{video_id}'
+                                    f'/mqdefault.jpg'
+                                }
+                            },
+                        },
+                    }
+                    for video_id in video_ids
+                    if video_id in self.server.youtube_videos
+                ]
+            }
+        elif url.path.startswith('/videos/'):
+            video_id = url.path.removeprefix('/videos/')
+            self.server.vimeo_calls.append(video_id)
+            self.server.authorization.add(self.headers.get('Authorization'))
+            if video_id in self.server.vimeo_videos:
+                body = {
+                    'duration': 212,
+                    'release_time': '2019-05-17T19:48:02+00:00',
+                    'pictures': {
+                        'sizes': [
+                            {'link': 'https://i.vimeocdn.com/video/small.jpg'},
+                            {'link': f'https://i.vimeocdn.com/video/{video_id}.jpg'},
+                        ]
+                    },
+                }
+            elif status == 200:
+                status = 404
+        content = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args: Any) -> None:
+        pass
+
+
+@pytest.fixture
+def video_api(monkeypatch: pytest.MonkeyPatch) -> Iterator[VideoApiServer]:
+    """Run a stub video API server and direct API calls to it."""
+    server = VideoApiServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(video, 'YOUTUBE_API_URL', server.url + '/youtube/v3/videos')
+    monkeypatch.setattr(video, 'VIMEO_API_URL', server.url + '/videos/')
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
 @pytest.mark.enable_socket
-@pytest.mark.requires_config('app', 'vimeo')
 @pytest.mark.usefixtures('app_context')
-def test_vimeo(db_session: scoped_session, new_proposal: models.Proposal) -> None:
-    assert new_proposal.title == "Test Proposal"
-
-    new_proposal.video_url = 'https://vimeo.com/336892869'
-    db_session.commit()
+@pytest.mark.mock_config(
+    'app', {'YOUTUBE_API_KEY': 'yt-key', 'VIMEO_ACCESS_TOKEN': 'vimeo-token'}
+)
+def test_fetch_video_metadata(video_api: VideoApiServer) -> None:
+    """YouTube ids are fetched in batches and Vimeo ids concurrently."""
+    youtube_ids = [f'yt{i:03}' for i in range(120)]
+    video_api.youtube_videos = set(youtube_ids[::2])
+    video_api.vimeo_videos = {'101', '102', '103'}
+
+    videos = video.fetch_video_metadata(
+        [('youtube', video_id) for video_id in youtube_ids]
+        + [('vimeo', video_id) for video_id in ('101', '102', '103', '104')]
+        + [('googledrive', '1rwHdWYnF4asdhsnDwLECoqZQy4o')]
+    )
+    assert len(video_api.youtube_calls) == 3
+    assert all(
+        len(call) <= video.YOUTUBE_BATCH_SIZE for call in video_api.youtube_calls
+    )
+    assert sorted(video_api.vimeo_calls) == ['101', '102', '103', '104']
+    assert video_api.authorization == {'bearer vimeo-token'}
+    assert video_api.max_in_flight > 1
+
+    assert len(videos) == 124
+    assert videos['youtube', 'yt000'] == {
+        'duration': 214,
+        'uploaded_at': utc.localize(datetime(2009, 10, 25, 6, 57, 33)),
+        'thumbnail': 'https://i.ytimg.com/vi/yt000/mqdefault.jpg',
+    }
+    # Videos missing at source are reported as None
+    assert videos['youtube', 'yt001'] is None
+    assert videos['vimeo', '101'] == {
+        'duration': 212,
+        'uploaded_at': utc.localize(datetime(2019, 5, 17, 19, 48, 2)),
+        'thumbnail': 'https://i.vimeocdn.com/video/101.jpg',
+    }
+    assert videos['vimeo', '104'] is None
 
-    check_proposal = models.Proposal.query.filter_by(id=new_proposal.id).first()
-    assert check_proposal is not None
-    assert check_proposal.video_source == 'vimeo'
-    assert check_proposal.video_id == '336892869'
-    assert check_proposal.video_url == 'https://vimeo.com/336892869'
 
-    # the first returned value of .video will be calculated values
-    # and then it'll cache everything in redis
-    check_video = check_proposal.views.video
-    assert check_video['source'] == check_proposal.video_source
-    assert check_video['id'] == check_proposal.video_id
-    assert check_video['url'] == check_proposal.video_url
-    assert check_video['duration'] == 212
-    assert check_video['uploaded_at'] == utc.localize(datetime(2019, 5, 17, 19, 48, 2))
-    assert check_video['thumbnail'].startswith('https://i.vimeocdn.com/video/783856813')
+@pytest.mark.enable_socket
+@pytest.mark.usefixtures('app_context')
+@pytest.mark.mock_config('app', {'YOUTUBE_API_KEY': 'yt-key'})
+def test_fetch_video_metadata_error(
+    caplog: pytest.LogCaptureFixture, video_api: VideoApiServer
+) -> None:
+    """Videos are not reported if the API fails, so they will be fetched again."""
+    caplog.set_level(logging.WARNING)
+    video_api.status = 500
+    assert video.fetch_video_metadata([('youtube', 'dQw4w9WgXcQ')]) == {}
+    assert "HTTP 500: YouTube API request failed" in caplog.text
 
 
-@pytest.mark.requires_config('app', 'vimeo')
 @pytest.mark.usefixtures('app_context')
-def test_vimeo_request_exception(
-    caplog: pytest.LogCaptureFixture,
-    requests_mock: Mocker,
-    new_proposal: models.Proposal,
+@pytest.mark.mock_config('app', {'YOUTUBE_API_KEY': 'yt-key'})
+def test_fetch_video_metadata_request_exception(
+    caplog: pytest.LogCaptureFixture, respx_mock: MockRouter
 ) -> None:
     caplog.set_level(logging.WARNING)
-    requests_mock.get(
-        'https://api.vimeo.com/videos/336892869',
-        exc=requests.exceptions.RequestException,
+    respx_mock.get(video.YOUTUBE_API_URL).mock(
+        side_effect=httpx.ConnectError("Connection refused")
     )
-    new_proposal.video_url = 'https://vimeo.com/336892869'
-    assert new_proposal.views.video is not None
-    assert "Vimeo API request error: RequestException()" in caplog.text
+    respx_mock.get(video.VIMEO_API_URL + '336892869').mock(
+        side_effect=httpx.ConnectError("Connection refused")
+    )
+    assert (
+        video.fetch_video_metadata([('youtube', 'dQw4w9WgXcQ'), ('vimeo', '336892869')])
+        == {}
+    )
+    assert "YouTube API request error: ConnectError" in caplog.text
+    assert "Vimeo API request error: ConnectError" in caplog.text
 
 
-@pytest.mark.usefixtures('app_context')
-@pytest.mark.mock_config('app', {'YOUTUBE_API_KEY': ''})
-def test_youtube_request_exception(
-    caplog: pytest.LogCaptureFixture,
-    requests_mock: Mocker,
+@pytest.mark.enable_socket
+@pytest.mark.mock_config('app', {'YOUTUBE_API_KEY': 'yt-key'})
+def test_video_property_fetched_in_background(
+    request_context: RequestContext,
+    monkeypatch: pytest.MonkeyPatch,
+    video_api: VideoApiServer,
     new_proposal: models.Proposal,
 ) -> None:
-    caplog.set_level(logging.WARNING)
-    requests_mock.get(
-        'https://www.googleapis.com/youtube/v3/videos',
-        exc=requests.exceptions.RequestException,
+    """Pages render with placeholder data while the video is fetched."""
+    job = Mock()
+    monkeypatch.setattr(video, 'process_video_queue', job)
+    video_api.youtube_videos = {'dQw4w9WgXcQ'}
+    new_proposal.video_url = 'https://www.youtube.com/watch?v=dQw4w9WgXcQ'
+
+    data = video.video_property(new_proposal)
+    assert data is not None
+    assert data['url'] == 'https://www.youtube.com/watch?v=dQw4w9WgXcQ'
+    assert data['duration'] == 0.0
+    assert data['thumbnail'] == ''
+    assert not video_api.youtube_calls
+
+    # The video is queued at the end of the request, and only one job is queued
+    video.fetch_videos_in_background_job(Response())
+    video.fetch_videos_in_background_job(Response())
+    assert redis_store.smembers(video.VIDEO_QUEUE) == {'youtube/dQw4w9WgXcQ'}
+    job.enqueue.assert_called_once_with()
+
+    video.refresh_videos(redis_store.spop(video.VIDEO_QUEUE, 10))
+    data = video.video_property(new_proposal)
+    assert data is not None
+    assert data['duration'] == 214
+    assert data['thumbnail'] == 'https://i.ytimg.com/vi/dQw4w9WgXcQ/mqdefault.jpg'
+    assert len(video_api.youtube_calls) == 1
+
+    # A fresh cache entry does not queue a refresh, but one close to expiry does
+    del g.video_fetch_queue
+    video.video_property(new_proposal)
+    assert 'video_fetch_queue' not in g
+    redis_store.expire(
+        video.video_cache_key('youtube', 'dQw4w9WgXcQ'), video.VIDEO_REFRESH_AHEAD - 1
     )
+    data = video.video_property(new_proposal)
+    assert data is not None
+    assert data['duration'] == 214
+    assert g.video_fetch_queue == {'youtube/dQw4w9WgXcQ'}
+
+
+@pytest.mark.enable_socket
+@pytest.mark.usefixtures('request_context')
+@pytest.mark.mock_config('app', {'YOUTUBE_API_KEY': 'yt-key'})
+def test_video_fetch_error_retried_later(
+    video_api: VideoApiServer,
+    new_proposal: models.Proposal,
+) -> None:
+    """Videos are not fetched again on every view when the API fails."""
     new_proposal.video_url = 'https://www.youtube.com/watch?v=dQw4w9WgXcQ'
-    assert new_proposal.views.video is not None
-    assert "YouTube API request error: RequestException()" in caplog.text
+    cache_key = video.video_cache_key('youtube', 'dQw4w9WgXcQ')
+    video_api.status = 500
+    video.refresh_videos(['youtube/dQw4w9WgXcQ'])
+    assert len(video_api.youtube_calls) == 1
+    assert (
+        video.VIDEO_REFRESH_AHEAD
+        < redis_store.ttl(cache_key)
+        <= video.VIDEO_REFRESH_AHEAD + video.VIDEO_ERROR_RETRY
+    )
+    data = video.video_property(new_proposal)
+    assert data is not None
+    assert data['duration'] == 0.0
+    assert 'video_fetch_queue' not in g
+
+    # Existing metadata is kept when a refresh fails
+    video.set_video_cache(
+        {
+            ('youtube', 'dQw4w9WgXcQ'): {
+                'duration': 214,
+                'uploaded_at': '',
+                'thumbnail': '',
+            }
+        }
+    )
+    video.refresh_videos(['youtube/dQw4w9WgXcQ'])
+    data = video.video_property(new_proposal)
+    assert data is not None
+    assert data['duration'] == 214
+    assert redis_store.ttl(cache_key) > video.VIDEO_REFRESH_AHEAD
+
+
+@pytest.mark.usefixtures('request_context')
+def test_video_missing_cached(new_proposal: models.Proposal) -> None:
+    """Videos missing at source are cached for a shorter period."""
+    new_proposal.video_url = 'https://vimeo.com/336892869'
+    video.set_video_cache({('vimeo', '336892869'): None})
+    cache_key = video.video_cache_key('vimeo', '336892869')
+    assert 0 < redis_store.ttl(cache_key) <= video.VIDEO_MISSING_CACHE_TIMEOUT
+    data = video.video_property(new_proposal)
+    assert data is not None
+    assert data['duration'] == 0.0
+    assert 'video_fetch_queue' not in g
+
+
+# MARK: Metadata fetch from live APIs --------------------------------------------------
+
+
+@pytest.mark.enable_socket
+@pytest.mark.requires_config('app', 'youtube')
+@pytest.mark.usefixtures('app_context')
+def test_youtube() -> None:
+    videos = video.fetch_video_metadata([('youtube', 'dQw4w9WgXcQ')])
+    assert videos['youtube', 'dQw4w9WgXcQ'] == {
+        'duration': 214,
+        'uploaded_at': utc.localize(datetime(2009, 10, 25, 6, 57, 33)),
+        'thumbnail': 'https://i.ytimg.com/vi/dQw4w9WgXcQ/mqdefault.jpg',
+    }
+
+
+@pytest.mark.enable_socket
+@pytest.mark.requires_config('app', 'vimeo')
+@pytest.mark.usefixtures('app_context')
+def test_vimeo() -> None:
+    videos = video.fetch_video_metadata([('vimeo', '336892869')])
+    metadata = videos['vimeo', '336892869']
+    assert metadata is not None
+    assert metadata['duration'] == 212
+    assert metadata['uploaded_at'] == utc.localize(datetime(2019, 5, 17, 19, 48, 2))
+    assert metadata['thumbnail'].startswith('https://i.vimeocdn.com/video/783856813')